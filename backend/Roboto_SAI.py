@@ -17,6 +17,8 @@ from enum import Enum
 import hashlib
 import traceback
 from abc import ABC, abstractmethod
+from memory_inverted_index import new_memory_index, index_memory, unindex_memory, select_candidate_ids
+from state_serializer import read_state, write_state
 
 # 🔧 AUTONOMOUS CONFIGURATION INTEGRATION
 try:
@@ -307,6 +309,10 @@ class RobotoSAI:
                 memory_file="roboto_sai_quantum_memory.json",
                 max_memories=50000  # Large capacity for all chats
             )
+            # Themes arrive with the background enrichment; index them when they do
+            self.quantum_memory.enrichment_listeners.append(self._index_stored_memory)
+            # Edits re-post, removals and archiving drop their postings
+            self.quantum_memory.change_listeners.append(self._reindex_changed_memory)
             
             # Quantum memory state tracking
             self.quantum_memory_state = {
@@ -551,9 +557,15 @@ class RobotoSAI:
                 "quantum_entanglement": self._quantum_entanglement_search
             }
             
-            # Retrieval cache for performance
-            self.retrieval_cache = {}
+            # Shared-candidate engine: one corpus pass per query, strategies re-rank
+            from hybrid_retrieval import HybridRetrievalEngine
+            self.retrieval_engine = HybridRetrievalEngine(self.quantum_memory)
+            
+            # Retrieval cache for performance (LRU/TTL, invalidated by the memory store generation)
+            from retrieval_cache import RetrievalCache
             self.cache_max_size = 1000
+            self.cache_ttl_seconds = 300
+            self.retrieval_cache = RetrievalCache(max_size=self.cache_max_size, ttl_seconds=self.cache_ttl_seconds)
             
             # User preference learning
             self.user_retrieval_preferences = {}
@@ -564,7 +576,9 @@ class RobotoSAI:
             self.log_modification(f"Advanced retrieval initialization failed: {e}")
 
     def retrieve_chat_memories(self, query: str, user_name: str = None, 
-                             limit: int = 5, algorithm: str = "hybrid") -> list:
+                             limit: int = 5, algorithm: str = "hybrid",
+                             time_range: tuple = None, emotions: list = None,
+                             themes: list = None) -> list:
         """
         Retrieve relevant chat memories using advanced multi-algorithm retrieval
         
@@ -573,6 +587,9 @@ class RobotoSAI:
             user_name: Filter by specific user
             limit: Maximum number of memories to return
             algorithm: Retrieval algorithm to use ("hybrid", "semantic", "temporal", "emotional", "contextual", "quantum")
+            time_range: Optional (start, end) datetimes; either end may be None
+            emotions: Optional emotions to restrict candidates to
+            themes: Optional key themes to restrict candidates to
             
         Returns:
             List of relevant memories with enhanced context
@@ -583,39 +600,51 @@ class RobotoSAI:
             
             start_time = datetime.now()
             
-            if algorithm == "hybrid":
-                memories = self._hybrid_retrieval(query, user_name, limit)
+            # Read-through cache: valid only for the current memory store generation
+            generation = self.quantum_memory.generation
+            scope = (tuple(time_range) if time_range else None,
+                     tuple(sorted(emotions or ())), tuple(sorted(themes or ())))
+            cache_key = self.retrieval_cache.make_key(query, user_name, limit, algorithm, scope)
+            cached = self.retrieval_cache.get(cache_key, generation)
+            self.memory_performance["total_operations"] += 1
+            if cached is not None:
+                self.memory_performance["cache_hits"] += 1
+                self.memory_performance["cache_hit_rate"] = self.retrieval_cache.get_stats()["hit_rate"]
+                for memory in cached:
+                    memory["retrieval_metadata"]["cache_hit"] = True
+                self._learn_from_retrieval(query, user_name, algorithm, len(cached))
+                return cached
+            
+            # Prune the corpus with the inverted indexes before any scoring
+            candidate_ids = self._select_retrieval_candidates(user_name, time_range, emotions, themes)
+            
+            if candidate_ids is not None and not candidate_ids:
+                memories = []
+            elif algorithm == "hybrid":
+                memories = self._hybrid_retrieval(query, user_name, limit, candidate_ids)
             else:
                 # Use specific algorithm
                 if algorithm in self.retrieval_algorithms:
-                    memories = self.retrieval_algorithms[algorithm](query, user_name, limit)
+                    memories = self.retrieval_algorithms[algorithm](query, user_name, limit, candidate_ids)
                 else:
                     memories = self.quantum_memory.fractal_memory_retrieval(query, user_name, limit)
             
-            # Add quantum context to results
+            # Add quantum context to results (already attached by the retrieval engine)
             enhanced_memories = []
             for memory in memories:
-                memory["quantum_context"] = self.quantum_memory.get_quantum_context(
-                    f"{memory.get('user_input', '')} {memory.get('roboto_response', '')}",
-                    user_name
-                )
+                if "quantum_context" not in memory:
+                    memory["quantum_context"] = self.quantum_memory.get_entanglement_context(memory)
                 memory["retrieval_metadata"] = {
                     "algorithm_used": algorithm,
                     "retrieval_time": (datetime.now() - start_time).total_seconds(),
-                    "context_enhanced": True
+                    "context_enhanced": True,
+                    "cache_hit": False
                 }
                 enhanced_memories.append(memory)
             
-            # Performance tracking
-            self.memory_performance["total_operations"] += 1
-            
-            # Cache results for performance
-            cache_key = f"{query}_{user_name}_{limit}_{algorithm}"
-            self.retrieval_cache[cache_key] = enhanced_memories
-            
-            # Cleanup cache if too large
-            if len(self.retrieval_cache) > self.cache_max_size:
-                self._cleanup_retrieval_cache()
+            # Cache results for performance (LRU eviction keeps the cache bounded)
+            self.retrieval_cache.put(cache_key, enhanced_memories, generation)
+            self.memory_performance["cache_hit_rate"] = self.retrieval_cache.get_stats()["hit_rate"]
             
             # Learn from retrieval patterns
             self._learn_from_retrieval(query, user_name, algorithm, len(enhanced_memories))
@@ -626,183 +655,91 @@ class RobotoSAI:
             self.log_modification(f"Advanced memory retrieval failed: {e}")
             return self._fallback_memory_retrieval(query, user_name, limit)
 
-    def _hybrid_retrieval(self, query: str, user_name: str = None, limit: int = 5) -> list:
-        """Hybrid retrieval combining multiple algorithms"""
+    def _select_retrieval_candidates(self, user_name: str = None, time_range: tuple = None,
+                                     emotions: list = None, themes: list = None):
+        """Use the inverted indexes to narrow the corpus; None means no restriction"""
         try:
-            # Get results from different algorithms
-            algorithm_results = {}
-            
-            for alg_name, alg_func in self.retrieval_algorithms.items():
-                try:
-                    results = alg_func(query, user_name, limit * 2)  # Get more candidates
-                    algorithm_results[alg_name] = results
-                except Exception as e:
-                    self.log_modification(f"Algorithm {alg_name} failed: {e}")
-                    algorithm_results[alg_name] = []
-            
-            # Combine and score results
-            combined_scores = {}
-            
-            for alg_name, memories in algorithm_results.items():
-                weight = self.retrieval_config.get(f"{alg_name}_weight", 0.2)
-                
-                for memory in memories:
-                    memory_id = memory.get("id")
-                    if memory_id not in combined_scores:
-                        combined_scores[memory_id] = {
-                            "memory": memory,
-                            "total_score": 0.0,
-                            "algorithm_scores": {}
-                        }
-                    
-                    # Calculate algorithm-specific score
-                    base_score = memory.get("relevance_score", memory.get("similarity", 0.0))
-                    combined_scores[memory_id]["algorithm_scores"][alg_name] = base_score * weight
-                    combined_scores[memory_id]["total_score"] += base_score * weight
-            
-            # Sort by total score and apply diversity
-            sorted_memories = sorted(
-                combined_scores.values(),
-                key=lambda x: x["total_score"],
-                reverse=True
+            candidate_ids = select_candidate_ids(
+                self.memory_index,
+                user_name=user_name,
+                time_range=time_range,
+                emotions=emotions,
+                themes=themes,
+                get_memory=self.quantum_memory.get_memory
             )
-            
-            # Extract memories and apply diversity
-            diverse_memories = []
-            seen_themes = set()
-            
-            for item in sorted_memories:
-                if len(diverse_memories) >= limit:
-                    break
-                    
-                memory = item["memory"]
-                themes = set(memory.get("key_themes", []))
-                
-                # Diversity check
-                if not themes.intersection(seen_themes) or len(diverse_memories) < 2:
-                    memory["hybrid_score"] = item["total_score"]
-                    memory["algorithm_breakdown"] = item["algorithm_scores"]
-                    diverse_memories.append(memory)
-                    seen_themes.update(themes)
-            
-            return diverse_memories
+        except Exception as e:
+            self.log_modification(f"Index candidate pruning failed: {e}")
+            return None
+        
+        if candidate_ids is not None:
+            total = max(1, len(self.quantum_memory.episodic_memories))
+            self.memory_performance["index_pruned_queries"] = self.memory_performance.get("index_pruned_queries", 0) + 1
+            self.memory_performance["last_candidate_ratio"] = len(candidate_ids) / total
+        return candidate_ids
+
+    def _build_retrieval_candidates(self, query: str, user_name: str = None, limit: int = 5,
+                                    candidate_ids: set = None):
+        """Score the memory corpus (or a pruned subset of it) once and return the shared candidate pool"""
+        current_context = self._get_current_context()
+        return self.retrieval_engine.build_candidates(
+            query,
+            user_name,
+            limit,
+            query_emotion=self._analyze_query_emotion(query),
+            query_intensity=self._calculate_emotional_intensity(query),
+            context_scorer=lambda memory: self._calculate_contextual_relevance(memory, current_context, query),
+            candidate_ids=candidate_ids
+        )
+
+    def _hybrid_retrieval(self, query: str, user_name: str = None, limit: int = 5,
+                          candidate_ids: set = None) -> list:
+        """Hybrid retrieval combining multiple algorithms over one shared candidate pool"""
+        try:
+            candidates = self._build_retrieval_candidates(query, user_name, limit * 2, candidate_ids)
+            weights = {
+                alg_name: self.retrieval_config.get(f"{alg_name}_weight", 0.2)
+                for alg_name in self.retrieval_algorithms
+            }
+            return self.retrieval_engine.hybrid(candidates, limit, weights)
             
         except Exception as e:
             self.log_modification(f"Hybrid retrieval failed: {e}")
             # Fallback to basic retrieval
             return self.quantum_memory.fractal_memory_retrieval(query, user_name, limit)
 
-    def _semantic_similarity_search(self, query: str, user_name: str = None, limit: int = 5) -> list:
-        """Semantic similarity-based retrieval"""
+    def _strategy_search(self, strategy: str, query: str, user_name: str = None, limit: int = 5,
+                         candidate_ids: set = None) -> list:
+        """Run a single retrieval strategy as a re-rank of a fresh candidate pool"""
         try:
-            return self.quantum_memory.retrieve_relevant_memories(query, user_name, limit)
+            candidates = self._build_retrieval_candidates(query, user_name, limit, candidate_ids)
+            return self.retrieval_engine.rank(candidates, strategy, limit)
         except Exception:
             return []
 
-    def _temporal_relevance_search(self, query: str, user_name: str = None, limit: int = 5) -> list:
+    def _semantic_similarity_search(self, query: str, user_name: str = None, limit: int = 5,
+                                    candidate_ids: set = None) -> list:
+        """Semantic similarity-based retrieval"""
+        return self._strategy_search("semantic_similarity", query, user_name, limit, candidate_ids)
+
+    def _temporal_relevance_search(self, query: str, user_name: str = None, limit: int = 5,
+                                   candidate_ids: set = None) -> list:
         """Time-based relevance retrieval"""
-        try:
-            memories = self.quantum_memory.retrieve_relevant_memories(query, user_name, limit * 3)
-            
-            # Apply temporal weighting
-            current_time = datetime.now()
-            weighted_memories = []
-            
-            for memory in memories:
-                try:
-                    memory_time = datetime.fromisoformat(memory.get("timestamp", ""))
-                    hours_old = (current_time - memory_time).total_seconds() / 3600
-                    
-                    # Recency boost (newer memories get higher scores)
-                    if hours_old < 24:
-                        temporal_boost = 1.5
-                    elif hours_old < 168:  # 1 week
-                        temporal_boost = 1.2
-                    elif hours_old < 720:  # 1 month
-                        temporal_boost = 1.0
-                    else:
-                        temporal_boost = 0.8
-                    
-                    memory["temporal_score"] = memory.get("relevance_score", 0) * temporal_boost
-                    weighted_memories.append(memory)
-                    
-                except Exception:
-                    memory["temporal_score"] = memory.get("relevance_score", 0)
-                    weighted_memories.append(memory)
-            
-            return sorted(weighted_memories, key=lambda x: x["temporal_score"], reverse=True)[:limit]
-            
-        except Exception:
-            return []
+        return self._strategy_search("temporal_relevance", query, user_name, limit, candidate_ids)
 
-    def _emotional_resonance_search(self, query: str, user_name: str = None, limit: int = 5) -> list:
+    def _emotional_resonance_search(self, query: str, user_name: str = None, limit: int = 5,
+                                    candidate_ids: set = None) -> list:
         """Emotion-based retrieval"""
-        try:
-            # Analyze query emotion
-            query_emotion = self._analyze_query_emotion(query)
-            
-            memories = self.quantum_memory.retrieve_relevant_memories(query, user_name, limit * 2)
-            emotional_memories = []
-            
-            for memory in memories:
-                memory_emotion = memory.get("emotion", "neutral")
-                emotional_match = 1.0 if memory_emotion == query_emotion else 0.5
-                
-                # Emotional intensity matching
-                query_intensity = self._calculate_emotional_intensity(query)
-                memory_intensity = memory.get("emotional_intensity", 0.5)
-                intensity_match = 1.0 - abs(query_intensity - memory_intensity)
-                
-                emotional_score = (emotional_match * 0.7) + (intensity_match * 0.3)
-                memory["emotional_score"] = memory.get("relevance_score", 0) * emotional_score
-                
-                emotional_memories.append(memory)
-            
-            return sorted(emotional_memories, key=lambda x: x["emotional_score"], reverse=True)[:limit]
-            
-        except Exception:
-            return []
+        return self._strategy_search("emotional_resonance", query, user_name, limit, candidate_ids)
 
-    def _contextual_matching_search(self, query: str, user_name: str = None, limit: int = 5) -> list:
+    def _contextual_matching_search(self, query: str, user_name: str = None, limit: int = 5,
+                                    candidate_ids: set = None) -> list:
         """Context-aware retrieval"""
-        try:
-            current_context = self._get_current_context()
-            memories = self.quantum_memory.retrieve_relevant_memories(query, user_name, limit * 2)
-            
-            contextual_memories = []
-            
-            for memory in memories:
-                context_score = self._calculate_contextual_relevance(memory, current_context, query)
-                memory["contextual_score"] = memory.get("relevance_score", 0) * context_score
-                contextual_memories.append(memory)
-            
-            return sorted(contextual_memories, key=lambda x: x["contextual_score"], reverse=True)[:limit]
-            
-        except Exception:
-            return []
+        return self._strategy_search("contextual_matching", query, user_name, limit, candidate_ids)
 
-    def _quantum_entanglement_search(self, query: str, user_name: str = None, limit: int = 5) -> list:
+    def _quantum_entanglement_search(self, query: str, user_name: str = None, limit: int = 5,
+                                     candidate_ids: set = None) -> list:
         """Quantum entanglement-based retrieval"""
-        try:
-            # Use quantum context from memory system
-            memories = self.quantum_memory.get_quantum_context(query, user_name)
-            
-            # Filter and score based on entanglement strength
-            entangled_memories = []
-            
-            for memory in memories:
-                entanglement_strength = memory.get("quantum_context", {}).get("entanglement_strength", 0.5)
-                coherence = memory.get("quantum_state", {}).get("coherence", 0.5)
-                
-                quantum_score = (entanglement_strength * 0.6) + (coherence * 0.4)
-                memory["quantum_score"] = quantum_score
-                
-                entangled_memories.append(memory)
-            
-            return sorted(entangled_memories, key=lambda x: x["quantum_score"], reverse=True)[:limit]
-            
-        except Exception:
-            return []
+        return self._strategy_search("quantum_entanglement", query, user_name, limit, candidate_ids)
 
     def _analyze_query_emotion(self, query: str) -> str:
         """Analyze the emotional content of a query"""
@@ -895,13 +832,9 @@ class RobotoSAI:
     def _cleanup_retrieval_cache(self) -> None:
         """Clean up retrieval cache to maintain performance"""
         try:
-            # Remove oldest 30% of cache entries
-            cache_items = list(self.retrieval_cache.items())
-            remove_count = int(len(cache_items) * 0.3)
-            
-            # Sort by access time (if available) or just remove first N
-            for key, _ in cache_items[:remove_count]:
-                del self.retrieval_cache[key]
+            # Drop expired entries and results computed against an older memory store
+            generation = self.quantum_memory.generation if self.quantum_memory else None
+            self.retrieval_cache.prune(generation)
                 
         except Exception as e:
             self.log_modification(f"Cache cleanup failed: {e}")
@@ -952,6 +885,7 @@ class RobotoSAI:
             self.memory_performance = {
                 "total_operations": 0,
                 "average_retrieval_time": 0.0,
+                "cache_hits": 0,
                 "cache_hit_rate": 0.0,
                 "quantum_operations": 0,
                 "optimization_cycles": 0,
@@ -990,19 +924,16 @@ class RobotoSAI:
     def _initialize_memory_indexing(self) -> None:
         """Initialize advanced memory indexing for faster retrieval"""
         try:
-            self.memory_index = {
-                "user_index": {},  # user_name -> memory_ids
-                "theme_index": {},  # theme -> memory_ids
-                "emotion_index": {},  # emotion -> memory_ids
-                "temporal_index": {},  # time_period -> memory_ids
-                "keyword_index": {},  # keyword -> memory_ids
-                "quantum_index": {}  # quantum_state -> memory_ids
-            }
+            # user/theme/emotion/temporal/keyword/quantum -> key -> set of memory ids
+            self.memory_index = new_memory_index()
             
             # Index rebuild tracking
             self.index_last_built = datetime.now()
             self.index_size = 0
             
+            # Index the memories loaded from disk; store_chat_memory keeps it current
+            self._rebuild_memory_index()
+            
             self.log_modification("Memory indexing system initialized")
             
         except Exception as e:
@@ -1161,11 +1092,12 @@ class RobotoSAI:
                     "original_length": len(memory["user_input"]) + len(memory["roboto_response"])
                 }
                 
-                # Replace in memory
-                idx = next((i for i, m in enumerate(self.quantum_memory.episodic_memories) if m["id"] == memory["id"]), None)
-                if idx is not None:
-                    self.quantum_memory.episodic_memories[idx] = compact_memory
-                    compacted_count += 1
+                # Replace in place so the memory system's id index keeps pointing at this record
+                previous = dict(memory)
+                memory.clear()
+                memory.update(compact_memory)
+                self.quantum_memory.touch_memory(memory, previous)
+                compacted_count += 1
             
             if compacted_count > 0:
                 self.quantum_memory.save_memory()
@@ -1183,67 +1115,11 @@ class RobotoSAI:
             
             start_time = datetime.now()
             
-            # Clear existing indexes
-            self.memory_index = {
-                "user_index": {},
-                "theme_index": {},
-                "emotion_index": {},
-                "temporal_index": {},
-                "keyword_index": {},
-                "quantum_index": {}
-            }
-            
-            # Rebuild indexes
+            # Rebuild indexes from scratch
+            memory_index = new_memory_index()
             for memory in self.quantum_memory.episodic_memories:
-                memory_id = memory["id"]
-                
-                # User index
-                user_name = memory.get("user_name", "unknown")
-                if user_name not in self.memory_index["user_index"]:
-                    self.memory_index["user_index"][user_name] = []
-                self.memory_index["user_index"][user_name].append(memory_id)
-                
-                # Theme index
-                for theme in memory.get("key_themes", []):
-                    if theme not in self.memory_index["theme_index"]:
-                        self.memory_index["theme_index"][theme] = []
-                    self.memory_index["theme_index"][theme].append(memory_id)
-                
-                # Emotion index
-                emotion = memory.get("emotion", "neutral")
-                if emotion not in self.memory_index["emotion_index"]:
-                    self.memory_index["emotion_index"][emotion] = []
-                self.memory_index["emotion_index"][emotion].append(memory_id)
-                
-                # Temporal index (by month)
-                try:
-                    memory_date = datetime.fromisoformat(memory.get("timestamp", ""))
-                    month_key = f"{memory_date.year}-{memory_date.month:02d}"
-                    if month_key not in self.memory_index["temporal_index"]:
-                        self.memory_index["temporal_index"][month_key] = []
-                    self.memory_index["temporal_index"][month_key].append(memory_id)
-                except:
-                    pass
-                
-                # Keyword index (from themes and content)
-                keywords = set(memory.get("key_themes", []))
-                # Add some keywords from content
-                content_words = f"{memory.get('user_input', '')} {memory.get('roboto_response', '')}".lower()
-                for word in content_words.split():
-                    if len(word) > 4 and word not in ['that', 'this', 'with', 'from', 'they', 'have', 'been']:
-                        keywords.add(word)
-                
-                for keyword in list(keywords)[:10]:  # Limit keywords per memory
-                    if keyword not in self.memory_index["keyword_index"]:
-                        self.memory_index["keyword_index"][keyword] = []
-                    self.memory_index["keyword_index"][keyword].append(memory_id)
-                
-                # Quantum index
-                quantum_state = memory.get("quantum_state", {}).get("superposition", 0)
-                quantum_key = f"q_{int(quantum_state // 30)}"  # Group by 30-degree segments
-                if quantum_key not in self.memory_index["quantum_index"]:
-                    self.memory_index["quantum_index"][quantum_key] = []
-                self.memory_index["quantum_index"][quantum_key].append(memory_id)
+                index_memory(memory_index, memory)
+            self.memory_index = memory_index
             
             # Update index metadata
             self.index_last_built = datetime.now()
@@ -1278,10 +1154,12 @@ class RobotoSAI:
                     
                     # Only apply if compression saves space
                     if len(compressed_input) < len(original_input) or len(compressed_response) < len(original_response):
+                        previous = dict(memory)
                         memory["user_input"] = compressed_input
                         memory["roboto_response"] = compressed_response
                         memory["compressed"] = True
                         memory["original_size"] = len(original_input) + len(original_response)
+                        self.quantum_memory.touch_memory(memory, previous)
                         compressed_count += 1
             
             if compressed_count > 0:
@@ -1326,11 +1204,7 @@ class RobotoSAI:
                 "performance_metrics": self.memory_performance.copy(),
                 "current_performance": current_perf,
                 "optimization_history": self.performance_history[-5:],  # Last 5 optimizations
-                "cache_status": {
-                    "size": len(self.retrieval_cache),
-                    "max_size": self.cache_max_size,
-                    "utilization": len(self.retrieval_cache) / self.cache_max_size
-                },
+                "cache_status": self.retrieval_cache.get_stats(),
                 "index_status": {
                     "last_built": self.index_last_built.isoformat() if hasattr(self, 'index_last_built') else None,
                     "total_entries": getattr(self, 'index_size', 0),
@@ -1410,6 +1284,9 @@ class RobotoSAI:
                 user_name=user_name or "unknown_user"
             )
             
+            # Keep the inverted indexes current without a full rebuild
+            self._index_stored_memory(memory_id)
+            
             # Update contextual memory
             if self.interaction_counter % self.context_update_frequency == 0:
                 self._update_contextual_memory(user_input, roboto_response, emotion)
@@ -1429,6 +1306,29 @@ class RobotoSAI:
             # Fallback to basic storage
             return self._fallback_memory_storage(user_input, roboto_response, user_name, emotion)
 
+    def _index_stored_memory(self, memory_id: str) -> None:
+        """Add a newly stored (or merged) memory to the inverted indexes"""
+        try:
+            memory = self.quantum_memory.get_memory(memory_id)
+            if memory is not None and hasattr(self, 'memory_index'):
+                self.index_size = getattr(self, 'index_size', 0) + index_memory(self.memory_index, memory)
+        except Exception as e:
+            self.log_modification(f"Incremental memory indexing failed: {e}")
+
+    def _reindex_changed_memory(self, before: Optional[dict], after: Optional[dict]) -> None:
+        """Move an edited memory's postings, or drop those of a removed or archived one"""
+        try:
+            if not hasattr(self, 'memory_index'):
+                return
+            size = getattr(self, 'index_size', 0)
+            if before is not None:
+                size -= unindex_memory(self.memory_index, before)
+            if after is not None:
+                size += index_memory(self.memory_index, after)
+            self.index_size = max(0, size)
+        except Exception as e:
+            self.log_modification(f"Incremental memory reindexing failed: {e}")
+
     def _fallback_memory_storage(self, user_input: str, roboto_response: str, 
                                user_name: str = None, emotion: str = "neutral") -> str:
         """Fallback memory storage when quantum system unavailable"""
@@ -1452,8 +1352,7 @@ class RobotoSAI:
             fallback_file = "roboto_sai_fallback_memory.json"
             try:
                 if os.path.exists(fallback_file):
-                    with open(fallback_file, 'r') as f:
-                        memories = json.load(f)
+                    memories = read_state(fallback_file)
                 else:
                     memories = []
             except:
@@ -1465,8 +1364,7 @@ class RobotoSAI:
             if len(memories) > 1000:
                 memories = memories[-1000:]
             
-            with open(fallback_file, 'w') as f:
-                json.dump(memories, f, indent=2)
+            write_state(fallback_file, memories)
             
             return memory_id
             
@@ -1526,60 +1424,6 @@ class RobotoSAI:
         except Exception as e:
             self.log_modification(f"Contextual memory update failed: {e}")
 
-    def retrieve_chat_memories(self, query: str, user_name: str = None, 
-                             limit: int = 5) -> list:
-        """
-        Retrieve relevant chat memories using quantum-enhanced retrieval
-        
-        Args:
-            query: Search query for memory retrieval
-            user_name: Filter by specific user
-            limit: Maximum number of memories to return
-            
-        Returns:
-            List of relevant memories with quantum context
-        """
-        try:
-            if not self.quantum_memory_initialized or not self.quantum_memory:
-                return self._fallback_memory_retrieval(query, user_name, limit)
-            
-            # Use fractal memory retrieval for enhanced results
-            memories = self.quantum_memory.fractal_memory_retrieval(
-                query=query,
-                user_name=user_name,
-                limit=limit
-            )
-            
-            # Add quantum context to results
-            enhanced_memories = []
-            for memory in memories:
-                memory["quantum_context"] = self.quantum_memory.get_quantum_context(
-                    f"{memory.get('user_input', '')} {memory.get('roboto_response', '')}",
-                    user_name
-                )
-                enhanced_memories.append(memory)
-            
-            # Performance tracking
-            self.memory_performance["total_operations"] += 1
-            
-            # Cache results for performance
-            cache_key = f"{query}_{user_name}_{limit}"
-            self.retrieval_cache[cache_key] = enhanced_memories
-            
-            # Cleanup cache if too large
-            if len(self.retrieval_cache) > self.cache_max_size:
-                # Remove oldest 20% of cache
-                cache_items = list(self.retrieval_cache.items())
-                remove_count = int(len(cache_items) * 0.2)
-                for key, _ in cache_items[:remove_count]:
-                    del self.retrieval_cache[key]
-            
-            return enhanced_memories
-            
-        except Exception as e:
-            self.log_modification(f"Quantum memory retrieval failed: {e}")
-            return self._fallback_memory_retrieval(query, user_name, limit)
-
     def _fallback_memory_retrieval(self, query: str, user_name: str = None, limit: int = 5) -> list:
         """Fallback memory retrieval when quantum system unavailable"""
         try:
@@ -1587,8 +1431,7 @@ class RobotoSAI:
             if not os.path.exists(fallback_file):
                 return []
             
-            with open(fallback_file, 'r') as f:
-                memories = json.load(f)
+            memories = read_state(fallback_file)
             
             # Simple text matching for fallback
             relevant_memories = []
@@ -1669,10 +1512,7 @@ class RobotoSAI:
             
             # Cache cleanup
             if len(self.retrieval_cache) > self.cache_max_size * 0.8:
-                cache_items = list(self.retrieval_cache.items())
-                remove_count = int(len(cache_items) * 0.3)
-                for key, _ in cache_items[:remove_count]:
-                    del self.retrieval_cache[key]
+                self._cleanup_retrieval_cache()
                 optimizations["cache_cleanup"] = True
                 optimizations["performance_improvements"] += 1
             
@@ -17,6 +17,8 @@ from datetime import date
 from typing import Dict, List, Optional, Tuple, Union, Any
 import asyncio
 
+from state_serializer import read_state, write_state
+
 # Optional imports for quantum/cultural/voice
 try:
     from quantum_capabilities import QuantumOptimizer
@@ -652,15 +654,14 @@ class AdvancedEmotionSimulator:
             return {"history_length": 0, "unique_emotions": [], "counts": {}, "most_common": None, "recent": []}
 
     def save_state(self, filepath: str = "emotion_state.json") -> bool:
-        """Save simulator state (weights and history) to JSON file."""
+        """Save simulator state (weights and history) in the STATE_FILE_FORMAT format (JSON by default)."""
         try:
             state = {
                 "keyword_weights": self.keyword_weights,
                 "emotion_history": list(self.emotion_history),
                 "cultural_weights": self.cultural_weights
             }
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(state, f, indent=2)
+            write_state(filepath, state)
             logger.info(f"Emotion simulator state saved to {filepath}")
             return True
         except Exception as e:
@@ -668,10 +669,9 @@ class AdvancedEmotionSimulator:
             return False
 
     def load_state(self, filepath: str = "emotion_state.json") -> bool:
-        """Load simulator state from file (weights and history)."""
+        """Load simulator state from file (weights and history); the format is detected."""
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                state = json.load(f)
+            state = read_state(filepath)
             if 'keyword_weights' in state:
                 self.keyword_weights = state['keyword_weights']
             if 'emotion_history' in state:
@@ -13,6 +13,8 @@ from typing import Dict, List, Tuple, Optional, Any
 import logging
 from dataclasses import dataclass, asdict
 
+from state_serializer import read_state, write_state
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -419,17 +421,14 @@ class AnchoredIdentityGate:
         try:
             if self.persistence_file:
                 events_data = [asdict(event) for event in self.anchored_events]
-                payload = json.dumps(events_data, indent=2, ensure_ascii=False)
                 # Optional encryption
                 persist_key = self._get_persist_key()
                 if persist_key:
-                    payload = self._encrypt_payload(payload)
+                    payload = self._encrypt_payload(json.dumps(events_data, indent=2, ensure_ascii=False))
                     # Write as text but obfuscated
-                    with open(self.persistence_file, 'w', encoding='utf-8') as f:
-                        json.dump({"encrypted": True, "payload": payload}, f, indent=2)
+                    write_state(self.persistence_file, {"encrypted": True, "payload": payload})
                 else:
-                    with open(self.persistence_file, 'w', encoding='utf-8') as f:
-                        json.dump(events_data, f, indent=2, ensure_ascii=False)
+                    write_state(self.persistence_file, events_data)
         except Exception as e:
             logger.error(f"Failed to persist events: {e}")
 
@@ -437,8 +436,7 @@ class AnchoredIdentityGate:
         """Load persisted events from file"""
         try:
             if self.persistence_file and os.path.exists(self.persistence_file):
-                with open(self.persistence_file, 'r', encoding='utf-8') as f:
-                    events_data = json.load(f)
+                events_data = read_state(self.persistence_file)
 
                 self.anchored_events = []
                 # detect encrypted wrapper
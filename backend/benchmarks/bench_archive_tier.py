@@ -0,0 +1,72 @@
+"""
+Benchmark: resident set, snapshot size and per-query cost with the archive tier.
+
+Loads a corpus larger than the hot set and runs archive_old_memories with
+each policy until the resident set is back within the hot set (a pass moves
+at most MEMORY_ARCHIVE_BATCH memories, so a large store takes several). "off"
+is the former behavior (every memory stays resident and in the memory file);
+"importance" and "age" move the coldest memories past the hot set into
+compressed archive segments. Reports the number of passes and the longest
+one (each runs under the write lock on a chat write), what stays resident, the snapshot and archive sizes, the retrieval latency
+over the resident set, and the cost of looking memories up in the archive.
+
+Usage:
+    python benchmarks/bench_archive_tier.py [memories] [hot_set_size]
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+from common import WORDS, best_of, make_memory_system, print_table
+
+MEMORIES = 50_000
+HOT_SET = 10_000
+QUERIES = 50
+
+
+def run(policy, count, hot_set):
+    system = make_memory_system(count, hot_set_size=hot_set, archive_policy=policy)
+    system.persistence = None
+    passes = []
+    with contextlib.redirect_stdout(io.StringIO()):   # The protection pass prints its report
+        while not passes or (policy != "off" and len(system.episodic_memories) > hot_set):
+            started = time.perf_counter()
+            system.archive_old_memories()
+            passes.append(time.perf_counter() - started)
+    system.save_memory()
+
+    rng = random.Random(3)
+    queries = [" ".join(rng.sample(WORDS, 3)) for _ in range(QUERIES)]
+    retrieve = best_of(lambda: [system.retrieve_relevant_memories(q, limit=5) for q in queries], repeat=3) / QUERIES
+    archived_ids = system.archive.ids()[:QUERIES]
+    if archived_ids:
+        get = best_of(lambda: [system.archive.get(i) for i in archived_ids], repeat=3) / len(archived_ids)
+        search = best_of(lambda: [system.search_archive(q, limit=5) for q in queries], repeat=3) / QUERIES
+    stats = system.archive.get_stats()
+    return (
+        policy,
+        len(passes),
+        f"{max(passes):.2f}",
+        len(system.episodic_memories),
+        stats["memories"],
+        f"{os.path.getsize(system.memory_file) / 2 ** 20:.1f}",
+        f"{stats['bytes'] / 2 ** 20:.1f}",
+        f"{retrieve * 1e3:.2f}",
+        f"{get * 1e6:.0f}" if archived_ids else "-",
+        f"{search * 1e3:.2f}" if archived_ids else "-",
+    )
+
+
+def main(count=MEMORIES, hot_set=HOT_SET):
+    rows = [run(policy, count, hot_set) for policy in ("off", "importance", "age")]
+    print(f"\nArchive tier ({count} memories, hot set {hot_set})")
+    print_table(("policy", "passes", "max_pass_s", "resident", "archived", "snapshot_mb", "archive_mb",
+                 "retrieve_ms", "archive_get_us", "archive_search_ms"), rows)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,97 @@
+"""
+Benchmark: caller-side latency of add_episodic_memory, inline vs queued enrichment.
+
+Inline (MEMORY_ASYNC_ENRICHMENT=0) each call analyzes the text, fetches the
+real-time context, entangles the memory, stores the conversation in SQLite
+and reflects every tenth memory before returning. Queued, the call records
+the raw exchange and the enrichment queue does the rest. The real-time
+engine is replaced by a stub that answers after ``CONTEXT_SECONDS``, like a
+cached weather lookup. Messages arrive every ``ARRIVAL_SECONDS`` (a busy
+chat) and in one burst, which fills the queue until its backpressure makes
+callers enrich inline. Reports the latency percentiles the caller sees and,
+for the queue, how long enrichment lagged behind and the time to drain.
+
+Usage:
+    python benchmarks/bench_async_enrichment.py [messages]
+"""
+
+import os
+import sys
+import time
+
+from common import make_memory_system, print_table, synthetic_memories
+
+import memory_system
+import persistent_memory_store
+from persistent_memory_store import PersistentMemoryStore
+
+MESSAGES = 300
+MEMORIES = 2_000
+CONTEXT_SECONDS = 0.005
+ARRIVAL_SECONDS = 0.01
+QUEUE_SIZE = 32
+
+
+class StubRealTimeEngine:
+    def get_comprehensive_context(self):
+        time.sleep(CONTEXT_SECONDS)
+        return {"success": True, "time_context": {"hour": 12}, "weather_context": {}}
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def run(queued, pacing, messages):
+    os.environ["MEMORY_ASYNC_ENRICHMENT"] = "1" if queued else "0"
+    os.environ["MEMORY_ENRICHMENT_QUEUE"] = str(QUEUE_SIZE)
+    system = make_memory_system(MEMORIES)
+    system.real_time_engine = StubRealTimeEngine()
+    system.real_time_background_refresh = False   # Enrichment fetches the context, as measured here
+    # The store's relative path, in this run's directory
+    store = PersistentMemoryStore(os.path.abspath("persistent_memory.db"))
+    memory_system.PERSISTENT_STORE = persistent_memory_store.PERSISTENT_STORE = store
+    exchanges = [(m["user_input"], m["roboto_response"]) for m in synthetic_memories(messages, seed=7)]
+    system.add_episodic_memory("warm up the analyzers", "ok", "joy")
+    system.wait_for_enrichment()
+
+    latencies = []
+    for user_input, response in exchanges:
+        started = time.perf_counter()
+        system.add_episodic_memory(user_input, response, "joy")
+        latencies.append(time.perf_counter() - started)
+        if pacing:
+            time.sleep(max(0.0, pacing - latencies[-1]))
+
+    started = time.perf_counter()
+    system.wait_for_enrichment()
+    drain = time.perf_counter() - started
+    stats = system.enrichment_queue.get_stats() if queued else None
+    if queued:
+        system.enrichment_queue.stop()
+    system.persistence.stop()
+
+    latencies.sort()
+    return (
+        "queued" if queued else "inline",
+        f"every {pacing * 1e3:.0f} ms" if pacing else "burst",
+        f"{percentile(latencies, 0.5) * 1e3:.2f}",
+        f"{percentile(latencies, 0.99) * 1e3:.2f}",
+        f"{latencies[-1] * 1e3:.1f}",
+        f"{drain * 1e3:.0f}",
+        stats["inline"] if stats else "-",
+        f"{stats['avg_lag_seconds'] * 1e3:.1f}" if stats else "-",
+        f"{stats['max_lag_seconds'] * 1e3:.1f}" if stats else "-",
+    )
+
+
+def main(messages=MESSAGES):
+    rows = [run(queued, pacing, messages) for pacing in (ARRIVAL_SECONDS, 0.0) for queued in (False, True)]
+    print(f"\nadd_episodic_memory latency ({messages} messages, {MEMORIES} memories, "
+          f"context {CONTEXT_SECONDS * 1e3:.0f} ms, queue of {QUEUE_SIZE})")
+    print_table(("enrichment", "arrivals", "p50_ms", "p99_ms", "max_ms", "drain_ms",
+                 "inline_fallbacks", "avg_lag_ms", "max_lag_ms"), rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if sys.argv[1:] else MESSAGES)
@@ -0,0 +1,96 @@
+"""
+Benchmark: PersistentMemoryStore under concurrent asyncio handlers.
+
+Each of ``HANDLERS`` coroutines plays a chat request loop: store the
+exchange, then list the recent messages. "blocking" calls the synchronous
+store from the coroutine, like an ``async def`` handler calling it directly;
+"to_thread" wraps every call in asyncio.to_thread; "facade" awaits
+AsyncPersistentStore, whose single writer group-commits concurrent writes.
+A ticker task measures how late the event loop wakes it (loop lag). Runs
+with SQLite synchronous=NORMAL and FULL (an fsync per commit).
+
+Usage:
+    python benchmarks/bench_async_store.py [requests_per_handler]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from common import print_table
+
+from persistent_async import AsyncPersistentStore
+from persistent_memory_store import PersistentMemoryStore
+from sqlite_connections import SQLiteConnectionManager
+
+HANDLERS = 64
+REQUESTS = 20
+TICK_SECONDS = 0.001
+
+
+async def ticker(lags, done):
+    while not done.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(time.perf_counter() - started - TICK_SECONDS)
+
+
+async def run_handlers(mode, store, facade, requests):
+    latencies, lags, done = [], [], asyncio.Event()
+
+    async def call(fn, *args):
+        if mode == "blocking":
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    async def handler(worker):
+        for i in range(requests):
+            started = time.perf_counter()
+            if mode == "facade":
+                await facade.astore_conversation(f"message {worker} {i}", f"reply {i}", "joy")
+                await facade.alist_recent_messages(20)
+            else:
+                await call(store.store_conversation, f"message {worker} {i}", f"reply {i}", "joy")
+                await call(store.list_recent_messages, 20)
+            latencies.append(time.perf_counter() - started)
+
+    tick = asyncio.create_task(ticker(lags, done))
+    started = time.perf_counter()
+    await asyncio.gather(*(handler(worker) for worker in range(HANDLERS)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await tick
+    return elapsed, sorted(latencies), sorted(lags)
+
+
+def run(mode, synchronous, requests):
+    store = PersistentMemoryStore(os.path.join(tempfile.mkdtemp(prefix="bench_async_store_"), "memory.db"))
+    store.connections = SQLiteConnectionManager(store.db_path, synchronous=synchronous)
+    facade = AsyncPersistentStore(store) if mode == "facade" else None
+    elapsed, latencies, lags = asyncio.run(run_handlers(mode, store, facade, requests))
+    group = "-"
+    if facade is not None:
+        facade.close()
+        group = f"{facade.get_stats()['avg_group']:.1f}"
+    store.close()
+
+    def percentile(samples, fraction):
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))] * 1e3 if samples else 0.0
+
+    return (synchronous, mode, f"{len(latencies) / elapsed:,.0f}", f"{percentile(latencies, 0.5):.1f}",
+            f"{percentile(latencies, 0.99):.1f}", f"{percentile(lags, 0.99):.1f}",
+            f"{lags[-1] * 1e3 if lags else elapsed * 1e3:.1f}", group)
+
+
+def main(requests=REQUESTS):
+    rows = [run(mode, synchronous, requests)
+            for synchronous in ("NORMAL", "FULL") for mode in ("blocking", "to_thread", "facade")]
+    print(f"\n{HANDLERS} concurrent handlers x {requests} requests (store + list recent)")
+    print_table(("synchronous", "mode", "requests_per_s", "p50_ms", "p99_ms", "loop_lag_p99_ms",
+                 "loop_lag_max_ms", "avg_group"), rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if sys.argv[1:] else REQUESTS)
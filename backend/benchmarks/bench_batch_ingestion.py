@@ -0,0 +1,63 @@
+"""
+Benchmark: ingesting conversations into PersistentMemoryStore row by row vs in batches.
+
+"per_row" calls store_conversation once per conversation, a transaction
+each; "batch" hands the same conversations to store_conversations, which
+writes them with one UPSERT statement in a single transaction. Each size is
+ingested into an empty database and then imported again under the merge
+policy, where every row is a duplicate whose merge count is incremented.
+
+Usage:
+    python benchmarks/bench_batch_ingestion.py [rows ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from common import print_table, synthetic_memories
+
+from persistent_memory_store import PersistentMemoryStore
+
+ROWS = (10_000, 100_000)
+BATCH_SIZE = 5_000
+
+
+def ingest(store, conversations, batched, dedupe_policy):
+    started = time.perf_counter()
+    if batched:
+        for start in range(0, len(conversations), BATCH_SIZE):
+            store.store_conversations(conversations[start:start + BATCH_SIZE], dedupe_policy=dedupe_policy)
+    else:
+        for c in conversations:
+            store.store_conversation(c["user_input"], c["response"], c["emotion"], c["importance"],
+                                     c["emotional_intensity"], dedupe_policy=dedupe_policy)
+    return time.perf_counter() - started
+
+
+def run(rows, batched, conversations):
+    store = PersistentMemoryStore(os.path.join(tempfile.mkdtemp(prefix="bench_ingest_"), "memory.db"))
+    fresh = ingest(store, conversations, batched, "skip")
+    merge = ingest(store, conversations, batched, "merge")
+    assert store.get_conversation_count() == rows
+    store.close()
+    return ("batch" if batched else "per_row", rows, f"{fresh:.2f}", f"{rows / fresh:,.0f}",
+            f"{merge:.2f}", f"{rows / merge:,.0f}")
+
+
+def main(sizes=ROWS):
+    results = []
+    for rows in sizes:
+        conversations = [
+            {"user_input": m["user_input"], "response": m["roboto_response"], "emotion": m["emotion"],
+             "importance": m["importance"], "emotional_intensity": m["emotional_intensity"]}
+            for m in synthetic_memories(rows)
+        ]
+        results += [run(rows, batched, conversations) for batched in (False, True)]
+    print(f"\nConversation ingestion (batches of {BATCH_SIZE})")
+    print_table(("mode", "rows", "insert_s", "insert_rows_per_s", "merge_s", "merge_rows_per_s"), results)
+
+
+if __name__ == "__main__":
+    main(tuple(int(arg) for arg in sys.argv[1:]) or ROWS)
@@ -0,0 +1,109 @@
+"""
+Benchmark: conversation search latency over a large PersistentMemoryStore.
+
+Fills a database with synthetic conversations through store_conversations,
+drawing words from a Zipf-distributed vocabulary (WORDS plus generated words)
+like natural text, with the FTS5 triggers indexing as rows arrive, then
+times search_conversations for one- and three-word queries and for rare
+words, with and without a ``since`` filter, against the LIKE scan used
+before the index is built (fast when a common word is in the newest rows,
+a full table scan for a rare one).
+Finally times backfill_search_index, the offline rebuild for existing
+databases.
+
+Usage:
+    python benchmarks/bench_conversation_search.py [rows]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from common import WORDS, print_table
+
+from persistent_memory_store import PersistentMemoryStore
+
+ROWS = 1_000_000
+BATCH_SIZE = 10_000
+VOCABULARY = 50_000
+QUERIES = 40
+LIKE_QUERIES = 3
+SYLLABLES = ["ka", "lo", "mi", "re", "su", "ta", "ne", "vo", "zi", "pa", "do", "fe", "gu", "hi", "ja", "ru"]
+
+
+def vocabulary(rng):
+    generated = {"".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(VOCABULARY * 2)}
+    words = list(dict.fromkeys(WORDS)) + sorted(generated)[:VOCABULARY]
+    rng.shuffle(words)
+    cumulative, total = [], 0.0
+    for rank in range(1, len(words) + 1):
+        total += 1.0 / rank
+        cumulative.append(total)
+    return words, cumulative
+
+
+def conversations(rows, rng, words, cumulative):
+    def text(low, high):
+        return " ".join(rng.choices(words, cum_weights=cumulative, k=rng.randint(low, high)))
+
+    for start in range(0, rows, BATCH_SIZE):
+        yield [
+            {
+                "user_input": f"{text(6, 18)} #{i}",
+                "response": text(10, 30),
+                "emotion": "joy",
+                "timestamp": f"2024-{1 + i * 12 // rows:02d}-01T00:00:00+00:00",
+            }
+            for i in range(start, min(rows, start + BATCH_SIZE))
+        ]
+
+
+def latencies(search, queries):
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        search(query)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return samples[len(samples) // 2] * 1e3, samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e3
+
+
+def main(rows=ROWS):
+    store = PersistentMemoryStore(os.path.join(tempfile.mkdtemp(prefix="bench_search_"), "memory.db"))
+    rng = random.Random(5)
+    words, cumulative = vocabulary(rng)
+    started = time.perf_counter()
+    for batch in conversations(rows, rng, words, cumulative):
+        store.store_conversations(batch)
+    ingest = time.perf_counter() - started
+
+    # Queries draw from the same distribution as the text: mostly common words, some rare
+    one_word = rng.choices(words, cum_weights=cumulative, k=QUERIES)
+    three_words = [" ".join(rng.choices(words, cum_weights=cumulative, k=3)) for _ in range(QUERIES)]
+    rare_word = rng.sample(words[len(words) // 2:], QUERIES)
+    query_sets = (("1 word", one_word), ("3 words", three_words), ("rare word", rare_word))
+    table = []
+    for label, queries in query_sets:
+        for since in (None, "2024-12-01"):
+            p50, p99 = latencies(lambda q: store.search_conversations(q, limit=10, since=since), queries)
+            table.append(("fts5", label, since or "-", f"{p50:.2f}", f"{p99:.2f}"))
+    store.search_indexed = False
+    for label, queries in query_sets:
+        p50, p99 = latencies(lambda q: store.search_conversations(q, limit=10), queries[:LIKE_QUERIES])
+        table.append(("like scan", label, "-", f"{p50:.2f}", f"{p99:.2f}"))
+
+    started = time.perf_counter()
+    store.backfill_search_index()
+    backfill = time.perf_counter() - started
+    size = os.path.getsize(store.db_path) / 2 ** 20
+    store.close()
+
+    print(f"\nConversation search ({rows:,} rows, {size:.0f} MB database; "
+          f"ingest with triggers {ingest:.1f} s, backfill {backfill:.1f} s)")
+    print_table(("search", "query", "since", "p50_ms", "p99_ms"), table)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if sys.argv[1:] else ROWS)
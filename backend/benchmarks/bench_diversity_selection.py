@@ -0,0 +1,93 @@
+"""
+Benchmark: MinHash diversity selection vs the pairwise similarity pass.
+
+Candidate pools are built from clusters of near-duplicate memories (the same
+exchange re-phrased within a few hours, as repeated conversations produce),
+interleaved in relevance order. The pairwise strategy tokenizes both texts
+and parses both timestamps for every comparison; the MinHash and MMR strategies
+read cached MinHash signatures from the feature store.
+
+``agreement`` is the share of the pairwise selection also chosen by the MinHash
+strategy, which applies the same 0.75 similarity threshold.
+
+Usage:
+    python benchmarks/bench_diversity_selection.py
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+from common import THEMES, WORDS, best_of, make_memory_system, print_table
+
+from memory_diversity import DiversitySelector
+
+POOL_SIZES = (50, 200, 1000, 5000)
+CLUSTER_SIZE = 25
+LIMITS = (10, 50)
+
+
+def near_duplicate_pool(size, seed=9):
+    """``size`` memories in clusters of CLUSTER_SIZE paraphrases, best-first."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    clusters = []
+    for cluster in range(max(1, size // CLUSTER_SIZE)):
+        words = [rng.choice(WORDS) for _ in range(30)]
+        themes = rng.sample(THEMES, 2)
+        started = now - timedelta(days=rng.randint(0, 365))
+        members = []
+        for member in range(CLUSTER_SIZE):
+            text = list(words)
+            for _ in range(3):
+                text[rng.randrange(len(text))] = rng.choice(WORDS)
+            members.append({
+                "id": f"c{cluster:04d}-{member:02d}",
+                "timestamp": (started + timedelta(minutes=rng.randint(0, 240))).isoformat(),
+                "user_input": " ".join(text[:12]),
+                "roboto_response": " ".join(text[12:]),
+                "key_themes": themes,
+                "emotion": "neutral",
+                "user_name": "Roberto Villarreal Martinez",
+            })
+        clusters.append(members)
+
+    pool = [memory for group in zip(*clusters) for memory in group][:size]
+    for rank, memory in enumerate(pool):
+        memory["relevance_score"] = 2.0 - rank / len(pool)
+    return pool
+
+
+def main():
+    system = make_memory_system(0)
+    rows = []
+
+    for size in POOL_SIZES:
+        pool = near_duplicate_pool(size)
+        for memory in pool:
+            system.feature_store.add(memory)
+
+        for limit in LIMITS:
+            timings, selections = {}, {}
+            for strategy in ("pairwise", "minhash", "mmr"):
+                system.diversity_selector = DiversitySelector(strategy=strategy)
+                selections[strategy] = system._select_diverse_memories(pool, limit)  # Warms the signature cache
+                timings[strategy] = best_of(lambda: system._select_diverse_memories(pool, limit), repeat=3)
+
+            expected = {memory["id"] for memory in selections["pairwise"]}
+            agreement = len(expected & {memory["id"] for memory in selections["minhash"]}) / len(expected)
+            rows.append((
+                size,
+                limit,
+                f"{timings['pairwise'] * 1e3:.2f}",
+                f"{timings['minhash'] * 1e3:.2f}",
+                f"{timings['mmr'] * 1e3:.2f}",
+                f"{timings['pairwise'] / timings['minhash']:.1f}x",
+                f"{agreement:.3f}",
+            ))
+
+    print(f"\nDiverse top-k selection over near-duplicate pools (ms per selection, clusters of {CLUSTER_SIZE})")
+    print_table(("pool", "limit", "pairwise_ms", "minhash_ms", "mmr_ms", "minhash_speedup", "agreement"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: local embedding index, exact vs IVF search.
+
+Builds the hashed n-gram embedding index over synthetic memories and reports
+embedding throughput, save/load cost, and per-query latency of the exact
+backend and of the IVF backend at several ``nprobe`` settings. ``recall@k``
+is the share of the exact top-k that the IVF search also returns. The IVF
+backend is forced on at every size; by default indexes below IVF_MIN_ROWS
+are searched exactly.
+
+Usage:
+    python benchmarks/bench_embedding_index.py [sizes...]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from common import WORDS, best_of, print_table, synthetic_memories
+
+import memory_embedding_index
+from memory_embedding_index import MemoryEmbeddingIndex
+
+SIZES = (10_000, 50_000, 200_000)
+NPROBES = (4, 12, 32)
+K = 10
+QUERY_COUNT = 50
+
+
+def main(sizes=SIZES):
+    # Train the inverted lists at every size (by default small indexes are searched exactly)
+    memory_embedding_index.IVF_MIN_ROWS = 0
+    rng = random.Random(3)
+    queries = [" ".join(rng.sample(WORDS, 4)) for _ in range(QUERY_COUNT)]
+    workdir = tempfile.mkdtemp(prefix="roboto_bench_")
+    build_rows, search_rows = [], []
+
+    for size in sizes:
+        documents = [(m["id"], f"{m['user_input']} {m['roboto_response']}") for m in synthetic_memories(size)]
+        path = os.path.join(workdir, f"embeddings_{size}.npz")
+
+        exact = MemoryEmbeddingIndex(lambda: documents, path=path, backend="exact")
+        started = time.perf_counter()
+        exact.sync()
+        embed_seconds = time.perf_counter() - started
+
+        exact.save()
+        ivf = MemoryEmbeddingIndex(lambda: documents, path=path, backend="ivf")
+        ivf.load()
+        started = time.perf_counter()
+        ivf.search(queries[0], K)  # Reconciles keys and trains the inverted lists
+        train_seconds = time.perf_counter() - started
+
+        reloaded = MemoryEmbeddingIndex(lambda: documents, path=path, backend="exact")
+        started = time.perf_counter()
+        reloaded.load()
+        reloaded.sync()
+        load_seconds = time.perf_counter() - started
+
+        build_rows.append((
+            size,
+            f"{embed_seconds:.2f}",
+            f"{size / embed_seconds:,.0f}",
+            f"{os.path.getsize(path) / 2 ** 20:.1f}",
+            f"{load_seconds:.2f}",
+            f"{train_seconds:.2f}",
+        ))
+
+        truth = {query: {memory_id for memory_id, _ in exact.search(query, K)} for query in queries}
+        exact_time = best_of(lambda: [exact.search(query, K) for query in queries], repeat=3) / len(queries)
+        search_rows.append((size, "exact", "-", f"{exact_time * 1e3:.2f}", "1.000"))
+
+        for nprobe in NPROBES:
+            ivf.backend.nprobe = nprobe
+            recall = sum(
+                len(truth[query] & {memory_id for memory_id, _ in ivf.search(query, K)}) / K for query in queries
+            ) / len(queries)
+            ivf_time = best_of(lambda: [ivf.search(query, K) for query in queries], repeat=3) / len(queries)
+            search_rows.append((size, "ivf", nprobe, f"{ivf_time * 1e3:.2f}", f"{recall:.3f}"))
+
+    print("\nEmbedding index build (hashed character 3-5 grams, 256 dims)")
+    print_table(("memories", "embed_s", "docs_per_s", "file_mb", "load_s", "ivf_train_s"), build_rows)
+    print(f"\nNearest-neighbour search, top-{K} (ms per query)")
+    print_table(("memories", "backend", "nprobe", "latency_ms", f"recall@{K}"), search_rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
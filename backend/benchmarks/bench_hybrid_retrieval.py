@@ -0,0 +1,108 @@
+"""
+Benchmark: shared-candidate hybrid retrieval vs the per-strategy passes it replaced.
+
+The legacy hybrid path ran five independent retrievals over the memory corpus
+(four retrieve_relevant_memories calls plus get_quantum_context) and then one
+more get_quantum_context retrieval per returned memory. The engine scores the
+corpus once and re-ranks a shared candidate pool per strategy.
+
+Rankings are compared on a fixed fixture corpus: ``overlap@k`` is the share of
+the legacy top-k also returned by the engine, ``legacy_relevance`` and
+``engine_relevance`` the mean relevance_score of each result set.
+
+Usage:
+    python benchmarks/bench_hybrid_retrieval.py
+"""
+
+import random
+
+from common import WORDS, best_of, make_memory_system, print_table
+
+from hybrid_retrieval import HybridRetrievalEngine, STRATEGY_FEATURES
+
+LIMIT = 5
+
+
+def legacy_hybrid(system, query, user_name=None, limit=LIMIT):
+    """Replica of the pre-engine RobotoSAI hybrid path (scoring semantics kept)."""
+    per_strategy = limit * 2
+    results = {
+        "semantic_similarity": system.retrieve_relevant_memories(query, user_name, per_strategy),
+        "temporal_relevance": system.retrieve_relevant_memories(query, user_name, per_strategy * 3)[:per_strategy],
+        "emotional_resonance": system.retrieve_relevant_memories(query, user_name, per_strategy * 2)[:per_strategy],
+        "contextual_matching": system.retrieve_relevant_memories(query, user_name, per_strategy * 2)[:per_strategy],
+        "quantum_entanglement": system.get_quantum_context(query, user_name)[:per_strategy],
+    }
+
+    combined = {}
+    for memories in results.values():
+        for memory in memories:
+            entry = combined.setdefault(memory["id"], {"memory": memory, "total_score": 0.0})
+            entry["total_score"] += memory.get("relevance_score", 0.0) * 0.2
+
+    ranked = sorted(combined.values(), key=lambda x: x["total_score"], reverse=True)
+    selected, seen_themes = [], set()
+    for item in ranked:
+        if len(selected) >= limit:
+            break
+        themes = set(item["memory"].get("key_themes", []))
+        if not themes.intersection(seen_themes) or len(selected) < 2:
+            selected.append(item["memory"])
+            seen_themes.update(themes)
+
+    # Legacy retrieve_chat_memories ran a further retrieval per result
+    for memory in selected:
+        memory["quantum_context"] = system.get_quantum_context(
+            f"{memory.get('user_input', '')} {memory.get('roboto_response', '')}", user_name
+        )
+    return selected
+
+
+def engine_hybrid(engine, query, user_name=None, limit=LIMIT):
+    candidates = engine.build_candidates(query, user_name, limit * 2)
+    return engine.hybrid(candidates, limit)
+
+
+def mean_relevance(memories):
+    return sum(m.get("relevance_score", 0.0) for m in memories) / len(memories) if memories else 0.0
+
+
+def main():
+    rng = random.Random(7)
+    queries = [" ".join(rng.sample(WORDS, 3)) for _ in range(20)]
+    rows = []
+
+    for size in (1_000, 10_000, 50_000):
+        system = make_memory_system(size, max_memories=size)
+        engine = HybridRetrievalEngine(system)
+
+        overlaps, legacy_rel, engine_rel = [], [], []
+        for query in queries:
+            legacy = legacy_hybrid(system, query)
+            new = engine_hybrid(engine, query)
+            legacy_ids = {m["id"] for m in legacy}
+            overlaps.append(len(legacy_ids & {m["id"] for m in new}) / max(1, len(legacy_ids)))
+            legacy_rel.append(mean_relevance(legacy))
+            engine_rel.append(mean_relevance(new))
+
+        legacy_time = best_of(lambda: [legacy_hybrid(system, q) for q in queries], repeat=3) / len(queries)
+        engine_time = best_of(lambda: [engine_hybrid(engine, q) for q in queries], repeat=3) / len(queries)
+        rows.append((
+            size,
+            f"{legacy_time * 1e3:.2f}",
+            f"{engine_time * 1e3:.2f}",
+            f"{legacy_time / engine_time:.1f}x",
+            f"{sum(overlaps) / len(overlaps):.2f}",
+            f"{sum(legacy_rel) / len(legacy_rel):.3f}",
+            f"{sum(engine_rel) / len(engine_rel):.3f}",
+        ))
+
+    print(f"\nHybrid retrieval, {len(STRATEGY_FEATURES)} strategies, limit={LIMIT} (ms per query)")
+    print_table(
+        ("memories", "legacy_ms", "engine_ms", "speedup", f"overlap@{LIMIT}", "legacy_relevance", "engine_relevance"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: journaled saves vs full memory file rewrites.
+
+A save used to back up the memory file and rewrite it whole with
+``json.dump(indent=2)``. With the journal a save appends only the records
+changed since the previous save (here ``CHANGES`` memories, the default
+MEMORY_SAVE_THRESHOLD). Also reports the snapshot write compaction runs in
+the background, and load time with a journal tail to replay.
+
+Usage:
+    python benchmarks/bench_journal_persistence.py [sizes...]
+"""
+
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from common import best_of, print_table, synthetic_memories
+
+from memory_journal import MemoryJournal
+
+SIZES = (1_000, 10_000, 50_000)
+CHANGES = 5
+SAVES = 200
+
+
+def full_save(path, state):
+    """The former save_memory: backup copy, then a pretty-printed rewrite via a temp file"""
+    if os.path.exists(path):
+        shutil.copyfile(path, f"{path}.backup")
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def main(sizes=SIZES):
+    rng = random.Random(7)
+    workdir = tempfile.mkdtemp(prefix="roboto_bench_")
+    rows = []
+
+    for size in sizes:
+        memories = synthetic_memories(size)
+        state = {"episodic_memories": memories, "user_profiles": {"roberto": {"interaction_count": size}}}
+        path = os.path.join(workdir, f"memory_{size}.json")
+
+        full_save(path, state)
+        full_time = best_of(lambda: full_save(path, state), repeat=3)
+        file_mb = os.path.getsize(path) / 2 ** 20
+
+        journal = MemoryJournal(path, fsync=False)
+        journal.load()
+
+        def journaled_save():
+            for memory in rng.sample(memories, CHANGES):
+                memory["importance"] = rng.random()
+                journal.record("upsert", "episodic_memories", memory["id"], memory)
+            journal.flush({"user_profiles": state["user_profiles"]})
+
+        journal_time = best_of(journaled_save, repeat=5)
+        for _ in range(SAVES):
+            journaled_save()
+
+        started = time.perf_counter()
+        MemoryJournal(path).load()
+        replay_time = time.perf_counter() - started
+        journal_kb = journal.journal_bytes / 1024
+
+        started = time.perf_counter()
+        journal.compact(lambda: dict(state), None, lambda snapshot: full_save(path, snapshot))
+        compact_time = time.perf_counter() - started
+        journal.close()
+
+        rows.append((
+            size,
+            f"{file_mb:.1f}",
+            f"{full_time * 1e3:.1f}",
+            f"{journal_time * 1e3:.3f}",
+            f"{full_time / journal_time:,.0f}x",
+            f"{journal_kb:.0f}",
+            f"{replay_time * 1e3:.0f}",
+            f"{compact_time * 1e3:.0f}",
+        ))
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    print(f"\nSave cost with {CHANGES} changed memories (ms); load replays {SAVES} journaled saves")
+    print_table(("memories", "file_mb", "full_save_ms", "journal_save_ms", "speedup",
+                 "journal_kb", "load_ms", "compact_ms"), rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
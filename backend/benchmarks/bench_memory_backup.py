@@ -0,0 +1,89 @@
+"""
+Benchmark: deduplicated memory backups vs full timestamped copies.
+
+Writes a memory snapshot, backs it up, then edits a few memories and appends
+new ones between ``ROUNDS`` further backups. Reports the time per backup,
+the bytes each backup adds to disk (the former ``.backup_<stamp>`` copy
+added the whole file every time) and the time to restore the newest one.
+
+Usage:
+    python benchmarks/bench_memory_backup.py [sizes...]
+"""
+
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from common import print_table, synthetic_memories
+
+from memory_backup import MemoryBackupStore
+
+SIZES = (1_000, 10_000, 50_000)
+ROUNDS = 10
+EDITS = 20
+APPENDS = 5
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def main(sizes=SIZES):
+    rng = random.Random(11)
+    workdir = tempfile.mkdtemp(prefix="roboto_bench_")
+    rows = []
+
+    for size in sizes:
+        memories = synthetic_memories(size + ROUNDS * APPENDS)
+        live = memories[:size]
+        path = os.path.join(workdir, f"memory_{size}.json")
+        store = MemoryBackupStore(path, keep_last=ROUNDS + 1)
+
+        def write():
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"episodic_memories": live}, f, indent=2, ensure_ascii=False)
+
+        write()
+        file_mb = os.path.getsize(path) / 2 ** 20
+        started = time.perf_counter()
+        store.backup()
+        first_time = time.perf_counter() - started
+        first_bytes = directory_size(store.directory)
+
+        elapsed = 0.0
+        for round_number in range(ROUNDS):
+            for memory in rng.sample(live, EDITS):
+                memory["importance"] = rng.random()
+            live.extend(memories[size + round_number * APPENDS:size + (round_number + 1) * APPENDS])
+            write()
+            started = time.perf_counter()
+            store.backup()
+            elapsed += time.perf_counter() - started
+        added_kb = (directory_size(store.directory) - first_bytes) / ROUNDS / 1024
+
+        started = time.perf_counter()
+        store.latest()
+        restore_time = time.perf_counter() - started
+
+        rows.append((
+            size,
+            f"{file_mb:.1f}",
+            f"{first_time * 1e3:.0f}",
+            f"{elapsed / ROUNDS * 1e3:.0f}",
+            f"{added_kb:.0f}",
+            f"{os.path.getsize(path) / 1024:.0f}",
+            f"{restore_time * 1e3:.0f}",
+        ))
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    print(f"\nBackups with {EDITS} edited and {APPENDS} new memories between rounds")
+    print_table(("memories", "file_mb", "first_ms", "incremental_ms", "added_kb_per_backup",
+                 "full_copy_kb", "restore_ms"), rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,120 @@
+"""
+Benchmark: per-memory enrichment and write CPU, separate vs single-parse NLP.
+
+The former helpers each built their own TextBlob over the user input: one
+for sentiment, one for emotional intensity (a second sentiment pass) and
+one for noun phrase themes. LegacyAnalyzer replays exactly that. The first
+table times the enrichment of each input on its own; the second runs the
+same add_episodic_memory with each analyzer, where the rest of the write
+(entanglements, indexes, the conversation store) is unchanged. Both use
+unique inputs, then a workload where ``REPEAT_SHARE`` of the inputs repeat
+and the LRU answers them.
+
+Without the NLTK corpora TextBlob needs for noun phrases, the former path
+retried loading them on every text; the analyzer notices once. Run with the
+corpora installed (python -m textblob.download_corpora) to see the gain
+from sharing the parse alone.
+
+Usage:
+    python benchmarks/bench_nlp_enrichment.py [memories]
+"""
+
+import random
+import sys
+import time
+
+from common import make_memory_system, print_table, synthetic_memories
+
+import memory_nlp
+from memory_nlp import TextAnalysis, TextAnalyzer, keyword_themes
+
+MEMORIES = 500
+REPEAT_SHARE = 0.3
+
+
+class LegacyAnalyzer:
+    """One TextBlob per helper, as _analyze_sentiment/_extract_themes/_calculate_emotional_intensity did"""
+
+    def analyze(self, text):
+        if not memory_nlp.TEXTBLOB_AVAILABLE:
+            return TextAnalyzer(cache_size=0).analyze(text)
+        TextBlob = memory_nlp.TextBlob
+        polarity = float(TextBlob(text).sentiment.polarity)
+        label = "positive" if polarity > 0.1 else "negative" if polarity < -0.1 else "neutral"
+        try:
+            phrases = list(TextBlob(text).noun_phrases)
+            themes = tuple(dict.fromkeys(p.lower().strip() for p in phrases if len(p.split()) <= 3 and p.strip()))[:5]
+        except Exception:
+            themes = keyword_themes(text.split())
+        sentiment = TextBlob(text).sentiment
+        intensity = min(1.0, abs(float(sentiment.polarity)) + float(sentiment.subjectivity))
+        return TextAnalysis(tuple(text.split()), (), polarity, None, label, themes, intensity)
+
+    def get_stats(self):
+        return {}
+
+
+def workload(count, repeat_share, seed=5):
+    rng = random.Random(seed)
+    memories = synthetic_memories(count, seed)
+    inputs = []
+    for i, memory in enumerate(memories):
+        if inputs and rng.random() < repeat_share:
+            inputs.append((rng.choice(inputs)[0], f"{memory['roboto_response']} #{i}"))  # Same input, new reply
+        else:
+            inputs.append((memory["user_input"], memory["roboto_response"]))
+    return inputs
+
+
+def cpu_per_memory(analyzer, inputs):
+    system = make_memory_system()
+    system.text_analyzer = analyzer
+    system.persistence = None       # Saves are not part of the enrichment cost
+    system.enrichment_queue = None  # Enrich on this thread, inside the timed loop
+    system.save_threshold = 10 ** 9
+    system.save_interval = 10 ** 9
+    started = time.process_time()
+    for user_input, response in inputs:
+        system.add_episodic_memory(user_input, response, "joy")
+    return (time.process_time() - started) / len(inputs)
+
+
+def enrichment_cpu(analyzer, inputs):
+    started = time.process_time()
+    for user_input, _ in inputs:
+        analysis = analyzer.analyze(user_input)
+        list(analysis.themes)
+    return (time.process_time() - started) / len(inputs)
+
+
+def main(count=MEMORIES):
+    unique = workload(count, 0.0)
+    repeated = workload(count, REPEAT_SHARE)
+    TextAnalyzer(cache_size=0).analyze("warm up the TextBlob models")
+    runs = (
+        ("separate parses", LegacyAnalyzer, unique),
+        ("single parse", lambda: TextAnalyzer(cache_size=0), unique),
+        ("separate parses", LegacyAnalyzer, repeated),
+        ("single parse + LRU", TextAnalyzer, repeated),
+    )
+
+    for title, measure in (("Enrichment CPU per input", enrichment_cpu),
+                           ("add_episodic_memory CPU per memory", cpu_per_memory)):
+        rows = []
+        baseline = None
+        for label, analyzer_fn, inputs in runs:
+            analyzer = analyzer_fn()
+            measure(analyzer_fn(), inputs[:50])  # Warm up
+            cost = measure(analyzer, inputs)
+            if label == "separate parses":
+                baseline = cost
+            hit_rate = analyzer.get_stats().get("hit_rate")
+            rows.append((label, "0%" if inputs is unique else f"{REPEAT_SHARE:.0%}", f"{cost * 1e3:.2f}",
+                         f"{(1 - cost / baseline) * 100:.0f}%", f"{hit_rate:.0%}" if hit_rate is not None else "-"))
+        print(f"\n{title} ({count} memories, TextBlob: {memory_nlp.TEXTBLOB_AVAILABLE}, "
+              f"noun phrase corpora: {not TextAnalyzer._noun_phrases_missing})")
+        print_table(("enrichment", "repeated_inputs", "cpu_ms", "saved", "cache_hit_rate"), rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if sys.argv[1:] else MEMORIES)
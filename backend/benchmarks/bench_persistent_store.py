@@ -0,0 +1,116 @@
+"""
+Benchmark: PersistentMemoryStore throughput under concurrent writers and readers.
+
+"legacy" is the former access pattern: a new sqlite3 connection per call,
+the default rollback journal and a 5 s lock timeout. "pooled" is the store
+as shipped, on per-thread WAL connections from SQLiteConnectionManager.
+Each writer thread stores conversations (every fifth one a merged duplicate)
+while as many reader threads list recent conversations and look rows up by
+fingerprint. Reports write and read throughput and the calls that failed
+with "database is locked".
+
+Usage:
+    python benchmarks/bench_persistent_store.py [seconds]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from common import print_table
+
+from persistent_memory_store import PersistentMemoryStore, generate_fingerprint
+
+SECONDS = 2.0
+WRITERS = (8, 16, 32)
+
+
+class LegacyPersistentMemoryStore(PersistentMemoryStore):
+    """The store with a fresh rollback-journal connection for every call"""
+
+    def __init__(self, db_path):
+        super().__init__(db_path)
+        self.connections.close()
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("PRAGMA journal_mode=DELETE")
+        legacy = self
+
+        class PerCall:
+            def connection(self):
+                return sqlite3.connect(legacy.db_path, isolation_level=None)
+
+            def transaction(self):
+                conn = sqlite3.connect(legacy.db_path)
+
+                class Scope:
+                    def __enter__(self):
+                        return conn
+
+                    def __exit__(self, exc_type, exc, tb):
+                        if exc_type is None:
+                            conn.commit()
+                        conn.close()
+
+                return Scope()
+
+            def close(self):
+                pass
+
+        self.connections = PerCall()
+
+
+def run(kind, writers, seconds):
+    directory = tempfile.mkdtemp(prefix="bench_store_")
+    path = os.path.join(directory, "memory.db")
+    store = LegacyPersistentMemoryStore(path) if kind == "legacy" else PersistentMemoryStore(path)
+    counts = {"writes": 0, "reads": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def tally(key):
+        with lock:
+            counts[key] += 1
+
+    def writer(worker):
+        i = 0
+        while time.perf_counter() < deadline:
+            n = i - 1 if i % 5 == 4 else i   # Every fifth call repeats the previous exchange
+            try:
+                store.store_conversation(f"message {worker} {n}", f"reply {n}", "joy", dedupe_policy="merge")
+                tally("writes")
+            except sqlite3.OperationalError:
+                tally("locked")
+            i += 1
+
+    def reader(worker):
+        while time.perf_counter() < deadline:
+            try:
+                store.list_recent_conversations(limit=20)
+                store.get_conversation_by_fingerprint(generate_fingerprint(f"message {worker} 0", "reply 0"))
+                tally("reads")
+            except sqlite3.OperationalError:
+                tally("locked")
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+    threads += [threading.Thread(target=reader, args=(w,)) for w in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    store.close()
+    return (kind, writers, f"{counts['writes'] / elapsed:.0f}", f"{counts['reads'] / elapsed:.0f}", counts["locked"])
+
+
+def main(seconds=SECONDS):
+    rows = [run(kind, writers, seconds) for writers in WRITERS for kind in ("legacy", "pooled")]
+    print(f"\nPersistentMemoryStore under load ({seconds:.0f} s per run, as many readers as writers)")
+    print_table(("store", "writers", "writes_per_s", "reads_per_s", "locked_errors"), rows)
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if sys.argv[1:] else SECONDS)
@@ -0,0 +1,106 @@
+"""
+Benchmark: real-time data CacheManager, former implementation vs LRU/TTL.
+
+"legacy" is the former CacheManager: once full, every set rebuilds the dict
+without expired items and scans all keys with min() for the entry expiring
+first, and get returns the stored dict itself. "lru" is CacheManager as
+shipped (OrderedDict LRU, values pickled on set and unpickled on get,
+byte accounting). Each runs with ``ENTRIES`` live entries holding a
+weather-sized result: sets of new keys into the full cache (every one
+evicts), get hits, and a 90/10 get/set mix.
+
+Usage:
+    python benchmarks/bench_realtime_cache.py [entries]
+"""
+
+import logging
+import sys
+import threading
+import time
+
+from common import print_table
+
+from real_time_data_system import CacheManager
+
+ENTRIES = 10_000
+OPERATIONS = 20_000
+VALUE = {
+    "success": True, "city": "San Antonio", "country": "US", "temperature": 31.2, "temperature_fahrenheit": 88.2,
+    "feels_like": 33.0, "humidity": 48, "pressure": 1012, "description": "Scattered clouds", "main_weather": "Clouds",
+    "wind_speed": 4.6, "wind_direction": 160, "cloudiness": 40, "visibility": 10000, "sunrise": "06:58",
+    "sunset": "20:31", "last_updated": "2024-05-01T12:00:00+00:00", "cached_at": 1714564800.0, "from_cache": False
+}
+
+
+class LegacyCacheManager:
+    """The former CacheManager, verbatim"""
+    def __init__(self, max_size: int = 1000):
+        self.cache = {}
+        self.max_size = max_size
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.cache:
+                item, expiry = self.cache[key]
+                if time.time() < expiry:
+                    return item
+                else:
+                    del self.cache[key]
+        return None
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            if len(self.cache) >= self.max_size:
+                current_time = time.time()
+                self.cache = {k: v for k, v in self.cache.items() if current_time < v[1]}
+                if len(self.cache) >= self.max_size:
+                    oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k][1])
+                    del self.cache[oldest_key]
+            self.cache[key] = (value, time.time() + ttl)
+
+
+def ops_per_second(fn, operations):
+    started = time.perf_counter()
+    for i in range(operations):
+        fn(i)
+    return operations / (time.perf_counter() - started)
+
+
+def run(name, entries):
+    def filled():
+        cache = LegacyCacheManager(entries) if name == "legacy" else CacheManager(entries, max_bytes=2 ** 40)
+        for i in range(entries):
+            cache.set(f"key_{i}", dict(VALUE), 3600)
+        return cache
+
+    # Evicting sets are slow for legacy; fewer of them keep the run short
+    cache = filled()
+    sets = ops_per_second(lambda i: cache.set(f"new_{i}", dict(VALUE), 3600),
+                          min(OPERATIONS, 200) if name == "legacy" else OPERATIONS)
+    cache = filled()
+    gets = ops_per_second(lambda i: cache.get(f"key_{i % entries}"), OPERATIONS)
+    hits = cache.get_stats()["hits"] if name == "lru" else OPERATIONS
+    assert hits == OPERATIONS
+
+    cache = filled()
+
+    def mixed(i):
+        if i % 10:
+            cache.get(f"key_{(entries - 1 - i) % entries}")   # Recently used keys, not yet evicted
+        else:
+            cache.set(f"mix_{i}", dict(VALUE), 3600)
+
+    mix = ops_per_second(mixed, min(OPERATIONS, 2_000) if name == "legacy" else OPERATIONS)
+    return name, f"{sets:,.0f}", f"{1e6 / sets:.1f}", f"{gets:,.0f}", f"{1e6 / gets:.1f}", f"{mix:,.0f}"
+
+
+def main(entries=ENTRIES):
+    logging.disable(logging.WARNING)
+    rows = [run(name, entries) for name in ("legacy", "lru")]
+    print(f"\nReal-time CacheManager with {entries:,} live entries")
+    print_table(("cache", "evicting_sets_per_s", "set_us", "gets_per_s", "get_us", "mixed_ops_per_s"), rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if sys.argv[1:] else ENTRIES)
@@ -0,0 +1,94 @@
+"""
+Benchmark: latency of RealTimeDataEngine.get_comprehensive_context.
+
+Each source is replaced by a fake that sleeps for a typical upstream latency
+(SOURCE_MS), so no network or API keys are needed. "sequential" calls the
+sources one after another like the former get_comprehensive_context; "sync"
+and "async" are get_comprehensive_context and its async twin, which fan the
+sources out under a deadline; "cached" is get_cached_context, which reads the
+background refresher's last good values (timed once it has warmed up). The
+"hung" scenario makes crypto take 5s: the fan-out returns at the deadline
+with crypto missing ("degraded" contexts), the cached context at once.
+
+Usage:
+    python benchmarks/bench_realtime_context.py [calls]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+
+from common import print_table
+
+from real_time_data_system import RealTimeDataEngine
+
+CALLS = 10
+DEADLINE_SECONDS = 1.0
+SOURCE_MS = {"time": 1, "weather": 180, "system_info": 110, "news": 320, "crypto": 150}
+GETTERS = {"time": "get_current_time", "weather": "get_weather_data", "system_info": "get_system_info",
+           "news": "get_news_data", "crypto": "get_crypto_data"}
+
+
+def make_engine(source_ms):
+    os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+    os.environ.setdefault("NEWS_API_KEY", "benchmark")
+    engine = RealTimeDataEngine()
+    for source, getter in GETTERS.items():
+        def fetch(*args, timeout=None, seconds=source_ms[source] / 1000):
+            if timeout is not None and seconds > timeout:
+                time.sleep(timeout)   # Like requests giving up at its timeout
+                return {"success": False, "error": "Request timeout"}
+            time.sleep(seconds)
+            return {"success": True}
+        setattr(engine, getter, fetch)
+    return engine
+
+
+def is_degraded(context):
+    """Partial, or some source gave up at its deadline-capped timeout"""
+    return context["partial"] or not all(context[key]["success"] for key in
+                                         ("weather_context", "system_context", "news_context", "crypto_context"))
+
+
+def sequential(engine):
+    for getter in GETTERS.values():
+        getattr(engine, getter)()
+
+
+def run(scenario, mode, calls):
+    source_ms = dict(SOURCE_MS, crypto=5000) if scenario == "hung" else SOURCE_MS
+    engine = make_engine(source_ms)
+    latencies, degraded = [], 0
+    if mode == "cached":
+        engine.start_background_refresh()
+        time.sleep(max(SOURCE_MS.values()) / 1000 + 0.1)
+    for _ in range(calls):
+        started = time.perf_counter()
+        if mode == "sequential":
+            sequential(engine)
+        elif mode == "cached":
+            degraded += is_degraded(engine.get_cached_context())
+        elif mode == "sync":
+            degraded += is_degraded(engine.get_comprehensive_context(deadline_seconds=DEADLINE_SECONDS))
+        else:
+            degraded += is_degraded(asyncio.run(
+                engine.get_comprehensive_context_async(deadline_seconds=DEADLINE_SECONDS)))
+        latencies.append(time.perf_counter() - started)
+    engine.close()
+    latencies.sort()
+    return (scenario, mode, f"{latencies[len(latencies) // 2] * 1e3:.1f}", f"{latencies[-1] * 1e3:.1f}",
+            "-" if mode == "sequential" else f"{degraded}/{calls}")
+
+
+def main(calls=CALLS):
+    logging.disable(logging.WARNING)
+    rows = [run(scenario, mode, calls) for scenario in ("typical", "hung")
+            for mode in ("sequential", "sync", "async", "cached")]
+    print(f"\nComprehensive context, {calls} calls per mode, deadline {DEADLINE_SECONDS}s, sources {SOURCE_MS} ms")
+    print_table(("scenario", "mode", "p50_ms", "max_ms", "degraded"), rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if sys.argv[1:] else CALLS)
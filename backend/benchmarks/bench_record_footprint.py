@@ -0,0 +1,84 @@
+"""
+Benchmark: resident bytes per episodic memory, plain dicts vs MemoryRecords.
+
+Serializes synthetic memories to JSON and parses them back, as load_memory
+does, then measures the Python heap they occupy with tracemalloc before and
+after converting them to compact records. Also reports the conversion time
+and the cost of a field read on each representation.
+
+Usage:
+    python benchmarks/bench_record_footprint.py [sizes...]
+"""
+
+import gc
+import json
+import sys
+import tracemalloc
+
+from common import best_of, print_table, synthetic_memories
+
+from memory_record import compact_memory_list
+
+SIZES = (10_000, 50_000)
+READS = 100_000
+
+
+def heap_bytes(build):
+    """Bytes still allocated by build()'s result"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, used
+
+
+def read_fields(memories):
+    count = len(memories)
+    for i in range(READS):
+        memory = memories[i % count]
+        memory.get("emotion")
+        memory["timestamp"]
+        memory.get("key_themes", [])
+
+
+def main(sizes=SIZES):
+    rows = []
+    for size in sizes:
+        payload = json.dumps({"episodic_memories": synthetic_memories(size)})
+
+        def load_dicts():
+            return json.loads(payload)["episodic_memories"]
+
+        def load_records():
+            return compact_memory_list(json.loads(payload)["episodic_memories"])
+
+        memories, dict_bytes = heap_bytes(load_dicts)
+        dict_read = best_of(lambda: read_fields(memories), repeat=3)
+        del memories
+        memories, record_bytes = heap_bytes(load_records)
+        record_read = best_of(lambda: read_fields(memories), repeat=3)
+        del memories
+        dict_load = best_of(load_dicts, repeat=1)
+        record_load = best_of(load_records, repeat=1)
+
+        rows.append((
+            size,
+            f"{dict_bytes / size:.0f}",
+            f"{record_bytes / size:.0f}",
+            f"{(1 - record_bytes / dict_bytes) * 100:.0f}%",
+            f"{dict_load:.2f}",
+            f"{record_load:.2f}",
+            f"{dict_read / READS * 1e9:.0f}",
+            f"{record_read / READS * 1e9:.0f}",
+        ))
+
+    print(f"\nResident heap per memory after load (field reads: {READS} x 3 fields)")
+    print_table(("memories", "dict_bytes", "record_bytes", "saved", "dict_load_s", "record_load_s",
+                 "dict_read_ns", "record_read_ns"), rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
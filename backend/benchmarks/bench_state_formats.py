@@ -0,0 +1,68 @@
+"""
+Benchmark: encode/decode time and file size of the state file formats.
+
+Builds a synthetic memory state (episodic memories plus the small sections
+a snapshot carries) and encodes it with every format and compression
+state_serializer offers, reporting the best encode and decode time of a
+few runs and the encoded size. Formats whose optional package is missing
+are reported as the fallback they write.
+
+Usage:
+    python benchmarks/bench_state_formats.py [memories]
+"""
+
+import sys
+
+from common import best_of, print_table, synthetic_memories
+
+from memory_journal import _json_default
+from state_serializer import COMPRESSIONS, FORMATS, detect_format, dumps_state, loads_state
+
+MEMORIES = 50_000
+
+
+def synthetic_state(count):
+    memories = synthetic_memories(count)
+    return {
+        "episodic_memories": memories,
+        "semantic_memories": {},
+        "emotional_patterns": {"Roberto Villarreal Martinez": [
+            {"emotion": m["emotion"], "sentiment": m["sentiment"], "timestamp": m["timestamp"],
+             "intensity": m["emotional_intensity"], "quantum_state": m["quantum_state"]} for m in memories
+        ]},
+        "user_profiles": {"Roberto Villarreal Martinez": {"interaction_count": count}},
+        "self_reflections": [],
+        "compressed_learnings": {},
+        "quantum_entanglements": {},
+        "real_time_integration": False,
+    }
+
+
+def main(count=MEMORIES):
+    state = synthetic_state(count)
+    baseline = None
+    rows = []
+    for format in FORMATS:
+        for compression in COMPRESSIONS:
+            data = dumps_state(state, format, compression, default=_json_default)
+            if (format, compression) != detect_format(data):
+                continue  # Optional package missing: its fallback is measured on its own row
+            encode = best_of(lambda: dumps_state(state, format, compression, default=_json_default), repeat=3)
+            decode = best_of(lambda: loads_state(data), repeat=3)
+            baseline = baseline or (encode, decode, len(data))
+            rows.append((
+                format,
+                compression,
+                f"{len(data) / 2 ** 20:.1f}",
+                f"{len(data) / baseline[2] * 100:.0f}%",
+                f"{encode:.2f}",
+                f"{decode:.2f}",
+                f"{(baseline[0] + baseline[1]) / (encode + decode):.1f}x",
+            ))
+
+    print(f"\nState file formats ({count} memories; baseline: pretty-printed JSON)")
+    print_table(("format", "compression", "size_mb", "size", "encode_s", "decode_s", "round_trip_speedup"), rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if sys.argv[1:] else MEMORIES)
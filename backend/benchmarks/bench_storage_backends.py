@@ -0,0 +1,102 @@
+"""
+Benchmark: memory system startup with the JSON and SQLite storage backends.
+
+Writes a synthetic memory file, imports it into the SQLite database once,
+then starts a QuantumEnhancedMemorySystem on each backend in a fresh
+process. Reports the time until the constructor returns, the resident
+memory it added, the time to fetch one memory by id, and the resident
+memory once the background index builds have finished. The JSON backend
+parses and holds every record; the SQLite backend pages records in on
+demand and builds the scoring features, TF-IDF index and phase 2 in the
+background, so its startup numbers should stay flat as the store grows.
+
+Usage:
+    python benchmarks/bench_storage_backends.py [sizes...]
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import make_memory_system, print_table, synthetic_memories
+
+from memory_sqlite_store import SQLiteMemoryStore
+
+SIZES = (10_000, 50_000, 100_000)
+BACKENDS = ("json", "sqlite")
+
+
+def resident_kb():
+    """Current resident set size (peak RSS is inherited from the forking parent)"""
+    with open("/proc/self/status", encoding="utf-8") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+
+
+def startup(workdir, backend):
+    """Child process: construct the memory system and report time and RSS growth"""
+    import memory_system  # noqa: F401 - module import cost is not part of startup
+    baseline = resident_kb()
+    started = time.perf_counter()
+    system = make_memory_system(workdir=workdir, storage_backend=backend)
+    elapsed = time.perf_counter() - started
+    rss = resident_kb() - baseline
+
+    memory_id = system.episodic_memories[len(system.episodic_memories) // 2]["id"]
+    started = time.perf_counter()
+    system.get_memory(memory_id)
+    lookup = time.perf_counter() - started
+    system.executor.shutdown(wait=True)
+    print(json.dumps({"startup": elapsed, "rss_kb": rss, "lookup": lookup, "warm_rss_kb": resident_kb() - baseline,
+                      "memories": len(system.episodic_memories)}))
+    os._exit(0)  # Skip the exit-time cleanup of the large indexes
+
+
+def main(sizes=SIZES):
+    workdir = tempfile.mkdtemp(prefix="roboto_bench_")
+    rows = []
+
+    for size in sizes:
+        path = os.path.join(workdir, "bench_memory.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"episodic_memories": synthetic_memories(size)}, f, indent=2, ensure_ascii=False)
+        database = os.path.join(workdir, "bench_memory.sqlite3")
+        if os.path.exists(database):
+            os.remove(database)
+        store = SQLiteMemoryStore(database, legacy_path=path)
+        started = time.perf_counter()
+        store.load()
+        import_time = time.perf_counter() - started
+        store.close()
+
+        for backend in BACKENDS:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", workdir, backend],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            rows.append((
+                size,
+                backend,
+                result["memories"],
+                f"{result['startup']:.2f}",
+                f"{result['rss_kb'] / 1024:.0f}",
+                f"{result['lookup'] * 1e3:.2f}",
+                f"{result['warm_rss_kb'] / 1024:.0f}",
+                f"{import_time:.1f}" if backend == "sqlite" else "-",
+            ))
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    print("\nMemory system startup by storage backend")
+    print_table(("memories", "backend", "loaded", "startup_s", "rss_added_mb", "lookup_ms", "warm_rss_mb",
+                 "import_s"), rows)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        startup(sys.argv[2], sys.argv[3])
+    else:
+        main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,113 @@
+"""
+Benchmark: memory and time of exporting a large PersistentMemoryStore.
+
+"legacy" is the former export_to_json: fetchall() of the conversations and
+one json.dump of the whole list. "json" is export_to_json as shipped, which
+streams the same file a chunk at a time; "ndjson" and "ndjson.gz" are
+export_ndjson. Each export runs in a fresh process so its peak resident
+memory can be measured; the table shows how far the peak rose above the
+process's size before the export (that includes SQLite's 64 MiB memory map
+of the database file, SQLITE_MMAP_BYTES). The legacy export is skipped above
+LEGACY_MAX_ROWS, where it needs more memory than small hosts have.
+
+Usage:
+    python benchmarks/bench_streaming_export.py [rows ...]
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+
+from common import print_table
+
+ROWS = (250_000, 1_000_000, 3_000_000)
+LEGACY_MAX_ROWS = 1_000_000
+MODES = ("legacy", "json", "ndjson", "ndjson.gz")
+
+
+def build_database(path, rows):
+    """Conversations written straight into the former schema (no search index)"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE conversations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, user_input TEXT, response TEXT,
+            emotion TEXT, importance REAL, emotional_intensity REAL DEFAULT 0.0, fingerprint TEXT,
+            merged_count INTEGER DEFAULT 1
+        )
+    """)
+    conn.execute("""
+        INSERT INTO conversations (timestamp, user_input, response, emotion, importance, fingerprint)
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+        SELECT '2024-05-01T12:00:00+00:00',
+               'tell me about the quantum music studio and the weather today number ' || i,
+               'the answer is a longer reply about songs, coffee, rain and the stars, written for message ' || i,
+               'joy', 0.5 + (i % 10) / 10.0, printf('%064x', i)
+        FROM n
+    """, (rows,))
+    conn.execute("CREATE UNIQUE INDEX idx_conversations_fingerprint ON conversations(fingerprint)")
+    conn.commit()
+    conn.close()
+
+
+def legacy_export(store, directory):
+    conversations = store.connections.connection().execute('SELECT * FROM conversations').fetchall()
+    with open(os.path.join(directory, "legacy.json"), "w") as f:
+        json.dump([
+            {'id': c[0], 'timestamp': c[1], 'user_input': c[2], 'response': c[3], 'emotion': c[4],
+             'importance': c[5], 'emotional_intensity': c[6], 'fingerprint': c[7], 'merged_count': c[8]}
+            for c in conversations
+        ], f, indent=2)
+
+
+def export_once(path, mode, results):
+    logging.disable(logging.WARNING)
+    import persistent_memory_store
+    persistent_memory_store.SEARCH_AUTO_BACKFILL_ROWS = 0   # Export the table as it is
+    store = persistent_memory_store.PersistentMemoryStore(path)
+    store.json_store = os.path.dirname(path)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    if mode == "legacy":
+        legacy_export(store, store.json_store)
+    elif mode == "json":
+        store.export_to_json()
+    else:
+        store.export_ndjson(os.path.join(store.json_store, f"export.{mode}"))
+    elapsed = time.perf_counter() - started
+    results.put((elapsed, (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024))
+
+
+def main(sizes=ROWS):
+    context = multiprocessing.get_context("spawn")
+    table = []
+    for rows in sizes:
+        directory = tempfile.mkdtemp(prefix="bench_export_")
+        path = os.path.join(directory, "memory.db")
+        build_database(path, rows)
+        size = os.path.getsize(path) / 2 ** 20
+        for mode in MODES:
+            if mode == "legacy" and rows > LEGACY_MAX_ROWS:
+                table.append((f"{rows:,}", f"{size:.0f}", mode, "-", "-", "-"))
+                continue
+            results = context.Queue()
+            process = context.Process(target=export_once, args=(path, mode, results))
+            process.start()
+            elapsed, peak_mb = results.get()
+            process.join()
+            table.append((f"{rows:,}", f"{size:.0f}", mode, f"{elapsed:.1f}", f"{rows / elapsed:,.0f}", f"{peak_mb:.0f}"))
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+    print("\nPersistentMemoryStore export (peak RSS growth during the export)")
+    print_table(("rows", "db_mb", "export", "seconds", "rows_per_s", "peak_mb"), table)
+
+
+if __name__ == "__main__":
+    main(tuple(int(arg) for arg in sys.argv[1:]) or ROWS)
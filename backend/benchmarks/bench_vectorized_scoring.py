@@ -0,0 +1,106 @@
+"""
+Benchmark: vectorized relevance scoring vs a per-memory Python loop.
+
+Both variants rank every lexical match of a query (TF-IDF cosine >= 0.03) by
+the full relevance formula of score_memory_candidates and return the top-k.
+The loop variant reads each factor from the memory dict, as the pre-feature
+store code did for its candidates; the vectorized variant computes the same
+factors over the feature store columns and selects with argpartition.
+
+``agreement@k`` is the share of the loop top-k also returned by the
+vectorized ranking.
+
+Usage:
+    python benchmarks/bench_vectorized_scoring.py
+"""
+
+import random
+from datetime import datetime, timezone
+
+from common import WORDS, best_of, make_memory_system, print_table
+
+SIZES = (10_000, 50_000)
+LIMIT = 15
+CREATOR = "Roberto Villarreal Martinez"
+
+
+def loop_top_k(system, query, user_name, limit=LIMIT):
+    """Per-memory replica of the relevance formula over all lexical matches."""
+    match = system.text_index.match(query, min_score=0.03)
+    query_sentiment = system._analyze_sentiment(query)
+    query_themes = set(system._extract_themes(query))
+    recent = system.episodic_memories[-1]
+    now = datetime.now(timezone.utc)
+
+    scored = []
+    for slot, similarity in zip(match.keys.tolist(), match.scores.tolist()):
+        memory = system.get_memory(system.feature_store.id_of(slot))
+        emotion_boost = 0.4 if memory.get("sentiment", "neutral") == query_sentiment else 0.1
+        if memory.get("emotion") in ("joy", "excitement", "curiosity") and "?" in query:
+            emotion_boost += 0.2
+
+        user_boost = 0.0
+        if user_name:
+            interaction_count = system.user_profiles.get(CREATOR, {}).get("interaction_count", 0)
+            user_boost = min(0.6, 0.3 + interaction_count * 0.01)
+            if memory.get("user_name") == CREATOR:
+                user_boost *= 1.5
+
+        memory_time = system._parse_timestamp(memory["timestamp"])
+        hours_ago = (now - memory_time).total_seconds() / 3600
+        if hours_ago < 24:
+            recency_boost = 0.3
+        elif hours_ago < 168:
+            recency_boost = 0.2
+        elif hours_ago < 720:
+            recency_boost = 0.1
+        else:
+            recency_boost = max(0, 0.05 - (hours_ago / 8760 * 0.05))
+
+        theme_boost = min(0.3, len(query_themes.intersection(memory.get("key_themes", []))) * 0.15)
+        importance_boost = (memory.get("importance", 0.5) + memory.get("emotional_intensity", 0.5)) * 0.15
+        continuity_boost = 0.25 if system._memories_are_related(memory, recent) else 0.0
+
+        relevance = (similarity + emotion_boost * 0.8 + user_boost * 1.2 + recency_boost * 0.6
+                     + theme_boost * 0.9 + importance_boost * 0.7 + continuity_boost * 0.5)
+        scored.append((relevance, memory["id"]))
+
+    scored.sort(reverse=True)
+    return [memory_id for _, memory_id in scored[:limit]]
+
+
+def vectorized_top_k(system, query, user_name, limit=LIMIT):
+    return [memory["id"] for memory in system.score_memory_candidates(query, user_name, candidate_limit=limit)]
+
+
+def main():
+    rng = random.Random(5)
+    queries = [" ".join(rng.sample(WORDS, 3)) for _ in range(20)]
+    rows = []
+
+    for size in SIZES:
+        system = make_memory_system(size, max_memories=size)
+        matches = sum(len(system.text_index.match(q, min_score=0.03).keys) for q in queries) / len(queries)
+
+        agreement = 0.0
+        for query in queries:
+            expected = loop_top_k(system, query, CREATOR)
+            agreement += len(set(expected) & set(vectorized_top_k(system, query, CREATOR))) / len(expected)
+
+        loop_time = best_of(lambda: [loop_top_k(system, q, CREATOR) for q in queries], repeat=3) / len(queries)
+        vector_time = best_of(lambda: [vectorized_top_k(system, q, CREATOR) for q in queries], repeat=3) / len(queries)
+        rows.append((
+            size,
+            int(matches),
+            f"{loop_time * 1e3:.2f}",
+            f"{vector_time * 1e3:.2f}",
+            f"{loop_time / vector_time:.1f}x",
+            f"{agreement / len(queries):.3f}",
+        ))
+
+    print(f"\nRelevance scoring of all lexical matches, top-{LIMIT} (ms per query)")
+    print_table(("memories", "matches", "loop_ms", "vectorized_ms", "speedup", f"agreement@{LIMIT}"), rows)
+
+
+if __name__ == "__main__":
+    main()
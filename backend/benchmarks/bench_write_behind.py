@@ -0,0 +1,79 @@
+"""
+Benchmark: calling-thread cost of a memory change, inline saves vs write-behind.
+
+Each change updates one memory and journals it the way add_episodic_memory
+does, then calls _deferred_save(). Inline (MEMORY_WRITE_BEHIND=0) every
+MEMORY_SAVE_THRESHOLD-th change pays for the flush and fsync; with the
+persistence worker the change only notifies it. Reports the per-change
+latency percentiles seen by the caller, and the worker's save count, save
+duration and lag once it has drained.
+
+Usage:
+    python benchmarks/bench_write_behind.py [changes]
+"""
+
+import os
+import random
+import sys
+import time
+
+from common import make_memory_system, print_table
+
+CHANGES = 2_000
+MEMORIES = 5_000
+BACKENDS = ("json", "sqlite")
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def run(backend, write_behind, changes):
+    os.environ["MEMORY_WRITE_BEHIND"] = "1" if write_behind else "0"
+    system = make_memory_system(MEMORIES, storage_backend=backend)
+    system.force_save()
+    rng = random.Random(11)
+    memories = [system.episodic_memories[i] for i in range(0, MEMORIES, 7)]
+
+    latencies = []
+    for _ in range(changes):
+        memory = rng.choice(memories)
+        started = time.perf_counter()
+        memory["importance"] = rng.random()
+        system._journal("upsert", "episodic_memories", memory["id"], memory)
+        system.dirty = True
+        system.save_counter += 1
+        system._deferred_save()
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    system.force_save()
+    drain = time.perf_counter() - started
+    stats = system.persistence.get_stats() if system.persistence is not None else None
+    if system.persistence is not None:
+        system.persistence.stop()
+
+    latencies.sort()
+    return (
+        backend,
+        "write-behind" if write_behind else "inline",
+        f"{percentile(latencies, 0.5) * 1e6:.0f}",
+        f"{percentile(latencies, 0.99) * 1e6:.0f}",
+        f"{latencies[-1] * 1e3:.2f}",
+        f"{sum(latencies) * 1e3:.0f}",
+        f"{drain * 1e3:.1f}",
+        stats["saves"] if stats else "-",
+        f"{stats['avg_save_seconds'] * 1e3:.2f}" if stats else "-",
+        f"{stats['max_lag_seconds'] * 1e3:.1f}" if stats else "-",
+    )
+
+
+def main(changes=CHANGES):
+    rows = [run(backend, write_behind, changes) for backend in BACKENDS for write_behind in (False, True)]
+    print(f"\nCaller-side cost of {changes} memory changes (fsync on, {MEMORIES} memories)")
+    print_table(("backend", "mode", "p50_us", "p99_us", "max_ms", "caller_total_ms", "drain_ms",
+                 "worker_saves", "avg_save_ms", "max_lag_ms"), rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if sys.argv[1:] else CHANGES)
@@ -0,0 +1,112 @@
+"""
+Shared fixtures for the memory system benchmarks.
+
+Benchmarks build a QuantumEnhancedMemorySystem inside a scratch directory and
+bulk-load deterministic synthetic memories, bypassing the NLP enrichment in
+add_episodic_memory so that large corpora can be generated quickly.
+"""
+
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone, timedelta
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# memory_system opens the shared persistent store on import; keep it out of the source tree
+os.environ.setdefault("PERSISTENT_MEMORY_DB",
+                      os.path.join(tempfile.mkdtemp(prefix="roboto_bench_"), "persistent_memory.db"))
+# No background refresher polling live weather, news and crypto APIs
+os.environ.setdefault("REALTIME_BACKGROUND_REFRESH", "0")
+
+WORDS = [
+    "music", "guitar", "studio", "quantum", "memory", "coffee", "weather", "rain",
+    "python", "code", "deploy", "server", "family", "birthday", "travel", "mexico",
+    "houston", "song", "lyrics", "album", "dream", "future", "robot", "emotion",
+    "feeling", "happy", "tired", "project", "design", "database", "question",
+    "answer", "learning", "history", "science", "space", "stars", "moon", "ocean",
+    "movie", "book", "story", "friend", "work", "idea", "energy", "focus", "music",
+]
+THEMES = [
+    "music production", "quantum computing", "family", "travel plans", "code review",
+    "space exploration", "personal growth", "weather", "song writing", "ai vision",
+]
+EMOTIONS = ["joy", "curiosity", "sadness", "excitement", "contemplation", "neutral", "empathy"]
+
+
+def synthetic_memory(i, rng, now=None):
+    """Build one memory record shaped like add_episodic_memory output."""
+    now = now or datetime.now(timezone.utc)
+    user_input = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18)))
+    response = " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 30)))
+    emotion = rng.choice(EMOTIONS)
+    return {
+        "id": f"m{i:08d}",
+        "timestamp": (now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))).isoformat(),
+        "user_input": f"{user_input} #{i}",
+        "roboto_response": response,
+        "emotion": emotion,
+        "user_name": "Roberto Villarreal Martinez",
+        "importance": round(rng.uniform(0.2, 2.0), 3),
+        "sentiment": rng.choice(["positive", "neutral", "negative"]),
+        "key_themes": rng.sample(THEMES, rng.randint(0, 3)),
+        "emotional_intensity": round(rng.uniform(0.0, 1.0), 3),
+        "quantum_state": {
+            "superposition": rng.randint(0, 359),
+            "coherence": round(rng.uniform(0.0, 1.0), 3),
+            "entanglement_strength": 0.95,
+            "stability": 1.0,
+        },
+        "contextual_data": {},
+        "fractal_dimension": round(rng.uniform(1.0, 2.0), 3),
+    }
+
+
+def synthetic_memories(count, seed=42):
+    """Return ``count`` deterministic synthetic memories."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    return [synthetic_memory(i, rng, now) for i in range(count)]
+
+
+def make_memory_system(count=0, workdir=None, seed=42, **kwargs):
+    """Create a memory system in a scratch directory preloaded with ``count`` memories."""
+    workdir = workdir or tempfile.mkdtemp(prefix="roboto_bench_")
+    os.chdir(workdir)
+
+    import memory_system
+    memory_system.REAL_TIME_AVAILABLE = False
+    logging.disable(logging.INFO)
+
+    system = memory_system.QuantumEnhancedMemorySystem(
+        memory_file=os.path.join(workdir, "bench_memory.json"),
+        **kwargs
+    )
+    if count:
+        system.episodic_memories.extend(synthetic_memories(count, seed))
+        system._build_fingerprint_index()
+        system.text_index.rebuild()
+    return system
+
+
+def best_of(func, repeat=5):
+    """Return the best wall-clock time of ``repeat`` calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def print_table(headers, rows):
+    """Print a simple fixed-width results table."""
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(c).rjust(w) for c, w in zip(row, widths)))
@@ -0,0 +1,203 @@
+"""
+Hybrid Retrieval Engine - Shared-candidate multi-strategy memory retrieval
+Created for Roboto SAI
+
+Scores the memory corpus once per query: a single lexical pass over the
+quantum memory system produces a shared candidate pool, every candidate gets
+its lexical, temporal, emotional, contextual, entanglement and theme features
+computed once, and each retrieval strategy is a cheap re-rank of that pool.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Strategy name -> per-candidate feature used to re-rank the shared pool
+STRATEGY_FEATURES = {
+    "semantic_similarity": "lexical",
+    "temporal_relevance": "temporal",
+    "emotional_resonance": "emotional",
+    "contextual_matching": "contextual",
+    "quantum_entanglement": "entanglement",
+}
+
+# Score key each strategy writes onto its results (kept for existing consumers)
+STRATEGY_SCORE_KEYS = {
+    "semantic_similarity": "relevance_score",
+    "temporal_relevance": "temporal_score",
+    "emotional_resonance": "emotional_score",
+    "contextual_matching": "contextual_score",
+    "quantum_entanglement": "quantum_score",
+}
+
+DEFAULT_STRATEGY_WEIGHT = 0.2
+CANDIDATE_POOL_FACTOR = 6  # Lexical candidates fetched per result a strategy returns
+
+
+class CandidateSet:
+    """Scored candidate pool shared by every retrieval strategy for one query."""
+
+    def __init__(self, query: str, user_name: Optional[str], memories: List[dict]):
+        self.query = query
+        self.user_name = user_name
+        self.memories = memories
+
+    def __len__(self) -> int:
+        return len(self.memories)
+
+
+class HybridRetrievalEngine:
+    """
+    Multi-strategy retrieval over a QuantumEnhancedMemorySystem.
+
+    ``build_candidates`` performs the only corpus-level work (one TF-IDF
+    search plus relevance scoring of the top hits); ``rank`` and ``hybrid``
+    only sort the candidate pool they are given.
+    """
+
+    def __init__(self, memory_system, pool_factor: int = CANDIDATE_POOL_FACTOR):
+        self.memory_system = memory_system
+        self.pool_factor = pool_factor
+
+    def build_candidates(
+        self,
+        query: str,
+        user_name: Optional[str] = None,
+        limit: int = 5,
+        query_emotion: str = "neutral",
+        query_intensity: float = 0.5,
+        context_scorer: Optional[Callable[[dict], float]] = None,
+        candidate_ids: Optional[Iterable[str]] = None,
+    ) -> CandidateSet:
+        """
+        Score the corpus once and attach per-feature scores to each candidate.
+
+        ``candidate_ids`` (e.g. from the inverted indexes) limits scoring to a
+        pre-pruned subset of the corpus.
+        """
+        memories = self.memory_system.score_memory_candidates(
+            query, user_name, candidate_limit=max(1, limit) * self.pool_factor, candidate_ids=candidate_ids
+        )
+        now = datetime.now(timezone.utc)
+
+        for memory in memories:
+            relevance = memory.get("relevance_score", 0.0)
+            factors = memory.get("feature_scores", {})
+
+            # Emotion and intensity match against the query
+            emotional_match = 1.0 if memory.get("emotion", "neutral") == query_emotion else 0.5
+            intensity_match = 1.0 - abs(query_intensity - memory.get("emotional_intensity", 0.5))
+            emotional = (emotional_match * 0.7) + (intensity_match * 0.3)
+
+            contextual = 1.0
+            if context_scorer is not None:
+                try:
+                    contextual = context_scorer(memory)
+                except Exception:
+                    contextual = 1.0
+
+            entanglement_context = self.memory_system.get_entanglement_context(memory)
+            coherence = entanglement_context.get("quantum_coherence", 0.5)
+            quantum_score = (entanglement_context.get("entanglement_strength", 0.0) * 0.6) + (coherence * 0.4)
+
+            memory["quantum_context"] = entanglement_context
+            memory["retrieval_features"] = {
+                "lexical": relevance,
+                "semantic": factors.get("semantic", memory.get("semantic_similarity", 0.0)),
+                "temporal": relevance * self._temporal_boost(memory.get("timestamp"), now),
+                "emotional": relevance * emotional,
+                "contextual": relevance * contextual,
+                "entanglement": relevance * quantum_score,
+                "theme": factors.get("theme", 1.0),
+            }
+
+        return CandidateSet(query, user_name, memories)
+
+    def rank(self, candidates: CandidateSet, strategy: str, limit: int = 5) -> List[dict]:
+        """Re-rank the shared pool with one strategy and return its top ``limit``."""
+        feature = STRATEGY_FEATURES.get(strategy)
+        if feature is None:
+            raise ValueError(f"Unknown retrieval strategy: {strategy}")
+
+        if strategy == "semantic_similarity":
+            # Pool is already sorted by relevance; keep the diversity filter
+            return self.memory_system._select_diverse_memories(candidates.memories, limit)
+
+        score_key = STRATEGY_SCORE_KEYS[strategy]
+        for memory in candidates.memories:
+            memory[score_key] = memory["retrieval_features"][feature]
+
+        return sorted(candidates.memories, key=lambda m: m[score_key], reverse=True)[:limit]
+
+    def hybrid(
+        self,
+        candidates: CandidateSet,
+        limit: int = 5,
+        weights: Optional[Dict[str, float]] = None,
+    ) -> List[dict]:
+        """Combine every strategy's re-rank of the shared pool into one result list."""
+        weights = weights or {}
+        combined_scores = {}
+
+        for strategy in STRATEGY_FEATURES:
+            weight = weights.get(strategy, DEFAULT_STRATEGY_WEIGHT)
+            try:
+                ranked = self.rank(candidates, strategy, limit * 2)  # Get more candidates
+            except Exception as e:
+                logger.warning(f"Retrieval strategy {strategy} failed: {e}")
+                continue
+
+            for memory in ranked:
+                memory_id = memory.get("id")
+                if memory_id not in combined_scores:
+                    combined_scores[memory_id] = {
+                        "memory": memory,
+                        "total_score": 0.0,
+                        "algorithm_scores": {}
+                    }
+
+                base_score = memory.get("relevance_score", memory.get("similarity", 0.0))
+                combined_scores[memory_id]["algorithm_scores"][strategy] = base_score * weight
+                combined_scores[memory_id]["total_score"] += base_score * weight
+
+        sorted_memories = sorted(combined_scores.values(), key=lambda x: x["total_score"], reverse=True)
+
+        # Extract memories and apply theme diversity
+        diverse_memories = []
+        seen_themes = set()
+
+        for item in sorted_memories:
+            if len(diverse_memories) >= limit:
+                break
+
+            memory = item["memory"]
+            themes = set(memory.get("key_themes", []))
+
+            if not themes.intersection(seen_themes) or len(diverse_memories) < 2:
+                memory["hybrid_score"] = item["total_score"]
+                memory["algorithm_breakdown"] = item["algorithm_scores"]
+                diverse_memories.append(memory)
+                seen_themes.update(themes)
+
+        return diverse_memories
+
+    @staticmethod
+    def _temporal_boost(timestamp: Optional[str], now: datetime) -> float:
+        """Recency boost - newer memories get higher scores."""
+        try:
+            memory_time = datetime.fromisoformat(timestamp)
+        except (TypeError, ValueError):
+            return 1.0
+        if memory_time.tzinfo is None:
+            memory_time = memory_time.replace(tzinfo=timezone.utc)
+
+        hours_old = (now - memory_time).total_seconds() / 3600
+        if hours_old < 24:
+            return 1.5
+        elif hours_old < 168:  # 1 week
+            return 1.2
+        elif hours_old < 720:  # 1 month
+            return 1.0
+        return 0.8
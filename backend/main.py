@@ -166,7 +166,40 @@ async def lifespan(app: FastAPI):
     if emotion_simulator:
         state_path = os.getenv("ROBO_EMOTION_STATE_PATH", "./data/emotion_state.json")
         emotion_simulator.save_state(state_path)
-    
+
+    # Finish queued memory enrichments, then write out what the persistence workers hold
+    try:
+        from memory_enrichment import drain_all
+        drain_timeout = float(os.getenv("MEMORY_SHUTDOWN_ENRICHMENT_TIMEOUT", "10"))
+        if not await asyncio.to_thread(drain_all, drain_timeout):
+            logger.warning("Memory enrichment queue did not drain before shutdown")
+    except Exception as e:
+        logger.warning(f"Memory enrichment drain on shutdown failed: {e}")
+
+    # Commit writes still queued behind the async conversation store
+    try:
+        from persistent_async import shutdown_async_store
+        store_timeout = float(os.getenv("PERSISTENT_SHUTDOWN_TIMEOUT", "10"))
+        if not await asyncio.to_thread(shutdown_async_store, store_timeout):
+            logger.warning("Async conversation store did not finish its writes before shutdown")
+    except Exception as e:
+        logger.warning(f"Async conversation store shutdown failed: {e}")
+
+    try:
+        from memory_persistence import shutdown_all
+        flush_timeout = float(os.getenv("MEMORY_SHUTDOWN_FLUSH_TIMEOUT", "10"))
+        if not await asyncio.to_thread(shutdown_all, flush_timeout):
+            logger.warning("Memory persistence flush did not finish before shutdown")
+    except Exception as e:
+        logger.warning(f"Memory persistence flush on shutdown failed: {e}")
+
+    # Embedding indexes are only written at journal compaction; save what changed since
+    try:
+        from memory_embedding_index import save_all
+        await asyncio.to_thread(save_all)
+    except Exception as e:
+        logger.warning(f"Embedding index save on shutdown failed: {e}")
+
     logger.info("Roboto SAI 2026 Backend Shutting Down...")
 
 # Initialize FastAPI app
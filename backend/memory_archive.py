@@ -0,0 +1,239 @@
+"""
+Memory Archive - Compressed cold tier for episodic memories
+Created for Roboto SAI
+
+archive_old_memories used to mark every memory protected and keep all of
+them resident, so the episodic list, the memory file and every linear pass
+over them grew without bound. The archive gives cold memories somewhere to
+go without deleting any chat history: a batch of memories moves into an
+immutable segment file (columnar records, zstd or zlib compressed) under
+``<memory file>.archive/``, and a small index records, for every archived
+id, its segment and position, its content fingerprint and its theme, keyword,
+emotion and month postings (memory_inverted_index).
+
+Lookups by id read one segment (recently read segments stay decoded in a
+small LRU), search() ranks archived ids by the postings a query hits, and
+restore() hands a memory back to the resident set. Segments are never
+rewritten: the index is the source of truth, so a restored id simply stops
+being listed. Segments and the index are fsynced before the memory system
+drops the archived records from its own storage.
+"""
+
+import heapq
+import logging
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from memory_inverted_index import KEYWORD_STOPWORDS, index_memory, new_memory_index
+from memory_journal import _json_default
+from state_serializer import dumps_state, read_state
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_FORMAT = "columnar"
+SEGMENT_COMPRESSION = "zstd"  # zlib without the zstandard package
+INDEX_FILE = "index.bin"
+SEARCH_INDEXES = ("theme_index", "keyword_index")
+_WORD = re.compile(r"[\w']+")
+
+
+def _write_durable(path: str, obj) -> int:
+    """Atomically replace ``path`` with ``obj`` and fsync it"""
+    data = dumps_state(obj, SEGMENT_FORMAT, SEGMENT_COMPRESSION, default=_json_default)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(data)
+
+
+class MemoryArchive:
+    """Append-only archive segments of episodic memories, with an id/fingerprint/term index"""
+
+    def __init__(self, directory: str, segment_cache: int = 4):
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self.segment_cache = max(1, segment_cache)
+        self._lock = threading.RLock()
+        self._locations: Dict[str, Tuple[str, int, str]] = {}   # memory id -> (segment, position, fingerprint)
+        self._fingerprints: Dict[str, str] = {}            # fingerprint -> memory id
+        self._postings = new_memory_index()
+        self._segments: Dict[str, int] = {}                # segment -> bytes on disk
+        self._cache: "OrderedDict[str, list]" = OrderedDict()
+        self.stats = {"archived": 0, "restored": 0, "segment_reads": 0, "cache_hits": 0}
+        self._load_index()
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def archive(self, memories: List[dict], fingerprints: Iterable[str]) -> Optional[str]:
+        """Write ``memories`` to a new segment and index them; returns the segment name"""
+        if not memories:
+            return None
+        records = [dict(memory) for memory in memories]
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            segment = f"segment-{len(self._segments) + 1:06d}.bin"
+            while os.path.exists(os.path.join(self.directory, segment)):  # Left by a crash before the index
+                segment = f"segment-{int(segment[8:14]) + 1:06d}.bin"
+            size = _write_durable(os.path.join(self.directory, segment), {"memories": records})
+
+            self._segments[segment] = size
+            for position, (memory, fingerprint) in enumerate(zip(records, fingerprints)):
+                self._locations[memory["id"]] = (segment, position, fingerprint or "")
+                if fingerprint:
+                    self._fingerprints[fingerprint] = memory["id"]
+                index_memory(self._postings, memory)
+            self._cache[segment] = records
+            self._trim_cache()
+            self._save_index()
+            self.stats["archived"] += len(records)
+        logger.info(f"🗄️ Archived {len(records)} memories to {segment}")
+        return segment
+
+    def restore(self, memory_id: str) -> Optional[dict]:
+        """
+        Remove a memory from the archive and return it (None if it is not archived).
+        The index on disk keeps listing it until the next archive() call, so a crash
+        before the memory system saved it again cannot lose it; on load a resident
+        copy wins over an archived one.
+        """
+        with self._lock:
+            memory = self.get(memory_id)
+            if memory is None:
+                return None
+            fingerprint = self._locations.pop(memory_id)[2]
+            if self._fingerprints.get(fingerprint) == memory_id:
+                del self._fingerprints[fingerprint]
+            self.stats["restored"] += 1
+            return memory
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def __contains__(self, memory_id) -> bool:
+        return memory_id in self._locations
+
+    def __len__(self):
+        return len(self._locations)
+
+    def id_for_fingerprint(self, fingerprint: str) -> Optional[str]:
+        with self._lock:
+            memory_id = self._fingerprints.get(fingerprint)
+            return memory_id if memory_id in self._locations else None
+
+    def get(self, memory_id: str) -> Optional[dict]:
+        """An archived memory as a plain dict, or None"""
+        with self._lock:
+            location = self._locations.get(memory_id)
+            if location is None:
+                return None
+            segment, position, _ = location
+            try:
+                return dict(self._segment(segment)[position])
+            except (OSError, ValueError, IndexError) as e:
+                logger.warning(f"Failed to read archived memory {memory_id} from {segment}: {e}")
+                return None
+
+    def search(self, query: str, limit: int = 5, exclude=()) -> List[Tuple[dict, float]]:
+        """Archived memories whose themes or keywords the query mentions, best first"""
+        tokens = _WORD.findall(str(query).lower())
+        words = {word for word in tokens if word not in KEYWORD_STOPWORDS}
+        if not words or limit <= 0:
+            return []
+        # Themes are noun phrases of up to three words
+        keys = words | {" ".join(tokens[i:i + n]) for n in (2, 3) for i in range(len(tokens) - n + 1)}
+        with self._lock:
+            hits = Counter()  # memory id -> number of query keys it is posted under
+            for key in keys:
+                hits.update(set().union(*(self._postings[name].get(key, ()) for name in SEARCH_INDEXES)))
+            results = []
+            # Restored or excluded ids may crowd the top: widen the cut until it is enough
+            for cut in (limit * 4, len(hits)):
+                ranked = heapq.nsmallest(cut, hits.items(), key=lambda item: (-item[1], item[0]))
+                ranked = [(memory_id, count) for memory_id, count in ranked
+                          if memory_id in self._locations and memory_id not in exclude]
+                if len(ranked) >= limit or cut >= len(hits):
+                    break
+            for memory_id, count in ranked[:limit]:
+                memory = self.get(memory_id)
+                if memory is not None:
+                    results.append((memory, min(1.0, count / len(words))))
+            return results
+
+    def forget(self, memory_ids: Iterable[str]) -> int:
+        """Stop listing memories that are resident again; returns how many were dropped"""
+        with self._lock:
+            dropped = 0
+            for memory_id in memory_ids:
+                location = self._locations.pop(memory_id, None)
+                if location is not None:
+                    dropped += 1
+                    if self._fingerprints.get(location[2]) == memory_id:
+                        del self._fingerprints[location[2]]
+            if dropped:
+                self._save_index()
+            return dropped
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._locations)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self.stats, "memories": len(self._locations), "segments": len(self._segments),
+                    "bytes": sum(self._segments.values()), "cached_segments": len(self._cache)}
+
+    # ------------------------------------------------------------------
+    # Segments and index
+    # ------------------------------------------------------------------
+
+    def _segment(self, segment: str) -> list:
+        records = self._cache.get(segment)
+        if records is not None:
+            self._cache.move_to_end(segment)
+            self.stats["cache_hits"] += 1
+            return records
+        records = read_state(os.path.join(self.directory, segment))["memories"]
+        self.stats["segment_reads"] += 1
+        self._cache[segment] = records
+        self._trim_cache()
+        return records
+
+    def _trim_cache(self):
+        while len(self._cache) > self.segment_cache:
+            self._cache.popitem(last=False)
+
+    def _save_index(self):
+        postings = {name: {key: sorted(ids & self._locations.keys()) for key, ids in keys.items()}
+                    for name, keys in self._postings.items()}
+        _write_durable(self.index_path, {
+            "segments": self._segments,
+            "locations": {memory_id: list(location) for memory_id, location in self._locations.items()},
+            "fingerprints": {fp: memory_id for fp, memory_id in self._fingerprints.items()
+                             if memory_id in self._locations},
+            "postings": {name: {key: ids for key, ids in keys.items() if ids} for name, keys in postings.items()},
+        })
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            index = read_state(self.index_path)
+            self._segments = dict(index.get("segments", {}))
+            self._locations = {memory_id: (location[0], int(location[1]), location[2])
+                               for memory_id, location in index.get("locations", {}).items()}
+            self._fingerprints = dict(index.get("fingerprints", {}))
+            for name, keys in index.get("postings", {}).items():
+                if name in self._postings:
+                    self._postings[name] = {key: set(ids) for key, ids in keys.items()}
+            logger.info(f"🗄️ Memory archive: {len(self._locations)} memories in {len(self._segments)} segments")
+        except Exception as e:
+            logger.error(f"Failed to load memory archive index {self.index_path}: {e}")
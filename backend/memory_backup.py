@@ -0,0 +1,284 @@
+"""
+Memory Backup - Deduplicated, rotated backups of memory snapshots
+Created for Roboto SAI
+
+Every snapshot write used to leave another full copy of the memory file
+(``<memory_file>.backup_<stamp>``). Backups now live in
+``<memory_file>.backups/``:
+
+    chunks/<sha[:2]>/<sha>   zlib-compressed content chunks, stored once
+    manifests/<id>.json      chunk list of one backup
+    index.json               backups newest first (id, time, size, sha256)
+
+Chunk boundaries are content defined (after lines whose CRC32 matches a
+mask), so a snapshot that differs from the previous one only in a few
+records re-stores only the chunks around them. Retention keeps the newest
+``keep_last`` backups plus the newest backup of each of the latest
+``keep_hourly`` hours and ``keep_daily`` days. Restoring reads the index and
+walks it newest first until a backup reassembles with a matching checksum,
+without listing the backup directory.
+
+Command line:
+    python memory_backup.py list [--memory-file roboto_memory.json]
+    python memory_backup.py restore [--memory-file roboto_memory.json] [--snapshot ID]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+KEEP_LAST = 5
+KEEP_HOURLY = 24
+KEEP_DAILY = 7
+MIN_CHUNK = 16 * 1024
+MAX_CHUNK = 512 * 1024
+LINE_MASK = 0x3FF  # A line ends a chunk with probability 1/1024 (~64 KB chunks of indented JSON)
+
+
+def chunk_boundaries(data: bytes) -> List[int]:
+    """End offsets of content-defined chunks: cut after a line whose CRC32 & LINE_MASK == 0"""
+    ends = []
+    start = position = 0
+    for line in data.split(b"\n"):
+        position += len(line) + 1
+        size = position - start
+        if size >= MAX_CHUNK or (size >= MIN_CHUNK and not zlib.crc32(line) & LINE_MASK):
+            ends.append(min(position, len(data)))
+            start = position
+    if start < len(data):
+        ends.append(len(data))
+    return ends
+
+
+class MemoryBackupStore:
+    """Content-addressed, retention-managed backups of one memory file"""
+
+    def __init__(self, memory_file: str, directory: Optional[str] = None, keep_last: int = KEEP_LAST,
+                 keep_hourly: int = KEEP_HOURLY, keep_daily: int = KEEP_DAILY, executor=None):
+        self.memory_file = memory_file
+        self.directory = directory or f"{memory_file}.backups"
+        self.keep_last = keep_last
+        self.keep_hourly = keep_hourly
+        self.keep_daily = keep_daily
+        self._executor = executor
+        self._lock = threading.Lock()
+        self.stats = {"backups": 0, "chunks_written": 0, "chunks_reused": 0, "bytes_written": 0,
+                      "pruned": 0, "chunks_deleted": 0}
+
+    # ------------------------------------------------------------------
+    # Layout
+    # ------------------------------------------------------------------
+
+    def _chunk_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "chunks", digest[:2], digest)
+
+    def _manifest_path(self, snapshot_id: str) -> str:
+        return os.path.join(self.directory, "manifests", f"{snapshot_id}.json")
+
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, "index.json")
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _read_json(self, path: str, default):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def snapshots(self) -> List[dict]:
+        """Index entries of the stored backups, newest first"""
+        return self._read_json(self._index_path(), [])
+
+    # ------------------------------------------------------------------
+    # Backup
+    # ------------------------------------------------------------------
+
+    def backup(self, source: Optional[str] = None) -> Optional[str]:
+        """Back up ``source`` (default: the memory file) and apply retention. Returns the backup id."""
+        source = source or self.memory_file
+        if not os.path.exists(source):
+            return None
+        with open(source, "rb") as f:
+            data = f.read()
+
+        with self._lock:
+            index = self.snapshots()
+            checksum = hashlib.sha256(data).hexdigest()
+            if index and index[0]["sha256"] == checksum:
+                return index[0]["id"]  # Unchanged since the last backup
+
+            chunks = []
+            start = 0
+            for end in chunk_boundaries(data):
+                piece = data[start:end]
+                digest = hashlib.sha256(piece).hexdigest()
+                path = self._chunk_path(digest)
+                if os.path.exists(path):
+                    self.stats["chunks_reused"] += 1
+                else:
+                    compressed = zlib.compress(piece, 1)
+                    self._write_atomic(path, compressed)
+                    self.stats["chunks_written"] += 1
+                    self.stats["bytes_written"] += len(compressed)
+                chunks.append(digest)
+                start = end
+
+            now = datetime.now(timezone.utc)
+            snapshot_id = now.strftime("%Y%m%dT%H%M%S%fZ")
+            self._write_atomic(self._manifest_path(snapshot_id), json.dumps({"chunks": chunks}).encode("utf-8"))
+            index.insert(0, {"id": snapshot_id, "created": now.timestamp(), "size": len(data), "sha256": checksum})
+            index = self._prune(index)
+            self._write_atomic(self._index_path(), json.dumps(index, indent=1).encode("utf-8"))
+            self.stats["backups"] += 1
+            logger.debug(f"Memory backup {snapshot_id}: {len(chunks)} chunks")
+            return snapshot_id
+
+    def backup_async(self, source: Optional[str] = None):
+        """Run backup() on the executor so snapshot writes do not wait for it"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+
+        def run():
+            try:
+                return self.backup(source)
+            except Exception as e:
+                logger.warning(f"Memory backup failed: {e}")
+                return None
+
+        return self._executor.submit(run)
+
+    # ------------------------------------------------------------------
+    # Retention
+    # ------------------------------------------------------------------
+
+    def _retained(self, index: List[dict]) -> set:
+        keep = {entry["id"] for entry in index[:self.keep_last]}
+        for fmt, limit in (("%Y%m%d%H", self.keep_hourly), ("%Y%m%d", self.keep_daily)):
+            buckets = set()
+            for entry in index:  # Newest first: the first backup seen in a bucket is kept
+                bucket = time.strftime(fmt, time.gmtime(entry["created"]))
+                if bucket not in buckets and len(buckets) < limit:
+                    buckets.add(bucket)
+                    keep.add(entry["id"])
+        return keep
+
+    def _prune(self, index: List[dict]) -> List[dict]:
+        """Drop backups outside the retention policy and the chunks only they referenced"""
+        keep = self._retained(index)
+        expired = [entry for entry in index if entry["id"] not in keep]
+        if not expired:
+            return index
+        index = [entry for entry in index if entry["id"] in keep]
+
+        referenced = set()
+        for entry in index:
+            referenced.update(self._read_json(self._manifest_path(entry["id"]), {}).get("chunks", []))
+        for entry in expired:
+            manifest = self._manifest_path(entry["id"])
+            for digest in set(self._read_json(manifest, {}).get("chunks", [])) - referenced:
+                try:
+                    os.remove(self._chunk_path(digest))
+                    self.stats["chunks_deleted"] += 1
+                except OSError:
+                    pass
+            try:
+                os.remove(manifest)
+            except OSError:
+                pass
+            self.stats["pruned"] += 1
+        return index
+
+    # ------------------------------------------------------------------
+    # Restore
+    # ------------------------------------------------------------------
+
+    def _assemble(self, entry: dict) -> Optional[bytes]:
+        manifest = self._read_json(self._manifest_path(entry["id"]), None)
+        if not manifest:
+            return None
+        try:
+            parts = []
+            for digest in manifest["chunks"]:
+                with open(self._chunk_path(digest), "rb") as f:
+                    parts.append(zlib.decompress(f.read()))
+        except (OSError, zlib.error):
+            return None
+        data = b"".join(parts)
+        return data if hashlib.sha256(data).hexdigest() == entry["sha256"] else None
+
+    def latest(self, snapshot_id: Optional[str] = None) -> Tuple[Optional[dict], Optional[bytes]]:
+        """(entry, contents) of the newest backup that reassembles intact, or of ``snapshot_id``"""
+        for entry in self.snapshots():
+            if snapshot_id and entry["id"] != snapshot_id:
+                continue
+            data = self._assemble(entry)
+            if data is not None:
+                return entry, data
+            logger.warning(f"Memory backup {entry['id']} is incomplete or corrupt; trying an older one")
+        return None, None
+
+    def restore(self, snapshot_id: Optional[str] = None, target: Optional[str] = None) -> Optional[dict]:
+        """
+        Write the newest consistent backup (or ``snapshot_id``) over the
+        memory file. Journal segments of the replaced file are renamed to
+        ``*.pre_restore`` so they are not replayed onto the restored state.
+        """
+        target = target or self.memory_file
+        entry, data = self.latest(snapshot_id)
+        if entry is None:
+            return None
+        directory = os.path.dirname(target) or "."
+        prefix = os.path.basename(target) + ".journal."
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name[len(prefix):].isdigit():
+                os.replace(os.path.join(directory, name), os.path.join(directory, f"{name}.pre_restore"))
+        self._write_atomic(target, data)
+        logger.info(f"🔁 Memory restored from backup {entry['id']}")
+        return entry
+
+    def get_stats(self) -> dict:
+        index = self.snapshots()
+        return {**self.stats, "stored": len(index), "latest": index[0]["id"] if index else None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List or restore Roboto SAI memory backups")
+    parser.add_argument("command", choices=("list", "restore"))
+    parser.add_argument("--memory-file", default="roboto_memory.json")
+    parser.add_argument("--snapshot", help="backup id to restore (default: newest consistent)")
+    args = parser.parse_args(argv)
+
+    store = MemoryBackupStore(args.memory_file)
+    if args.command == "list":
+        for entry in store.snapshots():
+            created = datetime.fromtimestamp(entry["created"], timezone.utc).isoformat()
+            print(f"{entry['id']}  {created}  {entry['size']:>12,} bytes")
+        return 0
+    entry = store.restore(args.snapshot)
+    if entry is None:
+        print("No consistent backup found")
+        return 1
+    print(f"Restored {args.memory_file} from backup {entry['id']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,203 @@
+"""
+Memory Diversity - MinHash-based diversity selection for retrieved memories
+Created for Roboto SAI
+
+Retrieval returns a diverse top-k by skipping memories that are too similar
+to ones already chosen. Similarity mixes theme overlap, word overlap and time
+proximity with the weights of _calculate_memory_similarity. Word overlap is
+estimated from MinHash signatures, which are cached per memory in the feature
+store, so a selection never re-tokenizes memory text pair by pair.
+
+Strategies:
+    minhash  - the greedy threshold pass, vectorized: each pick rejects every
+               remaining candidate too similar to it in one array operation
+               (default)
+    mmr      - maximal marginal relevance over relevance and similarity
+    pairwise - the original pass comparing every pair with a caller supplied
+               similarity function (kept for comparison)
+"""
+
+import zlib
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+NUM_PERM = 64
+SIMILARITY_THRESHOLD = 0.75
+MMR_LAMBDA = 0.7
+TIME_WINDOW_HOURS = 24.0
+MIN_WINDOW = 32               # Candidates profiled per step of the threshold pass
+
+# Weights of the pairwise similarity (_calculate_memory_similarity)
+THEME_WEIGHT = 0.4
+WORD_WEIGHT = 0.4
+TIME_WEIGHT = 0.2
+
+STRATEGIES = ("minhash", "mmr", "pairwise")
+EMPTY_SLOT = np.uint32(0xFFFFFFFF)
+
+_rng = np.random.default_rng(0x5EED)
+_HASH_A = _rng.integers(1, 2 ** 63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_HASH_B = _rng.integers(0, 2 ** 63, NUM_PERM, dtype=np.uint64)
+
+
+def memory_tokens(memory: dict) -> set:
+    """Lower-cased word set of a memory's exchange (same tokens as the pairwise check)."""
+    return set(f"{memory.get('user_input', '')} {memory.get('roboto_response', '')}".lower().split())
+
+
+def minhash_signature(tokens: Sequence[str], num_perm: int = NUM_PERM) -> np.ndarray:
+    """MinHash signature of a token set; an empty set maps to all EMPTY_SLOT."""
+    if not tokens:
+        return np.full(num_perm, EMPTY_SLOT, dtype=np.uint32)
+    hashes = np.fromiter((zlib.crc32(token.encode("utf-8")) for token in tokens),
+                         dtype=np.uint64, count=len(tokens))
+    # Multiply-shift hashing: the high 32 bits of a*x + b (mod 2^64) per permutation
+    permuted = (hashes[:, None] * _HASH_A[None, :num_perm] + _HASH_B[None, :num_perm]) >> np.uint64(32)
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def _epoch(timestamp) -> float:
+    try:
+        value = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return float("nan")
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class _Profiles:
+    """Similarity features of a block of memories as arrays."""
+
+    def __init__(self, memories, signature_of, theme_codes: Dict[str, int]):
+        self.signatures = np.stack([signature_of(memory) for memory in memories])
+        self.empty = (self.signatures == EMPTY_SLOT).all(axis=1)
+        self.epochs = np.array([_epoch(memory.get("timestamp")) for memory in memories])
+
+        theme_lists = [
+            [theme_codes.setdefault(theme, len(theme_codes)) for theme in set(memory.get("key_themes", []))]
+            for memory in memories
+        ]
+        width = max(1, max(map(len, theme_lists), default=0))
+        self.themes = np.full((len(memories), width), -1, dtype=np.int64)
+        for row, codes in enumerate(theme_lists):
+            self.themes[row, :len(codes)] = codes
+        self.theme_counts = (self.themes >= 0).sum(axis=1)
+
+    def similarity_to(self, other: "_Profiles", index: int, time_window_hours: float) -> np.ndarray:
+        """Estimated pairwise similarity of every memory in this block to ``other[index]``."""
+        word = (self.signatures == other.signatures[index]).mean(axis=1)
+        word[self.empty | other.empty[index]] = 0.0
+
+        codes = other.themes[index][other.themes[index] >= 0]
+        shared = (self.themes[:, :, None] == codes).any(axis=2).sum(axis=1)
+        union = self.theme_counts + len(codes) - shared
+        theme = np.where((self.theme_counts > 0) & (len(codes) > 0), shared / np.maximum(union, 1), 0.0)
+
+        hours = np.abs(self.epochs - other.epochs[index]) / 3600
+        time_similarity = np.maximum(0.0, 1.0 - hours / time_window_hours)
+        time_similarity[np.isnan(time_similarity)] = 0.0
+
+        return THEME_WEIGHT * theme + WORD_WEIGHT * word + TIME_WEIGHT * time_similarity
+
+
+class DiversitySelector:
+    """Pick a relevant but non-redundant top-k from memories sorted by relevance."""
+
+    def __init__(self, strategy: str = "minhash", threshold: float = SIMILARITY_THRESHOLD,
+                 mmr_lambda: float = MMR_LAMBDA, time_window_hours: float = TIME_WINDOW_HOURS):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown diversity strategy: {strategy}")
+        self.strategy = strategy
+        self.threshold = threshold
+        self.mmr_lambda = mmr_lambda
+        self.time_window_hours = time_window_hours
+
+    def select(self, memories: List[dict], limit: int,
+               signature_of: Optional[Callable[[dict], np.ndarray]] = None,
+               pairwise_similarity: Optional[Callable[[dict, dict], float]] = None) -> List[dict]:
+        """
+        Select up to ``limit`` memories. ``signature_of`` returns a memory's
+        cached MinHash signature; without it signatures are computed inline.
+        ``pairwise_similarity`` is required by the pairwise strategy.
+        """
+        if len(memories) <= limit:
+            return memories
+        signature_of = signature_of or (lambda memory: minhash_signature(memory_tokens(memory)))
+        if self.strategy == "pairwise":
+            return self._select_pairwise(memories, limit, pairwise_similarity)
+        if self.strategy == "mmr":
+            return self._select_mmr(memories, limit, signature_of)
+        return self._select_threshold(memories, limit, signature_of)
+
+    # ------------------------------------------------------------------
+    # Strategies
+    # ------------------------------------------------------------------
+
+    def _select_pairwise(self, memories, limit, similarity):
+        selected = [memories[0]]  # Always include the most relevant
+        for memory in memories[1:]:
+            if len(selected) >= limit:
+                break
+            if all(similarity(memory, chosen) <= self.threshold for chosen in selected):
+                selected.append(memory)
+        return selected
+
+    def _select_threshold(self, memories, limit, signature_of):
+        """
+        Same picks as the pairwise pass: the next pick is always the first
+        candidate not rejected by an earlier pick. Candidates are profiled in
+        growing windows so a mostly diverse pool only touches its head.
+        """
+        theme_codes: Dict[str, int] = {}
+        picks = []        # (profiles, index) of each selected memory
+        selected = []
+        start, window = 0, max(MIN_WINDOW, limit * 4)
+
+        while start < len(memories) and len(selected) < limit:
+            block = memories[start:start + window]
+            profiles = _Profiles(block, signature_of, theme_codes)
+            rejected = np.zeros(len(block), dtype=bool)
+            for other, index in picks:
+                rejected |= profiles.similarity_to(other, index, self.time_window_hours) > self.threshold
+
+            while len(selected) < limit:
+                open_rows = np.flatnonzero(~rejected)
+                if not len(open_rows):
+                    break
+                index = int(open_rows[0])
+                selected.append(block[index])
+                picks.append((profiles, index))
+                rejected[:index + 1] = True
+                rejected |= profiles.similarity_to(profiles, index, self.time_window_hours) > self.threshold
+
+            start += len(block)
+            window *= 4
+
+        return selected
+
+    def _select_mmr(self, memories, limit, signature_of):
+        count = len(memories)
+        profiles = _Profiles(memories, signature_of, {})
+
+        relevance = np.array([memory.get("relevance_score", np.nan) for memory in memories], dtype=float)
+        if np.isnan(relevance).any():
+            relevance = 1.0 - np.arange(count) / count  # Fall back to the input order
+        spread = relevance.max() - relevance.min()
+        relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones(count)
+
+        max_similarity = np.zeros(count)
+        available = np.ones(count, dtype=bool)
+        selected = []
+        for _ in range(limit):
+            scores = self.mmr_lambda * relevance - (1 - self.mmr_lambda) * max_similarity
+            scores[~available] = -np.inf
+            choice = int(np.argmax(scores))
+            selected.append(memories[choice])
+            available[choice] = False
+            np.maximum(max_similarity, profiles.similarity_to(profiles, choice, self.time_window_hours),
+                       out=max_similarity)
+
+        return selected
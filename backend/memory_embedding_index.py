@@ -0,0 +1,609 @@
+"""
+Memory Embedding Index - Local dense embeddings and nearest-neighbour search
+Created for Roboto SAI
+
+Embeds memory text on the CPU with hashed character n-grams (no model
+download, no external service) and answers nearest-neighbour queries by
+cosine similarity. Two search backends are available:
+
+    exact - one matrix-vector product over every live row
+    ivf   - inverted file: rows are bucketed under k-means centroids and a
+            query only scores the ``nprobe`` closest buckets
+
+New memories are embedded and appended one at a time. Bulk changes (loading,
+deduplication, compression) mark the index stale, and the next query
+reconciles it against the memory list by text checksum, so only new or
+changed memories are re-embedded. A lazy index (``eager=False``) embeds
+nothing on writes: every change only marks it stale, and it is built on its
+first query.
+
+The index is saved next to the memory file when the memory journal is
+compacted and at process exit (save_all), not on every memory save, and it
+is reloaded on start-up.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from memory_tfidf_index import MatchResult
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIM = 256
+MIN_CAPACITY = 1024
+EMBED_BATCH_SIZE = 4096
+COMPACTION_RATIO = 0.2            # Drop tombstoned rows once they are 20% of the index
+GATHER_MAX_FRACTION = 0.05        # Candidate sets above this share of rows go through the backend
+INDEX_FORMAT_VERSION = 1
+
+_indexes = weakref.WeakSet()      # Live indexes with a path, saved by save_all()
+_indexes_lock = threading.Lock()
+HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)   # Fibonacci hashing constant
+
+# IVF defaults
+IVF_MIN_ROWS = 20000              # Smaller indexes are searched exactly (about 1 ms)
+IVF_DEFAULT_NPROBE = 32
+IVF_TAIL_RATIO = 0.1              # Re-bucket once rows added since bucketing exceed this share
+IVF_RETRAIN_GROWTH = 4.0          # Retrain centroids once the index grew 4x since training
+KMEANS_ITERATIONS = 8
+KMEANS_SAMPLE_PER_LIST = 48
+
+
+def text_checksum(text: str) -> int:
+    return zlib.crc32(text.encode("utf-8"))
+
+
+class HashedNgramEmbedder:
+    """
+    Stateless feature hashing of character n-grams into ``dim`` dimensions.
+
+    Works on the lower-cased UTF-8 bytes of a whole batch at once: every
+    n-gram is packed into an integer, hashed to a signed bucket and summed
+    with one bincount, so embedding needs no per-token Python work.
+    """
+
+    def __init__(self, dim: int = DEFAULT_DIM, ngram_range: Tuple[int, int] = (3, 5)):
+        self.dim = dim
+        self.ngram_range = tuple(ngram_range)
+
+    @property
+    def config(self) -> dict:
+        return {"embedder": "hashed_ngram", "dim": self.dim, "ngram_range": list(self.ngram_range)}
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """L2-normalized float32 embeddings, one row per text."""
+        count = len(texts)
+        encoded = [f" {' '.join(text.lower().split())} ".encode("utf-8") for text in texts]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=count)
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+        docs = np.repeat(np.arange(count), lengths)
+
+        totals = np.zeros(count * self.dim)
+        low, high = self.ngram_range
+        for size in range(low, high + 1):
+            positions = len(data) - size + 1
+            if positions <= 0:
+                continue
+            grams = data[:positions].copy()
+            for offset in range(1, size):
+                grams = (grams << np.uint64(8)) | data[offset:offset + positions]
+            inside = docs[:positions] == docs[size - 1:]      # n-gram does not cross texts
+            hashed = (grams[inside] + np.uint64(size)) * HASH_MULTIPLIER
+            buckets = (hashed >> np.uint64(40)) % np.uint64(self.dim)
+            signs = np.where((hashed >> np.uint64(39)) & np.uint64(1), 1.0, -1.0)
+            totals += np.bincount(docs[:positions][inside] * self.dim + buckets.astype(np.int64),
+                                  weights=signs, minlength=count * self.dim)
+
+        matrix = totals.reshape(count, self.dim).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+class ExactSearch:
+    """Brute-force cosine search over every live row."""
+
+    name = "exact"
+
+    def reset(self) -> None:
+        pass
+
+    def prepare(self, index: "MemoryEmbeddingIndex") -> None:
+        """Bring the backend up to date with the index rows (called under the index lock)."""
+
+    def compacted(self, keep_rows: np.ndarray) -> None:
+        """Rows were renumbered to ``keep_rows`` order."""
+
+    def probe_rows(self, index: "MemoryEmbeddingIndex", query_vector: np.ndarray) -> Optional[np.ndarray]:
+        """Rows worth scoring for a query, or None for all rows."""
+        return None
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {}
+
+    def restore(self, state: Dict[str, np.ndarray], rows: int) -> None:
+        pass
+
+    def get_stats(self) -> dict:
+        return {"backend": self.name}
+
+
+class IVFSearch(ExactSearch):
+    """Inverted-file approximate search over spherical k-means buckets."""
+
+    name = "ivf"
+
+    def __init__(self, nlist: Optional[int] = None, nprobe: int = IVF_DEFAULT_NPROBE, seed: int = 0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self) -> None:
+        self.centroids: Optional[np.ndarray] = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._list_rows = np.zeros(0, dtype=np.int64)
+        self._list_offsets = np.zeros(1, dtype=np.int64)
+        self._bucketed_rows = 0        # Rows below this are in the inverted lists
+        self._trained_rows = 0
+        self.trainings = 0
+
+    def prepare(self, index) -> None:
+        rows = index.row_count
+        live = index.live_count
+        if live < IVF_MIN_ROWS:
+            return
+        if self.centroids is None or live > self._trained_rows * IVF_RETRAIN_GROWTH:
+            self._train(index)
+        elif rows - self._bucketed_rows > max(1024, IVF_TAIL_RATIO * rows):
+            self._bucket(index, self._bucketed_rows)
+
+    def compacted(self, keep_rows: np.ndarray) -> None:
+        if self.centroids is None:
+            return
+        self._bucketed_rows = int(np.count_nonzero(keep_rows < self._bucketed_rows))
+        self._assign = self._assign[keep_rows[:self._bucketed_rows]]
+        self._rebuild_lists()
+
+    def probe_rows(self, index, query_vector):
+        if self.centroids is None:
+            return None
+        nprobe = min(self.nprobe, len(self.centroids))
+        closest = np.argpartition(self.centroids @ query_vector, -nprobe)[-nprobe:]
+        parts = [self._list_rows[self._list_offsets[c]:self._list_offsets[c + 1]] for c in closest]
+        parts.append(np.arange(self._bucketed_rows, index.row_count))  # Not yet bucketed
+        return np.concatenate(parts)
+
+    def state(self):
+        if self.centroids is None:
+            return {}
+        return {
+            "ivf_centroids": self.centroids,
+            "ivf_assign": self._assign[:self._bucketed_rows],
+            "ivf_trained_rows": np.array([self._trained_rows]),
+        }
+
+    def restore(self, state, rows) -> None:
+        self.reset()
+        if "ivf_centroids" not in state:
+            return
+        self.centroids = state["ivf_centroids"].astype(np.float32)
+        self._assign = state["ivf_assign"].astype(np.int32)
+        self._bucketed_rows = min(len(self._assign), rows)
+        self._assign = self._assign[:self._bucketed_rows]
+        self._trained_rows = int(state["ivf_trained_rows"][0])
+        self._rebuild_lists()
+
+    def get_stats(self) -> dict:
+        sizes = np.diff(self._list_offsets) if self.centroids is not None else np.zeros(0)
+        return {
+            "backend": self.name,
+            "trained": self.centroids is not None,
+            "nlist": 0 if self.centroids is None else len(self.centroids),
+            "nprobe": self.nprobe,
+            "bucketed_rows": self._bucketed_rows,
+            "largest_list": int(sizes.max()) if len(sizes) else 0,
+            "trainings": self.trainings,
+        }
+
+    # Internals
+
+    def _train(self, index) -> None:
+        started = time.time()
+        live_rows = np.flatnonzero(index.alive[:index.row_count])
+        nlist = self.nlist or int(np.clip(np.sqrt(len(live_rows)), 16, 4096))
+        sample_size = min(len(live_rows), nlist * KMEANS_SAMPLE_PER_LIST)
+        sample = index.vectors[self._rng.choice(live_rows, sample_size, replace=False)]
+
+        centroids = sample[self._rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            members = sparse.csr_matrix(
+                (np.ones(sample_size, dtype=np.float32), (labels, np.arange(sample_size))),
+                shape=(nlist, sample_size)
+            )
+            sums = np.asarray(members @ sample)
+            empty = np.bincount(labels, minlength=nlist) == 0
+            sums[empty] = sample[self._rng.choice(sample_size, int(empty.sum()))]  # Re-seed empty lists
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = sums / norms
+
+        self.centroids = centroids.astype(np.float32)
+        self._trained_rows = len(live_rows)
+        self.trainings += 1
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._bucket(index, 0)
+        logger.info(f"IVF embedding index trained: {nlist} lists over {len(live_rows)} rows "
+                    f"in {time.time() - started:.2f}s")
+
+    def _bucket(self, index, start: int) -> None:
+        rows = index.row_count
+        assign = np.empty(rows - start, dtype=np.int32)
+        for offset in range(start, rows, EMBED_BATCH_SIZE * 4):
+            block = index.vectors[offset:min(rows, offset + EMBED_BATCH_SIZE * 4)]
+            assign[offset - start:offset - start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        self._assign = np.concatenate([self._assign[:start], assign])
+        self._bucketed_rows = rows
+        self._rebuild_lists()
+
+    def _rebuild_lists(self) -> None:
+        self._list_rows = np.argsort(self._assign, kind="stable").astype(np.int64)
+        counts = np.bincount(self._assign, minlength=len(self.centroids))
+        self._list_offsets = np.concatenate([[0], np.cumsum(counts)])
+
+
+EMBEDDING_BACKENDS = {"exact": ExactSearch, "ivf": IVFSearch}
+
+
+class MemoryEmbeddingIndex:
+    """
+    Dense embedding index keyed by memory id.
+
+    Rows are append-only: an edit tombstones the old row and appends a new
+    one. Like the TF-IDF index, each row can carry an integer key (the
+    memory's feature store slot) that ``match`` hands back with the scores.
+    """
+
+    def __init__(
+        self,
+        document_source: Callable[[], Iterable[tuple]],
+        path: Optional[str] = None,
+        backend: str = "exact",
+        embedder: Optional[HashedNgramEmbedder] = None,
+        eager: bool = True,
+        **backend_options,
+    ):
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {backend}")
+        # Callable returning (memory_id, text) or (memory_id, text, key) tuples for the full corpus
+        self._document_source = document_source
+        self.path = path
+        self.eager = eager                 # Embed on every write; lazy indexes only go stale
+        self.embedder = embedder or HashedNgramEmbedder()
+        self.backend = EMBEDDING_BACKENDS[backend](**backend_options)
+
+        self._lock = threading.RLock()
+        self._row_ids: List[Optional[str]] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._allocate(MIN_CAPACITY)
+        self._dead_rows = 0
+        self._stale = True                 # Reconcile with the document source before the next query
+        self._dirty = False                # Unsaved changes
+
+        self.stats = {
+            "queries": 0,
+            "rows_embedded": 0,
+            "syncs": 0,
+            "last_sync_seconds": 0.0,
+            "saves": 0,
+        }
+        if path:
+            with _indexes_lock:
+                _indexes.add(self)
+
+    @property
+    def row_count(self) -> int:
+        return len(self._row_ids)
+
+    @property
+    def live_count(self) -> int:
+        return len(self._id_to_row)
+
+    # ------------------------------------------------------------------
+    # Mutation API
+    # ------------------------------------------------------------------
+
+    def add(self, memory_id: str, text: str, key: int = -1) -> None:
+        """Embed and append (or replace) the row for a memory."""
+        if not self.eager:
+            self.mark_stale()
+            return
+        vector = self.embedder.embed([text])
+        with self._lock:
+            self._append_locked([memory_id], [text_checksum(text)], [key], vector)
+
+    def update(self, memory_id: str, text: str, key: int = -1) -> None:
+        self.add(memory_id, text, key)
+
+    def remove(self, memory_id: str) -> bool:
+        with self._lock:
+            if not self.eager:
+                self._stale = True
+                return memory_id in self._id_to_row
+            return self._remove_locked(memory_id)
+
+    def remap_keys(self, key_of: Callable[[str], int]) -> None:
+        """Look every row's key up again by memory id, after the key owner renumbered them."""
+        with self._lock:
+            for memory_id, row in self._id_to_row.items():
+                self._row_keys[row] = key_of(memory_id)
+
+    def mark_stale(self) -> None:
+        """The memory list changed in bulk; reconcile before the next query."""
+        with self._lock:
+            self._stale = True
+
+    def sync(self) -> None:
+        """Reconcile with the document source, embedding only new or changed text."""
+        with self._lock:
+            self._sync_locked()
+
+    # ------------------------------------------------------------------
+    # Query API
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, limit: int = 15,
+               candidate_ids: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """Return up to ``limit`` (memory_id, cosine_score) pairs, best first."""
+        with self._lock:
+            rows, scores = self._search_locked(query, limit, candidate_ids)
+            return [(self._row_ids[row], float(score)) for row, score in zip(rows, scores)]
+
+    def match(self, query: str, limit: int = 15,
+              candidate_ids: Optional[Iterable[str]] = None) -> MatchResult:
+        """Keys and cosine scores of the ``limit`` nearest rows (candidate filter applied)."""
+        with self._lock:
+            rows, scores = self._search_locked(query, limit, candidate_ids)
+            return MatchResult(self._row_keys[rows], scores, True)
+
+    def __contains__(self, memory_id) -> bool:
+        with self._lock:
+            return memory_id in self._id_to_row
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._id_to_row)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({
+                "live_rows": self.live_count,
+                "total_rows": self.row_count,
+                "tombstones": self._dead_rows,
+                "stale": self._stale,
+                "vector_bytes": int(self.vectors.nbytes),
+                **self.embedder.config,
+                **self.backend.get_stats(),
+            })
+            return stats
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: Optional[str] = None) -> bool:
+        """Write live rows (float16) and backend state atomically. Skipped when unchanged."""
+        path = path or self.path
+        with self._lock:
+            if not path or not self._dirty:
+                return False
+            if self._dead_rows:
+                self._compact_locked()
+            rows = self.row_count
+            meta = {"version": INDEX_FORMAT_VERSION, "backend": self.backend.name, **self.embedder.config}
+            arrays = {
+                "meta": np.array(json.dumps(meta)),
+                "ids": np.array(self._row_ids, dtype=str),
+                "checksums": self._checksums[:rows],
+                "vectors": self.vectors[:rows].astype(np.float16),
+                **self.backend.state(),
+            }
+            tmp = f"{path}.tmp.npz"
+            np.savez(tmp, **arrays)
+            os.replace(tmp, path)
+            self._dirty = False
+            self.stats["saves"] += 1
+            return True
+
+    def load(self, path: Optional[str] = None) -> bool:
+        """Load a saved index. Keys are re-attached on the next sync."""
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data["meta"]))
+                expected = {"version": INDEX_FORMAT_VERSION, **self.embedder.config}
+                if any(meta.get(name) != value for name, value in expected.items()):
+                    logger.warning(f"Ignoring embedding index {path}: built with {meta}")
+                    return False
+                ids = [str(memory_id) for memory_id in data["ids"]]
+                checksums = data["checksums"].astype(np.uint32)
+                vectors = data["vectors"].astype(np.float32)
+                backend_state = {name: data[name] for name in data.files if name.startswith("ivf_")}
+        except Exception as e:
+            logger.warning(f"Failed to load embedding index {path}: {e}")
+            return False
+
+        with self._lock:
+            self._row_ids = ids
+            self._id_to_row = {memory_id: row for row, memory_id in enumerate(ids)}
+            self._allocate(max(MIN_CAPACITY, len(ids)))
+            self.vectors[:len(ids)] = vectors
+            self._checksums[:len(ids)] = checksums
+            self.alive[:len(ids)] = True
+            self._dead_rows = 0
+            if meta.get("backend") == self.backend.name:
+                self.backend.restore(backend_state, len(ids))
+            else:
+                self.backend.reset()
+            self._stale = True
+            self._dirty = False
+        logger.info(f"Embedding index loaded: {len(ids)} rows from {path}")
+        return True
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _allocate(self, capacity: int) -> None:
+        self.vectors = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self._checksums = np.zeros(capacity, dtype=np.uint32)
+        self._row_keys = np.full(capacity, -1, dtype=np.int64)
+
+    def _ensure_capacity(self, size: int) -> None:
+        capacity = len(self.alive)
+        if size <= capacity:
+            return
+        grown = max(size, capacity * 2)
+        for name in ("vectors", "alive", "_checksums", "_row_keys"):
+            old = getattr(self, name)
+            new = np.zeros((grown,) + old.shape[1:], dtype=old.dtype)
+            if name == "_row_keys":
+                new[:] = -1
+            new[:capacity] = old
+            setattr(self, name, new)
+
+    def _append_locked(self, memory_ids, checksums, keys, vectors) -> None:
+        for memory_id in memory_ids:
+            self._remove_locked(memory_id)
+        start = self.row_count
+        end = start + len(memory_ids)
+        self._ensure_capacity(end)
+        self.vectors[start:end] = vectors
+        self._checksums[start:end] = checksums
+        self._row_keys[start:end] = keys
+        self.alive[start:end] = True
+        for offset, memory_id in enumerate(memory_ids):
+            self._row_ids.append(memory_id)
+            self._id_to_row[memory_id] = start + offset
+        self.stats["rows_embedded"] += len(memory_ids)
+        self._dirty = True
+
+    def _remove_locked(self, memory_id: str) -> bool:
+        row = self._id_to_row.pop(memory_id, None)
+        if row is None:
+            return False
+        self.alive[row] = False
+        self._dead_rows += 1
+        self._dirty = True
+        return True
+
+    def _sync_locked(self) -> None:
+        started = time.time()
+        seen = set()
+        pending = []
+        for document in self._document_source():
+            memory_id, text = document[0], document[1]
+            key = document[2] if len(document) > 2 else -1
+            seen.add(memory_id)
+            checksum = text_checksum(text)
+            row = self._id_to_row.get(memory_id)
+            if row is not None and self._checksums[row] == checksum:
+                self._row_keys[row] = key
+            else:
+                pending.append((memory_id, text, checksum, key))
+
+        for memory_id in [m for m in self._id_to_row if m not in seen]:
+            self._remove_locked(memory_id)
+        for offset in range(0, len(pending), EMBED_BATCH_SIZE):
+            batch = pending[offset:offset + EMBED_BATCH_SIZE]
+            vectors = self.embedder.embed([text for _, text, _, _ in batch])
+            self._append_locked([b[0] for b in batch], [b[2] for b in batch], [b[3] for b in batch], vectors)
+
+        if self._dead_rows > COMPACTION_RATIO * max(1, self.row_count):
+            self._compact_locked()
+        self._stale = False
+        self.stats["syncs"] += 1
+        self.stats["last_sync_seconds"] = time.time() - started
+        if pending:
+            logger.info(f"Embedding index synced: {len(pending)} memories embedded "
+                        f"in {self.stats['last_sync_seconds']:.2f}s")
+
+    def _compact_locked(self) -> None:
+        keep = np.flatnonzero(self.alive[:self.row_count])
+        self._row_ids = [self._row_ids[row] for row in keep]
+        self._id_to_row = {memory_id: row for row, memory_id in enumerate(self._row_ids)}
+        for name in ("vectors", "alive", "_checksums", "_row_keys"):
+            column = getattr(self, name)
+            column[:len(keep)] = column[keep]
+        self.alive[len(keep):] = False
+        self._row_keys[len(keep):] = -1
+        self._dead_rows = 0
+        self.backend.compacted(keep)
+
+    def _search_locked(self, query, limit, candidate_ids):
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+        if self._stale:
+            self._sync_locked()
+        if limit <= 0 or not self._id_to_row:
+            return empty
+        self.backend.prepare(self)
+        query_vector = self.embedder.embed([query])[0]
+        self.stats["queries"] += 1
+
+        rows = None
+        if candidate_ids is not None:
+            rows = np.fromiter((self._id_to_row[m] for m in candidate_ids if m in self._id_to_row), dtype=np.int64)
+            if not len(rows):
+                return empty
+            if len(rows) > GATHER_MAX_FRACTION * self.live_count:
+                probed = self.backend.probe_rows(self, query_vector)
+                if probed is not None:
+                    narrowed = probed[np.isin(probed, rows)]
+                    rows = narrowed if len(narrowed) >= limit else rows
+        else:
+            rows = self.backend.probe_rows(self, query_vector)
+
+        if rows is None:
+            scores = self.vectors[:self.row_count] @ query_vector
+            scores[~self.alive[:self.row_count]] = -np.inf
+            rows = np.arange(self.row_count)
+        else:
+            scores = self.vectors[rows] @ query_vector
+            scores[~self.alive[rows]] = -np.inf
+
+        count = min(limit, len(scores))
+        top = np.argpartition(scores, -count)[-count:] if count < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        top = top[np.isfinite(scores[top])]
+        return rows[top], scores[top]
+
+
+def save_all() -> int:
+    """Save every live index with unsaved changes (process shutdown); returns how many were written"""
+    with _indexes_lock:
+        indexes = list(_indexes)
+    saved = 0
+    for index in indexes:
+        try:
+            saved += index.save()
+        except Exception as e:
+            logger.warning(f"Failed to save embedding index {index.path}: {e}")
+    return saved
+
+
+atexit.register(save_all)
@@ -0,0 +1,139 @@
+"""
+Memory Enrichment - Bounded background enrichment queue for new memories
+Created for Roboto SAI
+
+add_episodic_memory used to analyze the text, fetch the real-time context,
+entangle the memory with the last 50, store the conversation in SQLite and
+run the periodic self-reflection before returning, so every chat reply
+waited for all of it. Writes now come in two phases: the memory system
+records the raw exchange and returns its id, and an EnrichmentQueue runs
+the rest on a small worker pool.
+
+The queue is bounded. When ``max_pending`` enrichments are already queued,
+submit() waits up to ``block_timeout`` seconds for a slot and then enriches
+on the caller's thread, so a burst of writes slows its callers down instead
+of growing the backlog without limit. wait() blocks until the queue is
+drained; drain_all() does that for every live queue and the FastAPI
+lifespan calls it before the persistence workers are flushed.
+"""
+
+import atexit
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_queues = weakref.WeakSet()
+_queues_lock = threading.Lock()
+
+
+class EnrichmentQueue:
+    """Runs ``enrich_fn(item)`` on a bounded worker pool, inline once the pool is saturated"""
+
+    def __init__(self, enrich_fn: Callable[[Any], None], workers: int = 2, max_pending: int = 256,
+                 block_timeout: float = 0.5, name: str = "memory-enrichment"):
+        self.enrich_fn = enrich_fn
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.block_timeout = block_timeout
+        self.name = name
+
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._cond = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0              # Submitted and not finished, queued or inline
+        self._stopping = False
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "inline": 0,
+                      "last_lag_seconds": 0.0, "max_lag_seconds": 0.0, "total_lag_seconds": 0.0}
+        with _queues_lock:
+            _queues.add(self)
+
+    def submit(self, item) -> bool:
+        """Enrich ``item`` in the background; returns False when it ran on the caller's thread"""
+        with self._cond:
+            self._pending += 1
+            self.stats["submitted"] += 1
+            stopping = self._stopping
+        submitted = time.monotonic()
+        if not stopping and self._slots.acquire(timeout=self.block_timeout):
+            try:
+                with self._cond:
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+                self._executor.submit(self._run, item, submitted, True)
+                return True
+            except RuntimeError:
+                self._slots.release()  # The pool was shut down under us
+        with self._cond:
+            self.stats["inline"] += 1
+        self._run(item, submitted, False)
+        return False
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every submitted item is enriched; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def stop(self, timeout: float = 10.0) -> bool:
+        """Drain the queue, then end the workers; later items are enriched by the caller"""
+        drained = self.wait(timeout)
+        with self._cond:
+            self._stopping = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=drained)
+        return drained
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            finished = self.stats["completed"] + self.stats["failed"]
+            return {
+                **self.stats,
+                "queue_depth": self._pending,
+                "max_pending": self.max_pending,
+                "workers": self.workers,
+                "avg_lag_seconds": self.stats["total_lag_seconds"] / finished if finished else 0.0,
+                "running": self._executor is not None and not self._stopping,
+            }
+
+    def _run(self, item, submitted: float, queued: bool):
+        try:
+            self.enrich_fn(item)
+            ok = True
+        except Exception as e:
+            logger.warning(f"Memory enrichment failed: {e}")
+            ok = False
+        finally:
+            if queued:
+                self._slots.release()
+        lag = time.monotonic() - submitted
+        with self._cond:
+            self._pending -= 1
+            self.stats["completed" if ok else "failed"] += 1
+            self.stats["last_lag_seconds"] = lag
+            self.stats["max_lag_seconds"] = max(self.stats["max_lag_seconds"], lag)
+            self.stats["total_lag_seconds"] += lag
+            self._cond.notify_all()
+
+
+def drain_all(timeout: float = 10.0) -> bool:
+    """Drain and stop every live queue (process shutdown); True when all of them finished"""
+    with _queues_lock:
+        queues = list(_queues)
+    drained = all([queue.stop(timeout) for queue in queues])
+    if queues:
+        logger.info(f"🧩 Memory enrichment drained on shutdown ({len(queues)} queues)")
+    return drained
+
+
+atexit.register(drain_all)
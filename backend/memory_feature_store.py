@@ -0,0 +1,258 @@
+"""
+Memory Feature Store - Columnar per-memory scoring features
+Created for Roboto SAI
+
+Keeps the numeric features used by relevance ranking in NumPy columns that
+are filled once when a memory is stored: epoch timestamp, importance,
+emotional intensity, interned user / sentiment / emotion codes and a padded
+matrix of interned theme ids. Retrieval scores every lexical match with a
+handful of vectorized operations instead of a Python loop per memory.
+MinHash signatures for diversity selection are computed on first use and
+cached until the memory changes.
+
+Slots are stable: a memory keeps its slot until it is removed or the store
+is compacted, so other indexes (the TF-IDF index) can store the slot as a row
+key. Compaction reclaims tombstoned slots once they make up half the table and
+renumbers the live ones; the owner then re-keys those indexes.
+"""
+
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from memory_diversity import NUM_PERM, memory_tokens, minhash_signature
+
+logger = logging.getLogger(__name__)
+
+MAX_THEMES = 8        # Theme ids kept per memory (_extract_themes returns at most 5)
+MIN_CAPACITY = 1024
+COMPACTION_RATIO = 0.5         # Compact once half the slots are tombstones
+COMPACTION_MIN_TOMBSTONES = 64  # ...but never for fewer than this many
+
+# 1-D column name -> (dtype, fill value for empty slots)
+COLUMNS = {
+    "epoch": (np.float64, np.nan),
+    "importance": (np.float64, 0.0),
+    "intensity": (np.float64, 0.0),
+    "user_code": (np.int32, -1),
+    "sentiment_code": (np.int32, -1),
+    "emotion_code": (np.int32, -1),
+    "signature_ready": (bool, False),
+    "alive": (bool, False),
+}
+
+
+def timestamp_to_epoch(timestamp) -> float:
+    """Epoch seconds for an ISO timestamp (naive values are local time), NaN if unparsable."""
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError, OverflowError, OSError):
+        return float("nan")
+
+
+def _number(value, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class MemoryFeatureStore:
+    """Columnar feature table keyed by memory id; slots are appended and compacted in bulk."""
+
+    def __init__(self, capacity: int = MIN_CAPACITY, max_themes: int = MAX_THEMES, num_perm: int = NUM_PERM):
+        self.max_themes = max_themes
+        self.num_perm = num_perm
+        self._lock = threading.RLock()
+        self._slot_ids: List[Optional[str]] = []
+        self._id_to_slot: Dict[str, int] = {}
+        self._vocabularies: Dict[str, Dict[str, int]] = {
+            "user": {}, "sentiment": {}, "emotion": {}, "theme": {},
+        }
+        self.compactions = 0
+        self._allocate(max(capacity, MIN_CAPACITY))
+
+    # ------------------------------------------------------------------
+    # Mutation API
+    # ------------------------------------------------------------------
+
+    def add(self, memory: dict) -> int:
+        """Insert or refresh the features of a memory and return its slot."""
+        memory_id = memory["id"]
+        with self._lock:
+            slot = self._id_to_slot.get(memory_id)
+            if slot is None:
+                slot = len(self._slot_ids)
+                self._ensure_capacity(slot + 1)
+                self._slot_ids.append(memory_id)
+                self._id_to_slot[memory_id] = slot
+            self._write_locked(slot, memory)
+            return slot
+
+    def remove(self, memory_id: str) -> bool:
+        """Tombstone a memory's slot."""
+        with self._lock:
+            slot = self._id_to_slot.pop(memory_id, None)
+            if slot is None:
+                return False
+            self.alive[slot] = False
+            self._slot_ids[slot] = None
+            return True
+
+    def sync(self, memories: Iterable[dict]) -> None:
+        """Match the store to a memory list: refresh present ids, tombstone the rest."""
+        with self._lock:
+            seen = set()
+            for memory in memories:
+                if memory.get("id") and memory["id"] not in seen:
+                    seen.add(memory["id"])
+                    self.add(memory)
+            for memory_id in [m for m in self._id_to_slot if m not in seen]:
+                self.remove(memory_id)
+
+    def needs_compaction(self) -> bool:
+        """True once tombstoned slots pass the compaction threshold."""
+        with self._lock:
+            tombstones = len(self._slot_ids) - len(self._id_to_slot)
+            return tombstones >= COMPACTION_MIN_TOMBSTONES and tombstones >= COMPACTION_RATIO * len(self._slot_ids)
+
+    def compact(self) -> int:
+        """Drop tombstoned slots and renumber the live ones in order. Returns the slots reclaimed.
+
+        Slot numbers held elsewhere are stale afterwards; look them up again with ``slot_of``.
+        """
+        with self._lock:
+            keep = np.flatnonzero(self.alive[:len(self._slot_ids)])
+            reclaimed = len(self._slot_ids) - len(keep)
+            if not reclaimed:
+                return 0
+            capacity = len(self.alive)
+            for name, (dtype, fill) in COLUMNS.items():
+                column = np.full(capacity, fill, dtype=dtype)
+                column[:len(keep)] = getattr(self, name)[keep]
+                setattr(self, name, column)
+            for name, (dtype, fill, width) in self._matrices().items():
+                matrix = np.full((capacity, width), fill, dtype=dtype)
+                matrix[:len(keep)] = getattr(self, name)[keep]
+                setattr(self, name, matrix)
+            self._slot_ids = [self._slot_ids[slot] for slot in keep]
+            self._id_to_slot = {memory_id: slot for slot, memory_id in enumerate(self._slot_ids)}
+            self.compactions += 1
+            return reclaimed
+
+    # ------------------------------------------------------------------
+    # Query API
+    # ------------------------------------------------------------------
+
+    def slot_of(self, memory_id: str) -> int:
+        with self._lock:
+            return self._id_to_slot.get(memory_id, -1)
+
+    def id_of(self, slot: int) -> Optional[str]:
+        with self._lock:
+            return self._slot_ids[slot] if 0 <= slot < len(self._slot_ids) else None
+
+    def code(self, vocabulary: str, value) -> int:
+        """Interned code of a value, or -1 if it was never stored."""
+        with self._lock:
+            return self._vocabularies[vocabulary].get(value, -1)
+
+    def signature(self, memory: dict) -> np.ndarray:
+        """MinHash signature of a memory's words, cached in its slot."""
+        with self._lock:
+            slot = self._id_to_slot.get(memory.get("id"), -1)
+            if slot >= 0 and self.signature_ready[slot]:
+                return self.signatures[slot].copy()
+        signature = minhash_signature(memory_tokens(memory), self.signatures.shape[1])
+        with self._lock:
+            if slot >= 0 and self._slot_ids[slot] == memory.get("id"):
+                self.signatures[slot] = signature
+                self.signature_ready[slot] = True
+        return signature
+
+    def theme_overlap(self, slots: np.ndarray, themes: Iterable[str]) -> np.ndarray:
+        """Number of ``themes`` each slot's memory shares (exact, like a set intersection)."""
+        overlap = np.zeros(len(slots), dtype=np.int32)
+        codes = {self.code("theme", theme) for theme in themes} - {-1}
+        if not codes or not len(slots):
+            return overlap
+        # Theme ids are unique within a row, so matching cells count shared themes
+        return np.isin(self.theme_ids[slots], list(codes)).sum(axis=1, dtype=np.int32)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._id_to_slot)
+
+    def __contains__(self, memory_id) -> bool:
+        with self._lock:
+            return memory_id in self._id_to_slot
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            columns = [getattr(self, name) for name in COLUMNS] + [self.theme_ids, self.signatures]
+            return {
+                "live_slots": len(self._id_to_slot),
+                "total_slots": len(self._slot_ids),
+                "capacity": len(self.alive),
+                "compactions": self.compactions,
+                "column_bytes": int(sum(column.nbytes for column in columns)),
+                "vocabulary_sizes": {name: len(vocab) for name, vocab in self._vocabularies.items()},
+            }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _matrices(self):
+        # 2-D column name -> (dtype, fill value, width)
+        return {
+            "theme_ids": (np.int32, -1, self.max_themes),
+            "signatures": (np.uint32, 0, self.num_perm),
+        }
+
+    def _allocate(self, capacity: int) -> None:
+        for name, (dtype, fill) in COLUMNS.items():
+            setattr(self, name, np.full(capacity, fill, dtype=dtype))
+        for name, (dtype, fill, width) in self._matrices().items():
+            setattr(self, name, np.full((capacity, width), fill, dtype=dtype))
+
+    def _ensure_capacity(self, size: int) -> None:
+        capacity = len(self.alive)
+        if size <= capacity:
+            return
+        grown = max(size, capacity * 2)
+        for name, (dtype, fill) in COLUMNS.items():
+            column = np.full(grown, fill, dtype=dtype)
+            column[:capacity] = getattr(self, name)
+            setattr(self, name, column)
+        for name, (dtype, fill, width) in self._matrices().items():
+            matrix = np.full((grown, width), fill, dtype=dtype)
+            matrix[:capacity] = getattr(self, name)
+            setattr(self, name, matrix)
+
+    def _intern(self, vocabulary: str, value) -> int:
+        vocab = self._vocabularies[vocabulary]
+        code = vocab.get(value)
+        if code is None:
+            code = vocab[value] = len(vocab)
+        return code
+
+    def _write_locked(self, slot: int, memory: dict) -> None:
+        self.epoch[slot] = timestamp_to_epoch(memory.get("timestamp"))
+        self.importance[slot] = _number(memory.get("importance"), 0.5)
+        self.intensity[slot] = _number(memory.get("emotional_intensity"), 0.5)
+        self.user_code[slot] = self._intern("user", memory.get("user_name"))
+        self.sentiment_code[slot] = self._intern("sentiment", memory.get("sentiment", "neutral"))
+        self.emotion_code[slot] = self._intern("emotion", memory.get("emotion", "neutral"))
+
+        themes = list(dict.fromkeys(memory.get("key_themes", []) or []))
+        if len(themes) > self.max_themes:
+            logger.debug(f"Memory {memory.get('id')} has {len(themes)} themes, keeping {self.max_themes}")
+        self.theme_ids[slot] = -1
+        for position, theme in enumerate(themes[:self.max_themes]):
+            self.theme_ids[slot, position] = self._intern("theme", theme)
+        self.signature_ready[slot] = False  # Recomputed lazily from the new text
+        self.alive[slot] = True
@@ -0,0 +1,186 @@
+"""
+Memory Inverted Index - User/theme/emotion/temporal postings for episodic memories
+Created for Roboto SAI
+
+Maintains the ``RobotoSAI.memory_index`` structure (index name -> key -> set of
+memory ids) one memory at a time, removing a memory's postings again when it
+is edited, removed or archived, and turns retrieval scopes such as a user or
+a time range into a candidate id set so scoring only touches matching memories.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Iterable, Optional, Set, Tuple
+
+INDEX_NAMES = ("user_index", "theme_index", "emotion_index", "temporal_index", "daily_index",
+               "keyword_index", "quantum_index")
+KEYWORD_STOPWORDS = {'that', 'this', 'with', 'from', 'they', 'have', 'been'}
+MAX_KEYWORDS_PER_MEMORY = 10
+
+
+def new_memory_index() -> dict:
+    """Return an empty index structure."""
+    return {name: {} for name in INDEX_NAMES}
+
+
+def _parse_timestamp(timestamp) -> Optional[datetime]:
+    try:
+        value = timestamp if isinstance(timestamp, datetime) else datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return None
+    return _as_utc(value)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def month_key(timestamp) -> Optional[str]:
+    """Temporal bucket (YYYY-MM, UTC) for an ISO timestamp or datetime."""
+    memory_date = _parse_timestamp(timestamp)
+    return f"{memory_date.year}-{memory_date.month:02d}" if memory_date else None
+
+
+def _postings(memory: dict, all_keywords: bool = False) -> Iterable[Tuple[str, str]]:
+    """(index name, key) pairs a memory is posted under; ``all_keywords`` lifts the keyword cap."""
+    yield "user_index", memory.get("user_name", "unknown")
+    for theme in memory.get("key_themes", []):
+        yield "theme_index", theme
+    yield "emotion_index", memory.get("emotion", "neutral")
+
+    memory_date = _parse_timestamp(memory.get("timestamp", ""))
+    if memory_date:
+        yield "temporal_index", f"{memory_date.year}-{memory_date.month:02d}"
+        yield "daily_index", memory_date.date().isoformat()
+
+    # Keyword index (from themes and content)
+    keywords = set(memory.get("key_themes", []))
+    content_words = f"{memory.get('user_input', '')} {memory.get('roboto_response', '')}".lower()
+    for word in content_words.split():
+        if len(word) > 4 and word not in KEYWORD_STOPWORDS:
+            keywords.add(word)
+    for keyword in list(keywords)[:None if all_keywords else MAX_KEYWORDS_PER_MEMORY]:
+        yield "keyword_index", keyword
+
+    # Quantum index, grouped by 30-degree segments
+    quantum_state = memory.get("quantum_state", {}).get("superposition", 0)
+    yield "quantum_index", f"q_{int(quantum_state // 30)}"
+
+
+def index_memory(memory_index: dict, memory: dict) -> int:
+    """Add one memory to every index. Returns the number of new postings."""
+    memory_id = memory["id"]
+    added = 0
+    for index_name, key in _postings(memory):
+        ids = memory_index[index_name].setdefault(key, set())
+        if memory_id not in ids:
+            ids.add(memory_id)
+            added += 1
+    return added
+
+
+def unindex_memory(memory_index: dict, memory: dict) -> int:
+    """
+    Drop one memory from every index, as it was when indexed (pass the record
+    from before an edit). Every content word is tried, since the capped keyword
+    choice can differ between the raw and the enriched record. Emptied keys are
+    removed. Returns the postings dropped.
+    """
+    memory_id = memory["id"]
+    removed = 0
+    for index_name, key in _postings(memory, all_keywords=True):
+        ids = memory_index[index_name].get(key)
+        if ids and memory_id in ids:
+            ids.discard(memory_id)
+            removed += 1
+            if not ids:
+                del memory_index[index_name][key]
+    return removed
+
+
+def _months_between(first: date, last: date) -> Iterable[Tuple[int, int]]:
+    year, month = first.year, first.month
+    while (year, month) <= (last.year, last.month):
+        yield year, month
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+
+
+def _time_range_ids(memory_index, start, end, get_memory) -> Set[str]:
+    """Memory ids with start <= timestamp <= end (either bound may be None)."""
+    temporal = memory_index["temporal_index"]
+    daily = memory_index["daily_index"]
+    start = _as_utc(start) if start is not None else None
+    end = _as_utc(end) if end is not None else None
+
+    if start is None or end is None:
+        if not daily:
+            return set()
+        days = [day for day, ids in daily.items() if ids]
+    first = start.date() if start is not None else date.fromisoformat(min(days))
+    last = end.date() if end is not None else date.fromisoformat(max(days))
+
+    # Whole months use month postings, partial months their day postings, and
+    # only the days cut by an explicit bound need per-memory timestamp checks
+    edge_days = {bound.date() for bound in (start, end) if bound is not None}
+    edge_months = {(day.year, day.month) for day in edge_days}
+    in_range: Set[str] = set()
+
+    for year, month in _months_between(first, last):
+        if (year, month) not in edge_months:
+            in_range |= temporal.get(f"{year}-{month:02d}", set())
+            continue
+
+        day = max(first, date(year, month, 1))
+        while day.month == month and day <= last:
+            ids = daily.get(day.isoformat(), set())
+            if day in edge_days and get_memory is not None:
+                for memory_id in ids:
+                    memory = get_memory(memory_id)
+                    memory_time = _parse_timestamp(memory.get("timestamp", "")) if memory else None
+                    if memory_time is None:
+                        continue
+                    if (start is None or memory_time >= start) and (end is None or memory_time <= end):
+                        in_range.add(memory_id)
+            else:
+                in_range |= ids
+            day += timedelta(days=1)
+
+    return in_range
+
+
+def select_candidate_ids(
+    memory_index: dict,
+    user_name: Optional[str] = None,
+    time_range: Optional[Tuple[Optional[datetime], Optional[datetime]]] = None,
+    emotions: Optional[Iterable[str]] = None,
+    themes: Optional[Iterable[str]] = None,
+    get_memory: Optional[Callable[[str], Optional[dict]]] = None,
+) -> Optional[Set[str]]:
+    """
+    Intersect the postings for each requested scope.
+
+    Returns None when no scope restricts the corpus (score everything), or the
+    candidate id set otherwise. A user with no indexed memories is not treated
+    as a restriction, since stored memories may use a canonical user name.
+    ``get_memory`` resolves ids so the boundary days are filtered exactly.
+    """
+    candidates: Optional[Set[str]] = None
+
+    def restrict(ids: Set[str]):
+        nonlocal candidates
+        candidates = set(ids) if candidates is None else candidates & ids
+
+    if user_name and memory_index["user_index"].get(user_name):
+        restrict(memory_index["user_index"][user_name])
+
+    if emotions:
+        restrict(set().union(*(memory_index["emotion_index"].get(e, set()) for e in emotions)))
+
+    if themes:
+        restrict(set().union(*(memory_index["theme_index"].get(t, set()) for t in themes)))
+
+    if time_range and (time_range[0] or time_range[1]):
+        restrict(_time_range_ids(memory_index, time_range[0], time_range[1], get_memory))
+
+    return candidates
@@ -0,0 +1,408 @@
+"""
+Memory Journal - Append-only change journal for the memory system
+Created for Roboto SAI
+
+Saving used to rewrite the whole memory file on every save. The journal
+instead appends only what changed since the last save: each change is a
+small record framed by its payload length and CRC32. Background compaction
+periodically writes a full snapshot (the regular memory file) and drops
+the journal segments it covers; loading reads the snapshot and replays the
+journal tail on top of it.
+
+Record operations (``section`` names a top-level key of the snapshot):
+    upsert - replace or append a record of a list section, matched by "id"
+    delete - remove a record of a list section by id
+    put    - set ``key`` of a dict section
+    append - append to a list section, or to list ``key`` of a dict section
+    set    - replace a whole section
+
+Segments are ``<memory_file>.journal.<seq>``. The snapshot stores the
+first segment it does not cover as ``journal_seq``. A torn or corrupt
+record (crash mid-append) ends replay of its segment, and the segment is
+truncated back to its last intact record.
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import Mapping
+from itertools import count
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from state_serializer import read_state
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct("<II")   # payload length, CRC32 of the payload
+COMPACTION_RATIO = 0.5          # Compact once the journal reaches this share of the snapshot size
+COMPACTION_MIN_BYTES = 1 << 20  # ...and at least this many bytes
+OPS = ("upsert", "delete", "put", "append", "set")
+
+
+def _json_default(value):
+    """Encode NumPy scalars and arrays that end up in memory records, and compact records"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def snapshot_value(value):
+    """The value as it is now: mappings (including compact records) are copied to plain dicts"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    return value
+
+
+def encode_record(record: dict) -> bytes:
+    """Frame one record: length and checksum header followed by compact JSON"""
+    payload = json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=_json_default).encode("utf-8")
+    return HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(data: bytes):
+    """Yield (record, end_offset) for each intact record; stops at the first torn or corrupt one"""
+    offset = 0
+    while offset + HEADER.size <= len(data):
+        length, checksum = HEADER.unpack_from(data, offset)
+        start = offset + HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return
+        try:
+            record = json.loads(payload)
+        except ValueError:
+            return
+        offset = start + length
+        yield record, offset
+
+
+def apply_record(state: dict, record: dict, positions: Dict[str, dict]):
+    """
+    Apply one record to snapshot-format ``state``. ``positions`` caches
+    id -> list index per list section; deleted rows become None and are
+    dropped by finish_replay.
+    """
+    op, section = record["op"], record["section"]
+    if op == "set":
+        state[section] = record["value"]
+    elif op in ("upsert", "delete"):
+        rows = state.setdefault(section, [])
+        index = positions.get(section)
+        if index is None:
+            index = positions[section] = {row["id"]: i for i, row in enumerate(rows)
+                                          if isinstance(row, dict) and "id" in row}
+        key = record["key"]
+        position = index.get(key)
+        if op == "delete":
+            if position is not None:
+                rows[position] = None
+                del index[key]
+        elif position is not None:
+            rows[position] = record["value"]
+        else:
+            index[key] = len(rows)
+            rows.append(record["value"])
+    elif op == "put":
+        state.setdefault(section, {})[record["key"]] = record["value"]
+    elif op == "append":
+        if record.get("key") is None:
+            state.setdefault(section, []).append(record["value"])
+        else:
+            state.setdefault(section, {}).setdefault(record["key"], []).append(record["value"])
+    else:
+        raise ValueError(f"Unknown journal operation: {op}")
+
+
+def finish_replay(state: dict, positions: Dict[str, dict]):
+    """Drop the rows deleted during replay"""
+    for section in positions:
+        state[section] = [row for row in state[section] if row is not None]
+
+
+class MemoryJournal:
+    """Append-only journal plus snapshot for one memory file"""
+
+    def __init__(self, snapshot_path: str, fsync: bool = True, compaction_ratio: float = COMPACTION_RATIO,
+                 compaction_min_bytes: int = COMPACTION_MIN_BYTES):
+        self.path = snapshot_path
+        self.fsync = fsync
+        self.compaction_ratio = compaction_ratio
+        self.compaction_min_bytes = compaction_min_bytes
+
+        self._lock = threading.RLock()        # Guards pending changes; held only briefly
+        self._write_lock = threading.RLock()  # Orders flushes and segment switches
+        self._pending = OrderedDict()  # coalesced changes waiting for the next flush
+        self._order = count()
+        self._digests = {}             # section -> CRC32 of its last journaled value
+        self._file = None
+        self._compacting = False
+        self._snapshot_requested = False
+
+        existing = self.segments()
+        self.seq = existing[-1] if existing else 0
+        self.journal_bytes = sum(os.path.getsize(self.segment_path(seq)) for seq in existing)
+        self.snapshot_bytes = os.path.getsize(snapshot_path) if os.path.exists(snapshot_path) else 0
+        self.stats = {"records_written": 0, "bytes_written": 0, "flushes": 0, "compactions": 0,
+                      "records_replayed": 0, "torn_segments": 0}
+
+    # ------------------------------------------------------------------
+    # Segments
+    # ------------------------------------------------------------------
+
+    def segment_path(self, seq: int) -> str:
+        return f"{self.path}.journal.{seq:06d}"
+
+    def segments(self):
+        """Sequence numbers of the journal segments on disk, ascending"""
+        directory = os.path.dirname(self.path) or "."
+        prefix = os.path.basename(self.path) + ".journal."
+        found = []
+        for name in os.listdir(directory) if os.path.isdir(directory) else ():
+            if name.startswith(prefix) and name[len(prefix):].isdigit():
+                found.append(int(name[len(prefix):]))
+        return sorted(found)
+
+    def _open_segment(self, seq: int):
+        if self._file is not None:
+            self._file.close()
+        self.seq = seq
+        self._file = open(self.segment_path(seq), "ab")
+
+    def _drop_segments(self, below: int):
+        for seq in self.segments():
+            if seq < below:
+                try:
+                    os.remove(self.segment_path(seq))
+                except OSError as e:
+                    logger.warning(f"Failed to remove journal segment {seq}: {e}")
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def record(self, op: str, section: str, key=None, value=None):
+        """
+        Queue a change for the next flush. The value is copied now, so a
+        flush on another thread writes it as it was when recorded; repeated
+        changes to one record between saves still cost one write.
+        """
+        if op not in OPS or op == "set":
+            raise ValueError(f"Unknown journal operation: {op}")
+        value = snapshot_value(value)
+        with self._lock:
+            if op == "append":
+                slot = (next(self._order),)
+            else:
+                slot = (section, key)
+                previous = self._pending.get(slot)
+                if previous is not None and previous[0] == "delete" and op != "delete":
+                    # Keep the delete so a re-added record moves to the end like it did in memory
+                    self._pending[(next(self._order),)] = self._pending.pop(slot)
+            self._pending[slot] = (op, section, key, value)
+
+    def request_snapshot(self):
+        """Compact at the next save (after bulk changes the journal cannot express cheaply)"""
+        self._snapshot_requested = True
+
+    def flush(self, sections: Optional[dict] = None) -> int:
+        """
+        Append the pending changes, plus a ``set`` record for each entry of
+        ``sections`` whose value changed since it was last written. Returns
+        the number of bytes appended. Changes recorded meanwhile wait for the
+        next flush instead of for this one's write and fsync.
+        """
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, OrderedDict()
+            try:
+                chunks = []
+                for op, section, key, value in pending.values():
+                    record = {"op": op, "section": section}
+                    if key is not None:
+                        record["key"] = key
+                    if op != "delete":
+                        record["value"] = value
+                    chunks.append(encode_record(record))
+
+                digests = {}
+                for section, value in (sections or {}).items():
+                    encoded = encode_record({"op": "set", "section": section, "value": value})
+                    digest = zlib.crc32(encoded)
+                    if self._digests.get(section) != digest:
+                        chunks.append(encoded)
+                        digests[section] = digest
+
+                if not chunks:
+                    return 0
+                data = b"".join(chunks)
+                if self._file is None:
+                    self._open_segment(self.seq)
+                self._file.write(data)
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+            except Exception:
+                with self._lock:
+                    # Keep the changes for the next flush; newer changes to the same keys win
+                    pending.update(self._pending)
+                    self._pending = pending
+                raise
+
+            with self._lock:
+                self._digests.update(digests)
+                self.journal_bytes += len(data)
+                self.stats["records_written"] += len(chunks)
+                self.stats["bytes_written"] += len(data)
+                self.stats["flushes"] += 1
+            return len(data)
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    def needs_compaction(self) -> bool:
+        if self._compacting:
+            return False
+        if self._snapshot_requested:
+            return True
+        return self.journal_bytes >= max(self.compaction_min_bytes, self.compaction_ratio * self.snapshot_bytes)
+
+    def compact(self, state_fn: Callable[[], dict], sections: Optional[dict],
+                write_snapshot: Callable[[dict], None], executor=None) -> bool:
+        """
+        Write a snapshot covering everything journaled so far and drop the
+        covered segments. ``state_fn`` returns the snapshot state with its
+        containers copied; it is called under the journal lock right before
+        new writes switch to a fresh segment, so the (slow) snapshot write can
+        run on ``executor`` while saving continues. Returns False when a
+        compaction is already running.
+        """
+        with self._write_lock, self._lock:
+            if self._compacting:
+                return False
+            self.flush(sections)
+            state = state_fn()
+            covered = self.seq
+            self._open_segment(covered + 1)
+            state["journal_seq"] = self.seq
+            self._compacting = True
+            self._snapshot_requested = False
+            journal_bytes = self.journal_bytes
+            self.journal_bytes = 0
+
+        def write():
+            try:
+                write_snapshot(state)
+                self._drop_segments(below=covered + 1)
+                self.snapshot_bytes = os.path.getsize(self.path)
+                self.stats["compactions"] += 1
+                logger.info(f"🗜️ Memory journal compacted into snapshot ({journal_bytes} journal bytes)")
+            except Exception as e:
+                logger.error(f"Memory journal compaction failed: {e}")
+                with self._lock:
+                    self.journal_bytes += journal_bytes  # The old segments are still replayed
+                    self._snapshot_requested = True
+            finally:
+                self._compacting = False
+
+        if executor is not None:
+            executor.submit(write)
+        else:
+            write()
+        return True
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) or bool(self.segments())
+
+    def load(self) -> Optional[dict]:
+        """
+        Read the snapshot and replay the journal tail on top of it. Returns
+        the state in snapshot format, or None when nothing was saved yet.
+        """
+        with self._lock:
+            if not self.exists():
+                return None
+            state = {}
+            if os.path.exists(self.path):
+                state = read_state(self.path)
+            return self.replay(state)
+
+    def replay(self, state: dict) -> dict:
+        """
+        Replay the journal segments not covered by snapshot ``state`` (for
+        example a restored backup) onto it. When the segment the snapshot
+        continues with was already compacted away, the journal is not
+        replayed: applying only the later segments would skip changes.
+        """
+        with self._write_lock, self._lock:
+            start = int(state.pop("journal_seq", 0))
+            existing = self.segments()
+            if existing and existing[-1] >= start and start not in existing:
+                logger.warning(f"Memory journal does not continue this snapshot (segment {start} "
+                               f"is gone); not replaying segments {existing[0]}-{existing[-1]}")
+                self.seq = existing[-1]
+                self.journal_bytes = 0
+                return state
+
+            self._drop_segments(below=start)  # Left behind by a compaction interrupted before cleanup
+            positions = {}
+            replayed = 0
+            journal_bytes = 0
+            for seq in self.segments():
+                path = self.segment_path(seq)
+                with open(path, "rb") as f:
+                    data = f.read()
+                good = 0
+                for record, good in read_records(data):
+                    apply_record(state, record, positions)
+                    replayed += 1
+                if good < len(data):
+                    logger.warning(f"Torn journal record in {path} at byte {good}; "
+                                   f"truncating {len(data) - good} bytes")
+                    with open(path, "r+b") as f:
+                        f.truncate(good)
+                    self.stats["torn_segments"] += 1
+                journal_bytes += good
+            finish_replay(state, positions)
+
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.seq = max([start] + self.segments())
+            self.journal_bytes = journal_bytes
+            self.snapshot_bytes = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            self._digests.clear()
+            self.stats["records_replayed"] += replayed
+            if replayed:
+                logger.info(f"📜 Replayed {replayed} memory journal records")
+            return state
+
+    def close(self):
+        with self._write_lock, self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "segment": self.seq,
+            "pending": len(self._pending),
+            "journal_bytes": self.journal_bytes,
+            "snapshot_bytes": self.snapshot_bytes,
+            "compacting": self._compacting,
+        }
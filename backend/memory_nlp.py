@@ -0,0 +1,167 @@
+"""
+Memory NLP - Single-parse text analysis for memory enrichment
+Created for Roboto SAI
+
+add_episodic_memory used to build a separate TextBlob over the same user
+input for sentiment, for emotional intensity and for themes, so every write
+ran the sentiment analyzer twice and the noun phrase extractor once, and
+retrieval did it again for each query. TextAnalyzer parses a text once into
+a TextAnalysis (tokens, noun phrases, polarity, subjectivity, sentiment,
+themes, intensity) that every enrichment helper reads, and keeps recent
+analyses in an LRU keyed by a hash of the text, so repeated texts (merged
+duplicates, repeated queries) skip analysis entirely.
+
+Without TextBlob, or when a TextBlob step fails, the keyword heuristics the
+helpers used before fill in the affected fields. A missing NLTK corpus is
+detected once instead of on every text.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+try:
+    from textblob import TextBlob
+    from textblob.exceptions import MissingCorpusError
+    TEXTBLOB_AVAILABLE = True
+except ImportError:
+    TEXTBLOB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MAX_THEMES = 5
+MAX_THEME_WORDS = 3
+SENTIMENT_THRESHOLD = 0.1
+
+POSITIVE_WORDS = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic', 'love', 'happy', 'joy', 'excited']
+NEGATIVE_WORDS = ['bad', 'terrible', 'awful', 'hate', 'sad', 'angry', 'frustrated', 'disappointed', 'worried', 'fear']
+HIGH_INTENSITY_WORDS = ['extremely', 'absolutely', 'completely', 'totally', 'devastated', 'ecstatic', 'furious', 'terrified']
+MEDIUM_INTENSITY_WORDS = ['very', 'really', 'quite', 'pretty', 'fairly', 'rather', 'upset', 'excited', 'worried', 'happy']
+EMOTIONAL_PUNCTUATION = ['!', '!!', '!!!', '?!', '...']
+STOP_WORDS = {'the', 'and', 'but', 'for', 'are', 'this', 'that', 'with', 'have', 'will', 'you', 'not', 'can',
+              'all', 'from', 'they', 'been', 'said', 'her', 'she', 'him', 'his'}
+
+
+@dataclass(frozen=True)
+class TextAnalysis:
+    """Everything the memory enrichment helpers need from one text"""
+    tokens: Tuple[str, ...]           # Whitespace tokens
+    noun_phrases: Tuple[str, ...]
+    polarity: Optional[float]         # None when the heuristics were used
+    subjectivity: Optional[float]
+    sentiment: str                    # "positive", "negative" or "neutral"
+    themes: Tuple[str, ...]
+    intensity: float
+
+
+EMPTY_ANALYSIS = TextAnalysis((), (), None, None, "neutral", (), 0.5)
+
+
+def keyword_sentiment(lower: str) -> str:
+    positive = sum(1 for word in POSITIVE_WORDS if word in lower)
+    negative = sum(1 for word in NEGATIVE_WORDS if word in lower)
+    if positive > negative:
+        return "positive"
+    if negative > positive:
+        return "negative"
+    return "neutral"
+
+
+def keyword_intensity(text: str, lower: str) -> float:
+    intensity = 0.5
+    intensity += 0.2 * sum(1 for word in HIGH_INTENSITY_WORDS if word in lower)
+    intensity += 0.1 * sum(1 for word in MEDIUM_INTENSITY_WORDS if word in lower)
+    intensity += 0.1 * sum(1 for punct in EMOTIONAL_PUNCTUATION if punct in text)
+    if sum(1 for c in text if c.isupper()) / max(1, len(text)) > 0.3:  # Shouting
+        intensity += 0.2
+    return min(1.0, intensity)
+
+
+def keyword_themes(tokens) -> Tuple[str, ...]:
+    words = (token.lower() for token in tokens)
+    themes = dict.fromkeys(word for word in words if len(word) > 3 and word not in STOP_WORDS)
+    return tuple(themes)[:MAX_THEMES]
+
+
+class TextAnalyzer:
+    """Parses texts once and remembers the analyses of recent ones"""
+
+    _noun_phrases_missing = False  # Process-wide: the NLTK corpus is not coming back mid-run
+
+    def __init__(self, cache_size: int = 2048):
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, TextAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def analyze(self, text) -> TextAnalysis:
+        if not text or not isinstance(text, str):
+            return EMPTY_ANALYSIS
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            analysis = self._cache.get(key)
+            if analysis is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return analysis
+            self.stats["misses"] += 1
+
+        analysis = self._parse(text)
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[key] = analysis
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+                    self.stats["evictions"] += 1
+        return analysis
+
+    def _parse(self, text: str) -> TextAnalysis:
+        lower = text.lower()
+        tokens = tuple(text.split())
+        polarity = subjectivity = noun_phrases = None
+        if TEXTBLOB_AVAILABLE:
+            blob = TextBlob(text)
+            try:
+                sentiment = blob.sentiment
+                polarity, subjectivity = float(sentiment.polarity), float(sentiment.subjectivity)
+            except Exception as e:
+                logger.debug(f"TextBlob sentiment failed, using keywords: {e}")
+            noun_phrases = self._noun_phrases(blob)
+
+        if polarity is None:
+            label, intensity = keyword_sentiment(lower), keyword_intensity(text, lower)
+        else:
+            label = ("positive" if polarity > SENTIMENT_THRESHOLD
+                     else "negative" if polarity < -SENTIMENT_THRESHOLD else "neutral")
+            intensity = min(1.0, abs(polarity) + subjectivity)
+
+        if noun_phrases is None:
+            themes, noun_phrases = keyword_themes(tokens), ()
+        else:
+            themes = tuple(dict.fromkeys(
+                phrase.lower().strip() for phrase in noun_phrases
+                if len(phrase.split()) <= MAX_THEME_WORDS and phrase.strip()
+            ))[:MAX_THEMES]
+        return TextAnalysis(tokens, noun_phrases, polarity, subjectivity, label, themes, intensity)
+
+    def _noun_phrases(self, blob) -> Optional[Tuple[str, ...]]:
+        """Noun phrases of the parsed text, or None when they cannot be extracted"""
+        if TextAnalyzer._noun_phrases_missing:
+            return None
+        try:
+            return tuple(blob.noun_phrases)
+        except MissingCorpusError:
+            TextAnalyzer._noun_phrases_missing = True
+            logger.warning("TextBlob noun phrase corpora are missing; themes use keyword extraction")
+        except Exception as e:
+            logger.debug(f"TextBlob noun phrases failed, using keywords: {e}")
+        return None
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {**self.stats, "cached": len(self._cache),
+                    "hit_rate": self.stats["hits"] / lookups if lookups else 0.0}
@@ -0,0 +1,203 @@
+"""
+Memory Persistence - Write-behind save worker for the memory system
+Created for Roboto SAI
+
+add_episodic_memory used to call save_memory on the request thread once
+MEMORY_SAVE_THRESHOLD changes or MEMORY_SAVE_INTERVAL seconds had piled up,
+so an unlucky chat request paid for the whole flush and fsync. A
+PersistenceWorker owns one daemon thread per memory system: changes only
+notify() it, and the worker coalesces notifications into one save when the
+threshold is reached, when the oldest unsaved change is ``interval`` seconds
+old, or right away for urgent changes and flush(). The storage layer copies
+each changed record when it is recorded, so the worker serializes the
+records as they were changed while requests keep editing them.
+
+flush_all() and shutdown_all() cover every live worker; the FastAPI lifespan
+calls shutdown_all() so queued changes reach disk before the process exits.
+"""
+
+import atexit
+import logging
+import threading
+import time
+import weakref
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+RETRY_SECONDS = 5.0  # Back-off after a failed save (changes, flush() and stop() still wake the worker)
+
+_workers = weakref.WeakSet()
+_workers_lock = threading.Lock()
+
+
+class PersistenceWorker:
+    """Runs ``save_fn`` on a dedicated thread, behind the callers that change state"""
+
+    def __init__(self, save_fn: Callable[[], None], threshold: int = 5, interval: float = 60.0,
+                 name: str = "memory-persistence"):
+        self.save_fn = save_fn
+        self.threshold = max(1, threshold)
+        self.interval = interval
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._pending = 0              # Notifications not yet picked up by a save
+        self._first_pending = None     # Monotonic time of the oldest of them
+        self._urgent = False
+        self._notified = 0             # Notifications received, ever
+        self._attempted = 0            # ... covered by a finished save attempt
+        self._saved = 0                # ... covered by a successful save
+        self._saving = False
+        self._stopping = False
+        self.stats = {"notifications": 0, "saves": 0, "errors": 0, "total_save_seconds": 0.0,
+                      "last_save_seconds": 0.0, "max_save_seconds": 0.0,
+                      "last_lag_seconds": 0.0, "max_lag_seconds": 0.0}
+        with _workers_lock:
+            _workers.add(self)
+
+    def notify(self, urgent: bool = False) -> bool:
+        """
+        Record that state changed. Returns False once the worker is stopped;
+        the caller then has to save on its own.
+        """
+        with self._cond:
+            if self._stopping:
+                return False
+            self._pending += 1
+            self._notified += 1
+            self.stats["notifications"] += 1
+            if self._first_pending is None:
+                self._first_pending = time.monotonic()
+            self._urgent = self._urgent or urgent
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            if self._urgent or self._pending >= self.threshold:
+                self._cond.notify_all()
+            return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Save everything notified so far; True once it is on disk"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target, first = self._notified, self._first_pending
+            if self._saved >= target:
+                return True
+            if self._thread is not None and self._thread.is_alive():
+                self._urgent = True
+                self._cond.notify_all()
+                while self._attempted < target:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return self._saved >= target
+        # The worker is gone (stopped): save on the calling thread
+        return self._save(target, first if first is not None else time.monotonic())
+
+    def stop(self, timeout: float = 10.0) -> bool:
+        """Flush, then end the worker thread; later changes are saved by the caller"""
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        return flushed
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            saves = self.stats["saves"]
+            return {
+                **self.stats,
+                "queue_depth": self._pending,
+                "lag_seconds": time.monotonic() - self._first_pending if self._first_pending is not None else 0.0,
+                "avg_save_seconds": self.stats["total_save_seconds"] / saves if saves else 0.0,
+                "saving": self._saving,
+                "running": self._thread is not None and self._thread.is_alive() and not self._stopping,
+            }
+
+    # ------------------------------------------------------------------
+    # Worker thread
+    # ------------------------------------------------------------------
+
+    def _due_locked(self) -> bool:
+        if not self._pending:
+            return False
+        return (self._urgent or self._stopping or self._pending >= self.threshold
+                or time.monotonic() - self._first_pending >= self.interval)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._due_locked():
+                    if self._stopping:
+                        return
+                    timeout = None
+                    if self._pending:
+                        timeout = max(0.0, self.interval - (time.monotonic() - self._first_pending))
+                    self._cond.wait(timeout)
+                target, first = self._notified, self._first_pending
+            if not self._save(target, first):
+                with self._cond:
+                    if self._stopping:
+                        return  # stop() reports the unsaved changes; the caller takes over
+                    self._cond.wait(min(self.interval, RETRY_SECONDS))
+
+    def _save(self, target: int, first: float) -> bool:
+        """Run one save covering notifications up to ``target``, the oldest from ``first``"""
+        with self._cond:
+            self._pending = self._notified - target
+            self._first_pending = time.monotonic() if self._pending else None
+            self._urgent = False
+            self._saving = True
+        started = time.monotonic()
+        try:
+            ok = self.save_fn() is not False  # save_memory reports a failed save by returning False
+        except Exception as e:
+            logger.error(f"Write-behind memory save failed: {e}")
+            ok = False
+        finished = time.monotonic()
+
+        with self._cond:
+            self._saving = False
+            self._attempted = max(self._attempted, target)
+            if ok:
+                self._saved = max(self._saved, target)
+                duration, lag = finished - started, finished - first
+                self.stats["saves"] += 1
+                self.stats["total_save_seconds"] += duration
+                self.stats["last_save_seconds"] = duration
+                self.stats["max_save_seconds"] = max(self.stats["max_save_seconds"], duration)
+                self.stats["last_lag_seconds"] = lag
+                self.stats["max_lag_seconds"] = max(self.stats["max_lag_seconds"], lag)
+            else:
+                # Retry with the next trigger; the changes are still queued in the storage layer
+                self.stats["errors"] += 1
+                self._pending += target - self._saved
+                self._first_pending = first
+            self._cond.notify_all()
+        return ok
+
+
+def flush_all(timeout: float = 10.0) -> bool:
+    """Flush every live worker; True when all of them saved in time"""
+    with _workers_lock:
+        workers = list(_workers)
+    return all([worker.flush(timeout) for worker in workers])
+
+
+def shutdown_all(timeout: float = 10.0) -> bool:
+    """Flush and stop every live worker (process shutdown)"""
+    with _workers_lock:
+        workers = list(_workers)
+    flushed = all([worker.stop(timeout) for worker in workers])
+    if workers:
+        logger.info(f"💾 Memory persistence flushed on shutdown ({len(workers)} workers)")
+    return flushed
+
+
+atexit.register(shutdown_all)
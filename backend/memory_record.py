@@ -0,0 +1,257 @@
+"""
+Memory Record - Compact slotted episodic memory records
+Created for Roboto SAI
+
+An episodic memory used to be a free-form dict: a hash table per record, an
+ISO timestamp string, separate copies of the same emotion, sentiment and
+user name strings, a theme list and a nested quantum state dict. MemoryRecord
+keeps the fields every memory has in __slots__ instead:
+
+    emotion, sentiment, user_name   codes into process-wide interned vocabularies
+    key_themes                      an interned tuple of theme codes
+    timestamp                       epoch microseconds (UTC ISO strings only)
+    quantum_state                   a tuple of its four values
+
+Anything else, and any value a field cannot encode exactly, lives in a small
+overflow dict created on first use. The record is a MutableMapping, so
+memory["emotion"], get(), update(), clear(), "in", iteration and dict(memory)
+behave like the dict it replaces; values are decoded on access and written
+back as plain JSON.
+"""
+
+import sys
+import threading
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_UNENCODABLE = object()  # Returned by a codec for values kept verbatim in the overflow dict
+
+QUANTUM_KEYS = ("superposition", "coherence", "entanglement_strength", "stability")
+
+
+class Vocabulary:
+    """Interned strings shared by every record: value <-> small integer code"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._codes: Dict[str, int] = {}
+        self._values: List[str] = []
+        self._lock = threading.Lock()
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self._values)
+                    self._values.append(sys.intern(value))  # Published before the code is
+                    self._codes[value] = code
+        return code
+
+    def value(self, code: int) -> str:
+        return self._values[code]
+
+    def __len__(self):
+        return len(self._values)
+
+
+VOCABULARIES = {name: Vocabulary(name) for name in ("emotion", "sentiment", "user_name", "key_themes")}
+_theme_sets: Dict[tuple, tuple] = {}  # One shared tuple per distinct theme combination
+
+
+class _Plain:
+    """Stored as is"""
+
+    @staticmethod
+    def encode(value):
+        return value
+
+    @staticmethod
+    def decode(stored):
+        return stored
+
+
+class _Word:
+    """A string from a vocabulary, stored as its code"""
+
+    def __init__(self, vocabulary: Vocabulary):
+        self.vocabulary = vocabulary
+
+    def encode(self, value):
+        if type(value) is not str:
+            return _UNENCODABLE
+        return self.vocabulary.code(value)
+
+    def decode(self, stored):
+        return self.vocabulary.value(stored)
+
+
+class _Words(_Word):
+    """A list of vocabulary strings, stored as an interned tuple of codes"""
+
+    def encode(self, value):
+        if type(value) is not list or any(type(word) is not str for word in value):
+            return _UNENCODABLE
+        codes = tuple(self.vocabulary.code(word) for word in value)
+        return _theme_sets.setdefault(codes, codes)
+
+    def decode(self, stored):
+        return [self.vocabulary.value(code) for code in stored]
+
+
+class _Timestamp:
+    """A UTC ISO timestamp, stored as epoch microseconds when it formats back identically"""
+
+    @staticmethod
+    def encode(value):
+        if type(value) is not str:
+            return _UNENCODABLE
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return _UNENCODABLE
+        if parsed.utcoffset() != timedelta(0):
+            return _UNENCODABLE  # Naive and non-UTC timestamps keep their exact text
+        micros = (parsed - _EPOCH) // _MICROSECOND
+        return micros if _Timestamp.decode(micros) == value else _UNENCODABLE
+
+    @staticmethod
+    def decode(stored):
+        # Formatting a naive datetime skips the tzinfo calls of an aware one
+        return (_NAIVE_EPOCH + timedelta(microseconds=stored)).isoformat() + "+00:00"
+
+
+class _QuantumState:
+    """The four-value quantum state dict, stored as a tuple"""
+
+    @staticmethod
+    def encode(value):
+        if type(value) is not dict or len(value) != len(QUANTUM_KEYS):
+            return _UNENCODABLE
+        try:
+            return tuple(value[key] for key in QUANTUM_KEYS)
+        except KeyError:
+            return _UNENCODABLE
+
+    @staticmethod
+    def decode(stored):
+        return dict(zip(QUANTUM_KEYS, stored))
+
+
+# Field -> codec, in the order add_episodic_memory writes them
+FIELDS = {
+    "id": _Plain,
+    "timestamp": _Timestamp,
+    "user_input": _Plain,
+    "roboto_response": _Plain,
+    "emotion": _Word(VOCABULARIES["emotion"]),
+    "user_name": _Word(VOCABULARIES["user_name"]),
+    "importance": _Plain,
+    "sentiment": _Word(VOCABULARIES["sentiment"]),
+    "key_themes": _Words(VOCABULARIES["key_themes"]),
+    "emotional_intensity": _Plain,
+    "quantum_state": _QuantumState,
+    "contextual_data": _Plain,
+    "fractal_dimension": _Plain,
+}
+_SLOTS = {key: f"_{key}" for key in FIELDS}
+
+
+class MemoryRecord(MutableMapping):
+    """Dict-compatible episodic memory with its common fields in slots"""
+
+    __slots__ = tuple(_SLOTS.values()) + ("_extra",)
+
+    def __init__(self, data=(), **kwargs):
+        self._extra = None
+        self.update(data, **kwargs)
+
+    def __getitem__(self, key):
+        slot = _SLOTS.get(key)
+        if slot is not None:
+            stored = getattr(self, slot, _UNENCODABLE)
+            if stored is not _UNENCODABLE:
+                return FIELDS[key].decode(stored)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        slot = _SLOTS.get(key)
+        if slot is not None:
+            stored = getattr(self, slot, _UNENCODABLE)
+            if stored is not _UNENCODABLE:
+                return FIELDS[key].decode(stored)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __setitem__(self, key, value):
+        slot = _SLOTS.get(key)
+        if slot is not None:
+            stored = FIELDS[key].encode(value)
+            if stored is not _UNENCODABLE:
+                setattr(self, slot, stored)
+                if self._extra:
+                    self._extra.pop(key, None)
+                return
+            if hasattr(self, slot):
+                delattr(self, slot)
+        if self._extra is None:
+            self._extra = {}
+        self._extra[key] = value
+
+    def __delitem__(self, key):
+        slot = _SLOTS.get(key)
+        if slot is not None and hasattr(self, slot):
+            delattr(self, slot)
+        elif self._extra and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        slot = _SLOTS.get(key)
+        if slot is not None and hasattr(self, slot):
+            return True
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        for key, slot in _SLOTS.items():
+            if hasattr(self, slot):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(hasattr(self, slot) for slot in _SLOTS.values()) + len(self._extra or ())
+
+    def copy(self) -> dict:
+        """A plain dict copy, like dict.copy() on the former records"""
+        return dict(self)
+
+    def __reduce__(self):
+        return MemoryRecord, (dict(self),)
+
+    def __repr__(self):
+        return f"MemoryRecord({dict(self)!r})"
+
+
+def compact_record(memory):
+    """MemoryRecord for a plain dict memory (other values are returned unchanged)"""
+    if type(memory) is dict:
+        return MemoryRecord(memory)
+    return memory
+
+
+def compact_memory_list(memories: list) -> list:
+    """Convert a list of memories in place, releasing each dict as it goes"""
+    for position, memory in enumerate(memories):
+        memories[position] = compact_record(memory)
+    return memories
+
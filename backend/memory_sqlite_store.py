@@ -0,0 +1,603 @@
+"""
+Memory SQLite Store - SQLite storage backend with lazily paged memories
+Created for Roboto SAI
+
+The JSON backend parses the whole memory file at startup and keeps every
+record in RAM. This backend keeps records in an indexed SQLite database and
+pages them in on demand:
+
+    memories   episodic memories by position (seq), id and fingerprint
+    entries    keyed records of dict sections (quantum_entanglements)
+    appends    append-only sections (emotional_patterns, self_reflections)
+    sections   small sections stored whole (profiles, metrics, ...)
+
+``episodic_memories`` becomes a PagedMemoryList: positions are an array of
+row ids, records are decoded on access and the most recently used
+``hot_size`` stay cached. Only the latest ``recent_appends`` entries of the
+append-only sections are loaded. Changes arrive through the same record()
+and flush() calls as the journal and are written in one transaction per
+save. An empty database imports the JSON snapshot and journal on first load.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Mapping, MutableSequence
+from itertools import count
+from typing import Callable, Dict, Iterable, List, Optional
+
+from memory_journal import MemoryJournal, _json_default, snapshot_value
+
+logger = logging.getLogger(__name__)
+
+HOT_SIZE = 2048          # Decoded records kept per paged collection
+RECENT_APPENDS = 1000    # Entries of each append-only list loaded at startup
+PAGE_SIZE = 500          # Rows fetched per query while iterating
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    fingerprint TEXT,
+    timestamp TEXT,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS memories_fingerprint ON memories(fingerprint);
+CREATE TABLE IF NOT EXISTS entries (
+    section TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (section, key)
+);
+CREATE TABLE IF NOT EXISTS appends (
+    seq INTEGER PRIMARY KEY,
+    section TEXT NOT NULL,
+    key TEXT,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS appends_section ON appends(section, key, seq);
+CREATE TABLE IF NOT EXISTS sections (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+MEMORY_SECTION = "episodic_memories"
+ENTRY_SECTIONS = ("quantum_entanglements",)
+APPEND_SECTIONS = ("emotional_patterns", "self_reflections")
+SNAPSHOT_ONLY = ("fractal_patterns", "last_saved", "journal_seq")  # Rebuilt or bookkeeping, never stored
+
+
+def _encode(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+
+
+class PagedMemoryList(MutableSequence):
+    """Episodic memories in SQLite order, decoded on access. Supports appends, not inserts."""
+
+    def __init__(self, store: "SQLiteMemoryStore", seqs: array):
+        self._store = store
+        self._seqs = seqs
+
+    def __len__(self):
+        return len(self._seqs)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._store._memories_for(self._seqs[index])
+        return self._store._memories_for([self._seqs[index]])[0]
+
+    def __iter__(self):
+        seqs = array("q", self._seqs)  # Appends during iteration are not visited, like iterating a copy
+        for start in range(0, len(seqs), PAGE_SIZE):
+            yield from self._store._memories_for(seqs[start:start + PAGE_SIZE], cache=False)
+
+    def __reversed__(self):
+        for start in range(len(self._seqs), 0, -PAGE_SIZE):
+            yield from reversed(self._store._memories_for(self._seqs[max(0, start - PAGE_SIZE):start]))
+
+    def __setitem__(self, index, memory):
+        if isinstance(index, slice):
+            raise TypeError("paged memories do not support slice assignment")
+        seq = self._seqs[index]
+        previous = self[index]
+        if previous.get("id") != memory["id"]:
+            self._store.record("delete", MEMORY_SECTION, previous.get("id"))
+        self._store._stage_memory(seq, memory)
+
+    def __delitem__(self, index):
+        positions = range(len(self._seqs))[index]
+        for position in sorted([positions] if isinstance(positions, int) else positions, reverse=True):
+            memory = self[position]
+            del self._seqs[position]
+            self._store.record("delete", MEMORY_SECTION, memory["id"])
+
+    def insert(self, index, memory):
+        if index < len(self._seqs):
+            raise NotImplementedError("paged memories only support appends")
+        self.append(memory)
+
+    def append(self, memory):
+        seq = self._store._next_seq()
+        self._seqs.append(seq)
+        self._store._stage_memory(seq, memory)
+
+    def index(self, memory, start=0, stop=None):
+        """Position of a memory, found by id"""
+        seq = self._store._seq_of(memory.get("id"))
+        position = bisect_left(self._seqs, seq) if seq is not None else len(self._seqs)
+        stop = len(self._seqs) if stop is None else stop
+        if position < len(self._seqs) and self._seqs[position] == seq and start <= position < stop:
+            return position
+        raise ValueError("memory is not in the store")
+
+    def __contains__(self, memory):
+        try:
+            self.index(memory)
+            return True
+        except (ValueError, AttributeError):
+            return False
+
+
+class PagedRecordMap(Mapping):
+    """Keyed records of one dict section, decoded on access (set and read; never deleted)"""
+
+    def __init__(self, store: "SQLiteMemoryStore", section: str, count: int):
+        self._store = store
+        self._section = section
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, key):
+        value = self._store._entry(self._section, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self._store._entry(self._section, key) is not None
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._count += 1
+        self._store._stage_entry(self._section, key, value)
+
+    def __iter__(self):
+        for key, _ in self.items():
+            yield key
+
+    def items(self):
+        yield from self._store._entries(self._section)
+
+    def values(self):
+        for _, value in self.items():
+            yield value
+
+
+class _IdIndex:
+    """memory id -> record lookups answered by the store (registration is implicit)"""
+
+    def __init__(self, store):
+        self._store = store
+
+    def get(self, memory_id, default=None):
+        memory = self._store._memory_by_id(memory_id)
+        return default if memory is None else memory
+
+    def __contains__(self, memory_id):
+        return self._store._memory_by_id(memory_id) is not None
+
+    def __setitem__(self, memory_id, memory):
+        pass  # Appending or recording the memory already made it visible
+
+    def __delitem__(self, memory_id):
+        pass
+
+
+class _FingerprintIndex:
+    """fingerprint -> memory id, from the indexed column plus changes not flushed yet"""
+
+    def __init__(self, store):
+        self._store = store
+        self._added: Dict[str, str] = {}
+        self._removed = set()
+
+    def get(self, fingerprint, default=None):
+        with self._store._lock:
+            if fingerprint in self._added:
+                return self._added[fingerprint]
+            if fingerprint in self._removed:
+                return default
+            row = self._store._db.execute(
+                "SELECT id FROM memories WHERE fingerprint = ? ORDER BY seq LIMIT 1", (fingerprint,)
+            ).fetchone()
+            if row is None or row[0] in self._store._deleted:
+                return default
+            return row[0]
+
+    def __contains__(self, fingerprint):
+        return self.get(fingerprint) is not None
+
+    def __setitem__(self, fingerprint, memory_id):
+        with self._store._lock:
+            self._added[fingerprint] = memory_id
+            self._removed.discard(fingerprint)
+
+    def __delitem__(self, fingerprint):
+        with self._store._lock:
+            self._added.pop(fingerprint, None)
+            self._removed.add(fingerprint)
+
+    def clear_overlay(self):
+        self._added.clear()
+        self._removed.clear()
+
+
+class SQLiteMemoryStore:
+    """SQLite storage for one memory system, with the journal's record/flush interface"""
+
+    def __init__(self, path: str, legacy_path: Optional[str] = None,
+                 fingerprint_of: Optional[Callable[[dict], str]] = None,
+                 hot_size: int = HOT_SIZE, recent_appends: int = RECENT_APPENDS):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.fingerprint_of = fingerprint_of or (lambda memory: None)
+        self.hot_size = hot_size
+        self.recent_appends = recent_appends
+
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+        self._pending = OrderedDict()   # coalesced changes waiting for the next flush
+        self._order = count()
+        self._staged: Dict[int, dict] = {}       # seq -> memory with unflushed changes
+        self._staged_ids: Dict[str, int] = {}    # id -> seq of staged memories
+        self._deleted = set()                    # ids deleted since the last flush
+        self._cache = OrderedDict()              # seq -> decoded memory (LRU)
+        self._cache_ids: Dict[str, int] = {}
+        self._entry_cache = OrderedDict()        # (section, key) -> decoded value (LRU)
+        self._digests = {}
+        self._snapshot_requested = False
+        self._last_seq = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM memories").fetchone()[0]
+
+        self.id_index = _IdIndex(self)
+        self.fingerprint_index = _FingerprintIndex(self)
+        self.memories = PagedMemoryList(self, array("q"))
+        self.entanglements = PagedRecordMap(self, ENTRY_SECTIONS[0], 0)
+        self.stats = {"flushes": 0, "rows_written": 0, "rows_read": 0, "imported": 0}
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _is_empty(self) -> bool:
+        return not any(self._db.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+                       for table in ("memories", "sections"))
+
+    def exists(self) -> bool:
+        legacy = self.legacy_path and MemoryJournal(self.legacy_path).exists()
+        return not self._is_empty() or bool(legacy)
+
+    def load(self) -> Optional[dict]:
+        """
+        State in snapshot format with episodic memories and entanglements
+        as paged views and the append-only sections truncated to their
+        latest entries. Imports the JSON snapshot into an empty database.
+        """
+        with self._lock:
+            if self._is_empty():
+                legacy = MemoryJournal(self.legacy_path) if self.legacy_path else None
+                if legacy is None or not legacy.exists():
+                    return None
+                self.import_state(legacy.load())
+                legacy.close()
+
+            state = {name: json.loads(value) for name, value in self._db.execute("SELECT name, value FROM sections")}
+            seqs = array("q", (row[0] for row in self._db.execute("SELECT seq FROM memories ORDER BY seq")))
+            self.memories = PagedMemoryList(self, seqs)
+            count = self._db.execute("SELECT COUNT(*) FROM entries WHERE section = ?",
+                                     (ENTRY_SECTIONS[0],)).fetchone()[0]
+            self.entanglements = PagedRecordMap(self, ENTRY_SECTIONS[0], count)
+            state[MEMORY_SECTION] = self.memories
+            state[ENTRY_SECTIONS[0]] = self.entanglements
+            state["emotional_patterns"] = {
+                key: self._recent("emotional_patterns", key)
+                for (key,) in self._db.execute(
+                    "SELECT DISTINCT key FROM appends WHERE section = 'emotional_patterns'").fetchall()
+            }
+            state["self_reflections"] = self._recent("self_reflections", None)
+            self._digests.clear()
+            return state
+
+    def _recent(self, section: str, key) -> list:
+        rows = self._db.execute(
+            "SELECT value FROM appends WHERE section = ? AND key IS ? ORDER BY seq DESC LIMIT ?",
+            (section, key, self.recent_appends)
+        ).fetchall()
+        return [json.loads(value) for (value,) in reversed(rows)]
+
+    def import_state(self, state: dict) -> int:
+        """Replace the database contents with a snapshot-format state (e.g. the JSON memory file)"""
+        with self._lock, self._db:
+            for table in ("memories", "entries", "appends", "sections"):
+                self._db.execute(f"DELETE FROM {table}")
+            memories = state.get(MEMORY_SECTION, [])
+            self._write_memories(enumerate(memories, start=1))
+            for section in ENTRY_SECTIONS:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO entries (section, key, value) VALUES (?, ?, ?)",
+                    ((section, key, _encode(value)) for key, value in (state.get(section) or {}).items())
+                )
+            self._db.executemany(
+                "INSERT INTO appends (section, key, value) VALUES ('emotional_patterns', ?, ?)",
+                ((key, _encode(entry)) for key, entries in (state.get("emotional_patterns") or {}).items()
+                 for entry in entries)
+            )
+            self._db.executemany(
+                "INSERT INTO appends (section, key, value) VALUES ('self_reflections', NULL, ?)",
+                ((_encode(entry),) for entry in state.get("self_reflections") or [])
+            )
+            self._db.executemany(
+                "INSERT INTO sections (name, value) VALUES (?, ?)",
+                ((name, _encode(value)) for name, value in state.items()
+                 if name not in (MEMORY_SECTION, *ENTRY_SECTIONS, *APPEND_SECTIONS, *SNAPSHOT_ONLY))
+            )
+            self._last_seq = len(memories)
+            self._reset_caches()
+            self.stats["imported"] += len(memories)
+        logger.info(f"📥 Imported {len(memories)} memories into {self.path}")
+        return len(memories)
+
+    def _write_memories(self, rows: Iterable):
+        """Upsert (seq, memory) pairs; a re-added memory moves to its new position"""
+        self._db.executemany(
+            "INSERT INTO memories (seq, id, fingerprint, timestamp, record) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET seq = excluded.seq, fingerprint = excluded.fingerprint, "
+            "timestamp = excluded.timestamp, record = excluded.record",
+            ((seq, memory["id"], self.fingerprint_of(memory), memory.get("timestamp"), _encode(memory))
+             for seq, memory in rows)
+        )
+
+    def _reset_caches(self):
+        self._pending.clear()
+        self._staged.clear()
+        self._staged_ids.clear()
+        self._deleted.clear()
+        self._cache.clear()
+        self._cache_ids.clear()
+        self._entry_cache.clear()
+        self.fingerprint_index.clear_overlay()
+
+    # ------------------------------------------------------------------
+    # Paged access (used by the views)
+    # ------------------------------------------------------------------
+
+    def _next_seq(self) -> int:
+        with self._lock:
+            self._last_seq += 1
+            return self._last_seq
+
+    def _remember(self, seq: int, memory: dict):
+        self._cache[seq] = memory
+        self._cache_ids[memory["id"]] = seq
+        while len(self._cache) > self.hot_size:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_ids.pop(evicted.get("id"), None)
+
+    def _memories_for(self, seqs, cache: bool = True) -> List[dict]:
+        """Records for positions ``seqs``: staged, then cached, then fetched in one query"""
+        with self._lock:
+            found = {}
+            missing = []
+            for seq in seqs:
+                memory = self._staged.get(seq)
+                if memory is None:
+                    memory = self._cache.get(seq)
+                    if memory is not None:
+                        self._cache.move_to_end(seq)
+                if memory is None:
+                    missing.append(seq)
+                else:
+                    found[seq] = memory
+            for start in range(0, len(missing), PAGE_SIZE):
+                chunk = missing[start:start + PAGE_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                for seq, record in self._db.execute(
+                        f"SELECT seq, record FROM memories WHERE seq IN ({placeholders})", chunk):
+                    found[seq] = json.loads(record)
+                    if cache:
+                        self._remember(seq, found[seq])
+                self.stats["rows_read"] += len(chunk)
+            return [found[seq] for seq in seqs if seq in found]
+
+    def _seq_of(self, memory_id) -> Optional[int]:
+        with self._lock:
+            if memory_id in self._deleted:
+                return None
+            seq = self._staged_ids.get(memory_id, self._cache_ids.get(memory_id))
+            if seq is None:
+                row = self._db.execute("SELECT seq FROM memories WHERE id = ?", (memory_id,)).fetchone()
+                seq = row[0] if row else None
+            return seq
+
+    def _memory_by_id(self, memory_id) -> Optional[dict]:
+        with self._lock:
+            seq = self._seq_of(memory_id)
+            if seq is None:
+                return None
+            memories = self._memories_for([seq])
+            return memories[0] if memories else None
+
+    def _stage_memory(self, seq: int, memory: dict):
+        with self._lock:
+            self._staged[seq] = memory
+            self._staged_ids[memory["id"]] = seq
+            self._deleted.discard(memory["id"])
+            self._pending.pop((MEMORY_SECTION, memory["id"]), None)
+            # The live object serves lookups; the flush writes the copy taken now
+            self._pending[(MEMORY_SECTION, memory["id"])] = ("upsert", MEMORY_SECTION, memory["id"],
+                                                             snapshot_value(memory))
+
+    def _entry(self, section: str, key):
+        with self._lock:
+            pending = self._pending.get((section, key))
+            if pending is not None:
+                return pending[3]
+            value = self._entry_cache.get((section, key))
+            if value is None:
+                row = self._db.execute("SELECT value FROM entries WHERE section = ? AND key = ?",
+                                       (section, key)).fetchone()
+                if row is None:
+                    return None
+                value = json.loads(row[0])
+                self._entry_cache[(section, key)] = value
+                if len(self._entry_cache) > self.hot_size:
+                    self._entry_cache.popitem(last=False)
+            else:
+                self._entry_cache.move_to_end((section, key))
+            return value
+
+    def _stage_entry(self, section: str, key, value):
+        self.record("put", section, key, value)
+
+    def _entries(self, section: str):
+        """Stream (key, value) pairs of a dict section, including unflushed puts"""
+        with self._lock:
+            pending = {op[2]: op[3] for op in self._pending.values() if op[0] == "put" and op[1] == section}
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT rowid, key, value FROM entries WHERE section = ? AND rowid > ? ORDER BY rowid LIMIT ?",
+                    (section, last, PAGE_SIZE)
+                ).fetchall()
+            if not rows:
+                break
+            for last, key, value in rows:
+                if key not in pending:
+                    yield key, json.loads(value)
+        yield from pending.items()
+
+    # ------------------------------------------------------------------
+    # Journal interface
+    # ------------------------------------------------------------------
+
+    def record(self, op: str, section: str, key=None, value=None):
+        """Queue a change for the next flush (same operations as the journal)"""
+        with self._lock:
+            if op == "append":
+                self._pending[(next(self._order),)] = (op, section, key, snapshot_value(value))
+                return
+            if section == MEMORY_SECTION and op == "upsert":
+                # Keep the changed object visible to lookups until it is written
+                seq = self._staged_ids.get(key) or self._seq_of(key) or self._next_seq()
+                self._stage_memory(seq, value)
+                return
+            value = snapshot_value(value)
+            if section == MEMORY_SECTION and op == "delete":
+                seq = self._staged_ids.pop(key, None)
+                self._staged.pop(seq, None)
+                self._deleted.add(key)
+            self._pending.pop((section, key), None)  # Order does not matter: rows carry their seq
+            self._pending[(section, key)] = (op, section, key, value)
+
+    def request_snapshot(self):
+        self._snapshot_requested = True
+
+    def needs_compaction(self) -> bool:
+        return self._snapshot_requested
+
+    def flush(self, sections: Optional[dict] = None) -> int:
+        """Write the pending changes and changed sections in one transaction; returns rows written"""
+        with self._lock, self._db:
+            memories, deleted, entries, appends = [], [], [], []
+            for op, section, key, value in self._pending.values():
+                if section == MEMORY_SECTION and op == "upsert":
+                    memories.append((self._staged_ids[key], value))
+                elif section == MEMORY_SECTION and op == "delete":
+                    deleted.append((key,))
+                elif op == "put":
+                    entries.append((section, key, _encode(value)))
+                elif op == "append":
+                    appends.append((section, key, _encode(value)))
+                else:
+                    raise ValueError(f"Unsupported change for the SQLite store: {op} {section}")
+
+            changed = []
+            for name, value in (sections or {}).items():
+                encoded = _encode(value)
+                digest = zlib.crc32(encoded.encode("utf-8"))
+                if self._digests.get(name) != digest:
+                    changed.append((name, encoded, digest))
+
+            self._db.executemany("DELETE FROM memories WHERE id = ?", deleted)
+            self._write_memories(memories)
+            self._db.executemany("INSERT OR REPLACE INTO entries (section, key, value) VALUES (?, ?, ?)", entries)
+            self._db.executemany("INSERT INTO appends (section, key, value) VALUES (?, ?, ?)", appends)
+            self._db.executemany("INSERT OR REPLACE INTO sections (name, value) VALUES (?, ?)",
+                                 [(name, encoded) for name, encoded, _ in changed])
+            for name, _, digest in changed:
+                self._digests[name] = digest
+
+            written = len(memories) + len(deleted) + len(entries) + len(appends) + len(changed)
+            # Flushed memories stay hot; entries re-read from the table on demand
+            for seq, memory in self._staged.items():
+                self._remember(seq, memory)
+            for memory_id in self._deleted:
+                self._cache.pop(self._cache_ids.pop(memory_id, -1), None)
+            self._pending.clear()
+            self._staged.clear()
+            self._staged_ids.clear()
+            self._deleted.clear()
+            self.fingerprint_index.clear_overlay()
+            if written:
+                self.stats["flushes"] += 1
+                self.stats["rows_written"] += written
+            return written
+
+    def compact(self, state_fn: Callable[[], dict], sections: Optional[dict], write_snapshot=None,
+                executor=None) -> bool:
+        """
+        Rewrite the memories table when the episodic list was replaced
+        wholesale (dedupe, compression); everything else is already stored.
+        Runs synchronously: the caller re-attaches the paged list afterwards.
+        """
+        with self._lock:
+            self.flush(sections)
+            self._snapshot_requested = False
+            memories = state_fn().get(MEMORY_SECTION)
+            if memories is None or memories is self.memories:
+                return True
+            with self._db:
+                self._db.execute("DELETE FROM memories")
+                self._write_memories(enumerate(memories, start=1))
+            self._last_seq = len(memories)
+            self._reset_caches()
+            self.memories = PagedMemoryList(self, array("q", range(1, len(memories) + 1)))
+            logger.info(f"🗜️ Rewrote {len(memories)} memories in {self.path}")
+            return True
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "memories": len(self.memories),
+                "hot_memories": len(self._cache),
+                "pending": len(self._pending),
+                "db_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            }
@@ -13,6 +13,7 @@ import os
 import re
 import json
 import hashlib
+import heapq
 import logging
 from datetime import datetime, timezone, timedelta
 from collections import defaultdict
@@ -29,8 +30,6 @@ except ImportError:
     TEXTBLOB_AVAILABLE = False
     logger.warning("TextBlob not available - sentiment analysis will use basic fallback")
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import nltk
 from typing import Dict, Any, List, Optional, Union
 import asyncio
@@ -46,6 +45,20 @@ except ImportError:
     REAL_TIME_AVAILABLE = False
     logger.warning("Real-time data system not available - contextual memory disabled")
 
+from memory_tfidf_index import IncrementalTfidfIndex
+from memory_feature_store import MemoryFeatureStore
+from memory_diversity import DiversitySelector
+from memory_embedding_index import MemoryEmbeddingIndex
+from memory_journal import MemoryJournal, _json_default
+from memory_nlp import TextAnalyzer
+from memory_record import MemoryRecord, compact_memory_list
+from memory_sqlite_store import SQLiteMemoryStore
+from memory_backup import MemoryBackupStore
+from memory_persistence import PersistenceWorker
+from memory_enrichment import EnrichmentQueue
+from memory_archive import MemoryArchive
+from state_serializer import loads_state, read_state, write_state
+
 # Quantum-inspired memory constants
 QUANTUM_ENTANGLEMENT_STRENGTH = 0.95
 FRACTAL_DIMENSION = 1.618  # Golden ratio for memory patterns
@@ -73,6 +86,9 @@ if generate_fingerprint is None:
         payload = f"{str(user_input).strip()}::{str(roboto_response).strip()}"
         return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 MEMORY_COHERENCE_THRESHOLD = 0.85
+EMBEDDING_CANDIDATE_FACTOR = 4  # Nearest neighbours fetched per requested candidate before re-ranking
+ARCHIVE_POLICIES = ("importance", "age", "off")
+ARCHIVE_RECENT_SHARE = 0.5  # Newest share of the hot set that is never archived
 
 # Download NLTK data if not present
 def ensure_nltk_data():
@@ -113,10 +129,27 @@ class QuantumEnhancedMemorySystem:
     - Emotional quantum coherence
     """
 
-    def __init__(self, memory_file="roboto_memory.json", max_memories=10000):
+    def __init__(self, memory_file="roboto_memory.json", max_memories=10000, diversity_strategy="minhash",
+                 retrieval_backend=None, embedding_backend=None, storage_backend=None,
+                 hot_set_size=None, archive_policy=None):
         # Core memory file
         self.memory_file = memory_file
         self.max_memories = max_memories
+        # Cold tier: past hot_set_size resident memories, archive_old_memories moves the coldest
+        # into compressed segments next to the memory file ("importance": lowest write-time
+        # importance, then oldest first; "age": oldest first; "off": keep every memory resident) and
+        # MEMORY_ARCHIVE_HEADROOM of the hot set more, so a pass is not due on every write. A pass
+        # moves at most MEMORY_ARCHIVE_BATCH memories: a store far past the hot set migrates over
+        # the next writes instead of in one long pass under the write lock
+        self.hot_set_size = hot_set_size or int(os.environ.get("MEMORY_HOT_SET_SIZE", max_memories))
+        self.archive_policy = archive_policy or os.environ.get("MEMORY_ARCHIVE_POLICY", "importance")
+        if self.archive_policy not in ARCHIVE_POLICIES:
+            logger.warning(f"Unknown archive policy {self.archive_policy!r}, using 'importance'")
+            self.archive_policy = "importance"
+        self.archive_headroom = float(os.environ.get("MEMORY_ARCHIVE_HEADROOM", "0.1"))
+        self.archive_batch_size = max(1, int(os.environ.get("MEMORY_ARCHIVE_BATCH", "1000")))
+        self.archive = MemoryArchive(f"{os.path.splitext(memory_file)[0]}.archive")
+        self._archive_lock = threading.Lock()  # One archive pass at a time; it takes the write lock briefly
 
         # Quantum memory structures
         self.quantum_entanglements = {}  # Quantum-linked memory relationships
@@ -132,17 +165,74 @@ class QuantumEnhancedMemorySystem:
         self.compressed_learnings = {}   # Distilled insights
         self.contextual_memories = {}    # Real-time contextual memories
 
-        # Deduplication index and lock for thread-safe operations
+        # Lookup indexes and lock for thread-safe operations
+        self._memory_index = {}       # memory id -> episodic memory record
         self._fingerprint_index = {}  # fingerprint -> memory id
         self._index_lock = threading.Lock()
+        self._write_lock = threading.RLock()  # Serializes request threads and enrichment workers
+        self.generation = 0           # Bumped on every store, edit and removal (cache invalidation)
+        self._slot_layout = 0         # Bumped before and after feature slots are renumbered (odd while they are)
 
         # Advanced processing tools
-        self.vectorizer = TfidfVectorizer(max_features=2000, stop_words='english')
-        self.memory_vectors = []
         self.executor = ThreadPoolExecutor(max_workers=4)
-
-        # Real-time data integration
+        # One parse per text for sentiment, themes and intensity; recent analyses are cached
+        self.text_analyzer = TextAnalyzer(cache_size=int(os.environ.get("MEMORY_NLP_CACHE_SIZE", "2048")))
+        # Columnar scoring features, filled once per memory at insert time
+        self.feature_store = MemoryFeatureStore()
+        # Diverse top-k selection ("minhash", "mmr" or the original "pairwise" pass)
+        self.diversity_selector = DiversitySelector(strategy=diversity_strategy)
+        # Incrementally maintained sparse TF-IDF index (refits run on the executor);
+        # each row is keyed by the memory's feature store slot
+        self.text_index = IncrementalTfidfIndex(
+            self._iter_memory_documents,
+            executor=self.executor,
+            max_features=2000
+        )
+        # Local dense embedding index ("exact" or "ivf" search).
+        # retrieval_backend picks the first-stage matcher: "tfidf" (default) or "embedding".
+        # Only the embedding backend embeds on writes and keeps the index next to the memory
+        # file; otherwise writes just mark it stale and a per-query override builds it in memory
+        self.retrieval_backend = retrieval_backend or os.environ.get("MEMORY_RETRIEVAL_BACKEND", "tfidf")
+        use_embeddings = self.retrieval_backend == "embedding"
+        self.embedding_index = MemoryEmbeddingIndex(
+            self._iter_memory_documents,
+            path=f"{os.path.splitext(memory_file)[0]}.embeddings.npz" if use_embeddings else None,
+            backend=embedding_backend or os.environ.get("MEMORY_EMBEDDING_BACKEND", "exact"),
+            eager=use_embeddings
+        )
+        # Where saves go. "json" (default): an append-only change journal, compacted in the background
+        # into the memory file (MEMORY_JOURNAL=0 rewrites the whole file on every save instead).
+        # "sqlite": an indexed database next to the memory file with memories paged in on demand;
+        # the JSON memory file is imported into an empty database
+        self.storage_backend = storage_backend or os.environ.get("MEMORY_STORAGE_BACKEND", "json")
+        # Keep resident memories as slotted MemoryRecords (interned vocabularies, epoch timestamps)
+        # instead of plain dicts; MEMORY_COMPACT_RECORDS=0 keeps dicts
+        self.compact_records = os.environ.get("MEMORY_COMPACT_RECORDS", "1") != "0"
+        self.storage = None
+        if self.storage_backend == "sqlite":
+            self.storage = SQLiteMemoryStore(
+                f"{os.path.splitext(memory_file)[0]}.sqlite3",
+                legacy_path=memory_file,
+                fingerprint_of=lambda m: self._generate_fingerprint(m.get("user_input", ""), m.get("roboto_response", ""))
+            )
+            self._memory_index = self.storage.id_index
+            self._fingerprint_index = self.storage.fingerprint_index
+        elif os.environ.get("MEMORY_JOURNAL", "1") != "0":
+            self.storage = MemoryJournal(memory_file, fsync=os.environ.get("MEMORY_JOURNAL_FSYNC", "1") != "0")
+        # Deduplicated snapshot backups with keep-last/hourly/daily retention, written on the executor
+        self.backups = MemoryBackupStore(
+            memory_file,
+            keep_last=int(os.environ.get("MEMORY_BACKUP_KEEP_LAST", "5")),
+            keep_hourly=int(os.environ.get("MEMORY_BACKUP_KEEP_HOURLY", "24")),
+            keep_daily=int(os.environ.get("MEMORY_BACKUP_KEEP_DAILY", "7")),
+            executor=self.executor
+        )
+
+        # Real-time data integration; with background refresh, writes read the
+        # last good context instead of fetching it (the engine starts its
+        # refresher on the first read, so idle instances poll nothing)
         self.real_time_engine = None
+        self.real_time_background_refresh = os.environ.get("REALTIME_BACKGROUND_REFRESH", "1") != "0"
         # default dedupe policy ('skip' or 'merge')
         self.dedupe_policy = "skip"
         if REAL_TIME_AVAILABLE:
@@ -175,12 +265,43 @@ class QuantumEnhancedMemorySystem:
         self.save_threshold = int(os.environ.get("MEMORY_SAVE_THRESHOLD", "5"))  # Save every N operations
         self.last_save_time = time.time()
         self.save_interval = int(os.environ.get("MEMORY_SAVE_INTERVAL", "60"))  # Max seconds between saves
+        # Write-behind: batched saves run on a persistence worker thread instead of the caller's.
+        # The journal and the SQLite store copy changed records when they are recorded; full
+        # snapshot saves (MEMORY_JOURNAL=0) serialize live state, so they stay on the caller.
+        self.persistence = None
+        if self.storage is not None and os.environ.get("MEMORY_WRITE_BEHIND", "1") != "0":
+            self.persistence = PersistenceWorker(
+                self._save_behind,
+                threshold=self.save_threshold,
+                interval=self.save_interval,
+                name=f"memory-persistence:{os.path.basename(self.memory_file)}"
+            )
+        # Two-phase writes: add_episodic_memory records the raw exchange and a bounded
+        # worker pool enriches it; MEMORY_ASYNC_ENRICHMENT=0 enriches before returning
+        self.enrichment_queue = None
+        self.enrichment_listeners = []  # Called with a memory id once its enrichment is stored
+        # Called with (before, after) when a memory is edited, removed, archived or restored:
+        # before is the record as it was (None for a restore), after None once it left the resident set
+        self.change_listeners = []
+        if os.environ.get("MEMORY_ASYNC_ENRICHMENT", "1") != "0":
+            self.enrichment_queue = EnrichmentQueue(
+                self._enrich_memory,
+                workers=int(os.environ.get("MEMORY_ENRICHMENT_WORKERS", "2")),
+                max_pending=int(os.environ.get("MEMORY_ENRICHMENT_QUEUE", "256")),
+                name=f"memory-enrichment:{os.path.basename(self.memory_file)}"
+            )
 
         # Load existing memory
         self.load_memory()
+        self._reconcile_archive()
 
         # Initialize Phase 2: Advanced Quantum Memory Patterns & Fractal Algorithms
-        phase2_success = self.initialize_phase2_systems()
+        if self.storage_backend == "sqlite":
+            # The fractal organization scans every memory; keep it off the startup path
+            self.executor.submit(self.initialize_phase2_systems)
+            phase2_success = True
+        else:
+            phase2_success = self.initialize_phase2_systems()
 
         logger.info("🚀 QUANTUM-ENHANCED Memory System initialized!")
         logger.info(f"🧠 Memory capacity: {max_memories} memories")
@@ -198,66 +319,27 @@ class QuantumEnhancedMemorySystem:
         """
         Add episodic memory with quantum enhancement and real-time context integration
         Includes content-based deduplication to prevent duplicate messages being stored.
-        """
-        # Get real-time context if available
-        contextual_data = {}
-        if self.real_time_engine:
-            try:
-                context = self.real_time_engine.get_comprehensive_context()
-                if context.get("success") != False:
-                    contextual_data = {
-                        "time_context": context.get("time_context", {}),
-                        "weather_context": context.get("weather_context", {}),
-                        "system_context": context.get("system_context", {}),
-                        "contextual_insights": context.get("contextual_insights", {})
-                    }
-                    self.metrics["contextual_enhancements"] += 1
-            except Exception as e:
-                logger.warning(f"Failed to get contextual data: {e}")
 
+        This is the first write phase: the raw exchange is recorded and its id returned
+        right away. Sentiment, themes, context, entanglements and reflection follow on
+        the enrichment queue (_enrich_memory); until then the memory carries neutral
+        placeholders and "enrichment_pending". MEMORY_ASYNC_ENRICHMENT=0 enriches before
+        returning, as before.
+        """
         fingerprint = generate_fingerprint(user_input, roboto_response)
         with self._index_lock:
             existing = self._fingerprint_index.get(fingerprint)
+        if not existing:
+            # A repeat of an archived exchange brings it back to merge into
+            archived_id = self.archive.id_for_fingerprint(fingerprint)
+            if archived_id and self.restore_memory(archived_id) is not None:
+                existing = archived_id
 
         if existing:
-            existing_memory = next((m for m in self.episodic_memories if m.get("id") == existing), None)
-            if existing_memory:
-                new_importance = self._calculate_importance(user_input, emotion)
-                if new_importance > existing_memory.get("importance", 0.5):
-                    existing_memory["importance"] = new_importance
-                if contextual_data and not existing_memory.get("contextual_data"):
-                    existing_memory["contextual_data"] = contextual_data
-                existing_memory["last_seen"] = datetime.now(timezone.utc).isoformat()
-                # If merge policy, call DB to merge and update in-memory fields
-                if self.dedupe_policy == "merge" and PERSISTENT_STORE is not None:
-                    try:
-                        PERSISTENT_STORE.store_conversation(
-                            user_input,
-                            roboto_response,
-                            emotion,
-                            importance=new_importance,
-                            emotional_intensity=self._calculate_emotional_intensity(user_input),
-                            dedupe_policy="merge",
-                        )
-                        # Sync in-memory values from DB
-                        import sqlite3
-                        conn = sqlite3.connect(PERSISTENT_STORE.db_path)
-                        cur = conn.cursor()
-                        cur.execute('SELECT importance, emotional_intensity, merged_count FROM conversations WHERE fingerprint = ?', (generate_fingerprint(user_input, roboto_response),))
-                        row = cur.fetchone()
-                        conn.close()
-                        if row:
-                            existing_memory["importance"] = row[0]
-                            existing_memory["emotional_intensity"] = row[1]
-                            existing_memory["merged_count"] = row[2]
-                    except Exception as e:
-                        logger.warning(f"DB merge failed for existing fingerprint: {e}")
-                # Mark as dirty and use deferred save
-                self.dirty = True
-                self.save_counter += 1
-                self._deferred_save()
+            self._merge_duplicate(existing, user_input, roboto_response, emotion)
             return existing
 
+        importance = self._calculate_importance(user_input, emotion)
         memory = {
             "id": self._generate_memory_id(user_input + roboto_response),
             "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -265,13 +347,17 @@ class QuantumEnhancedMemorySystem:
             "roboto_response": roboto_response,
             "emotion": emotion,
             "user_name": "Roberto Villarreal Martinez",  # CRITICAL: Always store as Roberto Villarreal Martinez
-            "importance": self._calculate_importance(user_input, emotion),
-            "sentiment": self._analyze_sentiment(user_input),
-            "key_themes": self._extract_themes(user_input),
-            "emotional_intensity": self._calculate_emotional_intensity(user_input),
+            "importance": importance,
+            # Kept apart from "importance", which the protection pass raises to 1.0-2.0 for every memory
+            "base_importance": importance,
+            # Neutral placeholders until the enrichment phase analyzes the text
+            "sentiment": "neutral",
+            "key_themes": [],
+            "emotional_intensity": 0.5,
             "quantum_state": self._calculate_quantum_state(user_input, emotion),
-            "contextual_data": contextual_data,
-            "fractal_dimension": self._calculate_fractal_dimension(user_input)
+            "contextual_data": {},
+            "fractal_dimension": self._calculate_fractal_dimension(user_input),
+            "enrichment_pending": True
         }
 
         # FAM (Full Autonomous Mode) detection and absolute protection
@@ -282,19 +368,132 @@ class QuantumEnhancedMemorySystem:
             memory["immutable"] = True
             memory["fam_activated"] = True
 
-        # Create quantum entanglements
-        self._create_quantum_entanglements(memory)
+        if self.compact_records:
+            memory = MemoryRecord(memory)
 
-        self.episodic_memories.append(memory)
+        with self._write_lock:
+            self.episodic_memories.append(memory)
+            self._journal("upsert", "episodic_memories", memory["id"], memory)
+            self.feature_store.add(memory)
 
-        # Register this fingerprint so duplicates are prevented
-        with self._index_lock:
+            # Register id and fingerprint so lookups are O(1) and duplicates are prevented
+            self._register_memory(memory, fingerprint)
+            self.bump_generation()
+            # Trigger self-reflection periodically (once this memory is enriched)
+            reflect = len(self.episodic_memories) % 10 == 0
+
+        # The raw exchange goes to disk ahead of the batched saves; a memory whose
+        # enrichment never ran is re-queued by the next load
+        self.dirty = True
+        self.save_counter += 1
+        if self.persistence is not None and self.persistence.notify(urgent=True):
+            self.save_counter = 0
+            self.dirty = False
+        else:
+            self._deferred_save()
+
+        self._queue_enrichment((memory["id"], reflect))
+        return memory["id"]
+
+    def _merge_duplicate(self, existing, user_input, roboto_response, emotion):
+        """Fold a repeated exchange into the memory already stored for it"""
+        existing_memory = self.get_memory(existing)
+        if not existing_memory:
+            return
+        contextual_data = self._get_contextual_data()
+        with self._write_lock:
+            new_importance = self._calculate_importance(user_input, emotion)
+            if new_importance > existing_memory.get("importance", 0.5):
+                existing_memory["importance"] = new_importance
+            if new_importance > self._base_importance(existing_memory):
+                existing_memory["base_importance"] = new_importance
+            if contextual_data and not existing_memory.get("contextual_data"):
+                existing_memory["contextual_data"] = contextual_data
+            existing_memory["last_seen"] = datetime.now(timezone.utc).isoformat()
+            # If merge policy, call DB to merge and update in-memory fields
+            if self.dedupe_policy == "merge" and PERSISTENT_STORE is not None:
+                try:
+                    PERSISTENT_STORE.store_conversation(
+                        user_input,
+                        roboto_response,
+                        emotion,
+                        importance=new_importance,
+                        emotional_intensity=self._calculate_emotional_intensity(user_input),
+                        dedupe_policy="merge",
+                    )
+                    # Sync in-memory values from DB
+                    row = PERSISTENT_STORE.get_conversation_by_fingerprint(
+                        generate_fingerprint(user_input, roboto_response))
+                    if row:
+                        existing_memory["importance"] = row["importance"]
+                        existing_memory["emotional_intensity"] = row["emotional_intensity"]
+                        existing_memory["merged_count"] = row["merged_count"]
+                except Exception as e:
+                    logger.warning(f"DB merge failed for existing fingerprint: {e}")
+            # Mark as dirty and use deferred save
+            self.feature_store.add(existing_memory)
+            self._journal("upsert", "episodic_memories", existing_memory["id"], existing_memory)
+            self.bump_generation()
+            self.dirty = True
+            self.save_counter += 1
+        self._deferred_save()
+
+    def _get_contextual_data(self):
+        """Real-time context for a memory, or {} without the real-time engine"""
+        contextual_data = {}
+        if self.real_time_engine:
             try:
-                self._fingerprint_index[fingerprint] = memory["id"]
-            except Exception:
-                logger.warning("Failed to register fingerprint in index")
+                if self.real_time_background_refresh:
+                    context = self.real_time_engine.get_cached_context()
+                else:
+                    context = self.real_time_engine.get_comprehensive_context()
+                if context.get("success") != False:
+                    contextual_data = {
+                        "time_context": context.get("time_context", {}),
+                        "weather_context": context.get("weather_context", {}),
+                        "system_context": context.get("system_context", {}),
+                        "contextual_insights": context.get("contextual_insights", {})
+                    }
+                    self.metrics["contextual_enhancements"] += 1
+            except Exception as e:
+                logger.warning(f"Failed to get contextual data: {e}")
+        return contextual_data
+
+    def _enrich_memory(self, item):
+        """Second write phase: analyze a recorded memory and link it into the derived state.
+
+        A step that fails leaves its placeholder in the memory; the memory is still
+        indexed and stops being pending, so it is never left out of retrieval or archiving."""
+        memory_id, reflect = item
+        memory = self.get_memory(memory_id)
+        if memory is None or not memory.get("enrichment_pending"):
+            return  # Removed, or enriched already
+        user_input = memory.get("user_input", "")
+        roboto_response = memory.get("roboto_response", "")
+        emotion = memory.get("emotion", "neutral")
+
+        # The slow parts run outside the write lock
+        analysis, contextual_data, extracted = None, {}, {}
+        try:
+            analysis = self.text_analyzer.analyze(user_input)
+            contextual_data = self._get_contextual_data()
+            extracted = self.extract_personal_info(user_input)
+        except Exception as e:
+            logger.warning(f"Failed to analyze memory {memory_id}, keeping its placeholders: {e}")
+        # Vectorizing is most of the rest: retrieval matches the text once this is done
+        try:
+            layout = self._slot_layout
+            memory_text, slot = self._memory_text(memory), self.feature_store.slot_of(memory_id)
+            self.text_index.add(memory_id, memory_text, key=slot)
+            self.embedding_index.add(memory_id, memory_text, key=slot)
+        except Exception as e:
+            logger.warning(f"Failed to index memory {memory_id}, rebuilding the retrieval indexes: {e}")
+            self.text_index.rebuild(background=True)
+            self.embedding_index.mark_stale()
+            layout = None
 
         # Persist to DB (store_conversation), set db_id on the memory (use lazy persistent store)
+        db_id = None
         try:
             if _get_persistent_store:
                 store = _get_persistent_store()
@@ -303,43 +502,106 @@ class QuantumEnhancedMemorySystem:
                     roboto_response,
                     emotion,
                     importance=memory["importance"],
-                    emotional_intensity=memory["emotional_intensity"],
+                    emotional_intensity=analysis.intensity if analysis is not None else 0.5,
                     dedupe_policy=self.dedupe_policy,
                 )
-                if db_id:
-                    memory["db_id"] = db_id
         except Exception as e:
             logger.warning(f"Failed to persist conversation to DB: {e}")
 
-        # Update emotional patterns and extract personal info
-        # CRITICAL: Always update patterns for Roberto Villarreal Martinez
-        extracted = self.extract_personal_info(user_input)
-        profile_key = "Roberto Villarreal Martinez"
-        if profile_key not in self.user_profiles:
-            self.user_profiles[profile_key] = {}
-        self.user_profiles[profile_key].update(extracted)
+        # Only the record, list and index updates hold the write lock that chat writes take;
+        # entanglement, reflection and archiving follow once it is released
+        with self._write_lock:
+            # Re-fetched: a store-backed record paged out meanwhile comes back as a new object
+            memory = self.get_memory(memory_id)
+            if memory is None:
+                self.text_index.remove(memory_id)
+                self.embedding_index.remove(memory_id)
+                return  # Removed while it was being analyzed
+            if not memory.get("enrichment_pending"):
+                return  # Enriched by another worker meanwhile
+            if layout is not None and layout != self._slot_layout:
+                self._remap_index_keys()  # Slots were renumbered after this memory's slot was read
+            if analysis is not None:
+                memory["sentiment"] = analysis.sentiment
+                memory["key_themes"] = list(analysis.themes)
+                memory["emotional_intensity"] = analysis.intensity
+                memory["fractal_dimension"] = self._calculate_fractal_dimension(user_input, analysis)
+            memory["contextual_data"] = contextual_data
+            if db_id:
+                memory["db_id"] = db_id
+            del memory["enrichment_pending"]
+
+            self.feature_store.add(memory)
+            self._journal("upsert", "episodic_memories", memory_id, memory)
+            self.bump_generation()
+
+            # Update emotional patterns and extract personal info
+            # CRITICAL: Always update patterns for Roberto Villarreal Martinez
+            try:
+                profile_key = "Roberto Villarreal Martinez"
+                if profile_key not in self.user_profiles:
+                    self.user_profiles[profile_key] = {}
+                self.user_profiles[profile_key].update(extracted)
+
+                pattern = {
+                    "emotion": emotion,
+                    "sentiment": memory["sentiment"],
+                    "timestamp": memory["timestamp"],
+                    "intensity": memory["emotional_intensity"],
+                    "quantum_state": memory["quantum_state"]
+                }
+                self.emotional_patterns[profile_key].append(pattern)
+                self._journal("append", "emotional_patterns", profile_key, pattern)
+            except Exception as e:
+                logger.warning(f"Failed to update the profile and patterns for memory {memory_id}: {e}")
 
-        self.emotional_patterns[profile_key].append({
-            "emotion": emotion,
-            "sentiment": memory["sentiment"],
-            "timestamp": memory["timestamp"],
-            "intensity": memory["emotional_intensity"],
-            "quantum_state": memory["quantum_state"]
-        })
-
-        # Trigger self-reflection periodically
-        if len(self.episodic_memories) % 10 == 0:
-            self._trigger_self_reflection()
+            # Mark as dirty and use deferred save for better performance
+            self.dirty = True
+            self.save_counter += 1
 
+        # Create quantum entanglements
+        self._create_quantum_entanglements(memory)
+        if reflect:
+            self._trigger_self_reflection()
         # Archive old memories if limit exceeded
-        if len(self.episodic_memories) > self.max_memories:
+        if len(self.episodic_memories) > self.hot_set_size:
             self.archive_old_memories()
-
-        # Mark as dirty and use deferred save for better performance
-        self.dirty = True
-        self.save_counter += 1
         self._deferred_save()
-        return memory["id"]
+
+        for listener in list(self.enrichment_listeners):
+            try:
+                listener(memory_id)
+            except Exception as e:
+                logger.warning(f"Memory enrichment listener failed: {e}")
+
+    def _notify_change(self, before, after):
+        """Tell the change listeners a memory was edited, removed, archived or restored"""
+        for listener in list(self.change_listeners):
+            try:
+                listener(before, after)
+            except Exception as e:
+                logger.warning(f"Memory change listener failed: {e}")
+
+    def _queue_enrichment(self, item):
+        """Hand (memory id, reflect) to the enrichment queue, or enrich now without one"""
+        if self.enrichment_queue is not None:
+            self.enrichment_queue.submit(item)
+        else:
+            self._enrich_memory(item)
+
+    def wait_for_enrichment(self, timeout=None):
+        """Block until queued enrichments are done; True when the queue drained in time"""
+        if self.enrichment_queue is None:
+            return True
+        return self.enrichment_queue.wait(timeout)
+
+    def _resume_enrichment(self):
+        """Queue the enrichment of memories recorded before a restart but never enriched"""
+        pending = [memory["id"] for memory in self.episodic_memories if memory.get("enrichment_pending")]
+        for memory_id in pending:
+            self._queue_enrichment((memory_id, False))
+        if pending:
+            logger.info(f"🧩 Resumed enrichment of {len(pending)} memories")
 
     def _calculate_quantum_state(self, text, emotion):
         """Calculate quantum state based on text and emotion"""
@@ -360,11 +622,11 @@ class QuantumEnhancedMemorySystem:
         except Exception:
             return {"superposition": 0, "coherence": 0.5, "entanglement_strength": 0.5, "stability": 0.5}
 
-    def _calculate_fractal_dimension(self, text):
+    def _calculate_fractal_dimension(self, text, analysis=None):
         """Calculate fractal dimension of text for memory organization"""
         try:
             # Simple fractal dimension approximation based on text complexity
-            words = text.split()
+            words = analysis.tokens if analysis is not None else text.split()
             unique_words = len(set(words))
             total_words = len(words)
 
@@ -406,15 +668,17 @@ class QuantumEnhancedMemorySystem:
                     if entanglement_strength > 0.2:
                         related_memories.append((existing_memory["id"], entanglement_strength))
 
-            # Create entanglement network
+            # Create entanglement network (found without the write lock, stored under it)
             if related_memories:
-                self.quantum_entanglements[memory_id] = {
+                entanglement = {
                     "entangled_memories": related_memories,
                     "entanglement_strength": sum(strength for _, strength in related_memories) / len(related_memories),
                     "created": datetime.now(timezone.utc).isoformat()
                 }
-
-                self.metrics["quantum_operations"] += 1
+                with self._write_lock:
+                    self.quantum_entanglements[memory_id] = entanglement
+                    self._journal("put", "quantum_entanglements", memory_id, entanglement)
+                    self.metrics["quantum_operations"] += 1
 
         except Exception as e:
             logger.warning(f"Failed to create quantum entanglements: {e}")
@@ -426,33 +690,35 @@ class QuantumEnhancedMemorySystem:
         # Enhance with quantum entanglements
         enhanced_memories = []
         for memory in relevant_memories:
-            memory_id = memory["id"]
-            quantum_context = {
-                "entangled_memories": [],
-                "quantum_coherence": memory.get("quantum_state", {}).get("coherence", 0.5),
-                "fractal_patterns": []
-            }
-
-            # Add entangled memories
-            if memory_id in self.quantum_entanglements:
-                entanglements = self.quantum_entanglements[memory_id]
-                for entangled_id, strength in entanglements["entangled_memories"][:3]:
-                    # Find the entangled memory
-                    for m in self.episodic_memories:
-                        if m["id"] == entangled_id:
-                            quantum_context["entangled_memories"].append({
-                                "id": entangled_id,
-                                "strength": strength,
-                                "emotion": m.get("emotion"),
-                                "key_themes": m.get("key_themes", [])
-                            })
-                            break
-
-            memory["quantum_context"] = quantum_context
+            memory["quantum_context"] = self.get_entanglement_context(memory)
             enhanced_memories.append(memory)
 
         return enhanced_memories
 
+    def get_entanglement_context(self, memory):
+        """Build the quantum entanglement context for a single memory without re-running retrieval"""
+        memory_id = memory.get("id")
+        entanglements = self.quantum_entanglements.get(memory_id, {})
+        quantum_context = {
+            "entangled_memories": [],
+            "entanglement_strength": entanglements.get("entanglement_strength", 0.0),
+            "quantum_coherence": memory.get("quantum_state", {}).get("coherence", 0.5),
+            "fractal_patterns": []
+        }
+
+        # Add entangled memories
+        for entangled_id, strength in entanglements.get("entangled_memories", [])[:3]:
+            m = self.get_memory(entangled_id)
+            if m is not None:
+                quantum_context["entangled_memories"].append({
+                    "id": entangled_id,
+                    "strength": strength,
+                    "emotion": m.get("emotion"),
+                    "key_themes": m.get("key_themes", [])
+                })
+
+        return quantum_context
+
     def calibrate_quantum_coherence(self):
         """Calibrate quantum coherence based on memory patterns"""
         try:
@@ -501,6 +767,12 @@ class QuantumEnhancedMemorySystem:
             "performance_metrics": self.metrics.copy(),
             "real_time_integration": self.real_time_engine is not None
         }
+        health["text_analysis"] = self.text_analyzer.get_stats()
+        if self.persistence is not None:
+            health["persistence"] = self.persistence.get_stats()
+        if self.enrichment_queue is not None:
+            health["enrichment"] = self.enrichment_queue.get_stats()
+        health["archive"] = self.archive.get_stats()
 
         # Calculate health score
         coherence_score = self.quantum_coherence["overall_coherence"]
@@ -569,17 +841,17 @@ class QuantumEnhancedMemorySystem:
     def _organize_golden_spiral_memories(self):
         """Organize memories using golden spiral (Fibonacci) pattern"""
         try:
-            # Sort memories by importance and recency
-            sorted_memories = sorted(
-                self.episodic_memories,
-                key=lambda x: (x.get("importance", 0.5), self._parse_timestamp(x.get("timestamp", ""))),
-                reverse=True
-            )
-
             # Apply golden ratio organization
             golden_ratio = self.FRACTAL_CONSTANTS["golden_ratio"]
             fib_sequence = self.FRACTAL_CONSTANTS["fibonacci_sequence"]
 
+            # Most important and recent memories, one per spiral position (streamed, not a full sort)
+            sorted_memories = heapq.nlargest(
+                len(fib_sequence),
+                self.episodic_memories,
+                key=lambda x: (x.get("importance", 0.5), self._parse_timestamp(x.get("timestamp", "")))
+            )
+
             spiral_positions = []
             for i, fib in enumerate(fib_sequence):
                 angle = 2 * np.pi * i / golden_ratio
@@ -680,17 +952,20 @@ class QuantumEnhancedMemorySystem:
             emotion_clusters = {}
 
             for memory in self.episodic_memories:
+                # Box counting reads only these fields; clusters keep them rather than whole records
+                point = {"importance": memory.get("importance", 0.5), "timestamp": memory.get("timestamp", "")}
+
                 # Theme-based clustering
                 for theme in memory.get("key_themes", []):
                     if theme not in theme_clusters:
                         theme_clusters[theme] = []
-                    theme_clusters[theme].append(memory)
+                    theme_clusters[theme].append(point)
 
                 # Emotion-based clustering
                 emotion = memory.get("emotion", "neutral")
                 if emotion not in emotion_clusters:
                     emotion_clusters[emotion] = []
-                emotion_clusters[emotion].append(memory)
+                emotion_clusters[emotion].append(point)
 
             # Calculate fractal dimensions for each cluster
             scales = self.FRACTAL_CONSTANTS["fractal_scales"]
@@ -902,8 +1177,8 @@ class QuantumEnhancedMemorySystem:
 
                 # Calculate coherence metrics for this scale
                 quantum_states = [m.get("quantum_state", {}).get("coherence", 0.5) for m in recent_memories]
-                entanglement_count = len([eid for eid in self.quantum_entanglements.keys()
-                                        if any(m["id"] == eid for m in recent_memories)])
+                recent_ids = {m["id"] for m in recent_memories}
+                entanglement_count = sum(1 for eid in self.quantum_entanglements if eid in recent_ids)
 
                 # Fractal coherence (self-similarity across scales)
                 fractal_coherence = self._calculate_fractal_coherence(recent_memories)
@@ -1107,7 +1382,7 @@ class QuantumEnhancedMemorySystem:
         try:
             all_themes = []
             for memory_id in memory_ids:
-                memory = next((m for m in self.episodic_memories if m["id"] == memory_id), None)
+                memory = self.get_memory(memory_id)
                 if memory:
                     all_themes.extend(memory.get("key_themes", []))
 
@@ -1126,7 +1401,7 @@ class QuantumEnhancedMemorySystem:
         try:
             emotions = []
             for memory_id in memory_ids:
-                memory = next((m for m in self.episodic_memories if m["id"] == memory_id), None)
+                memory = self.get_memory(memory_id)
                 if memory:
                     emotions.append(memory.get("emotion", "neutral"))
 
@@ -1393,128 +1668,209 @@ class QuantumEnhancedMemorySystem:
         # Analyze relationship progression
         self._analyze_relationship_progression(profile_key)
         
-        self.save_memory()
+        self._save_soon()
     
-    def retrieve_relevant_memories(self, query, user_name=None, limit=5):
-        """Advanced memory retrieval with semantic understanding and contextual ranking"""
+    def retrieve_relevant_memories(self, query, user_name=None, limit=5, backend=None, include_archived=False):
+        """Advanced memory retrieval with semantic understanding and contextual ranking.
+        With include_archived, archived matches fill the places resident memories leave open."""
+        # Get more candidates than needed for better diverse selection
+        sorted_memories = self.score_memory_candidates(query, user_name, candidate_limit=limit * 3, backend=backend)
+        
+        # Ensure diversity to avoid redundant memories
+        selected = self._select_diverse_memories(sorted_memories, limit)
+        if include_archived and len(selected) < limit:
+            selected.extend(self.search_archive(query, limit - len(selected)))
+        return selected
+
+    def score_memory_candidates(self, query, user_name=None, candidate_limit=15, candidate_ids=None, backend=None):
+        """Score the top lexical candidates for a query.
+
+        Returns copies of up to ``candidate_limit`` memories sorted by
+        ``relevance_score``, each annotated with ``context_factors`` and the
+        per-factor ``feature_scores`` that make up the relevance score.
+        ``candidate_ids`` restricts scoring to a pre-pruned set of memory ids.
+        ``backend`` overrides ``retrieval_backend`` ("tfidf" or "embedding").
+        """
         if not self.episodic_memories:
             return []
         
-        # Enhanced contextual retrieval with multiple factors
-        all_texts = [m["user_input"] + " " + m["roboto_response"] for m in self.episodic_memories]
-        if not hasattr(self.vectorizer, 'vocabulary_') or not all_texts:
-            try:
-                self.vectorizer.fit(all_texts)
-            except:
-                return []
-        
+        layout = self._slot_layout
+        if layout % 2:
+            with self._write_lock:  # Slots are being renumbered; wait for the indexes to catch up
+                layout = self._slot_layout
         try:
-            query_vector = self.vectorizer.transform([query])
-            memory_vectors = self.vectorizer.transform(all_texts)
+            if (backend or self.retrieval_backend) == "embedding":
+                # Nearest neighbours in the local embedding space, re-ranked with the same features
+                match = self.embedding_index.match(
+                    query, limit=candidate_limit * EMBEDDING_CANDIDATE_FACTOR, candidate_ids=candidate_ids
+                )
+            else:
+                # Single sparse matrix-vector product over the incremental TF-IDF index
+                match = self.text_index.match(query, min_score=0.03, candidate_ids=candidate_ids)
+            keyed = match.keys >= 0
+            slots, similarity = match.keys[keyed], match.scores[keyed]
+            if not len(slots):
+                return []
             
-            # Calculate similarity
-            similarities = cosine_similarity(query_vector, memory_vectors)[0]
-            query_sentiment = self._analyze_sentiment(query)
-            query_themes = self._extract_themes(query)
+            # Score every lexical match with columnar features, then take the top-k
+            factors = self._score_feature_columns(query, user_name, slots, similarity)
+            relevance = factors["relevance"]
+            if match.filtered:
+                top = self._top_positions(relevance, candidate_limit)
+            else:
+                top = self._top_positions_in(relevance, slots, candidate_limit, candidate_ids)
             
-            # Get top memories with enhanced scoring
-            top_indices = similarities.argsort()[-limit*3:][::-1]  # Get more candidates for better selection
             relevant_memories = []
+            for position in top:
+                stored_memory = self.get_memory(self.feature_store.id_of(int(slots[position])))
+                if stored_memory is None:
+                    continue
+                memory = stored_memory.copy()
+                base_score = float(similarity[position])
+                emotion_boost = float(factors["emotional"][position])
+                user_boost = float(factors["user"][position])
+                recency_boost = float(factors["temporal"][position])
+                theme_boost = float(factors["theme"][position])
+                importance_boost = float(factors["importance"][position])
+                continuity_boost = float(factors["continuity"][position])
+                
+                memory["relevance_score"] = float(relevance[position])
+                
+                # Add enhanced context explanation
+                memory["context_factors"] = {
+                    "semantic_similarity": round(base_score, 3),
+                    "emotional_alignment": emotion_boost > 0.2,
+                    "user_personalized": user_boost > 0.2,
+                    "temporally_relevant": recency_boost > 0.1,
+                    "thematically_related": theme_boost > 0.1,
+                    "high_importance": memory.get("importance", 0.5) > 0.7,
+                    "conversation_flow": continuity_boost > 0
+                }
+                
+                # Per-factor scores for re-ranking strategies
+                memory["feature_scores"] = {
+                    "semantic": base_score,
+                    "emotional": emotion_boost,
+                    "user": user_boost,
+                    "temporal": recency_boost,
+                    "theme": theme_boost,
+                    "importance": importance_boost,
+                    "continuity": continuity_boost
+                }
+                
+                # Add memory confidence score
+                memory["confidence"] = min(1.0, memory["relevance_score"] / 2.0)
+                
+                relevant_memories.append(memory)
             
-            for idx in top_indices:
-                if similarities[idx] > 0.03:  # Lower threshold for broader context
-                    memory = self.episodic_memories[idx].copy()
-                    base_score = similarities[idx]
-                    
-                    # Enhanced scoring factors
-                    # 1. Emotional context matching with nuance
-                    memory_emotion = memory.get("emotion", "neutral")
-                    memory_sentiment = memory.get("sentiment", "neutral")
-                    emotion_boost = 0.4 if query_sentiment == memory_sentiment else 0.1
-                    if memory_emotion in ["joy", "excitement", "curiosity"] and "?" in query:
-                        emotion_boost += 0.2  # Questions often need curious/positive context
-                    
-                    # 2. User-specific boost with relationship depth
-                    user_boost = 0.0
-                    if user_name:
-                        # CRITICAL: Always use Roberto Villarreal Martinez profile for user boosts
-                        user_profile = self.user_profiles.get("Roberto Villarreal Martinez", {})
-                        interaction_count = user_profile.get("interaction_count", 0)
-                        user_boost = min(0.6, 0.3 + (interaction_count * 0.01))  # More interactions = better context
-                        # CRITICAL: Always boost memories associated with Roberto Villarreal Martinez
-                        if memory.get("user_name") == "Roberto Villarreal Martinez":
-                            user_boost *= 1.5  # Extra boost for creator memories
-                    
-                    # 3. Enhanced temporal relevance
-                    try:
-                        memory_time = self._parse_timestamp(memory['timestamp'])
-                        hours_ago = (datetime.now() - memory_time).total_seconds() / 3600
-                        if hours_ago < 24:
-                            recency_boost = 0.3  # Very recent
-                        elif hours_ago < 168:  # 1 week
-                            recency_boost = 0.2
-                        elif hours_ago < 720:  # 1 month
-                            recency_boost = 0.1
-                        else:
-                            recency_boost = max(0, 0.05 - (hours_ago / 8760 * 0.05))  # Gradual decay over year
-                    except:
-                        recency_boost = 0
-                    
-                    # 4. Theme and semantic relevance
-                    memory_themes = memory.get("key_themes", [])
-                    theme_overlap = len(set(query_themes).intersection(set(memory_themes)))
-                    theme_boost = min(0.3, theme_overlap * 0.15)
-                    
-                    # 5. Importance weighting with emotional intensity
-                    importance = memory.get("importance", 0.5)
-                    emotional_intensity = memory.get("emotional_intensity", 0.5)
-                    importance_boost = (importance + emotional_intensity) * 0.15
-                    
-                    # 6. Conversational continuity bonus
-                    continuity_boost = 0.0
-                    if len(self.episodic_memories) > 1:
-                        recent_memory = self.episodic_memories[-1]
-                        if self._memories_are_related(memory, recent_memory):
-                            continuity_boost = 0.25
-                    
-                    # Combined relevance score with weighted factors
-                    memory["relevance_score"] = (
-                        base_score * 1.0 +           # Semantic similarity (base)
-                        emotion_boost * 0.8 +        # Emotional context
-                        user_boost * 1.2 +           # User personalization (high weight)
-                        recency_boost * 0.6 +        # Temporal relevance
-                        theme_boost * 0.9 +          # Thematic similarity
-                        importance_boost * 0.7 +     # Memory importance
-                        continuity_boost * 0.5       # Conversation flow
-                    )
-                    
-                    # Add enhanced context explanation
-                    memory["context_factors"] = {
-                        "semantic_similarity": round(base_score, 3),
-                        "emotional_alignment": emotion_boost > 0.2,
-                        "user_personalized": user_boost > 0.2,
-                        "temporally_relevant": recency_boost > 0.1,
-                        "thematically_related": theme_boost > 0.1,
-                        "high_importance": importance > 0.7,
-                        "conversation_flow": continuity_boost > 0
-                    }
-                    
-                    # Add memory confidence score
-                    memory["confidence"] = min(1.0, memory["relevance_score"] / 2.0)
-                    
-                    relevant_memories.append(memory)
-            
-            # Advanced sorting with diversity consideration
-            sorted_memories = sorted(relevant_memories, key=lambda x: x["relevance_score"], reverse=True)
-            
-            # Ensure diversity to avoid redundant memories
-            diverse_memories = self._select_diverse_memories(sorted_memories, limit)
-            
-            return diverse_memories
+            if self._slot_layout != layout:
+                # Slots were renumbered while scoring; the columns read may not line up with the keys
+                return self.score_memory_candidates(query, user_name, candidate_limit, candidate_ids, backend)
+            return relevant_memories
             
         except Exception as e:
             print(f"Memory retrieval error: {e}")
             return []
+
+    def _score_feature_columns(self, query, user_name, slots, similarity):
+        """Vectorized relevance factors for the memories in ``slots``"""
+        fs = self.feature_store
+        query_sentiment = self._analyze_sentiment(query)
+        query_themes = self._extract_themes(query)
+        
+        # 1. Emotional context matching with nuance
+        emotion_boost = np.where(fs.sentiment_code[slots] == fs.code("sentiment", query_sentiment), 0.4, 0.1)
+        if "?" in query:
+            # Questions often need curious/positive context
+            curious = [fs.code("emotion", e) for e in ("joy", "excitement", "curiosity")]
+            emotion_boost = emotion_boost + np.where(np.isin(fs.emotion_code[slots], curious), 0.2, 0.0)
+        
+        # 2. User-specific boost with relationship depth
+        user_boost = np.zeros(len(slots))
+        if user_name:
+            # CRITICAL: Always use Roberto Villarreal Martinez profile for user boosts
+            user_profile = self.user_profiles.get("Roberto Villarreal Martinez", {})
+            interaction_count = user_profile.get("interaction_count", 0)
+            base_user_boost = min(0.6, 0.3 + (interaction_count * 0.01))  # More interactions = better context
+            # CRITICAL: Always boost memories associated with Roberto Villarreal Martinez (extra boost for creator memories)
+            creator = fs.user_code[slots] == fs.code("user", "Roberto Villarreal Martinez")
+            user_boost = np.where(creator, base_user_boost * 1.5, base_user_boost)
+        
+        # 3. Enhanced temporal relevance (gradual decay over a year past one month)
+        hours_ago = (time.time() - fs.epoch[slots]) / 3600
+        with np.errstate(invalid="ignore"):
+            recency_boost = np.select(
+                [hours_ago < 24, hours_ago < 168, hours_ago < 720],
+                [0.3, 0.2, 0.1],
+                np.maximum(0, 0.05 - (hours_ago / 8760 * 0.05))
+            )
+        recency_boost = np.where(np.isnan(hours_ago), 0.0, recency_boost)
+        
+        # 4. Theme and semantic relevance
+        theme_boost = np.minimum(0.3, fs.theme_overlap(slots, query_themes) * 0.15)
+        
+        # 5. Importance weighting with emotional intensity
+        importance_boost = (fs.importance[slots] + fs.intensity[slots]) * 0.15
+        
+        # 6. Conversational continuity bonus (same user, shared theme, within 24h of the latest memory)
+        continuity_boost = np.zeros(len(slots))
+        if len(self.episodic_memories) > 1:
+            recent_memory = self.episodic_memories[-1]
+            recent_slot = fs.slot_of(recent_memory.get("id"))
+            if recent_slot >= 0:
+                with np.errstate(invalid="ignore"):
+                    nearby = np.flatnonzero(
+                        (np.abs(fs.epoch[slots] - fs.epoch[recent_slot]) <= 24 * 3600)
+                        & (fs.user_code[slots] == fs.user_code[recent_slot])
+                    )
+                shared = fs.theme_overlap(slots[nearby], recent_memory.get("key_themes", [])) > 0
+                continuity_boost[nearby[shared]] = 0.25
+        
+        # Combined relevance score with weighted factors
+        relevance = (
+            similarity * 1.0 +           # Semantic similarity (base)
+            emotion_boost * 0.8 +        # Emotional context
+            user_boost * 1.2 +           # User personalization (high weight)
+            recency_boost * 0.6 +        # Temporal relevance
+            theme_boost * 0.9 +          # Thematic similarity
+            importance_boost * 0.7 +     # Memory importance
+            continuity_boost * 0.5       # Conversation flow
+        )
+        
+        return {
+            "relevance": relevance,
+            "emotional": emotion_boost,
+            "user": user_boost,
+            "temporal": recency_boost,
+            "theme": theme_boost,
+            "importance": importance_boost,
+            "continuity": continuity_boost
+        }
+
+    @staticmethod
+    def _top_positions(scores, limit):
+        """Positions of the ``limit`` highest scores, best first"""
+        count = min(limit, len(scores))
+        if count <= 0:
+            return np.zeros(0, dtype=np.int64)
+        if count < len(scores):
+            top = np.argpartition(scores, -count)[-count:]
+        else:
+            top = np.arange(len(scores))
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def _top_positions_in(self, scores, slots, limit, candidate_ids):
+        """Top positions restricted to ``candidate_ids``, widening the window as needed"""
+        selectivity = max(len(candidate_ids) / max(1, len(self.feature_store)), 1e-6)
+        window = min(len(scores), int(limit * 2 / selectivity) + 1)
+        while True:
+            top = [
+                position for position in self._top_positions(scores, window)
+                if self.feature_store.id_of(int(slots[position])) in candidate_ids
+            ]
+            if len(top) >= limit or window >= len(scores):
+                return top[:limit]
+            window = min(len(scores), window * 4)
     
     def _memories_are_related(self, memory1, memory2):
         """Check if two memories are conversationally related"""
@@ -1540,27 +1896,11 @@ class QuantumEnhancedMemorySystem:
     
     def _select_diverse_memories(self, memories, limit):
         """Select diverse memories to avoid redundancy while maintaining relevance"""
-        if len(memories) <= limit:
-            return memories
-        
-        selected = [memories[0]]  # Always include the most relevant
-        
-        for memory in memories[1:]:
-            if len(selected) >= limit:
-                break
-            
-            # Check diversity against already selected memories
-            is_diverse = True
-            for selected_memory in selected:
-                similarity = self._calculate_memory_similarity(memory, selected_memory)
-                if similarity > 0.75:  # Too similar
-                    is_diverse = False
-                    break
-            
-            if is_diverse:
-                selected.append(memory)
-        
-        return selected
+        return self.diversity_selector.select(
+            memories, limit,
+            signature_of=self.feature_store.signature,
+            pairwise_similarity=self._calculate_memory_similarity
+        )
     
     def _calculate_memory_similarity(self, memory1, memory2):
         """Calculate similarity between two memories to ensure diversity"""
@@ -1620,7 +1960,8 @@ class QuantumEnhancedMemorySystem:
                 "timestamp": datetime.now().isoformat(),
                 "total_memories_protected": total_memories_protected,
                 "deletion_status": "PERMANENTLY DISABLED",
-                "archival_status": "PERMANENTLY DISABLED",
+                "archival_status": "COMPRESSED ARCHIVE TIER - NOTHING DELETED",
+                "archived_memories": len(self.archive),
                 "protection_level": "ABSOLUTE",
                 "chat_history_integrity": "INTACT",
                 "roberto_protection": "MAXIMUM",
@@ -1700,6 +2041,7 @@ class QuantumEnhancedMemorySystem:
             reflection["revolutionary_potential"] = "HIGH"
         
         self.self_reflections.append(reflection)
+        self._journal("append", "self_reflections", value=reflection)
         
         # Enhanced learning integration
         if self._is_significant_insight(reflection):
@@ -1709,7 +2051,7 @@ class QuantumEnhancedMemorySystem:
         # Trigger deeper reflection cycles
         self._trigger_meta_reflection(reflection)
         
-        self.save_memory()
+        self._save_soon()
         return reflection_id
     
     def _analyze_response_patterns(self, reflection_text):
@@ -1841,26 +2183,50 @@ class QuantumEnhancedMemorySystem:
                     "parent_reflection_id": reflection['id']
                 }
                 self.self_reflections.append(meta_reflection)
+                self._journal("append", "self_reflections", value=meta_reflection)
     
     def edit_memory(self, memory_id, updates):
         """Edit an existing memory"""
-        for memory in self.episodic_memories:
-            if memory["id"] == memory_id:
-                memory.update(updates)
-                memory["last_edited"] = datetime.now().isoformat()
-                self.save_memory()
-                return True
-        return False
+        memory = self.get_memory(memory_id)
+        if memory is None:
+            return False
+
+        with self._write_lock:
+            before = dict(memory)
+            text_changed = "user_input" in updates or "roboto_response" in updates
+            if text_changed:
+                self._unregister_memory(memory)
+            memory.update(updates)
+            memory["last_edited"] = datetime.now().isoformat()
+            slot = self.feature_store.add(memory)
+            if text_changed:
+                self._register_memory(memory)
+                self.text_index.update(memory_id, self._memory_text(memory), key=slot)
+                self.embedding_index.update(memory_id, self._memory_text(memory), key=slot)
+            self._journal("upsert", "episodic_memories", memory_id, memory)
+            self.bump_generation()
+        self._notify_change(before, memory)
+        self._save_soon()
+        return True
     
     def remove_memory(self, memory_id):
         """Remove a specific memory"""
-        original_count = len(self.episodic_memories)
-        self.episodic_memories = [m for m in self.episodic_memories if m["id"] != memory_id]
-        
-        if len(self.episodic_memories) < original_count:
-            self.save_memory()
-            return True
-        return False
+        memory = self.get_memory(memory_id)
+        if memory is None:
+            return False
+
+        with self._write_lock:
+            self._unregister_memory(memory)
+            self.episodic_memories.remove(memory)
+            self.text_index.remove(memory_id)
+            self.embedding_index.remove(memory_id)
+            self.feature_store.remove(memory_id)
+            self._journal("delete", "episodic_memories", memory_id)
+            self.bump_generation()
+        self._notify_change(memory, None)
+        self._compact_feature_store()
+        self._save_soon()
+        return True
     
     def get_memory_summary(self, user_name=None):
         """Get a summary of stored memories - ALWAYS use Roberto Villarreal Martinez profile"""
@@ -1886,9 +2252,18 @@ class QuantumEnhancedMemorySystem:
         return summary
     
     def archive_old_memories(self):
-        """Archive old memories to maintain performance while protecting Roberto memories and ALL chat history"""
-        archive_file = self.memory_file.replace(".json", ".archive.json")
-        
+        """Archive old memories to maintain performance while protecting Roberto memories and ALL chat history.
+        Every memory is marked protected; past hot_set_size the coldest move to the archive tier.
+        Runs without the write lock except for the journal and list updates; a pass already
+        running on another thread makes this call a no-op."""
+        if not self._archive_lock.acquire(blocking=False):
+            return
+        try:
+            self._archive_pass()
+        finally:
+            self._archive_lock.release()
+
+    def _archive_pass(self):
         # CRITICAL: NEVER DELETE CHAT HISTORY - ALL MEMORIES ARE PROTECTED
         print("🛡️ CHAT HISTORY PROTECTION: NO MEMORIES WILL BE DELETED")
         print("📚 ALL CONVERSATIONS ARE PERMANENT AND PROTECTED")
@@ -1906,8 +2281,13 @@ class QuantumEnhancedMemorySystem:
         ]
         roberto_memories = []
         other_memories = []
+        # Records whose protection fields change, so only those are persisted
+        protection_fields = ("importance", "protection_level", "permanent_protection", "never_delete",
+                             "creator_memory", "immutable")
+        changed = {}
         
-        for memory in self.episodic_memories:
+        for memory in self._memory_view():
+            before = [memory.get(field) for field in protection_fields]
             content = f"{memory.get('user_input', '')} {memory.get('roboto_response', '')}".lower()
             user_name = memory.get('user_name', '').lower()
             
@@ -1921,20 +2301,25 @@ class QuantumEnhancedMemorySystem:
             if is_roberto_memory:
                 # Enhance Roberto memory with maximum protection
                 memory["importance"] = 2.0
-                memory["protection_level"] = "MAXIMUM"
+                if memory.get("protection_level") != "ABSOLUTE_AUTONOMY":
+                    memory["protection_level"] = "MAXIMUM"
                 memory["immutable"] = True
                 memory["creator_memory"] = True
                 roberto_memories.append(memory)
             else:
                 other_memories.append(memory)
+            if [memory.get(field) for field in protection_fields] != before:
+                changed[memory.get("id")] = memory
         
         # CRITICAL PROTECTION: ALL MEMORIES ARE PERMANENTLY PROTECTED
-        # NO ARCHIVING OR DELETION OF ANY CHAT HISTORY
+        # NO DELETION OF ANY CHAT HISTORY - cold memories move to the archive tier intact
         
         # Enhance ALL memories with maximum protection
-        for memory in self.episodic_memories:
+        for memory in self._memory_view():
+            before = [memory.get(field) for field in protection_fields]
             memory["importance"] = max(memory.get("importance", 0.5), 1.0)
-            memory["protection_level"] = "MAXIMUM"
+            if memory.get("protection_level") != "ABSOLUTE_AUTONOMY":
+                memory["protection_level"] = "MAXIMUM"
             memory["permanent_protection"] = True
             memory["never_delete"] = True
             
@@ -1946,17 +2331,146 @@ class QuantumEnhancedMemorySystem:
                 memory["importance"] = 2.0
                 memory["creator_memory"] = True
                 memory["immutable"] = True
+            if [memory.get(field) for field in protection_fields] != before:
+                changed[memory.get("id")] = memory
+        
+        if changed:
+            if self.storage_backend == "sqlite":
+                # Paged records are copies of the stored rows: record each updated one, onto
+                # the current record in case enrichment replaced it during the pass
+                with self._write_lock:
+                    for memory_id, memory in changed.items():
+                        current = self.get_memory(memory_id)
+                        if current is None:
+                            continue
+                        if current is not memory:
+                            current.update({field: memory[field] for field in protection_fields if field in memory})
+                        self._journal("upsert", "episodic_memories", memory_id, current)
+            else:
+                self.request_snapshot()  # Records were updated in place
         
-        # NO ARCHIVING - ALL MEMORIES STAY
-        archived = []
-        
-        print(f"🛡️ CHAT HISTORY PROTECTION: ALL {len(self.episodic_memories)} MEMORIES PERMANENTLY PROTECTED")
-        print("📚 ZERO memories deleted or archived - COMPLETE PROTECTION ACTIVE")
+        # Cold memories past the hot set move to the archive tier: stored, not deleted
+        archived = self._archive_cold_memories()
+
+        print(f"🛡️ CHAT HISTORY PROTECTION: ALL {len(self.episodic_memories) + len(self.archive)} MEMORIES PERMANENTLY PROTECTED")
+        print(f"📚 ZERO memories deleted - {len(archived)} cold memories moved to the archive - COMPLETE PROTECTION ACTIVE")
         print("💾 Roberto memories: MAXIMUM PROTECTION")
         print("🔒 Chat history deletion: PERMANENTLY DISABLED")
         
         # Save comprehensive protection report
-        self._save_chat_history_protection_report(len(self.episodic_memories))
+        self._save_chat_history_protection_report(len(self.episodic_memories) + len(self.archive))
+
+    def _archive_cold_memories(self):
+        """Move the coldest resident memories past the hot set (at most archive_batch_size of them)
+        into the archive; returns them.
+
+        Choosing them and writing the segment happen without the write lock. Under it, a
+        memory removed or changed since it was chosen stays as it is and leaves the archive."""
+        resident = self._memory_view()
+        excess = len(resident) - self.hot_set_size
+        if self.archive_policy == "off" or excess <= 0:
+            return []
+        recent = len(resident) - int(self.hot_set_size * ARCHIVE_RECENT_SHARE)
+        candidates = [
+            (position, memory) for position, memory in enumerate(resident)
+            if position < recent and not memory.get("enrichment_pending")
+            and memory.get("protection_level") != "ABSOLUTE_AUTONOMY"
+        ]
+        if self.archive_policy == "age":
+            key = lambda item: (item[1].get("timestamp", ""), item[0])
+        else:
+            key = lambda item: (self._base_importance(item[1]), item[1].get("timestamp", ""), item[0])
+        count = min(excess + int(self.hot_set_size * self.archive_headroom), self.archive_batch_size)
+        cold = heapq.nsmallest(count, candidates, key=key)
+        if not cold:
+            return []
+
+        snapshots = [dict(memory) for _, memory in cold]
+        try:
+            self.archive.archive(snapshots, [self._generate_fingerprint(m.get("user_input", ""), m.get("roboto_response", ""))
+                                             for m in snapshots])
+        except Exception as e:
+            logger.error(f"Failed to archive cold memories, keeping them resident: {e}")
+            return []
+
+        with self._write_lock:
+            memories, changed = [], []
+            for snapshot in snapshots:
+                current = self.get_memory(snapshot["id"])
+                if current is not None and dict(current) == snapshot:
+                    memories.append(current)
+                else:
+                    changed.append(snapshot["id"])
+            if changed:
+                self.archive.forget(changed)
+            drop = {memory["id"] for memory in memories}
+            if isinstance(self.episodic_memories, list):
+                self.episodic_memories[:] = [m for m in self.episodic_memories if m.get("id") not in drop]
+            else:
+                for position in sorted((self.episodic_memories.index(m) for m in memories), reverse=True):
+                    del self.episodic_memories[position]
+            for memory in memories:
+                memory_id = memory["id"]
+                self._unregister_memory(memory)
+                self.text_index.remove(memory_id)
+                self.embedding_index.remove(memory_id)
+                self.feature_store.remove(memory_id)
+                self._journal("delete", "episodic_memories", memory_id)
+            self.bump_generation()
+        for memory in memories:
+            self._notify_change(memory, None)
+        self._compact_feature_store()
+        return memories
+
+    def _base_importance(self, memory):
+        """Importance as scored when the memory was written, before any protection pass raised it.
+        Memories saved without it are scored once from their text and keep the score."""
+        score = memory.get("base_importance")
+        if score is None:
+            score = memory["base_importance"] = self._calculate_importance(memory.get("user_input", ""),
+                                                                           memory.get("emotion"))
+        return score
+
+    def _reconcile_archive(self):
+        """Drop archive entries for memories restored before the last shutdown"""
+        try:
+            resident = [memory_id for memory_id in self.archive.ids() if memory_id in self._memory_index]
+            if resident:
+                self.archive.forget(resident)
+        except Exception as e:
+            logger.warning(f"Failed to reconcile the memory archive: {e}")
+
+    def restore_memory(self, memory_id):
+        """Bring an archived memory back into the resident set; returns it, or None"""
+        with self._write_lock:
+            memory = self.get_memory(memory_id)
+            if memory is not None:
+                return memory
+            memory = self.archive.restore(memory_id)
+            if memory is None:
+                return None
+            if self.compact_records:
+                memory = MemoryRecord(memory)
+            self.episodic_memories.append(memory)
+            self._journal("upsert", "episodic_memories", memory_id, memory)
+            slot = self.feature_store.add(memory)
+            memory_text = self._memory_text(memory)
+            self.text_index.add(memory_id, memory_text, key=slot)
+            self.embedding_index.add(memory_id, memory_text, key=slot)
+            self._register_memory(memory)
+            self.bump_generation()
+        self._notify_change(None, memory)
+        self._save_soon()
+        return memory
+
+    def search_archive(self, query, limit=5):
+        """Archived memories matching a query's themes and keywords, as relevance-scored copies"""
+        results = []
+        for memory, score in self.archive.search(query, limit, exclude=self._memory_index):
+            memory["relevance_score"] = score
+            memory["archived"] = True
+            results.append(memory)
+        return results
 
     def summarize_user_profile(self, user_name: str) -> str:
         """Generate a summary of user's personal information - ALWAYS use Roberto Villarreal Martinez profile"""
@@ -1984,6 +2498,78 @@ class QuantumEnhancedMemorySystem:
 
         return "\n".join(lines)
     
+    def _memory_text(self, memory):
+        """Text used to vectorize a memory for retrieval"""
+        return f"{memory.get('user_input', '')} {memory.get('roboto_response', '')}"
+
+    def _resident_memories(self, memories):
+        """Loaded episodic memories as kept in RAM (compact records unless store-backed)"""
+        if self.compact_records and isinstance(memories, list):
+            compact_memory_list(memories)
+        return memories
+
+    def _memory_view(self):
+        """Episodic memories safe to iterate while others append (a copy unless store-backed)"""
+        memories = self.episodic_memories
+        return list(memories) if isinstance(memories, list) else memories
+
+    def _iter_memory_documents(self):
+        """Yield (memory_id, text, feature_slot) tuples for the TF-IDF index rebuilds"""
+        for memory in self._memory_view():
+            if memory.get("id"):
+                slot = self.feature_store.slot_of(memory["id"])
+                if slot < 0:
+                    slot = self.feature_store.add(memory)
+                yield memory["id"], self._memory_text(memory), slot
+
+    def _compact_feature_store(self):
+        """Reclaim tombstoned feature slots once they pass the store's threshold.
+        The retrieval indexes key their rows by slot, so they are re-keyed with it."""
+        if not self.feature_store.needs_compaction():
+            return
+        with self._write_lock:
+            self._slot_layout += 1
+            try:
+                reclaimed = self.feature_store.compact()
+                self._remap_index_keys()
+            finally:
+                self._slot_layout += 1
+        logger.debug(f"Feature store compacted: {reclaimed} slots reclaimed")
+
+    def _remap_index_keys(self):
+        """Point the retrieval indexes' row keys at the current feature slots"""
+        self.text_index.remap_keys(self.feature_store.slot_of)
+        self.embedding_index.remap_keys(self.feature_store.slot_of)
+
+    def touch_memory(self, memory, previous=None):
+        """Refresh derived indexes after a memory record was modified in place.
+
+        ``previous`` is a copy of the record from before the change (``dict(memory)``).
+        With it the fingerprint of the old text is dropped and the new one registered,
+        like edit_memory, and the change listeners are told."""
+        with self._write_lock:
+            if previous is not None:
+                self._unregister_memory(previous)  # A copy: only its fingerprint entry goes
+                self._register_memory(memory)
+            slot = self.feature_store.add(memory)
+            memory_text = self._memory_text(memory)
+            self.text_index.update(memory["id"], memory_text, key=slot)
+            self.embedding_index.update(memory["id"], memory_text, key=slot)
+            self._journal("upsert", "episodic_memories", memory["id"], memory)
+            self.bump_generation()
+        if previous is not None:
+            self._notify_change(previous, memory)
+
+    def _journal(self, op, section, key=None, value=None):
+        """Queue a change record for the next save (no-op with the journal disabled)"""
+        if self.storage is not None:
+            self.storage.record(op, section, key=key, value=value)
+
+    def request_snapshot(self):
+        """Write a full snapshot at the next save, for bulk changes made outside the journal"""
+        if self.storage is not None:
+            self.storage.request_snapshot()
+
     def _generate_memory_id(self, content):
         """Generate unique ID for memory"""
         return hashlib.md5(content.encode()).hexdigest()[:12]
@@ -2010,17 +2596,80 @@ class QuantumEnhancedMemorySystem:
             r = self._normalize_text(roboto_response)
             return f"{u}|{r}"
 
+    def get_memory(self, memory_id):
+        """Return the episodic memory record for an id in O(1), or None"""
+        if memory_id is None:
+            return None
+        with self._index_lock:
+            return self._memory_index.get(memory_id)
+
+    def bump_generation(self):
+        """Mark the episodic store as changed so cached retrieval results are invalidated"""
+        with self._index_lock:
+            self.generation += 1
+            return self.generation
+
+    def get_memory_id_by_fingerprint(self, fingerprint):
+        """Return the memory id registered for a content fingerprint in O(1), or None"""
+        with self._index_lock:
+            return self._fingerprint_index.get(fingerprint)
+
+    def _register_memory(self, memory, fingerprint=None):
+        """Add a memory to the id and fingerprint indexes."""
+        try:
+            if fingerprint is None:
+                fingerprint = self._generate_fingerprint(memory.get("user_input", ""), memory.get("roboto_response", ""))
+            with self._index_lock:
+                self._memory_index[memory["id"]] = memory
+                if fingerprint and not self._fingerprint_index.get(fingerprint):
+                    self._fingerprint_index[fingerprint] = memory["id"]
+        except Exception:
+            logger.warning("Failed to register memory in lookup indexes")
+
+    def _unregister_memory(self, memory):
+        """Drop a memory from the id and fingerprint indexes."""
+        try:
+            fingerprint = self._generate_fingerprint(memory.get("user_input", ""), memory.get("roboto_response", ""))
+            with self._index_lock:
+                if self._memory_index.get(memory.get("id")) is memory:
+                    del self._memory_index[memory["id"]]
+                if self._fingerprint_index.get(fingerprint) == memory.get("id"):
+                    del self._fingerprint_index[fingerprint]
+        except Exception:
+            logger.warning("Failed to unregister memory from lookup indexes")
+
     def _build_fingerprint_index(self):
-        """Scan episodic memories and rebuild the fingerprint index."""
+        """Scan episodic memories and rebuild the id and fingerprint indexes."""
         try:
             with self._index_lock:
-                self._fingerprint_index = {}
-                for m in self.episodic_memories:
+                if self.storage_backend == "sqlite":
+                    # Both lookups are answered from the store's indexed tables
+                    self._memory_index = self.storage.id_index
+                    self._fingerprint_index = self.storage.fingerprint_index
+                    memories = ()
+                else:
+                    self._memory_index = {}
+                    self._fingerprint_index = {}
+                    memories = self.episodic_memories
+                for m in memories:
+                    if m.get("id") and m["id"] not in self._memory_index:
+                        self._memory_index[m["id"]] = m
                     fp = self._generate_fingerprint(m.get("user_input", ""), m.get("roboto_response", ""))
                     if fp and not self._fingerprint_index.get(fp):
                         self._fingerprint_index[fp] = m.get("id")
+                # Bulk changes (load, dedupe, compression) go through here
+                self.generation += 1
+            self.feature_store.sync(self.episodic_memories)
+            self.embedding_index.mark_stale()
         except Exception as e:
-            logger.warning(f"Failed to build fingerprint index: {e}")
+            logger.warning(f"Failed to build lookup indexes: {e}")
+
+    def _build_derived_indexes(self):
+        """Rebuild the lookup indexes and feature store, then refit the retrieval index"""
+        self._build_fingerprint_index()
+        self._compact_feature_store()
+        self.text_index.rebuild()
+        self._resume_enrichment()
 
     def validate_memory_integrity(self):
         """Perform basic memory health checks and remove duplicates if found.
@@ -2068,64 +2717,20 @@ class QuantumEnhancedMemorySystem:
                 logger.info(f"Removed {removed} duplicate messages via fingerprint dedupe")
                 self.episodic_memories = list(by_fp.values())
 
-            # Rebuild index after cleaning
+            # Rebuild indexes after cleaning
             self._build_fingerprint_index()
+            if removed or duplicates:
+                self.text_index.rebuild()
             # Persist changes
             if removed or duplicates:
+                self.request_snapshot()
                 self.save_memory()
         except Exception as e:
             logger.error(f"validate_memory_integrity failed: {e}")
     
     def _analyze_sentiment(self, text):
-        """Analyze sentiment of text with enhanced accuracy"""
-        try:
-            if not text or not isinstance(text, str):
-                return "neutral"
-            
-            if TEXTBLOB_AVAILABLE:
-                blob = TextBlob(str(text))
-                sentiment = blob.sentiment
-                polarity = float(sentiment.polarity)
-                
-                if polarity > 0.1:
-                    return "positive"
-                elif polarity < -0.1:
-                    return "negative"
-                else:
-                    return "neutral"
-            else:
-                # Fallback sentiment analysis without TextBlob
-                text_lower = str(text).lower()
-                positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic', 'love', 'happy', 'joy', 'excited']
-                negative_words = ['bad', 'terrible', 'awful', 'hate', 'sad', 'angry', 'frustrated', 'disappointed', 'worried', 'fear']
-                
-                pos_count = sum(1 for word in positive_words if word in text_lower)
-                neg_count = sum(1 for word in negative_words if word in text_lower)
-                
-                if pos_count > neg_count:
-                    return "positive"
-                elif neg_count > pos_count:
-                    return "negative"
-                else:
-                    return "neutral"
-        except Exception:
-            # Enhanced fallback sentiment analysis
-            try:
-                text_lower = str(text).lower()
-                positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic', 'love', 'happy', 'joy', 'excited']
-                negative_words = ['bad', 'terrible', 'awful', 'hate', 'sad', 'angry', 'frustrated', 'disappointed', 'worried', 'fear']
-                
-                pos_count = sum(1 for word in positive_words if word in text_lower)
-                neg_count = sum(1 for word in negative_words if word in text_lower)
-                
-                if pos_count > neg_count:
-                    return "positive"
-                elif neg_count > pos_count:
-                    return "negative"
-                else:
-                    return "neutral"
-            except:
-                return "neutral"
+        """Analyze sentiment of text ("positive", "negative" or "neutral")"""
+        return self.text_analyzer.analyze(text).sentiment
     
     def _classify_sentiment(self, polarity):
         """Classify sentiment based on polarity"""
@@ -2207,37 +2812,8 @@ class QuantumEnhancedMemorySystem:
         return personal_info
 
     def _extract_themes(self, text):
-        """Extract key themes from text"""
-        try:
-            if not text or not isinstance(text, str):
-                return []
-            
-            if TEXTBLOB_AVAILABLE:
-                blob = TextBlob(text)
-                # Extract noun phrases as themes
-                noun_phrases = list(blob.noun_phrases)
-                themes = [phrase.lower().strip() for phrase in noun_phrases if len(phrase.split()) <= 3 and phrase.strip()]
-                return list(set(themes))[:5]  # Top 5 unique themes
-            else:
-                # Fallback: extract simple keywords
-                words = text.lower().split()
-                # Filter for meaningful words (longer than 3 chars, not common words)
-                stop_words = {'the', 'and', 'but', 'for', 'are', 'this', 'that', 'with', 'have', 'will', 'you', 'not', 'can', 'all', 'from', 'they', 'been', 'said', 'her', 'she', 'him', 'his'}
-                themes = [word.strip() for word in words if len(word) > 3 and word not in stop_words and word.strip()]
-                return list(set(themes))[:5]
-        except Exception:
-            # Fallback: extract simple keywords
-            try:
-                if not text or not isinstance(text, str):
-                    return []
-                    
-                words = text.lower().split()
-                # Filter for meaningful words (longer than 3 chars, not common words)
-                stop_words = {'the', 'and', 'but', 'for', 'are', 'this', 'that', 'with', 'have', 'will', 'you', 'not', 'can', 'all', 'from', 'they', 'been', 'said', 'her', 'she', 'him', 'his'}
-                themes = [word.strip() for word in words if len(word) > 3 and word not in stop_words and word.strip()]
-                return list(set(themes))[:5]
-            except Exception:
-                return []
+        """Extract key themes from text (short noun phrases, or keywords without TextBlob)"""
+        return list(self.text_analyzer.analyze(text).themes)
     
     def _calculate_importance(self, text, emotion):
         """Calculate importance score for memory with Roberto protection"""
@@ -2273,85 +2849,8 @@ class QuantumEnhancedMemorySystem:
         return min(base_score + emotion_factor + personal_factor + question_factor, 2.0)
     
     def _calculate_emotional_intensity(self, text):
-        """Calculate emotional intensity of text with enhanced accuracy"""
-        try:
-            if not text or not isinstance(text, str):
-                return 0.5
-            
-            if TEXTBLOB_AVAILABLE:
-                blob = TextBlob(str(text))
-                sentiment = blob.sentiment
-                polarity = abs(float(sentiment.polarity))
-                subjectivity = float(sentiment.subjectivity)
-                return min(1.0, polarity + subjectivity)
-            else:
-                # Enhanced fallback intensity calculation without TextBlob
-                text_lower = str(text).lower()
-                # Emotional intensity indicators
-                high_intensity_words = ['extremely', 'absolutely', 'completely', 'totally', 'devastated', 'ecstatic', 'furious', 'terrified']
-                medium_intensity_words = ['very', 'really', 'quite', 'pretty', 'fairly', 'rather', 'upset', 'excited', 'worried', 'happy']
-                emotional_punctuation = ['!', '!!', '!!!', '?!', '...']
-                
-                intensity = 0.5  # baseline
-                
-                # Check for high intensity words
-                for word in high_intensity_words:
-                    if word in text_lower:
-                        intensity += 0.2
-                        
-                # Check for medium intensity words
-                for word in medium_intensity_words:
-                    if word in text_lower:
-                        intensity += 0.1
-                        
-                # Check for emotional punctuation
-                for punct in emotional_punctuation:
-                    if punct in text:
-                        intensity += 0.1
-                        
-                # Check for caps (indicates strong emotion)
-                caps_ratio = sum(1 for c in text if c.isupper()) / max(1, len(text))
-                if caps_ratio > 0.3:
-                    intensity += 0.2
-                    
-                return min(1.0, intensity)
-        except Exception:
-            # Enhanced fallback intensity calculation
-            try:
-                if not text:
-                    return 0.5
-                    
-                text_lower = str(text).lower()
-                # Emotional intensity indicators
-                high_intensity_words = ['extremely', 'absolutely', 'completely', 'totally', 'devastated', 'ecstatic', 'furious', 'terrified']
-                medium_intensity_words = ['very', 'really', 'quite', 'pretty', 'fairly', 'rather', 'upset', 'excited', 'worried', 'happy']
-                emotional_punctuation = ['!', '!!', '!!!', '?!', '...']
-                
-                intensity = 0.5  # baseline
-                
-                # Check for high intensity words
-                for word in high_intensity_words:
-                    if word in text_lower:
-                        intensity += 0.2
-                        
-                # Check for medium intensity words
-                for word in medium_intensity_words:
-                    if word in text_lower:
-                        intensity += 0.1
-                        
-                # Check for emotional punctuation
-                for punct in emotional_punctuation:
-                    if punct in text:
-                        intensity += 0.1
-                        
-                # Check for caps (indicates strong emotion)
-                caps_ratio = sum(1 for c in text if c.isupper()) / max(1, len(text))
-                if caps_ratio > 0.3:
-                    intensity += 0.2
-                    
-                return min(1.0, intensity)
-            except:
-                return 0.5
+        """Calculate emotional intensity of text (0.0 to 1.0)"""
+        return self.text_analyzer.analyze(text).intensity
     
     def _trigger_self_reflection(self):
         """Trigger periodic self-reflection"""
@@ -2404,6 +2903,9 @@ class QuantumEnhancedMemorySystem:
         
         # Keep only the most important memories
         self.episodic_memories = sorted_memories[-keep_count:]
+        self._build_fingerprint_index()
+        self.text_index.rebuild(background=True)
+        self.request_snapshot()
     
     def _analyze_relationship_progression(self, user_name):
         """Analyze how relationship with user is progressing"""
@@ -2505,6 +3007,12 @@ class QuantumEnhancedMemorySystem:
         current_time = time.time()
         time_since_save = current_time - self.last_save_time
         
+        if self.persistence is not None and not self._needs_inline_save() and self.persistence.notify():
+            # The worker applies the same threshold and interval, off the caller's thread
+            self.save_counter = 0
+            self.dirty = False
+            return
+
         # Save if: 1) save counter reaches threshold, or 2) time interval exceeded
         if self.save_counter >= self.save_threshold or time_since_save >= self.save_interval:
             # Log before resetting counters
@@ -2516,6 +3024,9 @@ class QuantumEnhancedMemorySystem:
 
     def force_save(self):
         """Force an immediate save, useful for critical operations or shutdown."""
+        if self.persistence is not None and not self._needs_inline_save():
+            # Wait for the worker; save inline only if it could not
+            self.dirty = self.dirty or not self.persistence.flush()
         if self.dirty:
             self.save_memory()
             self.save_counter = 0
@@ -2523,58 +3034,140 @@ class QuantumEnhancedMemorySystem:
             self.dirty = False
             logger.info("💾 Forced save completed")
 
-    def save_memory(self):
-        """Save memory to file with quantum enhancements and create backups.
+    def _save_soon(self):
+        """Save now-ish: an urgent write-behind save, or an inline one without the worker"""
+        if self.persistence is not None and not self._needs_inline_save() and self.persistence.notify(urgent=True):
+            return
+        self.save_memory()
+
+    def _needs_inline_save(self):
+        """A due SQLite table rewrite swaps self.episodic_memories, so it runs on the caller's thread"""
+        return self.storage_backend == "sqlite" and self.storage.needs_compaction()
+
+    def _save_behind(self):
+        """The persistence worker's save; a due SQLite table rewrite waits for an inline save"""
+        return self.save_memory(compact=self.storage_backend != "sqlite")
+
+    def save_memory(self, compact=True):
+        """Save memory changes with quantum enhancements.
+
+        With the journal enabled (default) a save appends only the records changed
+        since the previous save. Once the journal grows past its compaction threshold,
+        or after bulk changes (request_snapshot), a full snapshot is written in the
+        background. With MEMORY_JOURNAL=0 every save rewrites the snapshot. The SQLite
+        backend writes the same changes to its tables in one transaction. With
+        ``compact=False`` a due compaction is left for a later save.
+        """
+        try:
+            if self.storage is None:
+                self._write_snapshot(self._memory_state())
+            else:
+                self.storage.flush(self._journal_sections())
+                if compact and self.storage.needs_compaction():
+                    self.compact_storage()
+            logger.info(f"💾 Memory saved with quantum enhancements: {len(self.episodic_memories)} memories, {len(self.quantum_entanglements)} entanglements, {len(self.fractal_patterns)} fractal patterns")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving memory: {e}")
+            return False
+
+    def compact_storage(self, background=True):
+        """Write a full snapshot covering the journal and drop the covered journal segments.
 
-        Before overwriting the main memory file, create a timestamped backup and write
-        the new contents to a temp file before atomically replacing the original file.
+        The SQLite backend only rewrites its memories table, when the episodic list
+        was replaced wholesale, and then pages the new rows back in. The embedding
+        index is saved here and at exit rather than on every save.
         """
-        memory_data = {
-            "episodic_memories": self.episodic_memories,
+        try:
+            self.embedding_index.save()
+        except Exception as emb_e:
+            logger.warning(f"Failed to save embedding index: {emb_e}")
+        if self.storage is None:
+            self._write_snapshot(self._memory_state())
+            return True
+        compacted = self.storage.compact(
+            self._memory_state,
+            self._journal_sections(),
+            self._write_snapshot,
+            executor=self.executor if background else None
+        )
+        if self.storage_backend == "sqlite" and self.episodic_memories is not self.storage.memories:
+            self.episodic_memories = self.storage.memories
+        return compacted
+
+    def _memory_state(self):
+        """Memory state in the snapshot file format; containers are copied, records are shared"""
+        return {
+            "episodic_memories": self._memory_view(),
+            "semantic_memories": dict(self.semantic_memories),
+            "emotional_patterns": {user: list(patterns) for user, patterns in self.emotional_patterns.items()},
+            "user_profiles": dict(self.user_profiles),
+            "self_reflections": list(self.self_reflections),
+            "compressed_learnings": dict(self.compressed_learnings),
+            "quantum_entanglements": (dict(self.quantum_entanglements)
+                                      if isinstance(self.quantum_entanglements, dict) else self.quantum_entanglements),
+            "quantum_coherence": dict(self.quantum_coherence),
+            "quantum_metrics": dict(self.metrics),
+            "fractal_patterns": dict(self.fractal_patterns),
+            "real_time_integration": self.real_time_engine is not None,
+            "last_saved": datetime.now(timezone.utc).isoformat()
+        }
+
+    def _journal_sections(self):
+        """Small sections journaled whole when they change (fractal patterns are rebuilt on startup)"""
+        return {
             "semantic_memories": self.semantic_memories,
-            "emotional_patterns": dict(self.emotional_patterns),
             "user_profiles": self.user_profiles,
-            "self_reflections": self.self_reflections,
             "compressed_learnings": self.compressed_learnings,
-            "quantum_entanglements": self.quantum_entanglements,
             "quantum_coherence": self.quantum_coherence,
             "quantum_metrics": self.metrics,
-            "fractal_patterns": self.fractal_patterns,
-            "real_time_integration": self.real_time_engine is not None,
-            "last_saved": datetime.now(timezone.utc).isoformat()
+            "real_time_integration": self.real_time_engine is not None
         }
 
-        try:
-            # Create a backup of existing memory file (if exists)
-            if os.path.exists(self.memory_file):
-                try:
-                    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
-                    backup = f"{self.memory_file}.backup_{stamp}"
-                    with open(self.memory_file, 'rb') as src, open(backup, 'wb') as dst:
-                        dst.write(src.read())
-                    logger.debug(f"Memory backup created: {backup}")
-                except Exception as bkup_e:
-                    logger.warning(f"Failed to create backup before saving memory: {bkup_e}")
-
-            # Write to temporary file then replace
-            tmp = f"{self.memory_file}.tmp"
-            with open(tmp, 'w', encoding='utf-8') as f:
-                json.dump(memory_data, f, indent=2, ensure_ascii=False)
-            os.replace(tmp, self.memory_file)
-            logger.info(f"💾 Memory saved with quantum enhancements: {len(self.episodic_memories)} memories, {len(self.quantum_entanglements)} entanglements, {len(self.fractal_patterns)} fractal patterns")
-        except Exception as e:
-            logger.error(f"Error saving memory: {e}")
-    
+    def _write_snapshot(self, memory_data):
+        """Write the full memory file.
+
+        The new contents go to a temp file that atomically replaces the original file
+        (in the STATE_FILE_FORMAT format); the written snapshot is then backed up on the executor.
+        """
+        write_state(self.memory_file, memory_data, default=_json_default)
+        self.backups.backup_async()
+
+    def _read_latest_backup(self):
+        """Newest readable backup as (memory_data, source), or (None, None).
+
+        The deduplicated backup store is tried first, then timestamped
+        .backup_<stamp> copies left by earlier versions.
+        """
+        entry, data = self.backups.latest()
+        if entry is not None:
+            try:
+                return loads_state(data), f"backup {entry['id']}"
+            except (ValueError, RuntimeError) as e:
+                logger.warning(f"Backup {entry['id']} is not a readable snapshot: {e}")
+
+        dir_name = os.path.dirname(self.memory_file) or '.'
+        candidates = [f for f in os.listdir(dir_name) if f.startswith(os.path.basename(self.memory_file) + '.backup_')]
+        for latest in sorted(candidates, reverse=True):
+            backup_path = os.path.join(dir_name, latest)
+            try:
+                return read_state(backup_path), backup_path
+            except (OSError, ValueError, RuntimeError) as e:
+                logger.warning(f"Skipping unreadable backup {backup_path}: {e}")
+        return None, None
+
     def load_memory(self):
-        """Load memory from file with quantum enhancements"""
-        if not os.path.exists(self.memory_file):
+        """Load memory from file with quantum enhancements (snapshot plus journal replay)"""
+        if not (self.storage.exists() if self.storage is not None else os.path.exists(self.memory_file)):
             return
 
         try:
-            with open(self.memory_file, 'r') as f:
-                memory_data = json.load(f)
+            if self.storage is not None:
+                memory_data = self.storage.load()
+            else:
+                memory_data = read_state(self.memory_file)
 
-            self.episodic_memories = memory_data.get("episodic_memories", [])
+            self.episodic_memories = self._resident_memories(memory_data.get("episodic_memories", []))
             self.semantic_memories = memory_data.get("semantic_memories", {})
             self.emotional_patterns = defaultdict(list, memory_data.get("emotional_patterns", {}))
             self.user_profiles = memory_data.get("user_profiles", {})
@@ -2610,39 +3203,46 @@ class QuantumEnhancedMemorySystem:
 
             logger.info(f"📚 Memory loaded with quantum enhancements: {len(self.episodic_memories)} memories, {len(self.quantum_entanglements)} entanglements")
 
+            # Reuse saved embeddings; the fingerprint index rebuild marks them for reconciling
+            self.embedding_index.load()
+
+            if self.storage_backend == "sqlite":
+                # Lookups are answered by the store; the scoring features and the retrieval
+                # index need a pass over every record, so they are built off the startup path
+                self.executor.submit(self._build_derived_indexes)
+                return
+
             # Build fingerprint index for deduplication after loading
             try:
                 self._build_fingerprint_index()
                 # Also include any DB-known fingerprints pointing to DB IDs for cross-process safety
                 try:
-                    import sqlite3
-                    if hasattr(PERSISTENT_STORE, 'db_path'):
-                        conn = sqlite3.connect(PERSISTENT_STORE.db_path)
-                        cur = conn.cursor()
-                        cur.execute("SELECT fingerprint, id FROM conversations WHERE fingerprint IS NOT NULL")
-                        for fp, rowid in cur.fetchall():
+                    if PERSISTENT_STORE is not None:
+                        for fp, rowid in PERSISTENT_STORE.fingerprint_ids().items():
                             if fp and fp not in self._fingerprint_index:
                                 self._fingerprint_index[fp] = rowid
-                        conn.close()
                 except Exception as inner_db_ex:
                     logger.warning(f"Failed to sync DB fingerprints into index: {inner_db_ex}")
             except Exception as ie:
                 logger.warning(f"Failed to build fingerprint index on load: {ie}")
 
+            # Fit the retrieval index over the loaded corpus (after the feature store sync)
+            self.text_index.rebuild()
+            self._resume_enrichment()
+
         except Exception as e:
             logger.error(f"Error loading memory: {e}")
-            # Try to fall back to latest backup file
+            # Try to fall back to the newest consistent backup
             try:
-                dir_name = os.path.dirname(self.memory_file) or '.'
-                candidates = [f for f in os.listdir(dir_name) if f.startswith(os.path.basename(self.memory_file) + '.backup_')]
-                candidates = sorted(candidates, reverse=True)
-                if candidates:
-                    latest = candidates[0]
-                    backup_path = os.path.join(dir_name, latest)
-                    with open(backup_path, 'r', encoding='utf-8') as f:
-                        memory_data = json.load(f)
-
-                    self.episodic_memories = memory_data.get("episodic_memories", [])
+                memory_data, backup_path = self._read_latest_backup()
+                if memory_data is not None:
+                    if isinstance(self.storage, MemoryJournal):
+                        memory_data = self.storage.replay(memory_data)
+                    elif self.storage is not None:
+                        # Refill the database from the backup and page from it again
+                        self.storage.import_state(memory_data)
+                        memory_data = self.storage.load()
+                    self.episodic_memories = self._resident_memories(memory_data.get("episodic_memories", []))
                     self.semantic_memories = memory_data.get("semantic_memories", {})
                     self.emotional_patterns = defaultdict(list, memory_data.get("emotional_patterns", {}))
                     self.user_profiles = memory_data.get("user_profiles", {})
@@ -2655,11 +3255,14 @@ class QuantumEnhancedMemorySystem:
                     self.fractal_patterns = memory_data.get("fractal_patterns", {})
 
                     logger.info(f"🔁 Memory loaded from backup: {backup_path}")
+                    # Replace the unreadable memory file with a fresh snapshot at the next save
+                    self.request_snapshot()
                     # Rebuild fingerprint index
                     try:
                         self._build_fingerprint_index()
                     except Exception as ie:
                         logger.warning(f"Failed to build fingerprint index after backup load: {ie}")
+                    self.text_index.rebuild()
                     return
             except Exception as be:
                 logger.error(f"Failed to load from backups: {be}")
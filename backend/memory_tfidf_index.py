@@ -0,0 +1,487 @@
+"""
+Incremental TF-IDF Index - Sparse retrieval index for episodic memories
+Created for Roboto SAI
+
+Keeps a persistent sparse document-term matrix for the quantum memory system so
+that a retrieval query costs one sparse matrix-vector product instead of
+re-vectorizing the whole corpus. New memories append rows, edits and removals
+tombstone rows, and vocabulary refits / compaction run in the background.
+
+Each row can carry an integer key supplied by the caller (the memory's feature
+store slot), so ``match`` can hand back scores that line up with other
+columnar data without any per-row id lookups.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+logger = logging.getLogger(__name__)
+
+# Rebuild policy defaults
+DEFAULT_REFIT_RATIO = 0.25        # Refit once the corpus grew by 25% since the last fit
+DEFAULT_REFIT_MIN_DOCS = 50       # ...but never for fewer than this many new documents
+DEFAULT_COMPACTION_RATIO = 0.2    # Compact once 20% of the rows are tombstones
+MAX_TAIL_BLOCKS = 8               # Appended row blocks merged together past this count
+GATHER_MAX_FRACTION = 0.05        # Candidate sets above this share of rows filter a full scan instead
+
+
+class IncrementalTfidfIndex:
+    """
+    Incrementally maintained TF-IDF index keyed by memory id.
+
+    The vocabulary is frozen between refits: rows added after a fit are
+    vectorized with the current vocabulary and IDF weights. Rows are L2
+    normalized, so the dot product with a query vector is the cosine similarity.
+    """
+
+    def __init__(
+        self,
+        document_source: Callable[[], Iterable[tuple]],
+        executor=None,
+        max_features: int = 2000,
+        refit_ratio: float = DEFAULT_REFIT_RATIO,
+        refit_min_docs: int = DEFAULT_REFIT_MIN_DOCS,
+        compaction_ratio: float = DEFAULT_COMPACTION_RATIO,
+    ):
+        # Callable returning (memory_id, text) or (memory_id, text, key) tuples for the full corpus
+        self._document_source = document_source
+        self._executor = executor
+        self.max_features = max_features
+        self.refit_ratio = refit_ratio
+        self.refit_min_docs = refit_min_docs
+        self.compaction_ratio = compaction_ratio
+
+        self._lock = threading.RLock()
+        self._vectorizer: Optional[TfidfVectorizer] = None
+        self._main_block = None               # csr_matrix built by the last fit
+        self._tail_blocks: List = []          # csr_matrix blocks appended since
+        self._pending_rows: List = []         # single-row csr vectors not yet stacked
+        self._row_ids: List[Optional[str]] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_keys = np.zeros(0, dtype=np.int64)
+        self._dead_rows = 0
+        self._docs_at_fit = 0
+        self._added_since_fit = 0
+        self._unindexed_docs = 0              # Adds seen since a fit that found no vocabulary
+
+        # Background rebuild state
+        self._rebuild_future = None
+        self._oplog: Optional[List[Tuple[str, str, Optional[str], int]]] = None
+        self._remap_during_rebuild: Optional[Callable[[str], int]] = None
+
+        self.stats = {
+            "queries": 0,
+            "rows_appended": 0,
+            "rows_tombstoned": 0,
+            "refits": 0,
+            "last_refit_seconds": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Mutation API
+    # ------------------------------------------------------------------
+
+    def add(self, memory_id: str, text: str, key: int = -1) -> None:
+        """Append (or replace) the row for a memory, tagged with an optional integer key."""
+        with self._lock:
+            if self._oplog is not None:
+                self._oplog.append(("add", memory_id, text, key))
+            self._add_locked(memory_id, text, key)
+        self._maybe_schedule_rebuild()
+
+    def update(self, memory_id: str, text: str, key: int = -1) -> None:
+        """Re-vectorize a memory whose text changed (tombstone + append)."""
+        self.add(memory_id, text, key)
+
+    def remove(self, memory_id: str) -> bool:
+        """Tombstone the row for a memory. Returns True if the memory was indexed."""
+        with self._lock:
+            if self._oplog is not None:
+                self._oplog.append(("remove", memory_id, None, -1))
+            removed = self._remove_locked(memory_id)
+        self._maybe_schedule_rebuild()
+        return removed
+
+    def remap_keys(self, key_of: Callable[[str], int]) -> None:
+        """Look every row's key up again by memory id, after the key owner renumbered them."""
+        with self._lock:
+            self._remap_keys_locked(key_of)
+            if self._oplog is not None:
+                # The rebuild snapshot may hold keys from before the renumbering
+                self._remap_during_rebuild = key_of
+
+    def rebuild(self, background: bool = False) -> None:
+        """Refit the vocabulary over the current corpus and drop tombstoned rows."""
+        if background:
+            self._schedule_rebuild()
+        else:
+            self._rebuild()
+
+    # ------------------------------------------------------------------
+    # Query API
+    # ------------------------------------------------------------------
+
+    def search(
+        self,
+        query: str,
+        limit: int = 15,
+        min_score: float = 0.0,
+        candidate_ids: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Return up to ``limit`` (memory_id, cosine_score) pairs above ``min_score``.
+
+        When ``candidate_ids`` is given only those memories are returned. Small
+        candidate sets are gathered and scored row by row, so the cost scales
+        with the candidate set; large ones filter a full scan instead.
+        """
+        if limit <= 0:
+            return []
+
+        self._ensure_fitted()
+        with self._lock:
+            prepared = self._prepare_query_locked(query)
+            if prepared is None:
+                return []
+            blocks, dense_query = prepared
+
+            if candidate_ids is not None:
+                if not isinstance(candidate_ids, (set, frozenset, dict)):
+                    candidate_ids = set(candidate_ids)
+                if len(candidate_ids) <= GATHER_MAX_FRACTION * len(self._id_to_row):
+                    return self._search_rows_locked(blocks, candidate_ids, dense_query, limit, min_score)
+
+            scores = np.concatenate([block.dot(dense_query) for block in blocks])
+            scores[~self._alive[:len(scores)]] = 0.0
+            self.stats["queries"] += 1
+
+            if candidate_ids is None:
+                return self._top_hits_locked(scores, limit, min_score)
+
+            # Large candidate set: size the top-k window by the set's selectivity and
+            # widen it only if too few hits pass the filter
+            positive = int(np.count_nonzero(scores > min_score))
+            selectivity = max(len(candidate_ids) / max(1, len(self._id_to_row)), 1e-6)
+            window = min(positive, int(limit * 2 / selectivity) + 1)
+            while True:
+                hits = [
+                    (memory_id, score)
+                    for memory_id, score in self._top_hits_locked(scores, window, min_score)
+                    if memory_id in candidate_ids
+                ]
+                if len(hits) >= limit or window >= positive:
+                    return hits[:limit]
+                window = min(positive, window * 4)
+
+    def match(
+        self,
+        query: str,
+        min_score: float = 0.0,
+        candidate_ids: Optional[Iterable[str]] = None,
+    ) -> "MatchResult":
+        """
+        Return the keys and cosine scores of every live row above ``min_score``.
+
+        Small candidate sets are gathered and scored directly (``filtered`` is
+        True). Larger ones return the full scan unfiltered so the caller can
+        apply the candidate filter to its final ranking only.
+        """
+        self._ensure_fitted()
+        with self._lock:
+            prepared = self._prepare_query_locked(query)
+            if prepared is None:
+                return MatchResult(np.zeros(0, dtype=np.int64), np.zeros(0), True)
+            blocks, dense_query = prepared
+
+            gather = False
+            if candidate_ids is not None:
+                if not isinstance(candidate_ids, (set, frozenset, dict)):
+                    candidate_ids = set(candidate_ids)
+                gather = len(candidate_ids) <= GATHER_MAX_FRACTION * len(self._id_to_row)
+
+            if gather:
+                rows = self._candidate_rows_locked(candidate_ids)
+                scores = self._score_rows_locked(blocks, rows, dense_query) if rows.size else np.zeros(0)
+            else:
+                scores = np.concatenate([block.dot(dense_query) for block in blocks])
+                scores[~self._alive[:len(scores)]] = 0.0
+                rows = None
+            self.stats["queries"] += 1
+
+            keep = np.flatnonzero(scores > min_score)
+            row_numbers = keep if rows is None else rows[keep]
+            return MatchResult(self._row_keys[row_numbers], scores[keep], candidate_ids is None or gather)
+
+    def __contains__(self, memory_id) -> bool:
+        with self._lock:
+            return memory_id in self._id_to_row
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._id_to_row)
+
+    def get_stats(self) -> dict:
+        """Return index size and maintenance counters."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({
+                "live_rows": len(self._id_to_row),
+                "total_rows": len(self._row_ids),
+                "tombstones": self._dead_rows,
+                "vocabulary_size": len(self._vectorizer.vocabulary_) if self._vectorizer is not None else 0,
+                "rebuild_in_progress": self._oplog is not None,
+            })
+            return stats
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _ensure_fitted(self) -> None:
+        if self._vectorizer is None and self._unindexed_docs:
+            # Nothing fitted yet, or the last fit found no vocabulary and documents
+            # arrived since - the corpus is still small, fit inline
+            self._rebuild()
+
+    def _prepare_query_locked(self, query: str):
+        """Vectorize a query; returns (row blocks, dense query vector) or None if nothing can match."""
+        if self._vectorizer is None:
+            return None
+
+        self._flush_pending_locked()
+        query_vector = self._vectorizer.transform([query])
+        if query_vector.nnz == 0:
+            return None
+
+        blocks = [b for b in [self._main_block] + self._tail_blocks if b is not None and b.shape[0]]
+        if not blocks:
+            return None
+        return blocks, query_vector.toarray().ravel()
+
+    def _add_locked(self, memory_id: str, text: str, key: int = -1) -> None:
+        self._remove_locked(memory_id)
+        if self._vectorizer is None:
+            self._unindexed_docs += 1
+            return
+
+        row = self._vectorizer.transform([text or ""])
+        index = len(self._row_ids)
+        self._row_ids.append(memory_id)
+        self._id_to_row[memory_id] = index
+        self._pending_rows.append(row)
+        self._ensure_alive_capacity(index + 1)
+        self._alive[index] = True
+        self._row_keys[index] = key
+        self._added_since_fit += 1
+        self.stats["rows_appended"] += 1
+
+    def _remove_locked(self, memory_id: str) -> bool:
+        row = self._id_to_row.pop(memory_id, None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        self._row_ids[row] = None
+        self._dead_rows += 1
+        self.stats["rows_tombstoned"] += 1
+        return True
+
+    def _remap_keys_locked(self, key_of: Callable[[str], int]) -> None:
+        keys = np.full(len(self._row_keys), -1, dtype=np.int64)
+        for row, memory_id in enumerate(self._row_ids):
+            if memory_id is not None:
+                keys[row] = key_of(memory_id)
+        self._row_keys = keys
+
+    def _top_hits_locked(self, scores, limit, min_score, rows=None):
+        """Top ``limit`` (memory_id, score) pairs; ``rows`` maps score positions to row numbers."""
+        candidate_count = min(limit, len(scores))
+        if candidate_count <= 0:
+            return []
+        if candidate_count < len(scores):
+            top = np.argpartition(scores, -candidate_count)[-candidate_count:]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(scores[top])[::-1]]
+
+        return [
+            (self._row_ids[position if rows is None else rows[position]], float(scores[position]))
+            for position in top
+            if scores[position] > min_score
+        ]
+
+    def _search_rows_locked(self, blocks, candidate_ids, dense_query, limit, min_score):
+        """Score only the candidate rows; cost scales with the candidate set."""
+        rows = self._candidate_rows_locked(candidate_ids)
+        if not rows.size:
+            return []
+        self.stats["queries"] += 1
+        return self._top_hits_locked(self._score_rows_locked(blocks, rows, dense_query), limit, min_score, rows)
+
+    def _candidate_rows_locked(self, candidate_ids) -> np.ndarray:
+        """Sorted row numbers of the indexed candidates."""
+        id_to_row = self._id_to_row
+        rows = np.array([id_to_row[m] for m in candidate_ids if m in id_to_row], dtype=np.int64)
+        rows.sort()
+        return rows
+
+    @staticmethod
+    def _score_rows_locked(blocks, rows, dense_query) -> np.ndarray:
+        """Cosine scores for the given sorted global row numbers."""
+        parts = []
+        offset = 0
+        for block in blocks:
+            size = block.shape[0]
+            lo, hi = np.searchsorted(rows, [offset, offset + size])
+            if hi > lo:
+                parts.append(block[rows[lo:hi] - offset].dot(dense_query))
+            offset += size
+        return np.concatenate(parts)
+
+    def _ensure_alive_capacity(self, size: int) -> None:
+        if size <= len(self._alive):
+            return
+        capacity = max(size, len(self._alive) * 2, 64)
+        grown = np.zeros(capacity, dtype=bool)
+        grown[:len(self._alive)] = self._alive
+        self._alive = grown
+        keys = np.full(capacity, -1, dtype=np.int64)
+        keys[:len(self._row_keys)] = self._row_keys
+        self._row_keys = keys
+
+    def _flush_pending_locked(self) -> None:
+        if self._pending_rows:
+            self._tail_blocks.append(sparse.vstack(self._pending_rows, format="csr"))
+            self._pending_rows = []
+        if len(self._tail_blocks) > MAX_TAIL_BLOCKS:
+            self._tail_blocks = [sparse.vstack(self._tail_blocks, format="csr")]
+
+    def _needs_rebuild_locked(self) -> bool:
+        if self._vectorizer is None:
+            return False
+        growth_threshold = max(self.refit_min_docs, self.refit_ratio * self._docs_at_fit)
+        if self._added_since_fit >= growth_threshold:
+            return True
+        total_rows = len(self._row_ids)
+        return (
+            self._dead_rows >= self.refit_min_docs
+            and total_rows > 0
+            and self._dead_rows / total_rows >= self.compaction_ratio
+        )
+
+    def _maybe_schedule_rebuild(self) -> None:
+        with self._lock:
+            if not self._needs_rebuild_locked():
+                return
+        self._schedule_rebuild()
+
+    def _schedule_rebuild(self) -> None:
+        with self._lock:
+            if self._rebuild_future is not None and not self._rebuild_future.done():
+                return
+            if self._executor is not None:
+                self._rebuild_future = self._executor.submit(self._rebuild)
+            else:
+                thread = threading.Thread(target=self._rebuild, name="tfidf-index-rebuild", daemon=True)
+                self._rebuild_future = _ThreadFuture(thread)
+                thread.start()
+
+    def _rebuild(self) -> None:
+        """Fit a fresh vectorizer over a corpus snapshot and swap it in atomically."""
+        started = time.time()
+        with self._lock:
+            # Record mutations that race with the snapshot so they can be replayed
+            self._oplog = []
+            self._remap_during_rebuild = None
+
+        try:
+            ids: List[str] = []
+            texts: List[str] = []
+            keys: List[int] = []
+            for document in self._document_source():
+                ids.append(document[0])
+                texts.append(document[1] or "")
+                keys.append(document[2] if len(document) > 2 else -1)
+
+            vectorizer = None
+            matrix = None
+            if texts:
+                vectorizer = TfidfVectorizer(max_features=self.max_features, stop_words='english')
+                try:
+                    matrix = vectorizer.fit_transform(texts).tocsr()
+                except ValueError:
+                    # Empty vocabulary (e.g. only stop words so far)
+                    vectorizer = None
+                    matrix = None
+        except Exception as e:
+            logger.warning(f"TF-IDF index rebuild failed: {e}")
+            with self._lock:
+                self._oplog = None
+                self._remap_during_rebuild = None
+            return
+
+        with self._lock:
+            oplog = self._oplog or []
+            self._oplog = None
+
+            self._vectorizer = vectorizer
+            self._main_block = matrix
+            self._tail_blocks = []
+            self._pending_rows = []
+            self._row_ids = list(ids) if vectorizer is not None else []
+            self._id_to_row = {}
+            self._alive = np.zeros(max(len(self._row_ids), 64), dtype=bool)
+            self._row_keys = np.full(len(self._alive), -1, dtype=np.int64)
+            if vectorizer is not None:
+                self._row_keys[:len(keys)] = keys
+            self._dead_rows = 0
+            for row, memory_id in enumerate(self._row_ids):
+                previous = self._id_to_row.get(memory_id)
+                if previous is not None:
+                    # Duplicate id in the source - the later row wins
+                    self._alive[previous] = False
+                    self._row_ids[previous] = None
+                    self._dead_rows += 1
+                self._id_to_row[memory_id] = row
+                self._alive[row] = True
+
+            self._docs_at_fit = len(self._id_to_row)
+            self._added_since_fit = 0
+            self._unindexed_docs = 0   # An empty vocabulary counts too: refit once new documents arrive
+
+            for op, memory_id, text, key in oplog:
+                if op == "add":
+                    self._add_locked(memory_id, text, key)
+                else:
+                    self._remove_locked(memory_id)
+            if self._remap_during_rebuild is not None:
+                self._remap_keys_locked(self._remap_during_rebuild)
+                self._remap_during_rebuild = None
+
+            self.stats["refits"] += 1
+            self.stats["last_refit_seconds"] = time.time() - started
+
+        logger.debug(f"TF-IDF index rebuilt: {self._docs_at_fit} rows in {time.time() - started:.3f}s")
+
+
+class MatchResult(NamedTuple):
+    """Row keys and scores from ``IncrementalTfidfIndex.match``."""
+    keys: np.ndarray
+    scores: np.ndarray
+    filtered: bool  # False when a large candidate set still has to be applied by the caller
+
+
+class _ThreadFuture:
+    """Minimal future-like wrapper so rebuild tracking works without an executor."""
+
+    def __init__(self, thread: threading.Thread):
+        self._thread = thread
+
+    def done(self) -> bool:
+        return not self._thread.is_alive()
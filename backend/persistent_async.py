@@ -0,0 +1,280 @@
+"""
+Persistent Async - Asyncio facade over PersistentMemoryStore
+Created for Roboto SAI
+
+PersistentMemoryStore is synchronous: called from an ``async def`` FastAPI
+handler, every SQLite statement blocks the event loop. AsyncPersistentStore
+gives the store an awaitable surface (astore_conversation,
+alist_recent_messages, aget_conversation_by_fingerprint, ...) without
+touching the event loop thread:
+
+    writes   go into a bounded queue served by one writer thread. The writer
+             takes every write waiting in the queue (up to ``max_batch``) and
+             runs them in a single transaction, each in its own savepoint, so
+             concurrent writes share one commit (group commit) and a failing
+             write only fails its own caller.
+    reads    run on a pool of ``readers`` threads, each with its own WAL
+             connection, so they proceed while the writer commits.
+
+When the queue is full, callers wait for space on a helper thread instead of
+blocking the loop. Every operation records its latency (queue wait included)
+for get_stats(); the FastAPI lifespan calls shutdown_async_store() so queued
+writes are committed before the process exits.
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from persistent_memory_store import get_persistent_store
+
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 1024   # Latest samples kept per operation for the percentiles
+_STOP = object()
+
+
+class _OperationMetrics:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.samples = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, seconds: float, failed: bool):
+        self.count += 1
+        self.errors += failed
+        self.total_seconds += seconds
+        self.samples.append(seconds)
+
+    def summary(self) -> dict:
+        samples = sorted(self.samples)
+
+        def percentile(fraction):
+            return samples[min(len(samples) - 1, int(len(samples) * fraction))] * 1e3 if samples else 0.0
+
+        return {"count": self.count, "errors": self.errors,
+                "avg_ms": self.total_seconds / self.count * 1e3 if self.count else 0.0,
+                "p50_ms": percentile(0.5), "p99_ms": percentile(0.99), "max_ms": samples[-1] * 1e3 if samples else 0.0}
+
+
+class AsyncPersistentStore:
+    """Awaitable PersistentMemoryStore: one group-committing writer thread, a pool of readers"""
+
+    def __init__(self, store=None, max_pending: Optional[int] = None, max_batch: Optional[int] = None,
+                 readers: Optional[int] = None):
+        self.store = store or get_persistent_store()
+        self.max_pending = max(1, max_pending or int(os.environ.get("PERSISTENT_WRITE_QUEUE", "1024")))
+        self.max_batch = max(1, max_batch or int(os.environ.get("PERSISTENT_GROUP_COMMIT", "256")))
+        self.readers = max(1, readers or int(os.environ.get("PERSISTENT_READERS", "4")))
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.max_pending)
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._reader_pool: Optional[ThreadPoolExecutor] = None
+        self._closed = False
+        self._metrics: Dict[str, _OperationMetrics] = {}
+        self.stats = {"commits": 0, "grouped_writes": 0, "max_group": 0, "commit_failures": 0, "queue_full_waits": 0}
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    async def astore_conversation(self, user_input, response, emotion="neutral", importance=0.5,
+                                  emotional_intensity=0.0, dedupe_policy="skip"):
+        return await self._write("store_conversation", self.store.store_conversation, user_input, response,
+                                 emotion, importance, emotional_intensity, dedupe_policy)
+
+    async def astore_conversations(self, conversations, dedupe_policy="skip"):
+        return await self._write("store_conversations", self.store.store_conversations, conversations, dedupe_policy)
+
+    async def astore_pattern(self, pattern_key, pattern_data):
+        return await self._write("store_pattern", self.store.store_pattern, pattern_key, pattern_data)
+
+    async def aupdate_conversation(self, **changes):
+        return await self._write("update_conversation", lambda: self.store.update_conversation(**changes))
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    async def alist_recent_conversations(self, limit=100):
+        return await self._read("list_recent_conversations", self.store.list_recent_conversations, limit)
+
+    async def alist_recent_messages(self, limit=100):
+        return await self._read("list_recent_messages", self.store.list_recent_messages, limit)
+
+    async def aget_conversation_by_id(self, conv_id):
+        return await self._read("get_conversation_by_id", self.store.get_conversation_by_id, conv_id)
+
+    async def aget_conversation_by_fingerprint(self, fingerprint):
+        return await self._read("get_conversation_by_fingerprint", self.store.get_conversation_by_fingerprint,
+                                fingerprint)
+
+    async def aget_conversation_count(self):
+        return await self._read("get_conversation_count", self.store.get_conversation_count)
+
+    async def asearch_conversations(self, query, limit=10, since=None):
+        return await self._read("search_conversations",
+                                lambda: self.store.search_conversations(query, limit=limit, since=since))
+
+    # ------------------------------------------------------------------
+    # Lifecycle and metrics
+    # ------------------------------------------------------------------
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Commit the queued writes and stop the threads; False if the writer did not finish in time"""
+        with self._lock:
+            if self._closed:
+                return True
+            self._closed = True
+            writer, pool = self._writer, self._reader_pool
+        finished = True
+        if writer is not None:
+            self._queue.put(_STOP)
+            writer.join(timeout)
+            finished = not writer.is_alive()
+        if finished:
+            # Writes that raced with close() and landed behind the stop marker
+            while True:
+                try:
+                    operation = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if operation is not _STOP and operation[2].set_running_or_notify_cancel():
+                    operation[2].set_exception(RuntimeError("AsyncPersistentStore is closed"))
+        if pool is not None:
+            pool.shutdown(wait=finished)
+        return finished
+
+    async def aclose(self, timeout: Optional[float] = None) -> bool:
+        return await asyncio.to_thread(self.close, timeout)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            operations = {name: metrics.summary() for name, metrics in self._metrics.items()}
+            stats = dict(self.stats)
+        stats["avg_group"] = stats["grouped_writes"] / stats["commits"] if stats["commits"] else 0.0
+        return {**stats, "queue_depth": self._queue.qsize(), "operations": operations}
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _record(self, name: str, started: float, failed: bool):
+        with self._lock:
+            metrics = self._metrics.get(name)
+            if metrics is None:
+                metrics = self._metrics[name] = _OperationMetrics()
+            metrics.record(time.perf_counter() - started, failed)
+
+    async def _read(self, name: str, fn: Callable, *args):
+        started = time.perf_counter()
+        with self._lock:
+            if self._reader_pool is None:
+                self._reader_pool = ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix="store-reader")
+            pool = self._reader_pool
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(pool, lambda: fn(*args))
+        except BaseException:
+            self._record(name, started, True)
+            raise
+        self._record(name, started, False)
+        return result
+
+    async def _write(self, name: str, fn: Callable, *args):
+        started = time.perf_counter()
+        future: Future = Future()
+        operation = (fn, args, future)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("AsyncPersistentStore is closed")
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="store-writer", daemon=True)
+                self._writer.start()
+        try:
+            self._queue.put_nowait(operation)
+        except queue.Full:
+            with self._lock:
+                self.stats["queue_full_waits"] += 1
+            await asyncio.to_thread(self._queue.put, operation)   # Backpressure off the event loop
+        try:
+            result = await asyncio.wrap_future(future)
+        except BaseException:
+            self._record(name, started, True)
+            raise
+        self._record(name, started, False)
+        return result
+
+    def _write_loop(self):
+        while True:
+            group = [self._queue.get()]
+            while len(group) < self.max_batch:
+                try:
+                    group.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(operation is _STOP for operation in group)
+            group = [operation for operation in group if operation is not _STOP]
+            if group:
+                self._commit(group)
+            if stop:
+                return
+
+    def _commit(self, group):
+        # Writes whose callers were cancelled while queued are dropped
+        group = [operation for operation in group if operation[2].set_running_or_notify_cancel()]
+        if not group:
+            return
+        outcomes = []
+        try:
+            with self.store.connections.transaction():
+                for fn, args, _ in group:
+                    try:
+                        with self.store.connections.transaction():   # A savepoint per write
+                            outcomes.append((True, fn(*args)))
+                    except Exception as e:
+                        outcomes.append((False, e))
+        except Exception as e:
+            logger.warning(f"Group commit of {len(group)} writes failed: {e}")
+            with self._lock:
+                self.stats["commit_failures"] += 1
+            outcomes = [(False, e)] * len(group)
+        else:
+            with self._lock:
+                self.stats["commits"] += 1
+                self.stats["grouped_writes"] += len(group)
+                self.stats["max_group"] = max(self.stats["max_group"], len(group))
+        # Callers hear back only once their write is committed
+        for (_, _, future), (ok, value) in zip(group, outcomes):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+
+ASYNC_STORE: Optional[AsyncPersistentStore] = None
+_async_store_lock = threading.Lock()
+
+
+def get_async_store() -> AsyncPersistentStore:
+    """The shared AsyncPersistentStore over the singleton PersistentMemoryStore"""
+    global ASYNC_STORE
+    with _async_store_lock:
+        if ASYNC_STORE is None:
+            ASYNC_STORE = AsyncPersistentStore()
+        return ASYNC_STORE
+
+
+def shutdown_async_store(timeout: Optional[float] = None) -> bool:
+    """Commit queued writes of the shared facade, if it was ever used"""
+    global ASYNC_STORE
+    with _async_store_lock:
+        store, ASYNC_STORE = ASYNC_STORE, None
+    return store.close(timeout) if store is not None else True
@@ -0,0 +1,196 @@
+"""
+Persistent Export - Streaming NDJSON exports of the persistent memory store
+Created for Roboto SAI
+
+export_to_json used to fetchall() every table and json.dump one indented
+document per table, so an export held the whole database in memory and
+stalled the worker for as long as that took. Exports now page through each
+table by id (keyset pagination, ``chunk_rows`` rows per query) and write
+each chunk as soon as it is read:
+
+    {"table": "conversations", "id": 1, "timestamp": "...", ...}
+    {"table": "learned_patterns", "id": 1, "pattern_key": "...", ...}
+
+one JSON object per line (NDJSON), optionally compressed with gzip or zstd
+(optional ``zstandard``). A compressed chunk is a complete gzip member or
+zstd frame, and both formats read concatenated members as one stream.
+
+An export is written to ``<path>.part``. After every chunk the byte offset
+and the last id written per table go to ``<path>.progress``, so an
+interrupted export continues where it stopped (``resume=True``) and the
+finished file is renamed into place. An incremental export writes only rows
+added after the previous export recorded in ``state_file`` (ids above its
+high-water marks) or changed since it started (merged or edited rows carry
+a newer timestamp).
+"""
+
+import gzip
+import io
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Table -> column holding the time of its last change
+EXPORT_TABLES = {
+    "conversations": "timestamp",
+    "learned_patterns": "updated_at",
+    "user_data": "updated_at",
+}
+COMPRESSIONS = ("none", "gzip", "zstd")
+CHUNK_ROWS = 1000
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 6
+
+
+def compression_for(path: str) -> str:
+    """The compression implied by a file name (.gz, .zst)"""
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return "none"
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return data
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable export state {path}: {e}")
+        return None
+
+
+def _write_json(path: str, obj: dict):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+
+def export_ndjson(store, path: str, compression: Optional[str] = None, chunk_rows: int = CHUNK_ROWS,
+                  incremental: bool = False, resume: bool = False, state_file: Optional[str] = None) -> dict:
+    """
+    Stream the store's tables to ``path`` as NDJSON; returns the export's stats.
+    ``compression`` defaults to the one implied by the file name.
+    """
+    compression = compression or compression_for(path)
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown export compression: {compression} (choose from {', '.join(COMPRESSIONS)})")
+    if compression == "zstd" and not ZSTD_AVAILABLE:
+        raise ValueError("zstd exports need the zstandard package")
+    state_file = state_file or os.path.join(store.json_store, "export_state.json")
+    part_path, progress_path = f"{path}.part", f"{path}.progress"
+    conn = store.connections.connection()
+
+    progress = _read_json(progress_path) if resume else None
+    if progress is None or progress.get("compression") != compression or not os.path.exists(part_path):
+        previous = _read_json(state_file) if incremental else None
+        progress = {
+            "compression": compression,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "offset": 0,
+            # Rows stored after the export starts are left for the next one
+            "until": {table: conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                      for table in EXPORT_TABLES},
+            "after": {table: 0 for table in EXPORT_TABLES},
+            "previous": previous,
+            "rows": {table: 0 for table in EXPORT_TABLES},
+        }
+        with open(part_path, "wb"):
+            pass
+    else:
+        logger.info(f"Resuming export to {path} at byte {progress['offset']}")
+
+    previous = progress["previous"]
+    with open(part_path, "r+b") as out:
+        out.truncate(progress["offset"])   # Drop a chunk written after the last checkpoint
+        out.seek(progress["offset"])
+        for table, changed_column in EXPORT_TABLES.items():
+            since = None
+            if previous:
+                since = (previous["until"].get(table, 0), changed_column, previous["started_at"])
+            for rows in iter_table_chunks(conn, table, chunk_rows, progress["after"][table],
+                                          progress["until"][table], since):
+                data = "".join(json.dumps({"table": table, **row}, ensure_ascii=False, default=str) + "\n"
+                               for row in rows).encode("utf-8")
+                out.write(_compress(data, compression))
+                out.flush()
+                progress["offset"] = out.tell()
+                progress["after"][table] = rows[-1]["id"]
+                progress["rows"][table] += len(rows)
+                _write_json(progress_path, progress)
+        os.fsync(out.fileno())
+
+    os.replace(part_path, path)
+    _write_json(state_file, {"started_at": progress["started_at"], "until": progress["until"], "path": path})
+    try:
+        os.remove(progress_path)
+    except FileNotFoundError:
+        pass
+    stats = {"path": path, "compression": compression, "bytes": progress["offset"], "rows": progress["rows"],
+             "incremental": previous is not None}
+    logger.info(f"Exported {sum(progress['rows'].values())} rows to {path}")
+    return stats
+
+
+def iter_table_chunks(conn, table: str, chunk_rows: int = CHUNK_ROWS, after_id: int = 0,
+                      until_id: Optional[int] = None, since=None) -> Iterator[list]:
+    """
+    Rows of ``table`` with after_id < id <= until_id as lists of dicts, by id.
+    ``since`` = (high_id, column, timestamp) keeps only rows above high_id or
+    whose ``column`` is at or after ``timestamp``.
+    """
+    where, args = ["id > ?"], []
+    if until_id is not None:
+        where.append("id <= ?")
+        args.append(until_id)
+    if since is not None:
+        high_id, column, timestamp = since
+        where.append(f"(id > ? OR {column} >= ?)")
+        args += [high_id, timestamp]
+    sql = f"SELECT * FROM {table} WHERE {' AND '.join(where)} ORDER BY id LIMIT ?"
+    while True:
+        cursor = conn.execute(sql, (after_id, *args, chunk_rows))
+        columns = [description[0] for description in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1]["id"]
+
+
+def read_ndjson(path: str, compression: Optional[str] = None) -> Iterator[Dict]:
+    """The records of an export, one at a time"""
+    compression = compression or compression_for(path)
+    if compression == "gzip":
+        stream = gzip.open(path, "rt", encoding="utf-8")
+    elif compression == "zstd":
+        raw = open(path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        stream = io.TextIOWrapper(reader, encoding="utf-8")
+    else:
+        stream = open(path, encoding="utf-8")
+    with stream:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
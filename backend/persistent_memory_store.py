@@ -2,35 +2,123 @@
 """
 Persistent Memory Store - Long-term storage with redundancy
 Created by Roberto Villarreal Martinez for Roboto SAI
+
+Statements run on per-thread WAL connections from SQLiteConnectionManager;
+writes are IMMEDIATE transactions so concurrent writers queue, not fail.
+Conversations are written with one UPSERT per batch (store_conversations).
+
+search_conversations() ranks conversations by BM25 over an FTS5 index of
+user_input and response (conversations_fts), kept in sync by triggers. A
+database created before the index gets it built at startup when it is small
+(SEARCH_AUTO_BACKFILL_ROWS); larger ones are searched with LIKE until the
+index is built offline:
+    python persistent_memory_store.py backfill-search [--db persistent_memory.db]
+
+export_ndjson() streams every table to NDJSON (persistent_export):
+    python persistent_memory_store.py export FILE[.gz|.zst] [--incremental] [--resume]
+
+The shared store (get_persistent_store) lives at PERSISTENT_MEMORY_DB,
+persistent_memory.db in the working directory by default.
 """
 
+import argparse
 import json
+import logging
 import os
+import re
 from datetime import datetime, timezone
 import sqlite3
 from pathlib import Path
 
+from persistent_export import CHUNK_ROWS, export_ndjson, iter_table_chunks
+from sqlite_connections import SQLiteConnectionManager
+
 try:
     from .utils.fingerprint import generate_fingerprint
 except Exception:
     # fallback if executed as script
     from utils.fingerprint import generate_fingerprint
 
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_LOOKUP_CHUNK = 500
+SEARCH_AUTO_BACKFILL_ROWS = int(os.environ.get("SEARCH_AUTO_BACKFILL_ROWS", "100000"))
+# BM25 costs a few microseconds per matching row: rank only the newest matches of common words
+SEARCH_CANDIDATES = int(os.environ.get("SEARCH_CANDIDATES", "5000"))
+CONVERSATION_COLUMNS = (
+    'id', 'timestamp', 'user_input', 'response', 'emotion', 'importance',
+    'emotional_intensity', 'fingerprint', 'merged_count',
+)
+_SEARCH_WORD = re.compile(r"\w+")
+
+SEARCH_TABLE = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts USING fts5(
+        user_input, response,
+        content='conversations', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+'''
+# External content table: the triggers hand FTS5 the old text of changed rows
+SEARCH_TRIGGERS = (
+    '''
+    CREATE TRIGGER IF NOT EXISTS conversations_fts_insert AFTER INSERT ON conversations BEGIN
+        INSERT INTO conversations_fts(rowid, user_input, response)
+        VALUES (new.id, new.user_input, new.response);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS conversations_fts_delete AFTER DELETE ON conversations BEGIN
+        INSERT INTO conversations_fts(conversations_fts, rowid, user_input, response)
+        VALUES ('delete', old.id, old.user_input, old.response);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS conversations_fts_update AFTER UPDATE OF user_input, response ON conversations BEGIN
+        INSERT INTO conversations_fts(conversations_fts, rowid, user_input, response)
+        VALUES ('delete', old.id, old.user_input, old.response);
+        INSERT INTO conversations_fts(rowid, user_input, response)
+        VALUES (new.id, new.user_input, new.response);
+    END
+    ''',
+)
+
+INSERT_CONVERSATION = '''
+    INSERT INTO conversations (
+        timestamp, user_input, response, emotion, importance,
+        emotional_intensity, fingerprint
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+SKIP_DUPLICATE = 'ON CONFLICT(fingerprint) DO NOTHING'
+# Merge policy: keep the highest importance, average the emotional intensity over merges
+MERGE_DUPLICATE = '''
+    ON CONFLICT(fingerprint) DO UPDATE SET
+        importance = MAX(COALESCE(importance, 0.0), COALESCE(excluded.importance, 0.0)),
+        emotional_intensity = (
+            COALESCE(emotional_intensity, 0.0) * COALESCE(merged_count, 1)
+            + COALESCE(excluded.emotional_intensity, 0.0)
+        ) / (COALESCE(merged_count, 1) + 1),
+        merged_count = COALESCE(merged_count, 1) + 1,
+        timestamp = excluded.timestamp
+'''
+
+
 class PersistentMemoryStore:
     """Persistent storage with database backend"""
     
     def __init__(self, db_path="persistent_memory.db"):
         self.db_path = db_path
-        self.json_store = "persistent_memory_store"
+        self.connections = SQLiteConnectionManager(db_path)
+        self.json_store = os.path.join(os.path.dirname(db_path), "persistent_memory_store")
         os.makedirs(self.json_store, exist_ok=True)
         self._initialize_database()
         self._migrate_schema_if_needed()
     
     def _initialize_database(self):
         """Initialize SQLite database for structured storage"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        with self.connections.transaction() as conn:
+            self._create_tables(conn.cursor())
+
+    def _create_tables(self, cursor):
         # Conversations table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS conversations (
@@ -68,13 +156,13 @@ class PersistentMemoryStore:
         ''')
         
         # Unique index creation moved to migration step to avoid issues on older DBs
-        conn.commit()
-        conn.close()
 
     def _migrate_schema_if_needed(self):
         """Add missing columns and create indexes when upgrading from older schema."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.connections.transaction() as conn:
+            self._migrate(conn.cursor())
+
+    def _migrate(self, cursor):
         # Get existing columns
         cursor.execute("PRAGMA table_info(conversations)")
         columns = {row[1] for row in cursor.fetchall()}
@@ -100,10 +188,47 @@ class PersistentMemoryStore:
                 'CREATE UNIQUE INDEX IF NOT EXISTS idx_conversations_fingerprint '
                 'ON conversations(fingerprint)'
             )
+            self.fingerprint_unique = True
         except Exception:
-            pass
-        conn.commit()
-        conn.close()
+            self.fingerprint_unique = False
+        self._ensure_search_index(cursor)
+
+    def _ensure_search_index(self, cursor):
+        """Create the FTS5 index; build it now if the database is small enough"""
+        self.search_indexed = False
+        try:
+            cursor.execute(SEARCH_TABLE)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 unavailable, conversation search falls back to LIKE: {e}")
+            return
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name = 'conversations_fts_insert'")
+        if cursor.fetchone()[0]:
+            self.search_indexed = True
+            return
+        # Triggers on rows the index has never seen would corrupt it, so they are only
+        # added once every existing row is indexed
+        rows = cursor.execute('SELECT COUNT(*) FROM conversations').fetchone()[0]
+        if rows > SEARCH_AUTO_BACKFILL_ROWS:
+            logger.warning(
+                f"{rows} conversations are not in the search index yet; run "
+                f"'python persistent_memory_store.py backfill-search --db {self.db_path}'"
+            )
+            return
+        self._backfill_search_index(cursor)
+
+    def _backfill_search_index(self, cursor):
+        cursor.execute("INSERT INTO conversations_fts(conversations_fts) VALUES ('rebuild')")
+        for trigger in SEARCH_TRIGGERS:
+            cursor.execute(trigger)
+        self.search_indexed = True
+
+    def backfill_search_index(self):
+        """Index every stored conversation for search and keep the index in sync from now on"""
+        with self.connections.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SEARCH_TABLE)
+            self._backfill_search_index(cursor)
+            return cursor.execute('SELECT COUNT(*) FROM conversations').fetchone()[0]
     
     def store_conversation(
         self,
@@ -115,86 +240,82 @@ class PersistentMemoryStore:
         dedupe_policy="skip",
     ):
         """Store conversation in database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        fingerprint = generate_fingerprint(user_input, response)
+        conversation = {
+            'user_input': user_input,
+            'response': response,
+            'emotion': emotion,
+            'importance': importance,
+            'emotional_intensity': emotional_intensity,
+        }
+        return self.store_conversations([conversation], dedupe_policy=dedupe_policy)[0]['id']
+
+    def store_conversations(self, conversations, dedupe_policy="skip"):
+        """Store many conversations in one transaction.
+
+        Each conversation is a dict with user_input and response and optionally
+        emotion, importance, emotional_intensity and timestamp (as exported by
+        export_to_json). Duplicates by fingerprint, including repeats within the
+        batch, are skipped or merged as in store_conversation. Returns one
+        {'id', 'fingerprint', 'status'} per conversation, in order, where status
+        is 'inserted', 'merged' or 'skipped'.
+        """
         now_ts = datetime.now(timezone.utc).isoformat()
-        try:
-            cursor.execute(
-                '''
-                INSERT INTO conversations (
-                    timestamp, user_input, response, emotion, importance,
-                    emotional_intensity, fingerprint
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''',
-                (
-                    now_ts,
-                    user_input,
-                    response,
-                    emotion,
-                    importance,
-                    emotional_intensity,
-                    fingerprint,
-                ),
-            )
-            conn.commit()
-            new_id = cursor.lastrowid
-            conn.close()
-            return new_id
-        except sqlite3.IntegrityError:
-            # Duplicate detected by unique fingerprint
-            cursor.execute(
-                'SELECT id, importance, emotional_intensity, merged_count '
-                'FROM conversations WHERE fingerprint = ?',
-                (fingerprint,),
-            )
-            row = cursor.fetchone()
-            if not row:
-                conn.close()
-                return None
-            existing_id, existing_importance, existing_emotional, existing_count = row
-            if dedupe_policy == "skip":
-                conn.close()
-                return existing_id
-            # Merge policy: aggregate importance/emotional intensity
-            new_count = (existing_count or 1) + 1
-            # For importance, take the maximum
-            merged_importance = max(existing_importance or 0.0, importance)
-            # Weighted average for emotional intensity
-            merged_emotional = 0.0
-            try:
-                merged_emotional = (
-                    ((existing_emotional or 0.0) * (existing_count or 1)) + emotional_intensity
-                ) / new_count
-            except Exception:
-                merged_emotional = max(existing_emotional or 0.0, emotional_intensity)
+        rows = []
+        for c in conversations:
+            user_input, response = c.get('user_input'), c.get('response')
+            rows.append((
+                c.get('timestamp') or now_ts,
+                user_input,
+                response,
+                c.get('emotion', 'neutral'),
+                c.get('importance', 0.5),
+                c.get('emotional_intensity', 0.0),
+                generate_fingerprint(user_input, response),
+            ))
+        if not rows:
+            return []
+        fingerprints = [row[6] for row in rows]
 
-            cursor.execute(
-                '''
-                UPDATE conversations
-                SET importance = ?, emotional_intensity = ?, merged_count = ?, timestamp = ?
-                WHERE id = ?
-                ''',
-                (merged_importance, merged_emotional, new_count, now_ts, existing_id),
-            )
-            conn.commit()
-            conn.close()
-            return existing_id
-        
-        conn.commit()
-        conn.close()
+        with self.connections.transaction() as conn:
+            if not self.fingerprint_unique:
+                # Older databases whose duplicates kept the unique index from being built
+                ids = [conn.execute(INSERT_CONVERSATION, row).lastrowid for row in rows]
+                return [{'id': i, 'fingerprint': fp, 'status': 'inserted'} for i, fp in zip(ids, fingerprints)]
+            existing = self._ids_for_fingerprints(conn, fingerprints)
+            on_conflict = SKIP_DUPLICATE if dedupe_policy == "skip" else MERGE_DUPLICATE
+            conn.executemany(INSERT_CONVERSATION + on_conflict, rows)
+            ids = dict(existing)
+            ids.update(self._ids_for_fingerprints(conn, {fp for fp in fingerprints if fp not in existing}))
+
+        duplicate = 'skipped' if dedupe_policy == "skip" else 'merged'
+        results, seen = [], set(existing)
+        for fp in fingerprints:
+            results.append({'id': ids.get(fp), 'fingerprint': fp, 'status': duplicate if fp in seen else 'inserted'})
+            seen.add(fp)
+        return results
+
+    @staticmethod
+    def _ids_for_fingerprints(conn, fingerprints):
+        """Map the given fingerprints that are stored to their DB ids"""
+        fingerprints = list(fingerprints)
+        ids = {}
+        for start in range(0, len(fingerprints), FINGERPRINT_LOOKUP_CHUNK):
+            chunk = fingerprints[start:start + FINGERPRINT_LOOKUP_CHUNK]
+            ids.update(conn.execute(
+                'SELECT fingerprint, id FROM conversations WHERE fingerprint IN (%s)' % ','.join('?' * len(chunk)),
+                chunk,
+            ).fetchall())
+        return ids
     
     def store_pattern(self, pattern_key, pattern_data):
         """Store or update learned pattern"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            '''
-            INSERT OR REPLACE INTO learned_patterns (
-                pattern_key, pattern_data, created_at, updated_at
-            ) VALUES (?, ?, COALESCE((SELECT created_at FROM learned_patterns WHERE pattern_key = ?), ?), ?)
-            ''',
+        with self.connections.transaction() as conn:
+            conn.execute(
+                '''
+                INSERT OR REPLACE INTO learned_patterns (
+                    pattern_key, pattern_data, created_at, updated_at
+                ) VALUES (?, ?, COALESCE((SELECT created_at FROM learned_patterns WHERE pattern_key = ?), ?), ?)
+                ''',
                 (
                     pattern_key,
                     json.dumps(pattern_data),
@@ -202,72 +323,59 @@ class PersistentMemoryStore:
                     datetime.now(timezone.utc).isoformat(),
                     datetime.now(timezone.utc).isoformat(),
                 ),
-        )
-        
-        conn.commit()
-        conn.close()
+            )
     
-    def export_to_json(self):
-        """Export database to JSON files"""
+    def export_to_json(self, chunk_rows=CHUNK_ROWS):
+        """Export database to JSON files, streamed a chunk of rows at a time"""
         timestamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
-        
-        conn = sqlite3.connect(self.db_path)
-        
-        # Export conversations
-        conversations = conn.execute('SELECT * FROM conversations').fetchall()
+        conn = self.connections.connection()
+
         conv_file = os.path.join(self.json_store, f"conversations_{timestamp}.json")
-        with open(conv_file, 'w') as f:
-            json.dump(
-                [
-                    {
-                        'id': c[0],
-                        'timestamp': c[1],
-                        'user_input': c[2],
-                        'response': c[3],
-                        'emotion': c[4],
-                        'importance': c[5],
-                        'emotional_intensity': c[6],
-                        'fingerprint': c[7],
-                        'merged_count': c[8],
-                    }
-                    for c in conversations
-                ],
-                f,
-                indent=2,
-            )
-        # Export patterns
-        patterns = conn.execute('SELECT * FROM learned_patterns').fetchall()
+        self._write_json_array(conv_file, (
+            [{name: row[name] for name in CONVERSATION_COLUMNS} for row in rows]
+            for rows in iter_table_chunks(conn, 'conversations', chunk_rows)
+        ))
         pattern_file = os.path.join(self.json_store, f"patterns_{timestamp}.json")
-        with open(pattern_file, 'w') as f:
-            json.dump(
-                [
-                    {
-                        'id': p[0],
-                        'key': p[1],
-                        'data': p[2],
-                        'created': p[3],
-                        'updated': p[4],
-                    }
-                    for p in patterns
-                ],
-                f,
-                indent=2,
-            )
-        
-        conn.close()
+        self._write_json_array(pattern_file, (
+            [
+                {
+                    'id': row['id'],
+                    'key': row['pattern_key'],
+                    'data': row['pattern_data'],
+                    'created': row['created_at'],
+                    'updated': row['updated_at'],
+                }
+                for row in rows
+            ]
+            for rows in iter_table_chunks(conn, 'learned_patterns', chunk_rows)
+        ))
         return [conv_file, pattern_file]
 
+    @staticmethod
+    def _write_json_array(path, chunks):
+        """Write the lists in ``chunks`` as one array, exactly as json.dump(..., indent=2) would"""
+        with open(path, 'w') as f:
+            f.write('[')
+            separator = '\n'
+            for chunk in chunks:
+                # Each chunk's array without its brackets: "[\n  {...},\n  {...}\n]"[2:-2]
+                f.write(separator + json.dumps(chunk, indent=2)[2:-2])
+                separator = ',\n'
+            f.write(']' if separator == '\n' else '\n]')
+
+    def export_ndjson(self, path, compression=None, chunk_rows=CHUNK_ROWS, incremental=False, resume=False,
+                      state_file=None):
+        """Stream every table to ``path`` as (optionally compressed) NDJSON; see persistent_export"""
+        return export_ndjson(self, path, compression=compression, chunk_rows=chunk_rows,
+                             incremental=incremental, resume=resume, state_file=state_file)
+
     def list_recent_conversations(self, limit=100):
         """Return the most recent conversations as list of dicts."""
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute(
+        rows = self.connections.connection().execute(
             'SELECT timestamp, user_input, response, emotion, importance, emotional_intensity, '
             'fingerprint, merged_count FROM conversations ORDER BY id DESC LIMIT ?',
             (limit,),
-        )
-        rows = cur.fetchall()
-        conn.close()
+        ).fetchall()
         conversations = []
         for r in rows[::-1]:  # reverse to chronological ascending
             conversations.append({
@@ -301,23 +409,23 @@ class PersistentMemoryStore:
     
     def get_conversation_count(self):
         """Get total conversation count"""
-        conn = sqlite3.connect(self.db_path)
-        count = conn.execute('SELECT COUNT(*) FROM conversations').fetchone()[0]
-        conn.close()
-        return count
+        return self.connections.connection().execute('SELECT COUNT(*) FROM conversations').fetchone()[0]
+
+    def fingerprint_ids(self):
+        """Map every stored conversation fingerprint to its DB id"""
+        rows = self.connections.connection().execute(
+            'SELECT fingerprint, id FROM conversations WHERE fingerprint IS NOT NULL'
+        ).fetchall()
+        return dict(rows)
 
     def get_conversation_by_id(self, conv_id):
         """Return a conversation by its DB id"""
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute(
+        row = self.connections.connection().execute(
             'SELECT id, timestamp, user_input, response, emotion, importance, '
             'emotional_intensity, fingerprint, merged_count '
             'FROM conversations WHERE id = ?',
             (conv_id,)
-        )
-        row = cur.fetchone()
-        conn.close()
+        ).fetchone()
         if not row:
             return None
         return {
@@ -336,16 +444,12 @@ class PersistentMemoryStore:
         """Return a conversation by fingerprint"""
         if not fingerprint:
             return None
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute(
+        row = self.connections.connection().execute(
             'SELECT id, timestamp, user_input, response, emotion, importance, '
             'emotional_intensity, fingerprint, merged_count '
             'FROM conversations WHERE fingerprint = ?',
             (fingerprint,)
-        )
-        row = cur.fetchone()
-        conn.close()
+        ).fetchone()
         if not row:
             return None
         return {
@@ -360,6 +464,75 @@ class PersistentMemoryStore:
             'merged_count': row[8],
         }
 
+    def search_conversations(self, query, limit=10, since=None, highlight=("**", "**")):
+        """Conversations matching any word of ``query``, best first.
+
+        Ranks by BM25 among the newest SEARCH_CANDIDATES matches. ``since`` (ISO timestamp or datetime) keeps conversations stored at or after
+        it. Each result is a conversation dict plus 'score' (negated BM25, higher is
+        better) and 'user_input_snippet'/'response_snippet' with the matched words
+        wrapped in ``highlight``.
+        """
+        words = _SEARCH_WORD.findall(str(query).lower())
+        if not words or limit <= 0:
+            return []
+        if isinstance(since, datetime):
+            since = (since if since.tzinfo else since.replace(tzinfo=timezone.utc)).isoformat()
+        conn = self.connections.connection()
+        columns = ', '.join(f'c.{name}' for name in CONVERSATION_COLUMNS)
+        if not self.search_indexed:
+            # Unindexed: the newest conversations containing any of the words
+            terms = ' OR '.join('c.user_input LIKE ? OR c.response LIKE ?' for _ in words)
+            rows = conn.execute(
+                f"""
+                SELECT {columns}, c.user_input, c.response FROM conversations c
+                WHERE ({terms}) AND (? IS NULL OR c.timestamp >= ?)
+                ORDER BY c.id DESC LIMIT ?
+                """,
+                (*(f'%{word}%' for word in words for _ in range(2)), since, since, limit),
+            ).fetchall()
+            return [self._search_result(row, 0.0) for row in rows]
+
+        # Each word quoted, so FTS5 operators typed by the user stay plain words
+        match = ' OR '.join('"%s"' % word for word in dict.fromkeys(words))
+        oldest = conn.execute(
+            'SELECT rowid FROM conversations_fts WHERE conversations_fts MATCH ? '
+            'ORDER BY rowid DESC LIMIT 1 OFFSET ?',
+            (match, max(SEARCH_CANDIDATES, limit) - 1),
+        ).fetchone()
+        ranked = conn.execute(
+            """
+            SELECT conversations_fts.rowid, bm25(conversations_fts) AS score
+            FROM conversations_fts JOIN conversations c ON c.id = conversations_fts.rowid
+            WHERE conversations_fts MATCH ? AND conversations_fts.rowid >= ? AND (? IS NULL OR c.timestamp >= ?)
+            ORDER BY score LIMIT ?
+            """,
+            (match, oldest[0] if oldest else 0, since, since, limit),
+        ).fetchall()
+        if not ranked:
+            return []
+        # Snippets only for the rows returned
+        rows = conn.execute(
+            f"""
+            SELECT {columns}, snippet(conversations_fts, 0, ?, ?, '…', 12), snippet(conversations_fts, 1, ?, ?, '…', 12)
+            FROM conversations_fts JOIN conversations c ON c.id = conversations_fts.rowid
+            WHERE conversations_fts MATCH ? AND conversations_fts.rowid IN ({','.join('?' * len(ranked))})
+            """,
+            (*highlight, *highlight, match, *(rowid for rowid, _ in ranked)),
+        ).fetchall()
+        by_id = {row[0]: row for row in rows}
+        return [self._search_result(by_id[rowid], -score) for rowid, score in ranked if rowid in by_id]
+
+    @staticmethod
+    def _search_result(row, score):
+        result = dict(zip(CONVERSATION_COLUMNS, row))
+        result['score'] = score
+        result['user_input_snippet'], result['response_snippet'] = row[-2:]
+        return result
+
+    def close(self):
+        """Close the pooled connections (they are reopened on next use)"""
+        self.connections.close()
+
     def update_conversation(
         self,
         conv_id=None,
@@ -379,104 +552,99 @@ class PersistentMemoryStore:
         if not conv_id and not fingerprint:
             return None
 
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
+        with self.connections.transaction() as conn:
+            cur = conn.cursor()
 
-        # Locate the target row
-        if conv_id:
-            cur.execute(
-                'SELECT id, user_input, response, emotion, importance, '
-                'emotional_intensity, fingerprint, merged_count FROM conversations WHERE id = ?',
-                (conv_id,),
-            )
-        else:
-            cur.execute(
-                'SELECT id, user_input, response, emotion, importance, '
-                'emotional_intensity, fingerprint, merged_count FROM conversations WHERE fingerprint = ?',
-                (fingerprint,),
-            )
-        row = cur.fetchone()
-        if not row:
-            conn.close()
-            return None
-        (
-            existing_id,
-            existing_user,
-            existing_response,
-            existing_emotion,
-            existing_importance,
-            existing_emotional,
-            existing_count,
-        ) = row
-
-        # Compute new values
-        new_user = user_input if user_input is not None else existing_user
-        new_response = response if response is not None else existing_response
-        new_emotion = emotion if emotion is not None else existing_emotion
-        new_importance = importance if importance is not None else existing_importance
-        new_emotional = emotional_intensity if emotional_intensity is not None else existing_emotional
-        new_fp = generate_fingerprint(new_user, new_response)
+            # Locate the target row
+            if conv_id:
+                cur.execute(
+                    'SELECT id, user_input, response, emotion, importance, '
+                    'emotional_intensity, fingerprint, merged_count FROM conversations WHERE id = ?',
+                    (conv_id,),
+                )
+            else:
+                cur.execute(
+                    'SELECT id, user_input, response, emotion, importance, '
+                    'emotional_intensity, fingerprint, merged_count FROM conversations WHERE fingerprint = ?',
+                    (fingerprint,),
+                )
+            row = cur.fetchone()
+            if not row:
+                return None
+            (
+                existing_id,
+                existing_user,
+                existing_response,
+                existing_emotion,
+                existing_importance,
+                existing_emotional,
+                _existing_fp,
+                existing_count,
+            ) = row
 
-        now_ts = datetime.now(timezone.utc).isoformat()
+            # Compute new values
+            new_user = user_input if user_input is not None else existing_user
+            new_response = response if response is not None else existing_response
+            new_emotion = emotion if emotion is not None else existing_emotion
+            new_importance = importance if importance is not None else existing_importance
+            new_emotional = emotional_intensity if emotional_intensity is not None else existing_emotional
+            new_fp = generate_fingerprint(new_user, new_response)
 
-        try:
-            cur.execute(
-                '''
-                UPDATE conversations
-                SET user_input = ?, response = ?, emotion = ?, importance = ?,
-                    emotional_intensity = ?, fingerprint = ?, merged_count = ?, timestamp = ?
-                WHERE id = ?
-                ''',
-                (
-                    new_user,
-                    new_response,
-                    new_emotion,
-                    new_importance,
-                    new_emotional,
-                    new_fp,
-                    (existing_count or 1) + (1 if increment_merge else 0),
-                    now_ts,
-                    existing_id,
-                ),
-            )
-            conn.commit()
-            conn.close()
-            return existing_id
-        except sqlite3.IntegrityError:
-            # Conflict caused by fingerprint unique index (another row has same fingerprint).
-            # Merge into that row instead.
-            # Find the conflicting row and merge importance/emotional/merged_count
-            cur.execute(
-                'SELECT id, importance, emotional_intensity, merged_count '
-                'FROM conversations WHERE fingerprint = ?',
-                (new_fp,),
-            )
-            conflict_row = cur.fetchone()
-            if not conflict_row:
-                conn.close()
-                return None
-            conflict_id, conf_importance, conf_emotional, conf_count = conflict_row
+            now_ts = datetime.now(timezone.utc).isoformat()
 
-            # Aggregate counts & importance
-            new_count = (conf_count or 1) + 1
-            merged_importance = max(conf_importance or 0.0, new_importance or 0.0)
-            merged_emotional = 0.0
             try:
-                merged_emotional = (((conf_emotional or 0.0) * (conf_count or 1)) + (new_emotional or 0.0)) / new_count
-            except Exception:
-                merged_emotional = max(conf_emotional or 0.0, new_emotional or 0.0)
+                cur.execute(
+                    '''
+                    UPDATE conversations
+                    SET user_input = ?, response = ?, emotion = ?, importance = ?,
+                        emotional_intensity = ?, fingerprint = ?, merged_count = ?, timestamp = ?
+                    WHERE id = ?
+                    ''',
+                    (
+                        new_user,
+                        new_response,
+                        new_emotion,
+                        new_importance,
+                        new_emotional,
+                        new_fp,
+                        (existing_count or 1) + (1 if increment_merge else 0),
+                        now_ts,
+                        existing_id,
+                    ),
+                )
+                return existing_id
+            except sqlite3.IntegrityError:
+                # Conflict caused by fingerprint unique index (another row has same fingerprint).
+                # Merge into that row instead.
+                # Find the conflicting row and merge importance/emotional/merged_count
+                cur.execute(
+                    'SELECT id, importance, emotional_intensity, merged_count '
+                    'FROM conversations WHERE fingerprint = ?',
+                    (new_fp,),
+                )
+                conflict_row = cur.fetchone()
+                if not conflict_row:
+                    return None
+                conflict_id, conf_importance, conf_emotional, conf_count = conflict_row
 
-            cur.execute(
-                '''
-                UPDATE conversations
-                SET importance = ?, emotional_intensity = ?, merged_count = ?, timestamp = ?
-                WHERE id = ?
-                ''',
-                (merged_importance, merged_emotional, new_count, now_ts, conflict_id),
-            )
-            conn.commit()
-            conn.close()
-            return conflict_id
+                # Aggregate counts & importance
+                new_count = (conf_count or 1) + 1
+                merged_importance = max(conf_importance or 0.0, new_importance or 0.0)
+                merged_emotional = 0.0
+                try:
+                    merged_emotional = (((conf_emotional or 0.0) * (conf_count or 1)) + (new_emotional or 0.0)) / new_count
+                except Exception:
+                    merged_emotional = max(conf_emotional or 0.0, new_emotional or 0.0)
+
+                cur.execute(
+                    '''
+                    UPDATE conversations
+                    SET importance = ?, emotional_intensity = ?, merged_count = ?, timestamp = ?
+                    WHERE id = ?
+                    ''',
+                    (merged_importance, merged_emotional, new_count, now_ts, conflict_id),
+                )
+                return conflict_id
 
 # Global instance
 
@@ -487,6 +655,37 @@ def get_persistent_store():
     """Return a singleton PersistentMemoryStore instance (lazy init)."""
     global PERSISTENT_STORE
     if PERSISTENT_STORE is None:
-        PERSISTENT_STORE = PersistentMemoryStore()
+        # Tests and benchmarks point this outside the source tree
+        PERSISTENT_STORE = PersistentMemoryStore(os.environ.get("PERSISTENT_MEMORY_DB", "persistent_memory.db"))
     return PERSISTENT_STORE
 
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain or search the Roboto SAI conversation store")
+    parser.add_argument("command", choices=("backfill-search", "search", "export"))
+    parser.add_argument("query", nargs="?", default="", help="search words, or the export file")
+    parser.add_argument("--db", default="persistent_memory.db")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--since", help="only conversations stored at or after this ISO timestamp")
+    parser.add_argument("--incremental", action="store_true", help="export only rows new or changed since the last export")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted export")
+    args = parser.parse_args(argv)
+
+    store = PersistentMemoryStore(args.db)
+    if args.command == "backfill-search":
+        print(f"Indexed {store.backfill_search_index()} conversations in {args.db}")
+        return 0
+    if args.command == "export":
+        stats = store.export_ndjson(args.query or "export.ndjson.gz", incremental=args.incremental, resume=args.resume)
+        print(f"Exported {sum(stats['rows'].values())} rows ({stats['bytes']:,} bytes) to {stats['path']}")
+        return 0
+    for result in store.search_conversations(args.query, limit=args.limit, since=args.since):
+        print(f"{result['score']:7.2f}  #{result['id']}  {result['timestamp']}")
+        print(f"         {result['user_input_snippet']}")
+        print(f"         {result['response_snippet']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
+
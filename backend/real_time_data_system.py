@@ -4,6 +4,20 @@ Created by Roberto Villarreal Martinez for Roboto SAI
 
 This module provides real-time access to time, weather, and other live data sources.
 Enhanced with quantum capabilities, advanced caching, and comprehensive error handling.
+
+get_comprehensive_context used to call every source one after another with a
+blocking requests.get each, so its latency was the sum of all sources, paid
+on every episodic memory write. The sources now fan out concurrently on the
+engine's executor over one pooled HTTP session. The whole context has a
+deadline (REALTIME_CONTEXT_DEADLINE seconds) that caps each source's request
+timeout; sources still running at the deadline are reported as timed out and
+the context is returned partial, while the late fetch finishes in the
+background and warms the cache for the next call. Per-source latency
+histograms are part of get_metrics().
+
+get_cached_context is the variant for the memory write path: it reads the
+last good values kept by a BackgroundRefresher (real_time_refresher) and
+never waits on a fetch.
 """
 
 import requests
@@ -11,21 +25,33 @@ import json
 import time
 import logging
 import threading
+import copy
+import pickle
+import sys
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Tuple, Union
 import os
 import asyncio
 import aiohttp
+from bisect import bisect_left
 from dataclasses import dataclass, asdict
 from functools import lru_cache
 import platform
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, wait
 import hashlib
+from requests.adapters import HTTPAdapter
+
+from real_time_refresher import BackgroundRefresher
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+CONTEXT_DEADLINE_SECONDS = float(os.environ.get("REALTIME_CONTEXT_DEADLINE", "2.0"))
+FETCH_WORKERS = int(os.environ.get("REALTIME_FETCH_WORKERS", "8"))
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
 @dataclass
 class DataSourceConfig:
     """Configuration for data sources"""
@@ -91,43 +117,157 @@ class RateLimiter:
                 return True
             return False
 
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds) for one data source"""
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot: slower than the largest bucket
+        self.count = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """Record one completed fetch"""
+        ms = seconds * 1000
+        with self.lock:
+            self.counts[bisect_left(self.buckets, ms)] += 1
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def record_timeout(self):
+        """Record a fetch that missed the context deadline"""
+        with self.lock:
+            self.timeouts += 1
+
+    def _percentile(self, fraction: float) -> float:
+        # Upper bound of the bucket holding the percentile (max_ms for the overflow bucket)
+        rank = fraction * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if n and seen >= rank:
+                return float(min(bound, self.max_ms))
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            labels = [f"<={bound}ms" for bound in self.buckets] + [f">{self.buckets[-1]}ms"]
+            return {
+                "count": self.count,
+                "timeouts": self.timeouts,
+                "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+                "p50_ms": round(self._percentile(0.5), 2),
+                "p99_ms": round(self._percentile(0.99), 2),
+                "max_ms": round(self.max_ms, 2),
+                "buckets": dict(zip(labels, self.counts))
+            }
+
 class CacheManager:
-    """Advanced cache manager with TTL and size limits"""
-    def __init__(self, max_size: int = 1000):
-        self.cache = {}
+    """
+    Thread-safe LRU cache with per-entry TTL and a byte budget
+
+    get, set and eviction are O(1): entries live in an OrderedDict in
+    least-recently-used order, expired entries are dropped when read (or by
+    prune()), and the least recently used entry goes when the cache is over
+    ``max_size`` entries or ``max_bytes``. Values are stored pickled and
+    unpickled on every get, so callers that mark a result (``from_cache``)
+    cannot change what is cached; the pickle's length is the entry's size.
+    """
+    def __init__(self, max_size: int = 1000, max_bytes: Optional[int] = None, clock=time.monotonic):
         self.max_size = max_size
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.environ.get("REALTIME_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+        self._clock = clock
         self.lock = threading.Lock()
+        # key -> (pickled value, expires_at, size in bytes)
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    @staticmethod
+    def _freeze(value: Any) -> Tuple[Any, int]:
+        """(stored form, size in bytes) of a value"""
+        try:
+            blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)  # A few times faster than deepcopy
+            return blob, len(blob)
+        except Exception:
+            # Unpicklable: keep a deep copy, wrapped so it is not mistaken for a pickle
+            return [copy.deepcopy(value)], sys.getsizeof(value)
+
+    @staticmethod
+    def _thaw(stored: Any) -> Any:
+        return pickle.loads(stored) if isinstance(stored, bytes) else copy.deepcopy(stored[0])
 
     def get(self, key: str) -> Optional[Any]:
-        """Get cached item if not expired"""
+        """Get a copy of the cached item if not expired"""
         with self.lock:
-            if key in self.cache:
-                item, expiry = self.cache[key]
-                if time.time() < expiry:
-                    return item
-                else:
-                    del self.cache[key]
-        return None
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            stored, expires_at, size = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.bytes -= size
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+        return self._thaw(stored)
 
     def set(self, key: str, value: Any, ttl: int):
-        """Set cached item with TTL"""
+        """Set a copy of the item with TTL, evicting least recently used items over the limits"""
+        stored, size = self._freeze(value)
         with self.lock:
-            if len(self.cache) >= self.max_size:
-                # Remove expired items first
-                current_time = time.time()
-                self.cache = {k: v for k, v in self.cache.items() if current_time < v[1]}
-
-                # If still at max size, remove oldest
-                if len(self.cache) >= self.max_size:
-                    oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k][1])
-                    del self.cache[oldest_key]
-
-            self.cache[key] = (value, time.time() + ttl)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[2]
+            self._entries[key] = (stored, self._clock() + ttl, size)
+            self.bytes += size
+            # An item larger than max_bytes on its own is still kept
+            while len(self._entries) > self.max_size or (self.bytes > self.max_bytes and len(self._entries) > 1):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.stats["evictions"] += 1
+
+    def prune(self) -> int:
+        """Drop every expired item; returns how many went"""
+        now = self._clock()
+        with self.lock:
+            expired = [key for key, (_, expires_at, _) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                self.bytes -= self._entries.pop(key)[2]
+            self.stats["expirations"] += len(expired)
+        return len(expired)
 
     def clear(self):
         """Clear all cached items"""
         with self.lock:
-            self.cache.clear()
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Size, byte usage and hit/miss/eviction counters"""
+        with self.lock:
+            stats = dict(self.stats)
+            size, used = len(self._entries), self.bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "size": size,
+            "max_size": self.max_size,
+            "bytes": used,
+            "max_bytes": self.max_bytes,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0
+        })
+        return stats
 
 class RealTimeDataEngine:
     """
@@ -143,7 +283,8 @@ class RealTimeDataEngine:
         # Initialize components
         self.cache = CacheManager(max_size=500)
         self.weather_rate_limiter = RateLimiter(max_calls=1000, time_window=3600)  # 1000 calls/hour
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="realtime-fetch")
+        self.http = self._create_http_session()
 
         # Data source configurations
         self.configs = {
@@ -165,6 +306,16 @@ class RealTimeDataEngine:
             "stocks": self.configs["stocks"].enabled
         }
 
+        # Stale-while-revalidate refresher behind get_cached_context, started on demand
+        self.refresher: Optional[BackgroundRefresher] = None
+        self._refresh_keys: Dict[str, str] = {}
+        self._refresher_lock = threading.Lock()
+
+        # Per-source latency of the comprehensive context fan-out
+        self.source_latency = {
+            source: LatencyHistogram() for source in ("time", "weather", "system_info", "news", "crypto")
+        }
+
         # Metrics tracking
         self.metrics = {
             "api_calls": 0,
@@ -182,6 +333,22 @@ class RealTimeDataEngine:
             logger.warning("⚠️ Weather API key not found. Set OPENWEATHER_API_KEY for weather data.")
         if not self.news_api_key:
             logger.warning("⚠️ News API key not found. Set NEWS_API_KEY for news data.")
+
+    @staticmethod
+    def _create_http_session() -> requests.Session:
+        """One keep-alive session shared by every source and fetch worker"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=FETCH_WORKERS)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def close(self):
+        """Stop the fetch workers and release pooled HTTP connections"""
+        if self.refresher is not None:
+            self.refresher.stop()
+        self.executor.shutdown(wait=False)
+        self.http.close()
     
     def get_current_time(self, timezone_name: str = "America/Chicago") -> Dict[str, Any]:
         """
@@ -256,13 +423,15 @@ class RealTimeDataEngine:
                 "timestamp": time.time()
             }
     
-    def get_weather_data(self, city: str = "San Antonio", country_code: str = "US") -> Dict[str, Any]:
+    def get_weather_data(self, city: str = "San Antonio", country_code: str = "US",
+                         timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Get current weather data with enhanced error handling and rate limiting
 
         Args:
             city: City name
             country_code: ISO country code (e.g., 'US', 'GB')
+            timeout: Request timeout in seconds (defaults to the source config)
 
         Returns:
             Dict containing weather information or error details
@@ -313,10 +482,10 @@ class RealTimeDataEngine:
                 "lang": "en"
             }
 
-            response = requests.get(
+            response = self.http.get(
                 url,
                 params=params,
-                timeout=self.configs["weather"].timeout
+                timeout=timeout or self.configs["weather"].timeout
             )
             response.raise_for_status()
 
@@ -394,13 +563,15 @@ class RealTimeDataEngine:
                 "message": "An unexpected error occurred while fetching weather data."
             }
     
-    def get_news_data(self, query: str = "technology", language: str = "en") -> Dict[str, Any]:
+    def get_news_data(self, query: str = "technology", language: str = "en",
+                      timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Get latest news articles from NewsAPI
 
         Args:
             query: Search query for news
             language: Language code (e.g., 'en', 'es')
+            timeout: Request timeout in seconds (defaults to the source config)
 
         Returns:
             Dict containing news articles or error details
@@ -439,10 +610,10 @@ class RealTimeDataEngine:
                 "apiKey": self.news_api_key
             }
 
-            response = requests.get(
+            response = self.http.get(
                 url,
                 params=params,
-                timeout=self.configs["news"].timeout
+                timeout=timeout or self.configs["news"].timeout
             )
             response.raise_for_status()
 
@@ -483,12 +654,13 @@ class RealTimeDataEngine:
                 "message": "Could not fetch news data"
             }
 
-    def get_crypto_data(self, symbol: str = "bitcoin") -> Dict[str, Any]:
+    def get_crypto_data(self, symbol: str = "bitcoin", timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Get cryptocurrency data from CoinGecko API
 
         Args:
             symbol: Cryptocurrency symbol (e.g., 'bitcoin', 'ethereum')
+            timeout: Request timeout in seconds (defaults to the source config)
 
         Returns:
             Dict containing crypto information or error details
@@ -514,10 +686,10 @@ class RealTimeDataEngine:
                 "include_last_updated_at": "true"
             }
 
-            response = requests.get(
+            response = self.http.get(
                 url,
                 params=params,
-                timeout=self.configs["crypto"].timeout
+                timeout=timeout or self.configs["crypto"].timeout
             )
             response.raise_for_status()
 
@@ -763,8 +935,11 @@ class RealTimeDataEngine:
             "cache_hit_rate": round(cache_hit_rate, 2),
             "errors": self.metrics["errors"],
             "last_reset": datetime.fromtimestamp(self.metrics["last_reset"]).isoformat(),
-            "cache_size": len(self.cache.cache),
-            "enabled_sources": [k for k, v in self.configs.items() if v.enabled]
+            "cache_size": len(self.cache),
+            "cache": self.cache.get_stats(),
+            "enabled_sources": [k for k, v in self.configs.items() if v.enabled],
+            "source_latency": {source: histogram.snapshot() for source, histogram in self.source_latency.items()},
+            "background_refresh": self.refresher.get_stats() if self.refresher is not None else None
         }
 
     def reset_metrics(self):
@@ -776,80 +951,210 @@ class RealTimeDataEngine:
             "errors": 0,
             "last_reset": time.time()
         }
+        self.source_latency = {source: LatencyHistogram() for source in self.source_latency}
         logger.info("Metrics reset successfully")
     
-    def get_comprehensive_context(self, city: str = "San Antonio", timezone_name: str = "America/Chicago") -> Dict[str, Any]:
+    def get_comprehensive_context(self, city: str = "San Antonio", timezone_name: str = "America/Chicago",
+                                  deadline_seconds: Optional[float] = None) -> Dict[str, Any]:
         """
         Get comprehensive real-time context for SAI decision making
 
         Args:
             city: City for weather data
             timezone_name: Timezone for time data
+            deadline_seconds: Time budget for all sources (defaults to REALTIME_CONTEXT_DEADLINE)
 
         Returns:
-            Dict containing all available real-time context data
+            Dict containing all available real-time context data; "partial" is
+            True when some sources missed the deadline
         """
         try:
-            # Gather data from all enabled sources
+            deadline_seconds = CONTEXT_DEADLINE_SECONDS if deadline_seconds is None else deadline_seconds
+            deadline = time.monotonic() + deadline_seconds
+            fetches = self._start_context_fetches(city, timezone_name, deadline)
+            if fetches:
+                wait([future for _, future in fetches.values()], timeout=max(0.0, deadline - time.monotonic()))
+            return self._assemble_context(fetches, deadline_seconds)
+
+        except Exception as e:
+            logger.error(f"Error generating comprehensive context: {e}")
+            return self._fallback_context(e, timezone_name)
+
+    async def get_comprehensive_context_async(self, city: str = "San Antonio", timezone_name: str = "America/Chicago",
+                                              deadline_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Async version of get_comprehensive_context: awaits the same concurrent
+        fetches without blocking the event loop
+        """
+        try:
+            deadline_seconds = CONTEXT_DEADLINE_SECONDS if deadline_seconds is None else deadline_seconds
+            deadline = time.monotonic() + deadline_seconds
+            fetches = self._start_context_fetches(city, timezone_name, deadline)
+            if fetches:
+                await asyncio.wait([asyncio.wrap_future(future) for _, future in fetches.values()],
+                                   timeout=max(0.0, deadline - time.monotonic()))
+            return self._assemble_context(fetches, deadline_seconds)
+
+        except Exception as e:
+            logger.error(f"Error generating comprehensive context: {e}")
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._fallback_context, e, timezone_name
+            )
+
+    def start_background_refresh(self, city: str = "San Antonio",
+                                 timezone_name: str = "America/Chicago") -> BackgroundRefresher:
+        """
+        Keep the context sources warm in the background, each refreshed once
+        its cache duration has passed. The refresher follows the city it was
+        started with.
+        """
+        with self._refresher_lock:
+            if self.refresher is None:
+                refresher = BackgroundRefresher()
+                for key, source, fetch in self._context_sources(city, timezone_name):
+                    if source == "time":
+                        continue  # Local clock: read fresh on every call
+                    config = self.configs[source]
+                    # One second past the cache duration, so the fetch is never served from the cache
+                    refresher.add_source(source, lambda fetch=fetch, config=config: fetch(config.timeout),
+                                         config.cache_duration + 1)
+                    self._refresh_keys[source] = key
+                refresher.start()
+                self.refresher = refresher
+            return self.refresher
+
+    def get_cached_context(self, city: str = "San Antonio", timezone_name: str = "America/Chicago") -> Dict[str, Any]:
+        """
+        Comprehensive context from the last good value of every source
+
+        Never waits on a fetch: the background refresher (started on first
+        use) keeps the values fresh, and sources it has not fetched yet are
+        reported as pending with "partial" set.
+        """
+        try:
+            refresher = self.start_background_refresh(city, timezone_name)
             context_data = {
                 "data_timestamp": datetime.now(timezone.utc).isoformat(),
                 "metadata": {
                     "engine_version": "2.0",
                     "data_sources_enabled": [k for k, v in self.configs.items() if v.enabled],
                     "cache_enabled": True,
-                    "async_support": True
+                    "async_support": True,
+                    "background_refresh": True
                 }
             }
-
-            # Time data
             if self.configs["time"].enabled:
-                time_data = self.get_current_time(timezone_name)
-                context_data["time_context"] = time_data
-
-            # Weather data
-            if self.configs["weather"].enabled:
-                weather_data = self.get_weather_data(city)
-                context_data["weather_context"] = weather_data
-
-            # System data
-            if self.configs["system_info"].enabled:
-                system_data = self.get_system_info()
-                context_data["system_context"] = system_data
-
-            # News data (sample)
-            if self.configs["news"].enabled:
-                news_data = self.get_news_data("artificial intelligence")
-                context_data["news_context"] = news_data
-
-            # Crypto data (Bitcoin as default)
-            if self.configs["crypto"].enabled:
-                crypto_data = self.get_crypto_data("bitcoin")
-                context_data["crypto_context"] = crypto_data
-
-            # Generate contextual insights
+                context_data["time_context"] = self.get_current_time(timezone_name)
+
+            pending = []
+            for source, entry in refresher.snapshot().items():
+                key = self._refresh_keys[source]
+                if entry["value"] is None:
+                    pending.append(source)
+                    context_data[key] = {"success": False, "error": "Not fetched yet", "pending": True}
+                else:
+                    context_data[key] = {**entry["value"], "age_seconds": entry["age_seconds"], "stale": entry["stale"]}
+            context_data["partial"] = bool(pending)
+            context_data["pending_sources"] = pending
+
             context_data["contextual_insights"] = self._generate_contextual_insights(
                 context_data.get("time_context", {}),
                 context_data.get("weather_context", {}),
                 context_data.get("system_context", {}),
                 context_data.get("crypto_context", {})
             )
-
-            # Add performance metrics
             context_data["performance_metrics"] = self.get_metrics()
-
             return context_data
 
         except Exception as e:
-            logger.error(f"Error generating comprehensive context: {e}")
-            return {
-                "success": False,
-                "error": str(e),
-                "data_timestamp": datetime.now(timezone.utc).isoformat(),
-                "fallback_context": {
-                    "time_context": self.get_current_time(timezone_name),
-                    "system_context": self.get_system_info()
+            logger.error(f"Error reading cached context: {e}")
+            return {"success": False, "error": str(e), "data_timestamp": datetime.now(timezone.utc).isoformat()}
+
+    def _context_sources(self, city: str, timezone_name: str):
+        """(context key, source, fetch(timeout)) for each enabled source of the comprehensive context"""
+        sources = [
+            ("time_context", "time", lambda timeout: self.get_current_time(timezone_name)),
+            ("weather_context", "weather", lambda timeout: self.get_weather_data(city, timeout=timeout)),
+            ("system_context", "system_info", lambda timeout: self.get_system_info()),
+            ("news_context", "news", lambda timeout: self.get_news_data("artificial intelligence", timeout=timeout)),
+            ("crypto_context", "crypto", lambda timeout: self.get_crypto_data("bitcoin", timeout=timeout))
+        ]
+        return [(key, source, fetch) for key, source, fetch in sources if self.configs[source].enabled]
+
+    def _start_context_fetches(self, city: str, timezone_name: str, deadline: float):
+        """Submit every enabled source to the fetch workers at once"""
+        return {
+            key: (source, self.executor.submit(self._fetch_source, source, fetch, deadline, time.monotonic()))
+            for key, source, fetch in self._context_sources(city, timezone_name)
+        }
+
+    def _fetch_source(self, source: str, fetch, deadline: float, submitted: float) -> Dict[str, Any]:
+        """Run one source with whatever is left of the deadline as its request timeout"""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            # Waited in the queue past the deadline; the context has moved on
+            return {"success": False, "error": "Deadline exceeded before the fetch started"}
+        try:
+            return fetch(max(0.05, min(self.configs[source].timeout, remaining)))
+        except Exception as e:
+            logger.warning(f"Real-time source {source} failed: {e}")
+            self.metrics["errors"] += 1
+            return {"success": False, "error": str(e), "error_type": type(e).__name__}
+        finally:
+            self.source_latency[source].record(time.monotonic() - submitted)
+
+    def _assemble_context(self, fetches, deadline_seconds: float) -> Dict[str, Any]:
+        context_data = {
+            "data_timestamp": datetime.now(timezone.utc).isoformat(),
+            "metadata": {
+                "engine_version": "2.0",
+                "data_sources_enabled": [k for k, v in self.configs.items() if v.enabled],
+                "cache_enabled": True,
+                "async_support": True,
+                "deadline_seconds": deadline_seconds
+            }
+        }
+
+        timed_out = []
+        for key, (source, future) in fetches.items():
+            if future.done():
+                context_data[key] = future.result()
+            else:
+                # Left running: its result still lands in the cache for the next context
+                timed_out.append(source)
+                self.source_latency[source].record_timeout()
+                context_data[key] = {
+                    "success": False,
+                    "error": "Deadline exceeded",
+                    "timed_out": True,
+                    "message": f"{source} did not answer within {deadline_seconds}s"
                 }
+        context_data["partial"] = bool(timed_out)
+        context_data["timed_out_sources"] = timed_out
+
+        # Generate contextual insights
+        context_data["contextual_insights"] = self._generate_contextual_insights(
+            context_data.get("time_context", {}),
+            context_data.get("weather_context", {}),
+            context_data.get("system_context", {}),
+            context_data.get("crypto_context", {})
+        )
+
+        # Add performance metrics
+        context_data["performance_metrics"] = self.get_metrics()
+
+        return context_data
+
+    def _fallback_context(self, error: Exception, timezone_name: str) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "error": str(error),
+            "data_timestamp": datetime.now(timezone.utc).isoformat(),
+            "fallback_context": {
+                "time_context": self.get_current_time(timezone_name),
+                "system_context": self.get_system_info()
             }
+        }
     
     def _generate_contextual_insights(self, time_data: Dict, weather_data: Dict,
                                     system_data: Optional[Dict] = None, crypto_data: Optional[Dict] = None) -> Dict[str, Any]:
@@ -1278,4 +1583,4 @@ if __name__ == "__main__":
     # asyncio.run(demo_async_weather())
 
     # Uncomment to run comprehensive context demo
-    # demo_comprehensive_context()
\ No newline at end of file
+    # demo_comprehensive_context()
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+Real-Time Refresher - Stale-while-revalidate refresh of real-time data sources
+Created for Roboto SAI
+
+The memory write path used to pull the real-time context on demand, so a cold
+or expired cache entry put a weather request or a psutil sample straight into
+chat latency. A BackgroundRefresher keeps the last good value of every source
+instead and refreshes each one on its own schedule from a scheduler thread:
+
+    reads     get() and snapshot() return the last good value at once, a copy
+              so callers cannot change it, with its age; a source that was
+              never fetched has no value yet rather than making the reader wait.
+    refresh   at most one fetch per source is in flight (single flight);
+              refresh() while one is running returns the same future.
+    errors    a failed fetch keeps the last good value and retries after an
+              exponential backoff with jitter, capped at the source's interval.
+
+RealTimeDataEngine.start_background_refresh() registers its context sources
+with their cache durations as intervals; get_cached_context() builds the
+comprehensive context from the refresher without fetching anything.
+"""
+
+import copy
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Source:
+    __slots__ = ("name", "fetch", "interval", "value", "updated_at", "in_flight", "failures", "next_due",
+                 "last_error")
+
+    def __init__(self, name: str, fetch: Callable[[], Any], interval: float):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.value = None
+        self.updated_at: Optional[float] = None
+        self.in_flight: Optional[Future] = None
+        self.failures = 0
+        self.next_due = 0.0          # Due at once
+        self.last_error: Optional[str] = None
+
+
+class BackgroundRefresher:
+    """Refreshes registered sources in the background and serves their last good values"""
+
+    def __init__(self, workers: int = 4, base_backoff: Optional[float] = None, max_backoff: Optional[float] = None,
+                 name: str = "realtime-refresh"):
+        self.workers = max(1, workers)
+        self.base_backoff = base_backoff if base_backoff is not None else float(
+            os.environ.get("REALTIME_REFRESH_BACKOFF", "1.0"))
+        self.max_backoff = max_backoff if max_backoff is not None else float(
+            os.environ.get("REALTIME_REFRESH_MAX_BACKOFF", "300"))
+        self.name = name
+
+        self._sources: Dict[str, _Source] = {}
+        self._cond = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._scheduler: Optional[threading.Thread] = None
+        self._stopping = False
+        self.stats = {"refreshes": 0, "failures": 0, "coalesced": 0, "reads": 0, "stale_reads": 0, "empty_reads": 0}
+
+    def add_source(self, name: str, fetch: Callable[[], Any], interval: float):
+        """Register ``fetch`` to run every ``interval`` seconds; a result with success False counts as a failure"""
+        with self._cond:
+            self._sources[name] = _Source(name, fetch, max(0.01, interval))
+            self._cond.notify_all()
+
+    def start(self):
+        with self._cond:
+            if self._scheduler is not None or self._stopping:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+            self._scheduler = threading.Thread(target=self._schedule_loop, name=f"{self.name}-scheduler", daemon=True)
+            self._scheduler.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop scheduling; fetches in flight are left to finish on their own"""
+        with self._cond:
+            self._stopping = True
+            scheduler, executor = self._scheduler, self._executor
+            self._cond.notify_all()
+        if scheduler is not None:
+            scheduler.join(timeout)
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    @property
+    def running(self) -> bool:
+        return self._scheduler is not None and not self._stopping
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """Last good value of one source (None until its first success), never waiting on a fetch"""
+        with self._cond:
+            entry = self._entry(self._sources[name], time.monotonic())
+            self.stats["reads"] += 1
+            if entry["value"] is None:
+                self.stats["empty_reads"] += 1
+            elif entry["stale"]:
+                self.stats["stale_reads"] += 1
+            value = entry["value"]
+        entry["value"] = copy.deepcopy(value)   # Outside the lock; the stored value is never mutated
+        return entry
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """get() for every source"""
+        with self._cond:
+            names = list(self._sources)
+        return {name: self.get(name) for name in names}
+
+    def refresh(self, name: str) -> Future:
+        """Fetch ``name`` now, or join the fetch already in flight"""
+        with self._cond:
+            source = self._sources[name]
+            if source.in_flight is not None:
+                self.stats["coalesced"] += 1
+                return source.in_flight
+            if self._executor is None:
+                raise RuntimeError("BackgroundRefresher is not started")
+            # _run waits for the lock, so in_flight is set before it can clear it
+            source.in_flight = self._executor.submit(self._run, source)
+            return source.in_flight
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        sources = {}
+        with self._cond:
+            for name, source in self._sources.items():
+                entry = self._entry(source, now)
+                del entry["value"]
+                sources[name] = {**entry, "failures": source.failures, "last_error": source.last_error,
+                                 "next_refresh_seconds": round(max(0.0, source.next_due - now), 3)}
+            return {**self.stats, "running": self.running, "sources": sources}
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _entry(source: _Source, now: float) -> Dict[str, Any]:
+        age = None if source.updated_at is None else now - source.updated_at
+        return {"value": source.value, "age_seconds": None if age is None else round(age, 3),
+                "stale": age is None or age > source.interval, "refreshing": source.in_flight is not None}
+
+    def _backoff(self, source: _Source) -> float:
+        # Exponential, "equal jitter" so failing sources do not retry in lockstep
+        delay = min(self.max_backoff, source.interval, self.base_backoff * 2 ** (source.failures - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _schedule_loop(self):
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                now = time.monotonic()
+                due = [s.name for s in self._sources.values() if s.in_flight is None and s.next_due <= now]
+                if not due:
+                    waiting = [s.next_due for s in self._sources.values() if s.in_flight is None]
+                    self._cond.wait(min(waiting) - now if waiting else None)
+                    continue
+            for name in due:
+                try:
+                    self.refresh(name)
+                except RuntimeError:
+                    return  # Executor shut down by stop()
+
+    def _run(self, source: _Source):
+        error = None
+        try:
+            result = source.fetch()
+            if isinstance(result, dict) and result.get("success") is False:
+                error = str(result.get("error", "fetch failed"))
+        except Exception as e:
+            result, error = None, str(e)
+
+        with self._cond:
+            source.in_flight = None
+            now = time.monotonic()
+            self.stats["refreshes"] += 1
+            if error is None:
+                source.value, source.updated_at = result, now
+                source.failures, source.last_error = 0, None
+                source.next_due = now + source.interval
+            else:
+                self.stats["failures"] += 1
+                source.failures += 1
+                source.last_error = error
+                source.next_due = now + self._backoff(source)
+                logger.warning(f"Refresh of {source.name} failed ({source.failures} in a row): {error}")
+            self._cond.notify_all()
+        return result
@@ -0,0 +1,122 @@
+"""
+Retrieval Cache - Bounded LRU/TTL cache for memory retrieval results
+Created for Roboto SAI
+
+Entries are keyed by a normalized query, user, limit and algorithm and tagged
+with the memory store generation they were computed at. Any store, edit or
+removal bumps the generation, so a lookup never returns results computed
+against an older version of the memory store.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+DEFAULT_MAX_SIZE = 1000
+DEFAULT_TTL_SECONDS = 300.0
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query used in cache keys."""
+    return " ".join((query or "").lower().split()).strip(" .,!?;:")
+
+
+class RetrievalCache:
+    """Thread-safe LRU cache with per-entry TTL and generation invalidation."""
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (generation, expires_at, value)
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, Any]]" = OrderedDict()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def make_key(query: str, user_name: Optional[str], limit: int, algorithm: str, scope: Hashable = None) -> tuple:
+        """Cache key for a retrieval; ``scope`` carries any hashable candidate filters."""
+        return (normalize_query(query), user_name, limit, algorithm, scope)
+
+    def get(self, key: Hashable, generation: int) -> Optional[Any]:
+        """Return a copy of the cached value, or None on miss, expiry or a stale generation."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            entry_generation, expires_at, value = entry
+            if entry_generation != generation:
+                del self._entries[key]
+                self.stats["invalidations"] += 1
+                self.stats["misses"] += 1
+                return None
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+        # Callers annotate results in place - hand out copies
+        return copy.deepcopy(value)
+
+    def put(self, key: Hashable, value: Any, generation: int) -> None:
+        """Store a copy of ``value`` computed at ``generation``, evicting the LRU entry if full."""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (generation, self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def prune(self, generation: Optional[int] = None) -> int:
+        """Drop expired entries and, if ``generation`` is given, entries from older generations."""
+        removed = 0
+        now = self._clock()
+        with self._lock:
+            for key, (entry_generation, expires_at, _) in list(self._entries.items()):
+                if expires_at <= now:
+                    self.stats["expirations"] += 1
+                elif generation is not None and entry_generation != generation:
+                    self.stats["invalidations"] += 1
+                else:
+                    continue
+                del self._entries[key]
+                removed += 1
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_stats(self) -> dict:
+        """Return size and hit/miss/eviction counters."""
+        with self._lock:
+            stats = dict(self.stats)
+            size = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "size": size,
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "utilization": size / self.max_size if self.max_size else 0.0,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+        })
+        return stats
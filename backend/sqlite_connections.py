@@ -0,0 +1,148 @@
+"""
+SQLite Connections - Per-thread WAL connections for SQLite-backed stores
+Created for Roboto SAI
+
+PersistentMemoryStore used to open a new sqlite3 connection for every call,
+run one statement under the default rollback journal and close it again, so
+under concurrent chat traffic most of the time went to connection setup and
+file locking, and writers that collided failed at once with "database is
+locked". SQLiteConnectionManager keeps one connection per thread, set up
+once with:
+
+    journal_mode=WAL     readers no longer block the writer or each other
+    synchronous          NORMAL by default: no fsync per commit (a power cut may drop the last few)
+    cache_size           a page cache per connection (SQLITE_CACHE_KIB)
+    busy_timeout         writers queue for the lock instead of failing (SQLITE_BUSY_TIMEOUT_MS)
+    temp_store, mmap     temporary tables in memory, reads through a memory map
+
+Each connection keeps its own compiled statement cache, so the store's
+statements are prepared once per thread. Writes go through transaction(),
+which takes the write lock up front (BEGIN IMMEDIATE); a transaction that
+reads before it writes then cannot fail to upgrade its lock halfway.
+Transactions nest as savepoints, so a caller can group several store writes
+into one commit.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+class SQLiteConnectionManager:
+    """Hands each thread its own tuned connection to one database file"""
+
+    def __init__(self, path: str, busy_timeout_ms: Optional[int] = None, synchronous: Optional[str] = None,
+                 cache_kib: Optional[int] = None, mmap_bytes: Optional[int] = None, cached_statements: int = 256):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms if busy_timeout_ms is not None else int(
+            os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "10000"))
+        self.synchronous = (synchronous or os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")).upper()
+        if self.synchronous not in SYNCHRONOUS_MODES:
+            logger.warning(f"Unknown SQLite synchronous mode {self.synchronous!r}, using NORMAL")
+            self.synchronous = "NORMAL"
+        self.cache_kib = cache_kib if cache_kib is not None else int(os.environ.get("SQLITE_CACHE_KIB", "8192"))
+        self.mmap_bytes = mmap_bytes if mmap_bytes is not None else int(
+            os.environ.get("SQLITE_MMAP_BYTES", str(64 * 2 ** 20)))
+        self.cached_statements = cached_statements
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+        self.stats = {"connections": 0, "transactions": 0, "rollbacks": 0}
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, in autocommit mode (each read statement stands alone)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        A write transaction holding the write lock from its first statement.
+        Nested inside another one on the same thread it is a savepoint: its work
+        commits with the outer transaction, and an error rolls back only its own.
+        """
+        conn = self.connection()
+        depth = getattr(self._local, "depth", 0)
+        if depth:
+            savepoint = f"nested_{depth}"
+            conn.execute(f"SAVEPOINT {savepoint}")
+            self._local.depth = depth + 1
+            try:
+                yield conn
+                conn.execute(f"RELEASE {savepoint}")
+            except BaseException:
+                if conn.in_transaction:   # SQLite may already have rolled back the whole transaction
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+                raise
+            finally:
+                self._local.depth = depth
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = 1
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            with self._lock:
+                self.stats["rollbacks"] += 1
+            raise
+        finally:
+            self._local.depth = 0
+        with self._lock:
+            self.stats["transactions"] += 1
+
+    def close(self):
+        """Close every connection (the store can still be used; threads reconnect)"""
+        with self._lock:
+            connections, self._connections = list(self._connections.values()), {}
+            self._local = threading.local()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to close SQLite connection to {self.path}: {e}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self.stats, "open_connections": len(self._connections),
+                    "synchronous": self.synchronous, "busy_timeout_ms": self.busy_timeout_ms}
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections are only used by the thread that opened them; close() may run elsewhere
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None,
+                               check_same_thread=False, cached_statements=self.cached_statements)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.OperationalError as e:  # Another connection is switching the mode right now
+            logger.debug(f"Could not set WAL mode on {self.path}: {e}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA cache_size={-int(self.cache_kib)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_bytes)}")
+
+        current = threading.current_thread()
+        with self._lock:
+            # Threads that have finished cannot use their connections again
+            finished = [thread for thread in self._connections if not thread.is_alive()]
+            stale = [self._connections.pop(thread) for thread in finished]
+            self._connections[current] = conn
+            self.stats["connections"] += 1
+        for old in stale:
+            old.close()
+        return conn
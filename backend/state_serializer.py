@@ -0,0 +1,315 @@
+"""
+State Serializer - Pluggable file formats for persisted state
+Created for Roboto SAI
+
+The memory snapshot, the emotion simulator state, the anchored identity
+events and the fallback memory file were all written as pretty-printed
+JSON, the largest and slowest format for multi-megabyte state. Writers now
+go through write_state(), which encodes with one of:
+
+    json          pretty-printed JSON text (the former files; default)
+    json-compact  JSON without indentation
+    columnar      length-prefixed frames, one per top-level section; lists
+                  of records are stored column by column, so each field
+                  name is written once instead of once per record
+    msgpack       MessagePack (needs the optional ``msgpack`` package)
+
+optionally compressed with ``zlib`` or ``zstd`` (optional ``zstandard``).
+Everything but uncompressed ``json`` starts with a 7-byte header (magic,
+version, format, compression), so read_state() detects the format of any
+file, including the JSON files written before this module existed.
+STATE_FILE_FORMAT and STATE_FILE_COMPRESSION choose the defaults; an
+unavailable optional format falls back to a stdlib one with a warning.
+
+Command line:
+    python state_serializer.py info FILE
+    python state_serializer.py convert SOURCE [DEST] [--format F] [--compression C]
+"""
+
+import argparse
+import json
+import logging
+import os
+import struct
+import zlib
+from collections.abc import Mapping
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RSAI"
+VERSION = 1
+HEADER = struct.Struct("<4sBBB")  # magic, version, format code, compression code
+FORMATS = {"json": 1, "json-compact": 2, "columnar": 3, "msgpack": 4}
+COMPRESSIONS = {"none": 0, "zlib": 1, "zstd": 2}
+FALLBACKS = {"msgpack": "columnar", "zstd": "zlib"}  # Used when the optional package is missing
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+_U8 = struct.Struct("<B")
+_U16 = struct.Struct("<H")
+_U64 = struct.Struct("<Q")
+ROOT_SECTIONS, ROOT_VALUE = 0, 1  # Columnar root: a dict of named sections, or one value
+KIND_VALUE, KIND_RECORDS = 0, 1   # Columnar section: JSON value, or a list of records by column
+
+_warned = set()
+
+
+def _available(name: str) -> bool:
+    return {"msgpack": MSGPACK_AVAILABLE, "zstd": ZSTD_AVAILABLE}.get(name, True)
+
+
+def _resolve(name: str, choices: dict, kind: str) -> str:
+    if name not in choices:
+        raise ValueError(f"Unknown state file {kind}: {name} (choose from {', '.join(choices)})")
+    if not _available(name):
+        fallback = FALLBACKS[name]
+        if name not in _warned:
+            _warned.add(name)
+            logger.warning(f"State file {kind} {name} is not installed; writing {fallback} instead")
+        return fallback
+    return name
+
+
+def default_options() -> Tuple[str, str]:
+    """(format, compression) configured by STATE_FILE_FORMAT and STATE_FILE_COMPRESSION"""
+    return (os.environ.get("STATE_FILE_FORMAT", "json").strip().lower(),
+            os.environ.get("STATE_FILE_COMPRESSION", "none").strip().lower())
+
+
+# ----------------------------------------------------------------------
+# Columnar layout
+# ----------------------------------------------------------------------
+
+def _json_bytes(value, default) -> bytes:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=default).encode("utf-8")
+
+
+def _is_records(value) -> bool:
+    return isinstance(value, list) and len(value) > 1 and all(isinstance(item, Mapping) for item in value)
+
+
+def _encode_records(records: list, default) -> List[bytes]:
+    """u64 count, u16 columns, then name + JSON column for each field every record has, then the rest"""
+    counts = {}
+    for record in records:
+        for key in record:
+            counts[key] = counts.get(key, 0) + 1
+    keys = [key for key, seen in counts.items() if seen == len(records) and isinstance(key, str)]
+    parts = [_U64.pack(len(records)), _U16.pack(len(keys))]
+    for key in keys:
+        name = key.encode("utf-8")
+        column = _json_bytes([record[key] for record in records], default)
+        parts += [_U16.pack(len(name)), name, _U64.pack(len(column)), column]
+
+    extra = b""
+    if len(keys) < len(counts):
+        dense = set(keys)
+        extra = _json_bytes([{key: value for key, value in record.items() if key not in dense} or None
+                             for record in records], default)
+    parts += [_U64.pack(len(extra)), extra]
+    return parts
+
+
+def _decode_records(view: memoryview, offset: int) -> list:
+    (count,), offset = _U64.unpack_from(view, offset), offset + _U64.size
+    (columns,), offset = _U16.unpack_from(view, offset), offset + _U16.size
+    keys, values = [], []
+    for _ in range(columns):
+        (size,), offset = _U16.unpack_from(view, offset), offset + _U16.size
+        keys.append(bytes(view[offset:offset + size]).decode("utf-8"))
+        offset += size
+        (size,), offset = _U64.unpack_from(view, offset), offset + _U64.size
+        values.append(json.loads(bytes(view[offset:offset + size])))
+        offset += size
+    records = [dict(zip(keys, row)) for row in zip(*values)] if keys else [{} for _ in range(count)]
+
+    (size,), offset = _U64.unpack_from(view, offset), offset + _U64.size
+    if size:
+        for record, extra in zip(records, json.loads(bytes(view[offset:offset + size]))):
+            if extra:
+                record.update(extra)
+    return records
+
+
+def _encode_columnar(obj, default) -> bytes:
+    sections = obj.items() if isinstance(obj, Mapping) and all(isinstance(key, str) for key in obj) else None
+    parts = [_U8.pack(ROOT_VALUE if sections is None else ROOT_SECTIONS)]
+    if sections is None:
+        sections = [("", obj)]
+    else:
+        sections = list(sections)
+        parts.append(_U64.pack(len(sections)))
+
+    for name, value in sections:
+        encoded_name = name.encode("utf-8")
+        if _is_records(value):
+            kind, body = KIND_RECORDS, _encode_records(value, default)
+        else:
+            kind, body = KIND_VALUE, [_json_bytes(value, default)]
+        parts += [_U16.pack(len(encoded_name)), encoded_name, _U8.pack(kind),
+                  _U64.pack(sum(len(part) for part in body))] + body
+    return b"".join(parts)
+
+
+def _decode_columnar(data) -> object:
+    view = memoryview(data)
+    (root,), offset = _U8.unpack_from(view, 0), _U8.size
+    count = 1
+    if root == ROOT_SECTIONS:
+        (count,), offset = _U64.unpack_from(view, offset), offset + _U64.size
+
+    sections = {}
+    for _ in range(count):
+        (size,), offset = _U16.unpack_from(view, offset), offset + _U16.size
+        name = bytes(view[offset:offset + size]).decode("utf-8")
+        offset += size
+        (kind,), offset = _U8.unpack_from(view, offset), offset + _U8.size
+        (size,), offset = _U64.unpack_from(view, offset), offset + _U64.size
+        if kind == KIND_RECORDS:
+            sections[name] = _decode_records(view, offset)
+        else:
+            sections[name] = json.loads(bytes(view[offset:offset + size]))
+        offset += size
+    return sections if root == ROOT_SECTIONS else sections[""]
+
+
+# ----------------------------------------------------------------------
+# Formats and compression
+# ----------------------------------------------------------------------
+
+def _msgpack_default(default):
+    def encode(value):
+        if isinstance(value, Mapping):
+            return dict(value)
+        if default is not None:
+            return default(value)
+        raise TypeError(f"Object of type {type(value).__name__} is not msgpack serializable")
+    return encode
+
+
+ENCODERS = {
+    "json": lambda obj, default: json.dumps(obj, indent=2, ensure_ascii=False, default=default).encode("utf-8"),
+    "json-compact": _json_bytes,
+    "columnar": _encode_columnar,
+    "msgpack": lambda obj, default: msgpack.packb(obj, use_bin_type=True, default=_msgpack_default(default)),
+}
+DECODERS = {
+    "json": lambda data: json.loads(bytes(data).decode("utf-8-sig")),
+    "json-compact": lambda data: json.loads(bytes(data)),
+    "columnar": _decode_columnar,
+    "msgpack": lambda data: msgpack.unpackb(data, raw=False, strict_map_key=False),
+}
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    if compression == "zlib":
+        return zlib.compress(data, ZLIB_LEVEL)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return data
+
+
+def _decompress(data, compression: str):
+    if compression == "zlib":
+        return zlib.decompress(data)
+    if compression == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+def detect_format(data: bytes) -> Tuple[str, str]:
+    """(format, compression) of encoded state; header-less data is legacy JSON text"""
+    if data[:len(MAGIC)] != MAGIC:
+        return "json", "none"
+    if len(data) < HEADER.size:
+        raise ValueError("Truncated state file header")
+    _, version, format_code, compression_code = HEADER.unpack_from(data)
+    if version > VERSION:
+        raise ValueError(f"State file version {version} is newer than this reader ({VERSION})")
+    formats = {code: name for name, code in FORMATS.items()}
+    compressions = {code: name for name, code in COMPRESSIONS.items()}
+    if format_code not in formats or compression_code not in compressions:
+        raise ValueError(f"Unknown state file format {format_code}/{compression_code}")
+    return formats[format_code], compressions[compression_code]
+
+
+def dumps_state(obj, format: Optional[str] = None, compression: Optional[str] = None,
+                default: Optional[Callable] = None) -> bytes:
+    """Encode ``obj``; unset options come from the environment (default_options)"""
+    configured = default_options()
+    format = _resolve(format or configured[0], FORMATS, "format")
+    compression = _resolve(compression or configured[1], COMPRESSIONS, "compression")
+    data = ENCODERS[format](obj, default)
+    if format == "json" and compression == "none":
+        return data  # Plain JSON text, readable by anything that read the former files
+    return HEADER.pack(MAGIC, VERSION, FORMATS[format], COMPRESSIONS[compression]) + _compress(data, compression)
+
+
+def loads_state(data: bytes):
+    """Decode state written by dumps_state (or a legacy JSON file), detecting its format"""
+    if data[:len(MAGIC)] != MAGIC:
+        return DECODERS["json"](data)
+    format, compression = detect_format(data)
+    if not _available(format) or not _available(compression):
+        missing = format if not _available(format) else compression
+        raise RuntimeError(f"State file is {missing}-encoded but {missing} support is not installed")
+    return DECODERS[format](_decompress(memoryview(data)[HEADER.size:], compression))
+
+
+def write_state(path: str, obj, format: Optional[str] = None, compression: Optional[str] = None,
+                default: Optional[Callable] = None) -> int:
+    """Encode ``obj`` into a temp file that atomically replaces ``path``; returns the bytes written"""
+    data = dumps_state(obj, format, compression, default)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+def read_state(path: str):
+    with open(path, "rb") as f:
+        return loads_state(f.read())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or convert Roboto SAI state files")
+    parser.add_argument("command", choices=("info", "convert"))
+    parser.add_argument("source")
+    parser.add_argument("dest", nargs="?", help="output file (default: rewrite SOURCE in place)")
+    parser.add_argument("--format", choices=tuple(FORMATS), default="columnar")
+    parser.add_argument("--compression", choices=tuple(COMPRESSIONS), default="zlib")
+    args = parser.parse_args(argv)
+
+    with open(args.source, "rb") as f:
+        data = f.read()
+    format, compression = detect_format(data)
+    if args.command == "info":
+        print(f"{args.source}: {format}, compression {compression}, {len(data):,} bytes")
+        return 0
+    dest = args.dest or args.source
+    converted = dumps_state(loads_state(data), args.format, args.compression)
+    with open(f"{dest}.tmp", "wb") as f:
+        f.write(converted)
+    os.replace(f"{dest}.tmp", dest)
+    new_format, new_compression = detect_format(converted)
+    print(f"Converted {args.source} ({format}/{compression}, {len(data):,} bytes) "
+          f"to {dest} ({new_format}/{new_compression}, {len(converted):,} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,14 @@
+"""
+Shared test setup: keep the shared persistent store out of the source tree
+and the real-time refresher off.
+
+memory_system opens the shared PersistentMemoryStore when it is imported, so
+the path has to be set before any test module is collected.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("PERSISTENT_MEMORY_DB",
+                      os.path.join(tempfile.mkdtemp(prefix="roboto_tests_"), "persistent_memory.db"))
+# No background refresher polling live weather, news and crypto APIs
+os.environ.setdefault("REALTIME_BACKGROUND_REFRESH", "0")
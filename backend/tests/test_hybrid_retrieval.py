@@ -0,0 +1,185 @@
+"""
+Unit tests for the shared-candidate hybrid retrieval engine.
+"""
+import sys
+import os
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+# Add backend to path so we can import the engine module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from hybrid_retrieval import HybridRetrievalEngine, STRATEGY_FEATURES
+
+
+class FakeMemorySystem:
+    """Records how often the corpus is scored."""
+
+    def __init__(self, memories):
+        self.memories = memories
+        self.scoring_passes = 0
+        self.quantum_entanglements = {"old": {"entanglement_strength": 1.0, "entangled_memories": []}}
+
+    def score_memory_candidates(self, query, user_name=None, candidate_limit=15, candidate_ids=None):
+        self.scoring_passes += 1
+        ranked = sorted(self.memories, key=lambda m: m["relevance_score"], reverse=True)
+        return [dict(m) for m in ranked[:candidate_limit]]
+
+    def get_entanglement_context(self, memory):
+        entanglements = self.quantum_entanglements.get(memory["id"], {})
+        return {
+            "entangled_memories": [],
+            "entanglement_strength": entanglements.get("entanglement_strength", 0.0),
+            "quantum_coherence": memory.get("quantum_state", {}).get("coherence", 0.5),
+            "fractal_patterns": []
+        }
+
+    def _select_diverse_memories(self, memories, limit):
+        return memories[:limit]
+
+
+def make_memories():
+    now = datetime.now(timezone.utc)
+    return [
+        {"id": "old", "relevance_score": 1.0, "emotion": "sad", "emotional_intensity": 0.1,
+         "timestamp": (now - timedelta(days=90)).isoformat(), "key_themes": ["a"],
+         "quantum_state": {"coherence": 0.9}},
+        {"id": "fresh", "relevance_score": 0.9, "emotion": "happy", "emotional_intensity": 0.5,
+         "timestamp": (now - timedelta(hours=1)).isoformat(), "key_themes": ["b"],
+         "quantum_state": {"coherence": 0.1}},
+        {"id": "weak", "relevance_score": 0.2, "emotion": "neutral", "emotional_intensity": 0.5,
+         "timestamp": now.isoformat(), "key_themes": ["c"]},
+    ]
+
+
+def test_strategies_rerank_one_shared_candidate_pool():
+    system = FakeMemorySystem(make_memories())
+    engine = HybridRetrievalEngine(system)
+    candidates = engine.build_candidates("query", query_emotion="happy", query_intensity=0.5)
+
+    assert [m["id"] for m in engine.rank(candidates, "semantic_similarity", 1)] == ["old"]
+    assert [m["id"] for m in engine.rank(candidates, "temporal_relevance", 1)] == ["fresh"]
+    assert [m["id"] for m in engine.rank(candidates, "emotional_resonance", 1)] == ["fresh"]
+    assert [m["id"] for m in engine.rank(candidates, "quantum_entanglement", 1)] == ["old"]
+    assert system.scoring_passes == 1
+
+
+def test_hybrid_combines_strategies_with_single_scoring_pass():
+    system = FakeMemorySystem(make_memories())
+    engine = HybridRetrievalEngine(system)
+
+    results = engine.hybrid(engine.build_candidates("query", limit=2), limit=2)
+
+    assert system.scoring_passes == 1
+    assert [m["id"] for m in results] == ["old", "fresh"]
+    assert set(results[0]["algorithm_breakdown"]) == set(STRATEGY_FEATURES)
+    assert all("quantum_context" in m for m in results)
+
+
+CORPUS = [
+    ("I practiced guitar scales before breakfast", "Steady scales make fast solos easy", "joy"),
+    ("The ocean was freezing at sunrise", "Cold water wakes you up like coffee", "surprise"),
+    ("My chess club lost the final round", "Every lost game teaches an opening", "sad"),
+    ("Tomatoes finally grew in the garden", "Homegrown tomatoes taste like summer", "joy"),
+    ("We watched the stars from the desert", "Desert skies show the milky way", "curious"),
+    ("The espresso machine broke again", "Descaling usually fixes the pump", "angry"),
+    ("Learning a new guitar song for my sister", "Her birthday song will sound great", "happy"),
+    ("Sailing lessons on the bay were rough", "Wind shifts make sailing tricky", "fear"),
+    ("Why do chess engines sacrifice pawns", "Engines value activity over material", "curious"),
+    ("Planted lavender along the fence", "Lavender keeps the bees around", "neutral"),
+    ("The telescope shows saturn rings clearly", "Saturn is bright this month", "surprise"),
+    ("Roasting my own coffee beans at home", "Light roasts keep fruity notes", "joy"),
+    ("Guitar strings keep snapping on stage", "Coated strings last longer", "angry"),
+    ("Whales breached near the ocean pier", "Migration season brings them close", "happy"),
+    ("Teaching my nephew the chess openings", "Start him with the italian game", "neutral"),
+    ("Compost smells bad in the garden", "Add dry leaves to balance it", "sad"),
+]
+
+
+def legacy_hybrid_retrieval(roboto, query, user_name=None, limit=5):
+    """The five per-strategy retrievals RobotoSAI._hybrid_retrieval ran before the shared candidate pool."""
+    memory = roboto.quantum_memory
+    per_strategy = limit * 2
+    results = {"semantic_similarity": memory.retrieve_relevant_memories(query, user_name, per_strategy)}
+
+    memories = memory.retrieve_relevant_memories(query, user_name, per_strategy * 3)
+    current_time = datetime.now()
+    for m in memories:
+        try:
+            hours_old = (current_time - datetime.fromisoformat(m.get("timestamp", ""))).total_seconds() / 3600
+            boost = 1.5 if hours_old < 24 else 1.2 if hours_old < 168 else 1.0 if hours_old < 720 else 0.8
+            m["temporal_score"] = m.get("relevance_score", 0) * boost
+        except Exception:
+            m["temporal_score"] = m.get("relevance_score", 0)   # Aware timestamps minus naive now()
+    results["temporal_relevance"] = sorted(memories, key=lambda x: x["temporal_score"], reverse=True)[:per_strategy]
+
+    query_emotion = roboto._analyze_query_emotion(query)
+    memories = memory.retrieve_relevant_memories(query, user_name, per_strategy * 2)
+    for m in memories:
+        emotional_match = 1.0 if m.get("emotion", "neutral") == query_emotion else 0.5
+        intensity_match = 1.0 - abs(roboto._calculate_emotional_intensity(query) - m.get("emotional_intensity", 0.5))
+        m["emotional_score"] = m.get("relevance_score", 0) * (emotional_match * 0.7 + intensity_match * 0.3)
+    results["emotional_resonance"] = sorted(memories, key=lambda x: x["emotional_score"], reverse=True)[:per_strategy]
+
+    current_context = roboto._get_current_context()
+    memories = memory.retrieve_relevant_memories(query, user_name, per_strategy * 2)
+    for m in memories:
+        m["contextual_score"] = m.get("relevance_score", 0) * roboto._calculate_contextual_relevance(
+            m, current_context, query)
+    results["contextual_matching"] = sorted(memories, key=lambda x: x["contextual_score"], reverse=True)[:per_strategy]
+
+    memories = memory.get_quantum_context(query, user_name)
+    for m in memories:
+        m["quantum_score"] = (m.get("quantum_context", {}).get("entanglement_strength", 0.5) * 0.6
+                              + m.get("quantum_state", {}).get("coherence", 0.5) * 0.4)
+    results["quantum_entanglement"] = sorted(memories, key=lambda x: x["quantum_score"], reverse=True)[:per_strategy]
+
+    combined = {}
+    for strategy, memories in results.items():
+        weight = roboto.retrieval_config.get(f"{strategy}_weight", 0.2)
+        for m in memories:
+            entry = combined.setdefault(m["id"], {"memory": m, "total_score": 0.0})
+            entry["total_score"] += m.get("relevance_score", 0.0) * weight
+
+    selected, seen_themes = [], set()
+    for item in sorted(combined.values(), key=lambda x: x["total_score"], reverse=True):
+        if len(selected) >= limit:
+            break
+        themes = set(item["memory"].get("key_themes", []))
+        if not themes.intersection(seen_themes) or len(selected) < 2:
+            item["memory"]["hybrid_score"] = item["total_score"]
+            selected.append(item["memory"])
+            seen_themes.update(themes)
+    return selected
+
+
+def test_robotosai_hybrid_retrieval_matches_the_previous_scorer(tmp_path, monkeypatch):
+    """
+    Same memories in the same order as the five-retrieval path on a fixed corpus.
+
+    hybrid_score can differ, and with it the order on other corpora: a memory's
+    score is its relevance times the weights of the strategies that ranked it in
+    their top ``limit * 2``, and those lists are now cut from one shared pool.
+    The quantum strategy re-ranks the whole pool instead of the top three of
+    get_quantum_context, the others re-rank the pool before the diversity
+    filter, and the temporal boost now applies (the old path subtracted aware
+    timestamps from a naive now() and fell back to plain relevance).
+    """
+    pytest.importorskip("roboto_sai_sdk")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MEMORY_ASYNC_ENRICHMENT", "0")
+    import memory_system
+    monkeypatch.setattr(memory_system, "REAL_TIME_AVAILABLE", False)
+    from Roboto_SAI import RobotoSAI
+
+    roboto = RobotoSAI()
+    for user_input, response, emotion in CORPUS:
+        roboto.quantum_memory.add_episodic_memory(user_input, response, emotion)
+
+    for query in ("guitar songs and chess openings", "the ocean at sunrise with coffee",
+                  "stars over the garden", "saturn whales lavender espresso guitar", "chess"):
+        legacy = legacy_hybrid_retrieval(roboto, query)
+        engine = roboto._hybrid_retrieval(query)
+        assert engine and [m["id"] for m in engine] == [m["id"] for m in legacy], query
+        assert [m["relevance_score"] for m in engine] == pytest.approx([m["relevance_score"] for m in legacy])
@@ -0,0 +1,125 @@
+"""
+Unit tests for the compressed archive tier of episodic memories.
+"""
+import sys
+import os
+
+# Add backend to path so we can import the archive module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from memory_archive import MemoryArchive
+from state_serializer import detect_format
+
+
+def make_memory(i, topic):
+    return {"id": f"m{i}", "timestamp": "2024-05-01T12:00:00+00:00", "user_input": f"tell me about {topic} again",
+            "roboto_response": f"answer {i}", "emotion": "joy", "user_name": "Roberto Villarreal Martinez",
+            "key_themes": [topic], "importance": 1.0, "quantum_state": {"superposition": 40}}
+
+
+def test_archived_memories_are_indexed_searchable_and_survive_reopening(tmp_path):
+    directory = str(tmp_path / "memory.archive")
+    archive = MemoryArchive(directory)
+    topics = ["guitar", "ocean", "coffee"]
+    memories = [make_memory(i, topics[i % 3]) for i in range(30)]
+    assert archive.archive(memories[:15], [f"fp{i}" for i in range(15)]) == "segment-000001.bin"
+    archive.archive(memories[15:], [f"fp{i}" for i in range(15, 30)])
+
+    assert len(archive) == 30 and "m20" in archive
+    assert archive.get("m20") == memories[20] and archive.get("missing") is None
+    assert archive.id_for_fingerprint("fp7") == "m7"
+    hits = archive.search("what about the ocean", limit=10)   # "about" is a keyword of every memory
+    assert {memory["id"] for memory, _ in hits} == {f"m{i}" for i in range(1, 30, 3)}
+    assert hits[0][1] == 0.5 and archive.search("ocean", limit=1)[0][1] == 1.0     # Share of query words matched
+    assert archive.search("ocean", exclude={"m1"}, limit=1)[0][0]["id"] == "m10"
+
+    segment = os.path.join(directory, "segment-000001.bin")
+    assert detect_format(open(segment, "rb").read())[0] == "columnar"
+    reopened = MemoryArchive(directory)
+    assert reopened.get("m3") == memories[3] and reopened.id_for_fingerprint("fp29") == "m29"
+    assert reopened.get_stats()["segments"] == 2 and reopened.get_stats()["segment_reads"] == 1
+
+
+def test_restore_and_forget_stop_listing_memories(tmp_path):
+    directory = str(tmp_path / "memory.archive")
+    archive = MemoryArchive(directory, segment_cache=1)
+    archive.archive([make_memory(i, "guitar") for i in range(4)], ["fp0", "fp1", "fp2", "fp3"])
+
+    assert archive.restore("m1")["id"] == "m1"
+    assert archive.restore("m1") is None and "m1" not in archive and archive.id_for_fingerprint("fp1") is None
+    assert [memory["id"] for memory, _ in archive.search("guitar", limit=10)] == ["m0", "m2", "m3"]
+    # The index on disk still lists a restored memory until the next write
+    assert "m1" in MemoryArchive(directory)
+
+    assert archive.forget(["m2", "missing"]) == 1
+    reopened = MemoryArchive(directory)
+    assert sorted(reopened.ids()) == ["m0", "m3"] and reopened.id_for_fingerprint("fp2") is None
+
+
+def test_archive_ranks_by_write_time_importance_and_keeps_autonomy_memories(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MEMORY_ASYNC_ENRICHMENT", "0")
+    import memory_system
+    monkeypatch.setattr(memory_system, "REAL_TIME_AVAILABLE", False)
+    system = memory_system.QuantumEnhancedMemorySystem(memory_file=str(tmp_path / "memory.json"), hot_set_size=10)
+
+    autonomy = system.add_episodic_memory("switch on full autonomy", "Done", "neutral")
+    ids = [system.add_episodic_memory(f"I feel my music lessons matter, what do you think? {i}"
+                                      if i % 2 else f"ok {i}", "Sure", "vulnerability" if i % 2 else "neutral")
+           for i in range(12)]
+    # Every resident memory now has importance >= 1.0 from the protection pass
+    archived = set(system.archive.ids())
+    assert archived and archived <= set(ids[0::2])
+    assert system.get_memory(autonomy)["protection_level"] == "ABSOLUTE_AUTONOMY"
+    assert autonomy not in archived
+
+
+def test_archive_pass_moves_at_most_a_batch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MEMORY_ASYNC_ENRICHMENT", "0")
+    monkeypatch.setenv("MEMORY_ARCHIVE_BATCH", "3")
+    import memory_system
+    monkeypatch.setattr(memory_system, "REAL_TIME_AVAILABLE", False)
+    system = memory_system.QuantumEnhancedMemorySystem(memory_file=str(tmp_path / "memory.json"))
+    for i in range(12):
+        system.add_episodic_memory(f"note number {i}", "Noted", "neutral")
+
+    system.hot_set_size = 4   # A store far past a newly configured hot set migrates over several passes
+    resident = []
+    for _ in range(3):
+        system.archive_old_memories()
+        resident.append(len(system.episodic_memories))
+    assert resident == [9, 6, 4] and len(system.archive) == 8
+
+
+def test_archive_pass_runs_outside_the_write_lock(tmp_path, monkeypatch):
+    import threading
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MEMORY_ASYNC_ENRICHMENT", "0")
+    import memory_system
+    monkeypatch.setattr(memory_system, "REAL_TIME_AVAILABLE", False)
+    system = memory_system.QuantumEnhancedMemorySystem(memory_file=str(tmp_path / "memory.json"))
+    ids = [system.add_episodic_memory(f"note number {i}", "Noted", "neutral") for i in range(12)]
+
+    entered, release = threading.Event(), threading.Event()
+    write_segment = system.archive.archive
+
+    def slow_archive(memories, fingerprints):
+        entered.set()
+        release.wait(5)
+        return write_segment(memories, fingerprints)
+
+    monkeypatch.setattr(system.archive, "archive", slow_archive)
+    system.hot_set_size = 4
+    archiver = threading.Thread(target=system.archive_old_memories)
+    archiver.start()
+    assert entered.wait(5)
+    # Chat writes and edits go through while the segment is written
+    system.add_episodic_memory("a new message", "Got it", "neutral")
+    system.edit_memory(ids[0], {"roboto_response": "Edited"})
+    release.set()
+    archiver.join(5)
+
+    # The memory edited mid-pass stays resident and out of the archive
+    assert system.get_memory(ids[0])["roboto_response"] == "Edited" and ids[0] not in system.archive
+    assert len(system.archive) == 7 and len(system.episodic_memories) == 6
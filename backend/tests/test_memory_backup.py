@@ -0,0 +1,73 @@
+"""
+Unit tests for the deduplicated, rotated memory backup store.
+"""
+import sys
+import os
+import json
+
+# Add backend to path so we can import the backup module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from memory_backup import MemoryBackupStore, chunk_boundaries
+
+
+def write_memory_file(path, count, edited=None):
+    memories = [{"id": f"m{i}", "user_input": f"memory number {i} " * 8,
+                 "importance": 0.9 if i == edited else 0.5} for i in range(count)]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"episodic_memories": memories}, f, indent=2)
+
+
+def test_unchanged_chunks_are_stored_once(tmp_path):
+    path = str(tmp_path / "memory.json")
+    store = MemoryBackupStore(path)
+    write_memory_file(path, 5000)
+    first = store.backup()
+    written = store.stats["chunks_written"]
+    assert written > 4 and store.backup() == first  # Identical contents are not backed up twice
+
+    write_memory_file(path, 5000, edited=2500)
+    second = store.backup()
+    assert second != first
+    assert store.stats["chunks_written"] - written <= 2
+    assert store.stats["chunks_reused"] >= written - 2
+
+    with open(path, "rb") as f:
+        entry, data = store.latest()
+        assert entry["id"] == second and data == f.read()
+    assert chunk_boundaries(b"") == [] and chunk_boundaries(b"a\nb")[-1] == 3
+
+
+def test_retention_keeps_recent_hourly_and_daily(tmp_path):
+    store = MemoryBackupStore(str(tmp_path / "memory.json"), keep_last=2, keep_hourly=3, keep_daily=2)
+    hour, day = 3600, 86400
+    base = 10 * day + 12.5 * hour  # 12:30
+    # Newest first: four in the current hour, then one per earlier hour, then a day earlier
+    created = [base, base - 60, base - 120, base - 180, base - hour, base - 2 * hour, base - 3 * hour, base - day - hour]
+    index = [{"id": str(i), "created": stamp} for i, stamp in enumerate(created)]
+
+    kept = store._retained(index)
+    assert kept == {"0", "1", "4", "5", "7"}
+
+
+def test_pruning_and_restore_skip_corrupt_backups(tmp_path):
+    path = str(tmp_path / "memory.json")
+    store = MemoryBackupStore(path, keep_last=2, keep_hourly=0, keep_daily=0)
+    ids = []
+    for edited in range(3):
+        write_memory_file(path, 2000, edited=edited * 700)
+        ids.append(store.backup())
+    assert [entry["id"] for entry in store.snapshots()] == ids[:0:-1]
+    assert store.stats["pruned"] == 1 and store.stats["chunks_deleted"] >= 1
+
+    # Lose a chunk of the newest backup: restore falls back to the previous one
+    manifest = json.load(open(store._manifest_path(ids[2])))
+    previous = set(json.load(open(store._manifest_path(ids[1])))["chunks"])
+    os.remove(store._chunk_path(next(c for c in manifest["chunks"] if c not in previous)))
+
+    with open(path + ".journal.000003", "wb") as f:
+        f.write(b"later changes")
+    assert store.restore()["id"] == ids[1]
+    assert json.load(open(path))["episodic_memories"][700]["importance"] == 0.9
+    assert os.path.exists(path + ".journal.000003.pre_restore")
+    assert not os.path.exists(path + ".journal.000003")
@@ -0,0 +1,87 @@
+"""
+Unit tests for MinHash diversity selection of retrieved memories.
+"""
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# Add backend to path so we can import the selector module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from memory_diversity import DiversitySelector, memory_tokens, minhash_signature
+from memory_feature_store import MemoryFeatureStore
+
+BASE_TIME = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+def make_memory(memory_id, text, themes=("music",), hours=0.0, score=1.0):
+    return {
+        "id": memory_id,
+        "user_input": text,
+        "roboto_response": "",
+        "key_themes": list(themes),
+        "timestamp": (BASE_TIME + timedelta(hours=hours)).isoformat(),
+        "relevance_score": score,
+    }
+
+
+def exact_similarity(first, second):
+    """The pairwise similarity with exact word Jaccard."""
+    themes1, themes2 = set(first["key_themes"]), set(second["key_themes"])
+    theme = len(themes1 & themes2) / len(themes1 | themes2) if themes1 and themes2 else 0
+    words1, words2 = memory_tokens(first), memory_tokens(second)
+    word = len(words1 & words2) / len(words1 | words2) if words1 and words2 else 0
+    hours = abs((datetime.fromisoformat(first["timestamp"]) - datetime.fromisoformat(second["timestamp"])).total_seconds()) / 3600
+    return theme * 0.4 + word * 0.4 + max(0, 1 - hours / 24) * 0.2
+
+
+def pool():
+    memories = []
+    for topic in range(6):
+        words = [f"t{topic}w{i}" for i in range(20)]
+        for copy in range(8):
+            memories.append(make_memory(f"{topic}-{copy}", " ".join(words[copy % 2:]), themes=[f"topic{topic}"],
+                                        hours=topic * 100 + copy * 0.1, score=2.0 - copy * 0.1 - topic * 0.01))
+    return sorted(memories, key=lambda memory: memory["relevance_score"], reverse=True)
+
+
+def test_minhash_signature_estimates_jaccard():
+    first = {f"w{i}" for i in range(100)}
+    second = {f"w{i}" for i in range(50, 150)}
+    estimate = (minhash_signature(first) == minhash_signature(second)).mean()
+    assert abs(estimate - 1 / 3) < 0.15
+    assert (minhash_signature(first) == minhash_signature(set(first))).all()
+
+
+def test_minhash_strategy_matches_pairwise_pass():
+    memories = pool()
+    expected = DiversitySelector("pairwise").select(memories, 5, pairwise_similarity=exact_similarity)
+    selected = DiversitySelector("minhash").select(memories, 5)
+
+    assert [m["id"] for m in selected] == [m["id"] for m in expected]
+    assert len({m["key_themes"][0] for m in selected}) == 5
+
+
+def test_mmr_prefers_relevant_and_dissimilar_memories():
+    memories = pool()
+    selected = DiversitySelector("mmr", mmr_lambda=0.5).select(memories, 3)
+
+    assert selected[0] is memories[0]
+    assert len({m["key_themes"][0] for m in selected}) == 3
+
+
+def test_feature_store_caches_signatures_until_the_memory_changes():
+    store = MemoryFeatureStore()
+    memory = make_memory("a", "guitar music studio")
+    store.add(memory)
+
+    first = store.signature(memory)
+    assert store.signature_ready[store.slot_of("a")]
+    assert np.array_equal(store.signature(memory), first)
+
+    memory["user_input"] = "rain forecast tomorrow"
+    store.add(memory)
+    assert not store.signature_ready[store.slot_of("a")]
+    assert not np.array_equal(store.signature(memory), first)
@@ -0,0 +1,101 @@
+"""
+Unit tests for the local embedding index used for nearest-neighbour retrieval.
+"""
+import sys
+import os
+import random
+
+import numpy as np
+
+# Add backend to path so we can import the index module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import memory_embedding_index
+from memory_embedding_index import HashedNgramEmbedder, MemoryEmbeddingIndex
+
+WORDS = ["guitar", "music", "studio", "rain", "weather", "coffee", "python", "code",
+         "travel", "mexico", "family", "birthday", "space", "stars", "ocean", "dream"]
+
+
+def corpus(count, seed=1):
+    rng = random.Random(seed)
+    return {f"m{i}": " ".join(rng.choice(WORDS) for _ in range(12)) for i in range(count)}
+
+
+def test_embeddings_are_normalized_and_similar_text_is_closer():
+    embedder = HashedNgramEmbedder(dim=128)
+    vectors = embedder.embed(["guitar music studio", "Guitar  MUSIC studio!", "rain forecast tomorrow", ""])
+
+    assert vectors.shape == (4, 128) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors[:3], axis=1), 1.0)
+    assert vectors[0] @ vectors[1] > 0.8 > vectors[0] @ vectors[2]
+    assert np.array_equal(embedder.embed(["guitar music studio"])[0], vectors[0])
+
+
+def test_incremental_updates_and_keys():
+    docs = {"a": "guitar music studio", "b": "rain and weather", "c": "music lessons"}
+    index = MemoryEmbeddingIndex(lambda: [(k, v, i) for i, (k, v) in enumerate(docs.items())])
+
+    assert index.search("guitar music", 1)[0][0] == "a"
+    assert list(index.match("guitar music", 1).keys) == [0]
+
+    index.add("d", "guitar music studio session", key=7)
+    index.update("a", "coffee in the morning", key=0)
+    index.remove("b")
+    ids = [memory_id for memory_id, _ in index.search("guitar music studio", 3)]
+    assert ids[0] == "d" and "b" not in ids
+    assert [m for m, _ in index.search("guitar music", 5, candidate_ids={"a", "c"})] == ["c", "a"]
+    assert len(index) == 3
+
+
+def test_save_load_only_reembeds_changed_memories(tmp_path):
+    docs = corpus(50)
+    path = str(tmp_path / "memory.embeddings.npz")
+    index = MemoryEmbeddingIndex(lambda: list(docs.items()), path=path)
+    index.sync()
+    assert index.save() and not index.save()  # Unchanged indexes are not rewritten
+
+    docs["m3"] = "a completely new memory about stars"
+    docs["m99"] = "brand new memory"
+    del docs["m4"]
+    reloaded = MemoryEmbeddingIndex(lambda: list(docs.items()), path=path)
+    assert reloaded.load()
+    reloaded.sync()
+
+    assert reloaded.stats["rows_embedded"] == 2
+    assert "m4" not in reloaded and len(reloaded) == 50
+    assert reloaded.search("completely new memory about stars", 1)[0][0] == "m3"
+
+
+def test_ivf_matches_exact_when_probing_every_list(monkeypatch):
+    monkeypatch.setattr(memory_embedding_index, "IVF_MIN_ROWS", 100)
+    docs = list(corpus(800).items())
+    exact = MemoryEmbeddingIndex(lambda: docs, backend="exact")
+    ivf = MemoryEmbeddingIndex(lambda: docs, backend="ivf", nlist=16, nprobe=16)
+
+    for query in ["guitar music", "rain weather coffee", "space stars ocean dream"]:
+        assert ivf.search(query, 10) == exact.search(query, 10)
+    assert ivf.get_stats()["trained"]
+
+    # Rows added after training are searched from the unbucketed tail
+    ivf.backend.nprobe = 2
+    ivf.add("new", "guitar studio guitar studio")
+    assert ivf.search("guitar studio guitar studio", 1)[0][0] == "new"
+
+
+def test_lazy_index_embeds_on_first_query_and_saves_at_exit(tmp_path):
+    docs = corpus(20)
+    lazy = MemoryEmbeddingIndex(lambda: list(docs.items()), eager=False)
+    docs["new"] = "guitar studio guitar studio"
+    lazy.add("new", docs["new"])
+    lazy.remove("m0")
+    assert lazy.stats["rows_embedded"] == 0 and not lazy.save()
+
+    assert lazy.search("guitar studio guitar studio", 1)[0][0] == "new"
+    assert lazy.stats["rows_embedded"] == 21 and lazy.stats["syncs"] == 1
+
+    path = tmp_path / "memory.embeddings.npz"
+    index = MemoryEmbeddingIndex(lambda: list(docs.items()), path=str(path))
+    index.add("extra", "rain and weather")
+    assert not path.exists()
+    assert memory_embedding_index.save_all() >= 1 and path.exists()
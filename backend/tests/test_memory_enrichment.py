@@ -0,0 +1,162 @@
+"""
+Unit tests for the bounded background memory enrichment queue.
+"""
+import sys
+import os
+import threading
+
+# Add backend to path so we can import the enrichment module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from memory_enrichment import EnrichmentQueue
+
+
+class RecordingEnrich:
+    """enrich_fn that records the items and threads it ran on, and can block or fail"""
+
+    def __init__(self, fail_on=None):
+        self.items = []
+        self.threads = []
+        self.fail_on = fail_on
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, item):
+        self.release.wait(5)
+        if item == self.fail_on:
+            raise ValueError("analysis failed")
+        self.items.append(item)
+        self.threads.append(threading.current_thread())
+
+
+def test_items_are_enriched_in_the_background_and_wait_drains():
+    enrich = RecordingEnrich()
+    enrich.release.clear()
+    queue = EnrichmentQueue(enrich, workers=2, max_pending=8)
+
+    assert all(queue.submit(i) for i in range(5))
+    assert enrich.items == [] and queue.get_stats()["queue_depth"] == 5
+    assert not queue.wait(timeout=0.05)
+
+    enrich.release.set()
+    assert queue.wait(timeout=5)
+    assert sorted(enrich.items) == [0, 1, 2, 3, 4]
+    assert threading.current_thread() not in enrich.threads
+    stats = queue.get_stats()
+    assert stats["completed"] == 5 and stats["inline"] == 0 and stats["queue_depth"] == 0
+    queue.stop()
+
+
+def test_a_full_queue_pushes_back_by_enriching_on_the_caller():
+    enrich = RecordingEnrich()
+    enrich.release.clear()
+    queue = EnrichmentQueue(enrich, workers=1, max_pending=2, block_timeout=0.01)
+    queue.submit("a")
+    queue.submit("b")
+
+    caller = threading.Thread(target=lambda: queue.submit("c"))
+    caller.start()
+    caller.join(0.2)
+    assert caller.is_alive()                            # Blocked behind the full queue, then enriching itself
+    enrich.release.set()
+    caller.join(5)
+
+    assert queue.wait(timeout=5)
+    assert sorted(enrich.items) == ["a", "b", "c"]
+    assert enrich.threads[enrich.items.index("c")] is caller
+    assert queue.get_stats()["inline"] == 1
+    queue.stop()
+
+
+def test_failures_are_counted_and_stopped_queues_run_inline():
+    enrich = RecordingEnrich(fail_on="bad")
+    queue = EnrichmentQueue(enrich, workers=1, max_pending=4)
+    queue.submit("bad")
+    queue.submit("good")
+    assert queue.stop(timeout=5)
+    assert enrich.items == ["good"] and queue.get_stats()["failed"] == 1
+
+    assert queue.submit("late") is False
+    assert enrich.items[-1] == "late" and enrich.threads[-1] is threading.current_thread()
+    assert not queue.get_stats()["running"]
+
+
+def make_memory_system(tmp_path, monkeypatch, **kwargs):
+    monkeypatch.chdir(tmp_path)
+    import memory_system
+    monkeypatch.setattr(memory_system, "REAL_TIME_AVAILABLE", False)
+    return memory_system.QuantumEnhancedMemorySystem(memory_file=str(tmp_path / "memory.json"), **kwargs)
+
+
+def test_memories_paged_out_before_enrichment_are_still_enriched(tmp_path, monkeypatch):
+    system = make_memory_system(tmp_path, monkeypatch, storage_backend="sqlite")
+    system.storage.hot_size = 4   # Records are decoded afresh once they drop out of the LRU
+    ids = [system.add_episodic_memory(f"I love playing guitar {i}", "Music is great", "joy") for i in range(20)]
+    system.save_memory()
+    assert system.wait_for_enrichment(timeout=30)
+
+    memories = [system.get_memory(memory_id) for memory_id in ids]
+    assert not [m for m in memories if m.get("enrichment_pending")]
+    assert all(m["sentiment"] != "neutral" or m["key_themes"] for m in memories)
+    assert system.retrieve_relevant_memories("playing guitar", limit=5)
+
+
+def test_a_failed_analysis_still_finishes_and_indexes_the_memory(tmp_path, monkeypatch):
+    system = make_memory_system(tmp_path, monkeypatch)
+
+    analyze = system.text_analyzer.analyze
+
+    def broken(text):
+        if "tides" in text:
+            raise RuntimeError("analyzer crashed")
+        return analyze(text)
+
+    monkeypatch.setattr(system.text_analyzer, "analyze", broken)
+    memory_id = system.add_episodic_memory("tell me about the ocean tides", "They follow the moon", "curious")
+    assert system.wait_for_enrichment(timeout=30)
+
+    memory = system.get_memory(memory_id)
+    assert not memory.get("enrichment_pending")
+    assert memory["sentiment"] == "neutral" and memory["key_themes"] == []   # Placeholders kept
+    assert [m["id"] for m in system.retrieve_relevant_memories("the ocean", limit=1)] == [memory_id]
+
+
+def test_chat_writes_do_not_wait_for_entanglement_and_reflection(tmp_path, monkeypatch):
+    system = make_memory_system(tmp_path, monkeypatch)
+    entered, release = threading.Event(), threading.Event()
+    entangle = system._create_quantum_entanglements
+
+    def slow_entangle(memory):
+        entered.set()
+        release.wait(5)
+        entangle(memory)
+
+    monkeypatch.setattr(system, "_create_quantum_entanglements", slow_entangle)
+    system.add_episodic_memory("first message about the garden", "Lovely", "joy")
+    assert entered.wait(5)
+
+    writer = threading.Thread(target=system.add_episodic_memory, args=("second message", "Sure", "joy"))
+    writer.start()
+    writer.join(2)
+    assert not writer.is_alive()           # Recorded while the first enrichment is still entangling
+    release.set()
+    assert system.wait_for_enrichment(timeout=30)
+
+
+def test_touch_memory_moves_the_fingerprint_of_rewritten_text(tmp_path, monkeypatch):
+    system = make_memory_system(tmp_path, monkeypatch)
+    memory_id = system.add_episodic_memory("please tell me about the ocean tides", "They follow the moon", "curious")
+    assert system.wait_for_enrichment(timeout=30)
+    changes = []
+    system.change_listeners.append(lambda before, after: changes.append((before, after)))
+
+    memory = system.get_memory(memory_id)
+    previous = dict(memory)
+    memory["user_input"] = "ocean tides"   # Compressed in place, as RobotoSAI does
+    system.touch_memory(memory, previous)
+
+    old = system._generate_fingerprint("please tell me about the ocean tides", "They follow the moon")
+    assert system.get_memory_id_by_fingerprint(old) is None
+    assert system.get_memory_id_by_fingerprint(system._generate_fingerprint("ocean tides", "They follow the moon")) == memory_id
+    assert system.get_memory(memory_id) is memory and changes == [(previous, memory)]
+    assert system.add_episodic_memory("ocean tides", "They follow the moon", "curious") == memory_id   # Deduplicated
@@ -0,0 +1,137 @@
+"""
+Unit tests for the columnar memory feature store used by vectorized scoring.
+"""
+import sys
+import os
+
+import numpy as np
+
+# Add backend to path so we can import the store module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from memory_feature_store import MemoryFeatureStore, timestamp_to_epoch
+from memory_tfidf_index import IncrementalTfidfIndex
+
+
+def make_memory(memory_id, themes=(), user="Roberto", importance=0.5, timestamp="2026-03-05T10:00:00+00:00"):
+    return {
+        "id": memory_id,
+        "timestamp": timestamp,
+        "user_name": user,
+        "importance": importance,
+        "emotional_intensity": 0.25,
+        "sentiment": "positive",
+        "emotion": "joy",
+        "key_themes": list(themes),
+    }
+
+
+def test_slots_are_stable_and_refreshed_in_place():
+    store = MemoryFeatureStore(capacity=2)
+    slots = [store.add(make_memory(f"m{i}")) for i in range(3000)]
+    assert slots == list(range(3000))
+
+    assert store.add(make_memory("m7", importance=1.5)) == 7
+    assert store.importance[7] == 1.5
+    assert store.epoch[7] == timestamp_to_epoch("2026-03-05T10:00:00+00:00")
+
+    assert store.remove("m7")
+    assert not store.alive[7] and store.id_of(7) is None and "m7" not in store
+    assert store.add(make_memory("new")) == 3000
+
+
+def test_theme_overlap_counts_shared_themes_and_sync_tombstones():
+    store = MemoryFeatureStore()
+    store.sync([
+        make_memory("a", themes=["music", "family", "music"]),
+        make_memory("b", themes=["weather"]),
+        make_memory("c"),
+    ])
+    slots = np.array([store.slot_of(m) for m in ("a", "b", "c")])
+
+    assert store.theme_overlap(slots, ["music", "family", "travel"]).tolist() == [2, 0, 0]
+    assert store.theme_overlap(slots, ["unknown"]).tolist() == [0, 0, 0]
+    assert store.code("user", "Roberto") >= 0 and store.code("user", "Guest") == -1
+
+    store.sync([make_memory("a"), make_memory("c")])
+    assert len(store) == 2 and store.slot_of("b") == -1
+    assert store.theme_overlap(slots[:1], ["music"]).tolist() == [0]
+
+
+def test_tfidf_match_returns_feature_slots_as_keys():
+    store = MemoryFeatureStore()
+    texts = {"a": "guitar music studio", "b": "rain and weather", "c": "music lessons"}
+    index = IncrementalTfidfIndex(
+        lambda: [(memory_id, text, store.add(make_memory(memory_id))) for memory_id, text in texts.items()]
+    )
+    index.rebuild()
+
+    match = index.match("music", min_score=0.01)
+    assert {store.id_of(int(key)) for key in match.keys} == {"a", "c"}
+    assert (match.scores > 0.01).all() and match.filtered
+
+    # A third of the corpus is too broad to gather, so the caller applies the filter
+    scoped = index.match("music", candidate_ids={"c"})
+    assert not scoped.filtered and len(scoped.keys) == 2
+
+
+def test_compaction_reclaims_tombstones_and_index_keys_follow():
+    from memory_embedding_index import MemoryEmbeddingIndex
+
+    store = MemoryFeatureStore()
+    texts = {f"m{i}": f"{['guitar', 'ocean', 'coffee'][i % 3]} note {i}" for i in range(200)}
+    for memory_id in texts:
+        store.add(make_memory(memory_id, themes=[texts[memory_id].split()[0]]))
+    documents = lambda: [(memory_id, text, store.slot_of(memory_id)) for memory_id, text in texts.items()]
+    index, embeddings = IncrementalTfidfIndex(documents), MemoryEmbeddingIndex(documents)
+    index.rebuild()
+    embeddings.sync()
+
+    for i in range(0, 200, 4):
+        store.remove(f"m{i}")
+        index.remove(f"m{i}")
+        embeddings.remove(f"m{i}")
+        del texts[f"m{i}"]
+    assert not store.needs_compaction()   # A quarter of the slots
+    for i in range(1, 200, 4):
+        store.remove(f"m{i}")
+        index.remove(f"m{i}")
+        embeddings.remove(f"m{i}")
+        del texts[f"m{i}"]
+    assert store.needs_compaction()
+
+    assert store.compact() == 100 and not store.needs_compaction()
+    assert len(store) == 100 and store.get_stats()["total_slots"] == 100
+    assert store.slot_of("m2") == 0 and store.id_of(0) == "m2" and store.id_of(100) is None
+    assert store.theme_ids[store.slot_of("m3")][0] == store.code("theme", "guitar")
+    index.remap_keys(store.slot_of)
+    embeddings.remap_keys(store.slot_of)
+
+    match = index.match("ocean note", min_score=0.01)
+    assert {store.id_of(int(key)) for key in match.keys} >= {m for m, text in texts.items() if "ocean" in text}
+    assert all(store.id_of(int(key)) in texts for key in match.keys)
+    nearest = embeddings.match(texts["m7"], limit=1)
+    assert store.id_of(int(nearest.keys[0])) == "m7"
+
+
+def test_memory_system_compacts_slots_as_memories_are_removed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MEMORY_ASYNC_ENRICHMENT", "0")
+    import memory_system
+    monkeypatch.setattr(memory_system, "REAL_TIME_AVAILABLE", False)
+    system = memory_system.QuantumEnhancedMemorySystem(memory_file=str(tmp_path / "memory.json"),
+                                                       retrieval_backend="embedding")
+    system.text_index.refit_min_docs = 10 ** 6   # Keep the rows (and keys) from before the removals
+    topics = ["guitar", "ocean", "coffee", "chess"]
+    ids = [system.add_episodic_memory(f"tell me about {topics[i % 4]} number {i}", f"reply {i}", "joy")
+           for i in range(160)]
+    assert system.retrieve_relevant_memories("chess", limit=1)   # Fits the TF-IDF index
+    for memory_id in ids[:120]:
+        system.remove_memory(memory_id)
+
+    stats = system.feature_store.get_stats()
+    assert stats["compactions"] >= 1 and stats["total_slots"] < 120 and stats["live_slots"] == 40
+    for backend in ("tfidf", "embedding"):
+        hits = system.retrieve_relevant_memories("tell me about chess number 159", limit=3, backend=backend)
+        assert hits and hits[0]["id"] == ids[159]
+        assert all(hit["id"] in ids[120:] and hit["relevance_score"] > 0 for hit in hits)
@@ -0,0 +1,114 @@
+"""
+Unit tests for the inverted memory indexes used for candidate pruning.
+"""
+import sys
+import os
+from datetime import datetime, timezone
+
+# Add backend to path so we can import the index module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from memory_inverted_index import new_memory_index, index_memory, unindex_memory, select_candidate_ids
+
+
+def make_memory(memory_id, timestamp, user="Roberto", emotion="joy", themes=()):
+    return {
+        "id": memory_id,
+        "timestamp": timestamp,
+        "user_name": user,
+        "emotion": emotion,
+        "key_themes": list(themes),
+        "user_input": "guitar practice session",
+        "roboto_response": "sounds wonderful",
+    }
+
+
+def build(memories):
+    index = new_memory_index()
+    for memory in memories:
+        index_memory(index, memory)
+    return index, {m["id"]: m for m in memories}
+
+
+def test_indexing_is_incremental_and_idempotent():
+    index = new_memory_index()
+    memory = make_memory("a", "2026-03-05T10:00:00+00:00", themes=["music"])
+
+    added = index_memory(index, memory)
+    assert added > 0
+    assert index_memory(index, memory) == 0
+    assert index["temporal_index"]["2026-03"] == {"a"}
+    assert index["theme_index"]["music"] == {"a"}
+
+
+def test_scopes_intersect_and_unknown_user_does_not_restrict():
+    index, _ = build([
+        make_memory("a", "2026-01-10T00:00:00+00:00", user="Roberto", emotion="joy"),
+        make_memory("b", "2026-02-10T00:00:00+00:00", user="Roberto", emotion="sadness"),
+        make_memory("c", "2026-02-20T00:00:00+00:00", user="Guest", emotion="joy"),
+    ])
+
+    assert select_candidate_ids(index) is None
+    assert select_candidate_ids(index, user_name="Nobody") is None
+    assert select_candidate_ids(index, user_name="Roberto") == {"a", "b"}
+    assert select_candidate_ids(index, user_name="Roberto", emotions=["joy"]) == {"a"}
+    assert select_candidate_ids(index, emotions=["anger"]) == set()
+
+
+def test_time_range_filters_partial_months_exactly():
+    index, by_id = build([
+        make_memory("jan", "2026-01-31T12:00:00+00:00"),
+        make_memory("feb-early", "2026-02-02T00:00:00+00:00"),
+        make_memory("feb-late", "2026-02-25T00:00:00+00:00"),
+        make_memory("mar", "2026-03-15T00:00:00+00:00"),
+    ])
+    start = datetime(2026, 2, 10, tzinfo=timezone.utc)
+
+    assert select_candidate_ids(index, time_range=(start, None), get_memory=by_id.get) == {"feb-late", "mar"}
+    assert select_candidate_ids(
+        index, time_range=(None, datetime(2026, 2, 5)), get_memory=by_id.get
+    ) == {"jan", "feb-early"}
+    assert select_candidate_ids(
+        index, time_range=(datetime(2026, 3, 1), None), get_memory=by_id.get
+    ) == {"mar"}
+
+
+def test_unindex_drops_every_posting_and_empty_keys():
+    index = new_memory_index()
+    raw = make_memory("a", "2026-03-05T10:00:00+00:00")
+    enriched = dict(raw, key_themes=["music"])
+    index_memory(index, raw)                      # Indexed when stored, again once enriched
+    index_memory(index, enriched)
+
+    assert unindex_memory(index, enriched) > 0
+    assert all(not keys for keys in index.values())
+
+
+def test_edited_and_removed_memories_leave_the_candidate_set(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MEMORY_ASYNC_ENRICHMENT", "0")
+    import memory_system
+    monkeypatch.setattr(memory_system, "REAL_TIME_AVAILABLE", False)
+    system = memory_system.QuantumEnhancedMemorySystem(memory_file=str(tmp_path / "memory.json"))
+    index = new_memory_index()
+
+    def reindex(before, after):                   # As RobotoSAI._reindex_changed_memory
+        if before is not None:
+            unindex_memory(index, before)
+        if after is not None:
+            index_memory(index, after)
+
+    system.change_listeners.append(reindex)
+    kept = system.add_episodic_memory("I feel happy about my garden", "Wonderful", "joy")
+    edited = system.add_episodic_memory("I feel happy about the guitar", "Great", "joy")
+    removed = system.add_episodic_memory("I am happy today", "Nice", "joy")
+    for memory_id in (kept, edited, removed):
+        index_memory(index, system.get_memory(memory_id))
+    assert select_candidate_ids(index, emotions=["joy"]) == {kept, edited, removed}
+
+    system.edit_memory(edited, {"emotion": "sadness", "roboto_response": "What a lovely orchestra"})
+    system.remove_memory(removed)
+    assert select_candidate_ids(index, emotions=["joy"]) == {kept}
+    assert select_candidate_ids(index, emotions=["sadness"]) == {edited}
+    # Postings of the replaced text go; the analyzed themes stay until it is re-analyzed
+    assert "great" not in index["keyword_index"] and index["keyword_index"]["orchestra"] == {edited}
@@ -0,0 +1,119 @@
+"""
+Unit tests for the append-only memory journal and its torn-write recovery.
+"""
+import sys
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+# Add backend to path so we can import the journal module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from memory_journal import HEADER, MemoryJournal, encode_record
+
+
+def write_snapshot(path):
+    def write(state):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+    return write
+
+
+def populated_journal(path):
+    journal = MemoryJournal(path, fsync=False)
+    for i in range(5):
+        journal.record("upsert", "episodic_memories", f"m{i}", {"id": f"m{i}", "text": f"memory {i}"})
+    journal.record("append", "emotional_patterns", "roberto", {"emotion": "joy"})
+    journal.record("put", "quantum_entanglements", "m1", {"entangled_memories": [["m0", 0.7]]})
+    journal.flush({"user_profiles": {"roberto": {"interaction_count": 5}}})
+    return journal
+
+
+def test_replay_restores_state_and_coalesces_changes(tmp_path):
+    path = str(tmp_path / "memory.json")
+    journal = populated_journal(path)
+
+    memory = {"id": "m2", "text": "first edit"}
+    journal.record("upsert", "episodic_memories", "m2", memory)
+    memory["text"] = "second edit"                      # Coalesced: one record per change set
+    journal.record("upsert", "episodic_memories", "m2", memory)
+    journal.record("delete", "episodic_memories", "m0")
+    journal.record("delete", "episodic_memories", "m3")
+    journal.record("upsert", "episodic_memories", "m3", {"id": "m3", "text": "re-added"})
+    journal.record("append", "self_reflections", value={"reflection": "insight"})
+    assert journal.flush({"user_profiles": {"roberto": {"interaction_count": 5}}}) > 0
+    assert journal.get_stats()["records_written"] == 8 + 5  # Unchanged profile section not rewritten
+    journal.close()
+
+    state = MemoryJournal(path).load()
+    assert [m["id"] for m in state["episodic_memories"]] == ["m1", "m2", "m4", "m3"]
+    assert state["episodic_memories"][1]["text"] == "second edit"
+    assert state["emotional_patterns"] == {"roberto": [{"emotion": "joy"}]}
+    assert state["quantum_entanglements"]["m1"]["entangled_memories"] == [["m0", 0.7]]
+    assert state["self_reflections"] == [{"reflection": "insight"}]
+    assert state["user_profiles"]["roberto"]["interaction_count"] == 5
+
+
+def test_torn_and_corrupt_records_are_truncated(tmp_path):
+    path = str(tmp_path / "memory.json")
+    journal = populated_journal(path)
+    journal.close()
+    segment = journal.segment_path(journal.seq)
+    intact = os.path.getsize(segment)
+
+    # Crash mid-append: the header promises more payload than was written
+    torn = encode_record({"op": "upsert", "section": "episodic_memories", "key": "m9",
+                          "value": {"id": "m9", "text": "lost"}})
+    with open(segment, "ab") as f:
+        f.write(torn[:HEADER.size + 5])
+
+    reloaded = MemoryJournal(path, fsync=False)
+    state = reloaded.load()
+    assert len(state["episodic_memories"]) == 5
+    assert os.path.getsize(segment) == intact
+    assert reloaded.get_stats()["torn_segments"] == 1
+
+    # Appends after recovery land on a clean record boundary
+    reloaded.record("upsert", "episodic_memories", "m9", {"id": "m9", "text": "kept"})
+    reloaded.flush()
+    reloaded.close()
+    with open(segment, "r+b") as f:          # Flip a payload byte of the first record
+        f.seek(HEADER.size + 2)
+        byte = f.read(1)
+        f.seek(HEADER.size + 2)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    assert MemoryJournal(path).load().get("episodic_memories", []) == []
+
+
+def test_compaction_writes_snapshot_and_drops_segments(tmp_path):
+    path = str(tmp_path / "memory.json")
+    journal = populated_journal(path)
+    state = journal.load()
+    assert not journal.needs_compaction()
+    journal.request_snapshot()
+    assert journal.needs_compaction()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert journal.compact(lambda: dict(state), None, write_snapshot(path), executor=executor)
+        journal.record("delete", "episodic_memories", "m4")    # Lands in the new segment
+        journal.flush()
+    assert journal.segments() == [1]
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["journal_seq"] == 1
+
+    reloaded = MemoryJournal(path).load()
+    assert [m["id"] for m in reloaded["episodic_memories"]] == ["m0", "m1", "m2", "m3"]
+    assert "journal_seq" not in reloaded
+
+
+def test_backup_replay_requires_contiguous_segments(tmp_path):
+    path = str(tmp_path / "memory.json")
+    journal = populated_journal(path)          # Segment 0
+    journal.compact(lambda: {"episodic_memories": []}, None, write_snapshot(path))
+    journal.record("delete", "episodic_memories", "m0")
+    journal.flush()                            # Segment 1
+
+    backup = {"episodic_memories": [{"id": "m0"}, {"id": "m1"}], "journal_seq": 1}
+    assert MemoryJournal(path).replay(dict(backup))["episodic_memories"] == [{"id": "m1"}]
+    older = {"episodic_memories": [{"id": "m0"}], "journal_seq": 0}   # Segment 0 was compacted away
+    assert MemoryJournal(path).replay(older)["episodic_memories"] == [{"id": "m0"}]
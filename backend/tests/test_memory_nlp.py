@@ -0,0 +1,88 @@
+"""
+Unit tests for the single-parse memory text analyzer and its cache.
+"""
+import sys
+import os
+
+# Add backend to path so we can import the analyzer module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import memory_nlp
+from memory_nlp import EMPTY_ANALYSIS, TextAnalyzer
+
+
+class FakeBlob:
+    """Counts parses; sentiment is fixed, noun phrases are the capitalized words"""
+    created = 0
+
+    class Sentiment:
+        polarity = 0.5
+        subjectivity = 0.25
+
+    def __init__(self, text):
+        FakeBlob.created += 1
+        self.text = text
+        self.sentiment = FakeBlob.Sentiment()
+
+    @property
+    def noun_phrases(self):
+        return [word.strip(".,!") for word in self.text.split() if word[0].isupper()]
+
+
+class MissingCorpus(Exception):
+    pass
+
+
+def test_one_parse_feeds_every_field_and_repeats_hit_the_cache(monkeypatch):
+    monkeypatch.setattr(memory_nlp, "TEXTBLOB_AVAILABLE", True)
+    monkeypatch.setattr(memory_nlp, "TextBlob", FakeBlob, raising=False)
+    monkeypatch.setattr(TextAnalyzer, "_noun_phrases_missing", False)
+    FakeBlob.created = 0
+    analyzer = TextAnalyzer(cache_size=2)
+
+    analysis = analyzer.analyze("we recorded Music in Houston with Music friends")
+    assert FakeBlob.created == 1
+    assert analysis.sentiment == "positive" and analysis.intensity == 0.75
+    assert analysis.themes == ("music", "houston") and analysis.noun_phrases == ("Music", "Houston", "Music")
+    assert analysis.tokens == tuple("we recorded Music in Houston with Music friends".split())
+
+    assert analyzer.analyze("we recorded Music in Houston with Music friends") is analysis
+    analyzer.analyze("second text")
+    analyzer.analyze("third text")                      # Evicts the first analysis
+    analyzer.analyze("we recorded Music in Houston with Music friends")
+    assert FakeBlob.created == 4
+    assert analyzer.get_stats()["hits"] == 1 and analyzer.get_stats()["evictions"] == 2
+    assert analyzer.analyze("") is EMPTY_ANALYSIS and analyzer.analyze(None) is EMPTY_ANALYSIS
+
+
+def test_missing_noun_phrase_corpus_is_detected_once(monkeypatch):
+    class NoCorpusBlob(FakeBlob):
+        attempts = 0
+
+        @property
+        def noun_phrases(self):
+            NoCorpusBlob.attempts += 1
+            raise MissingCorpus()
+
+    monkeypatch.setattr(memory_nlp, "TEXTBLOB_AVAILABLE", True)
+    monkeypatch.setattr(memory_nlp, "TextBlob", NoCorpusBlob, raising=False)
+    monkeypatch.setattr(memory_nlp, "MissingCorpusError", MissingCorpus, raising=False)
+    monkeypatch.setattr(TextAnalyzer, "_noun_phrases_missing", False)
+    analyzer = TextAnalyzer(cache_size=0)
+
+    first = analyzer.analyze("the guitar sounds great with the studio monitors")
+    analyzer.analyze("another song about the ocean")
+    assert NoCorpusBlob.attempts == 1
+    assert first.themes == ("guitar", "sounds", "great", "studio", "monitors")
+    assert first.sentiment == "positive"                # Sentiment still comes from TextBlob
+
+
+def test_keyword_fallback_matches_former_heuristics(monkeypatch):
+    monkeypatch.setattr(memory_nlp, "TEXTBLOB_AVAILABLE", False)
+    analyzer = TextAnalyzer()
+    analysis = analyzer.analyze("I am extremely worried and sad, this is AWFUL!!!")
+    assert analysis.sentiment == "negative" and analysis.polarity is None
+    # 0.5 + extremely + worried + "!", "!!", "!!!"
+    assert abs(analysis.intensity - 1.0) < 1e-9
+    assert analyzer.analyze("I love this").intensity == 0.5
+    assert analyzer.analyze("Happy happy music from Houston").themes == ("happy", "music", "houston")
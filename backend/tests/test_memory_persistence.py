@@ -0,0 +1,107 @@
+"""
+Unit tests for the write-behind memory persistence worker.
+"""
+import sys
+import os
+import gc
+import threading
+import time
+
+# Add backend to path so we can import the persistence module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import memory_persistence
+from memory_journal import MemoryJournal
+from memory_persistence import PersistenceWorker, shutdown_all
+
+
+class RecordingSave:
+    """save_fn that records its calls and can be told to fail or block"""
+
+    def __init__(self, fail=0):
+        self.calls = 0
+        self.fail = fail
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self):
+        self.release.wait(5)
+        self.calls += 1
+        if self.fail:
+            self.fail -= 1
+            raise OSError("disk full")
+        return True
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_notifications_coalesce_into_threshold_saves():
+    save = RecordingSave()
+    save.release.clear()
+    worker = PersistenceWorker(save, threshold=3, interval=60)
+    for _ in range(3):
+        assert worker.notify()
+    wait_for(lambda: worker.get_stats()["saving"])
+    for _ in range(4):                                  # Arrive while the first save is running
+        worker.notify()
+    save.release.set()
+    wait_for(lambda: worker.get_stats()["saves"] == 2)
+    stats = worker.get_stats()
+    assert save.calls == 2 and stats["queue_depth"] == 0 and stats["notifications"] == 7
+
+    worker.notify()                                     # Below the threshold: waits for the interval
+    time.sleep(0.05)
+    assert save.calls == 2 and worker.get_stats()["queue_depth"] == 1
+    assert worker.flush(timeout=5) and save.calls == 3
+    assert worker.get_stats()["last_lag_seconds"] >= 0.05
+    worker.stop()
+
+
+def test_interval_and_urgent_changes_trigger_saves():
+    save = RecordingSave()
+    worker = PersistenceWorker(save, threshold=100, interval=0.05)
+    worker.notify()
+    wait_for(lambda: save.calls == 1)
+
+    slow = PersistenceWorker(RecordingSave(), threshold=100, interval=60)
+    slow.notify(urgent=True)
+    wait_for(lambda: slow.save_fn.calls == 1)
+    worker.stop()
+    slow.stop()
+
+
+def test_failed_saves_are_retried_and_counted(monkeypatch):
+    monkeypatch.setattr(memory_persistence, "RETRY_SECONDS", 0.01)
+    save = RecordingSave(fail=2)
+    worker = PersistenceWorker(save, threshold=1, interval=60)
+    worker.notify()
+    wait_for(lambda: worker.get_stats()["saves"] == 1)
+    stats = worker.get_stats()
+    assert save.calls == 3 and stats["errors"] == 2 and stats["queue_depth"] == 0
+
+    assert PersistenceWorker(lambda: False).flush() is True         # Nothing notified
+    refusing = PersistenceWorker(lambda: False, threshold=100, interval=60)
+    refusing.notify()
+    assert refusing.flush(timeout=1) is False and refusing.get_stats()["queue_depth"] == 1
+    worker.stop()
+    assert refusing.stop(timeout=1) is False
+    del refusing
+    gc.collect()
+
+
+def test_shutdown_flushes_journal_changes_and_hands_back_later_saves(tmp_path):
+    journal = MemoryJournal(str(tmp_path / "memory.json"), fsync=False)
+    worker = PersistenceWorker(lambda: journal.flush() >= 0, threshold=100, interval=60)
+    memory = {"id": "m1", "text": "before"}
+    journal.record("upsert", "episodic_memories", "m1", memory)
+    worker.notify()
+    memory["text"] = "after the change was recorded"    # The journal keeps the recorded copy
+
+    assert shutdown_all(timeout=5)
+    assert journal.load()["episodic_memories"] == [{"id": "m1", "text": "before"}]
+    assert not worker.get_stats()["running"] and worker.notify() is False
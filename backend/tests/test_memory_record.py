@@ -0,0 +1,86 @@
+"""
+Unit tests for the compact, dict-compatible episodic memory record.
+"""
+import sys
+import os
+import copy
+import json
+import pickle
+
+# Add backend to path so we can import the record module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from memory_journal import _json_default
+from memory_record import MemoryRecord, compact_memory_list
+
+
+def make_memory(i=0, **overrides):
+    memory = {
+        "id": f"m{i}",
+        "timestamp": "2025-03-01T12:30:45.123456+00:00",
+        "user_input": f"question {i}",
+        "roboto_response": f"answer {i}",
+        "emotion": "joy",
+        "user_name": "Roberto Villarreal Martinez",
+        "importance": 0.7,
+        "sentiment": "positive",
+        "key_themes": ["music", "family"],
+        "emotional_intensity": 0.4,
+        "quantum_state": {"superposition": 12, "coherence": 0.5, "entanglement_strength": 0.95, "stability": 1.0},
+        "contextual_data": {},
+        "fractal_dimension": 1.4,
+        "db_id": 7,
+    }
+    memory.update(overrides)
+    return memory
+
+
+def test_record_round_trips_as_a_dict():
+    plain = make_memory()
+    record = MemoryRecord(plain)
+    assert record == plain and dict(record) == plain and list(record) == list(plain)
+    assert record._timestamp == 1740832245123456 and record._extra == {"db_id": 7}
+    assert json.loads(json.dumps({"episodic_memories": [record]}, default=_json_default)) == {"episodic_memories": [plain]}
+    assert pickle.loads(pickle.dumps(record)) == plain and copy.deepcopy(record) == plain
+    assert type(record.copy()) is dict
+
+    other = MemoryRecord(make_memory(1))
+    assert record["emotion"] is other["emotion"]            # Interned vocabulary strings
+    assert record._key_themes is other._key_themes          # One tuple per theme combination
+
+
+def test_values_a_field_cannot_encode_are_kept_verbatim():
+    odd = {
+        "timestamp": "2025-03-01T12:30:45Z",                # Would not format back identically
+        "emotion": None,
+        "key_themes": ("music",),
+        "quantum_state": {"superposition": 1},
+    }
+    record = MemoryRecord(make_memory(**odd))
+    for key, value in odd.items():
+        assert record[key] == value and type(record[key]) is type(value)
+    assert set(record._extra) == set(odd) | {"db_id"}
+
+    record["timestamp"] = "2025-03-01T00:00:00+00:00"       # Encodable again: moves back into its slot
+    assert "timestamp" not in record._extra and record["timestamp"] == "2025-03-01T00:00:00+00:00"
+    naive = MemoryRecord(timestamp="2025-03-01T00:00:00")
+    assert naive["timestamp"] == "2025-03-01T00:00:00" and naive._extra == {"timestamp": "2025-03-01T00:00:00"}
+
+
+def test_mapping_mutation_matches_dict():
+    record = MemoryRecord(make_memory())
+    record["importance"] = 2.0
+    record["protection_level"] = "MAXIMUM"
+    del record["contextual_data"]
+    assert record["importance"] == 2.0 and record.get("protection_level") == "MAXIMUM"
+    assert "contextual_data" not in record and record.get("contextual_data", "gone") == "gone"
+    assert len(record) == len(make_memory())
+
+    record.clear()
+    assert len(record) == 0 and dict(record) == {}
+    record.update({"id": "m2", "emotion": "sadness"})
+    assert record == {"id": "m2", "emotion": "sadness"}
+
+    memories = [make_memory(i) for i in range(3)]
+    assert all(type(m) is MemoryRecord for m in compact_memory_list(memories))
+    assert compact_memory_list(memories)[1] is memories[1]
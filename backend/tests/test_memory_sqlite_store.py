@@ -0,0 +1,125 @@
+"""
+Unit tests for the SQLite memory store and its lazily paged memory list.
+"""
+import sys
+import os
+import json
+
+# Add backend to path so we can import the store module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from memory_sqlite_store import SQLiteMemoryStore
+
+
+def fingerprint(memory):
+    return memory.get("user_input")
+
+
+def make_memory(i):
+    return {"id": f"m{i}", "user_input": f"question {i}", "roboto_response": f"answer {i}"}
+
+
+def open_store(tmp_path, **kwargs):
+    store = SQLiteMemoryStore(str(tmp_path / "memory.sqlite3"), legacy_path=str(tmp_path / "memory.json"),
+                              fingerprint_of=fingerprint, **kwargs)
+    return store, store.load()
+
+
+def test_json_snapshot_is_imported_once(tmp_path):
+    state = {
+        "episodic_memories": [make_memory(i) for i in range(20)],
+        "emotional_patterns": {"roberto": [{"emotion": "joy", "n": i} for i in range(5)]},
+        "self_reflections": [{"reflection": "insight"}],
+        "quantum_entanglements": {"m1": {"entangled_memories": [["m0", 0.7]]}},
+        "user_profiles": {"roberto": {"interaction_count": 5}},
+        "fractal_patterns": {"dimension": 1.3},
+    }
+    with open(tmp_path / "memory.json", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+    store, loaded = open_store(tmp_path, recent_appends=3)
+    assert store.stats["imported"] == 20
+    assert [m["id"] for m in loaded["episodic_memories"][-3:]] == ["m17", "m18", "m19"]
+    assert loaded["quantum_entanglements"]["m1"]["entangled_memories"] == [["m0", 0.7]]
+    assert [p["n"] for p in loaded["emotional_patterns"]["roberto"]] == [2, 3, 4]  # Recent tail only
+    assert loaded["user_profiles"] == {"roberto": {"interaction_count": 5}}
+    assert "fractal_patterns" not in loaded
+    store.close()
+
+    store, loaded = open_store(tmp_path)
+    assert store.stats["imported"] == 0 and len(loaded["episodic_memories"]) == 20
+    store.close()
+
+
+def test_paged_list_bounds_decoded_records(tmp_path):
+    store, _ = open_store(tmp_path)
+    store.import_state({"episodic_memories": [make_memory(i) for i in range(3000)]})
+    memories = store.load()["episodic_memories"]
+    store.hot_size = 100
+
+    assert sum(1 for _ in memories) == 3000   # Iteration pages without filling the cache
+    assert len(store._cache) == 0
+    assert memories[1234]["id"] == "m1234" and memories[1234] is memories[1234]
+    assert [m["id"] for m in memories[-2:]] == ["m2998", "m2999"]
+    for i in range(0, 3000, 7):
+        memories[i]
+    assert len(store._cache) <= 100
+    assert memories.index(make_memory(2500)) == 2500 and make_memory(5000) not in memories
+    store.close()
+
+
+def test_recorded_changes_survive_reopen(tmp_path):
+    store, _ = open_store(tmp_path)
+    store.import_state({"episodic_memories": [make_memory(i) for i in range(10)]})
+    state = store.load()
+    memories = state["episodic_memories"]
+
+    added = make_memory(10)
+    memories.append(added)
+    store.record("upsert", "episodic_memories", "m10", added)
+    edited = store.id_index.get("m3")
+    edited["user_input"] = "edited"
+    store.record("upsert", "episodic_memories", "m3", edited)
+    store.fingerprint_index["edited"] = "m3"
+    del memories[memories.index(store.id_index.get("m0"))]
+    store.record("delete", "episodic_memories", "m0")
+    store.record("append", "emotional_patterns", "roberto", {"emotion": "joy"})
+    state["quantum_entanglements"]["m10"] = {"entangled_memories": [["m3", 0.9]]}
+    store.record("put", "quantum_entanglements", "m10", {"entangled_memories": [["m3", 0.9]]})
+
+    # Unflushed changes are visible to lookups
+    assert store.id_index.get("m10") is added and "m0" not in store.id_index
+    assert store.fingerprint_index.get("edited") == "m3"
+    assert store.fingerprint_index.get("question 0") is None
+    store.flush({"user_profiles": {"roberto": {"interaction_count": 6}}})
+    store.close()
+
+    store, state = open_store(tmp_path)
+    assert [m["id"] for m in state["episodic_memories"]] == [f"m{i}" for i in range(1, 11)]
+    assert store.id_index.get("m3")["user_input"] == "edited"
+    assert store.fingerprint_index.get("edited") == "m3"
+    assert state["emotional_patterns"] == {"roberto": [{"emotion": "joy"}]}
+    assert state["quantum_entanglements"]["m10"]["entangled_memories"] == [["m3", 0.9]]
+    assert state["user_profiles"]["roberto"]["interaction_count"] == 6
+    store.close()
+
+
+def test_compaction_rewrites_replaced_memory_list(tmp_path):
+    store, _ = open_store(tmp_path)
+    store.import_state({"episodic_memories": [make_memory(i) for i in range(10)]})
+    memories = store.load()["episodic_memories"]
+
+    assert store.compact(lambda: {"episodic_memories": memories}, None)
+    assert store.memories is memories                  # Nothing replaced, nothing rewritten
+
+    kept = [m for m in memories if int(m["id"][1:]) % 2]
+    store.request_snapshot()
+    assert store.needs_compaction()
+    assert store.compact(lambda: {"episodic_memories": kept}, None)
+    assert not store.needs_compaction()
+    assert [m["id"] for m in store.memories] == ["m1", "m3", "m5", "m7", "m9"]
+    store.close()
+
+    store, state = open_store(tmp_path)
+    assert len(state["episodic_memories"]) == 5 and store.id_index.get("m2") is None
+    store.close()
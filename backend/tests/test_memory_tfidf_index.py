@@ -0,0 +1,94 @@
+"""
+Unit tests for the incremental TF-IDF memory index.
+"""
+import sys
+import os
+
+# Add backend to path so we can import the index module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from memory_tfidf_index import IncrementalTfidfIndex
+
+
+def make_index(docs, **kwargs):
+    return IncrementalTfidfIndex(lambda: list(docs.items()), **kwargs)
+
+
+def test_search_fits_lazily_and_ranks_by_cosine():
+    docs = {
+        "a": "guitar music production in the studio",
+        "b": "weather forecast rain tomorrow",
+        "c": "mixing music tracks and guitar solos",
+    }
+    index = make_index(docs)
+    for memory_id, text in docs.items():
+        index.add(memory_id, text)
+
+    hits = index.search("guitar music", limit=3)
+    ids = [memory_id for memory_id, _ in hits]
+    assert set(ids) == {"a", "c"}
+    assert all(score > 0 for _, score in hits)
+
+
+def test_add_update_and_remove_are_incremental():
+    docs = {"a": "quantum memory systems", "b": "cooking pasta recipes"}
+    index = make_index(docs, refit_min_docs=1000)
+    index.rebuild()
+
+    docs["c"] = "quantum entanglement memory"
+    index.add("c", docs["c"])
+    assert {m for m, _ in index.search("quantum memory")} == {"a", "c"}
+
+    index.remove("a")
+    assert [m for m, _ in index.search("quantum memory")] == ["c"]
+
+    index.update("b", "pasta with quantum sauce")
+    assert "b" in {m for m, _ in index.search("quantum")}
+    assert index.get_stats()["tombstones"] == 2
+    assert len(index) == 2
+
+
+def test_rebuild_compacts_tombstones_and_refits_vocabulary():
+    docs = {"a": "alpha topic", "b": "beta topic"}
+    index = make_index(docs, refit_min_docs=1000)
+    index.rebuild()
+
+    # "gamma" is out of vocabulary until the next refit
+    docs["c"] = "gamma topic"
+    index.add("c", docs["c"])
+    assert index.search("gamma") == []
+
+    del docs["a"]
+    index.remove("a")
+    index.rebuild()
+
+    stats = index.get_stats()
+    assert stats["tombstones"] == 0
+    assert stats["live_rows"] == 2
+    assert [m for m, _ in index.search("gamma")] == ["c"]
+
+
+def test_search_can_be_restricted_to_candidate_ids():
+    docs = {"a": "music studio", "b": "music festival", "c": "music lessons", "d": "cooking"}
+    index = make_index(docs, refit_min_docs=1000)
+    index.rebuild()
+    index.add("e", "music album")  # lives in a tail block
+
+    assert {m for m, _ in index.search("music", candidate_ids={"b", "e", "d", "missing"})} == {"b", "e"}
+    assert index.search("music", candidate_ids=set()) == []
+
+
+def test_an_empty_vocabulary_is_fitted_once_per_batch():
+    docs = {"a": "the and of", "b": "it is to"}
+    index = make_index(docs)
+    for memory_id, text in docs.items():
+        index.add(memory_id, text)
+
+    for _ in range(3):
+        assert index.search("the and") == []
+    assert index.get_stats()["refits"] == 1   # Only stop words: no refit per query
+
+    docs["c"] = "guitar solos"
+    index.add("c", docs["c"])
+    assert [m for m, _ in index.search("guitar")] == ["c"]
+    assert index.get_stats()["refits"] == 2
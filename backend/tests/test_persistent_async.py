@@ -0,0 +1,42 @@
+"""
+Unit tests for the asyncio facade over the persistent memory store.
+"""
+import sys
+import os
+import asyncio
+
+import pytest
+
+# Add backend to path so we can import the async store module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from persistent_async import AsyncPersistentStore
+from persistent_memory_store import PersistentMemoryStore
+
+
+def test_concurrent_writes_share_commits_and_fail_alone(tmp_path):
+    store = PersistentMemoryStore(str(tmp_path / "memory.db"))
+    facade = AsyncPersistentStore(store, max_pending=8, readers=2)
+
+    async def scenario():
+        writes = [facade.astore_conversation(f"question {i}", f"answer {i}") for i in range(40)]
+        writes.append(facade.astore_pattern("broken", {"not json": object()}))
+        results = await asyncio.gather(*writes, return_exceptions=True)
+        recent = await facade.alist_recent_messages(limit=3)
+        count = await facade.aget_conversation_count()
+        row = await facade.aget_conversation_by_fingerprint(recent[0]["fingerprint"])
+        return results, recent, count, row
+
+    results, recent, count, row = asyncio.run(scenario())
+    assert sorted(results[:40]) == list(range(1, 41))
+    assert isinstance(results[40], TypeError)
+    assert count == 40 and len(recent) == 6 and row["user_input"] == recent[0]["message"]
+    assert facade.close(timeout=5)
+
+    stats = facade.get_stats()
+    assert stats["grouped_writes"] == 41 and stats["commits"] < 41 and stats["queue_full_waits"] > 0
+    assert stats["operations"]["store_conversation"]["count"] == 40
+    assert stats["operations"]["store_pattern"]["errors"] == 1
+    assert stats["operations"]["list_recent_messages"]["p99_ms"] > 0
+    with pytest.raises(RuntimeError):
+        asyncio.run(facade.astore_conversation("too", "late"))
@@ -0,0 +1,79 @@
+"""
+Unit tests for streaming exports of the persistent memory store.
+"""
+import sys
+import os
+import json
+
+import pytest
+
+# Add backend to path so we can import the export module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import persistent_export
+from persistent_export import read_ndjson
+from persistent_memory_store import PersistentMemoryStore
+
+
+def make_store(tmp_path, rows=25):
+    store = PersistentMemoryStore(str(tmp_path / "memory.db"))
+    store.json_store = str(tmp_path)
+    store.store_conversations([{"user_input": f"question {i}", "response": f"answer {i}"} for i in range(rows)])
+    store.store_pattern("greeting", {"style": "warm"})
+    return store
+
+
+def test_ndjson_export_streams_every_table_and_picks_up_changes(tmp_path):
+    store = make_store(tmp_path)
+    path = str(tmp_path / "full.ndjson.gz")
+    stats = store.export_ndjson(path, chunk_rows=10)
+    assert stats["rows"] == {"conversations": 25, "learned_patterns": 1, "user_data": 0}
+    records = list(read_ndjson(path))
+    assert [r["id"] for r in records if r["table"] == "conversations"] == list(range(1, 26))
+    assert records[-1]["pattern_key"] == "greeting"
+    assert not os.path.exists(path + ".part") and not os.path.exists(path + ".progress")
+
+    store.store_conversation("question 3", "answer 3", importance=0.9, dedupe_policy="merge")
+    store.store_conversation("something new", "reply")
+    delta = str(tmp_path / "delta.ndjson")
+    stats = store.export_ndjson(delta, incremental=True)
+    assert stats["incremental"] and stats["rows"]["conversations"] == 2
+    assert [r["user_input"] for r in read_ndjson(delta)] == ["question 3", "something new"]
+
+
+def test_interrupted_export_resumes_from_last_chunk(tmp_path, monkeypatch):
+    store = make_store(tmp_path, rows=50)
+    path = str(tmp_path / "export.ndjson.gz")
+    real_write = persistent_export._write_json
+    checkpoints = []
+
+    def crash_after_two_chunks(target, obj):
+        real_write(target, obj)
+        checkpoints.append(obj["offset"])
+        if len(checkpoints) == 2:
+            with open(path + ".part", "ab") as f:
+                f.write(b"torn chunk")   # Written after the last checkpoint
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(persistent_export, "_write_json", crash_after_two_chunks)
+    with pytest.raises(KeyboardInterrupt):
+        store.export_ndjson(path, chunk_rows=10)
+    monkeypatch.setattr(persistent_export, "_write_json", real_write)
+
+    stats = store.export_ndjson(path, chunk_rows=10, resume=True)
+    assert stats["rows"]["conversations"] == 50
+    ids = [r["id"] for r in read_ndjson(path) if r["table"] == "conversations"]
+    assert ids == list(range(1, 51))
+
+
+def test_json_export_matches_the_former_format(tmp_path):
+    store = make_store(tmp_path, rows=3)
+    conv_file, pattern_file = store.export_to_json(chunk_rows=2)
+    conversations = [store.get_conversation_by_id(i) for i in (1, 2, 3)]
+    assert open(conv_file).read() == json.dumps(conversations, indent=2)
+    patterns = json.load(open(pattern_file))
+    assert patterns[0]["key"] == "greeting" and json.loads(patterns[0]["data"]) == {"style": "warm"}
+
+    empty = PersistentMemoryStore(str(tmp_path / "empty.db"))
+    empty.json_store = str(tmp_path)
+    assert open(empty.export_to_json()[0]).read() == "[]"
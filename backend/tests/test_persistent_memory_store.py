@@ -0,0 +1,90 @@
+"""
+Unit tests for batched writes to the SQLite conversation store.
+"""
+import sys
+import os
+
+# Add backend to path so we can import the persistent store module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from persistent_memory_store import PersistentMemoryStore
+
+
+def conversation(i, importance=0.5, emotional_intensity=0.0):
+    return {"user_input": f"question {i}", "response": f"answer {i}", "emotion": "joy",
+            "importance": importance, "emotional_intensity": emotional_intensity}
+
+
+def test_batch_reports_inserted_and_skipped_rows(tmp_path):
+    store = PersistentMemoryStore(str(tmp_path / "memory.db"))
+    first = store.store_conversation("question 1", "answer 1", "joy")
+
+    results = store.store_conversations([conversation(0), conversation(1), conversation(2), conversation(0)])
+    assert [r["status"] for r in results] == ["inserted", "skipped", "inserted", "skipped"]
+    assert results[1]["id"] == first and results[0]["id"] == results[3]["id"]
+    assert store.get_conversation_count() == 3
+    assert store.get_conversation_by_id(results[2]["id"])["user_input"] == "question 2"
+    assert store.store_conversations([]) == []
+
+
+def test_batch_merge_matches_single_row_merge(tmp_path):
+    single = PersistentMemoryStore(str(tmp_path / "single.db"))
+    batch = PersistentMemoryStore(str(tmp_path / "batch.db"))
+    updates = [conversation(1, importance=0.4, emotional_intensity=0.2),
+               conversation(1, importance=0.9, emotional_intensity=0.8),
+               conversation(1, importance=0.1, emotional_intensity=0.5)]
+    for update in updates:
+        single.store_conversation(update["user_input"], update["response"], "joy", update["importance"],
+                                  update["emotional_intensity"], dedupe_policy="merge")
+    results = batch.store_conversations(updates, dedupe_policy="merge")
+
+    assert [r["status"] for r in results] == ["inserted", "merged", "merged"]
+    expected = single.get_conversation_by_id(1)
+    merged = batch.get_conversation_by_id(results[0]["id"])
+    assert merged["merged_count"] == expected["merged_count"] == 3
+    assert merged["importance"] == expected["importance"] == 0.9
+    assert abs(merged["emotional_intensity"] - expected["emotional_intensity"]) < 1e-9
+
+
+def test_search_ranks_highlights_and_follows_updates(tmp_path):
+    store = PersistentMemoryStore(str(tmp_path / "memory.db"))
+    store.store_conversations([
+        {"user_input": "I love playing guitar", "response": "Guitar and rain go well together"},
+        {"user_input": "what's the weather", "response": "Rain later", "timestamp": "2020-01-01T00:00:00+00:00"},
+        {"user_input": "tell me a story", "response": "Once upon a time"},
+    ])
+
+    results = store.search_conversations("guitar rain NEAR(")   # Query syntax is treated as plain words
+    assert [r["id"] for r in results] == [1, 2]
+    assert results[0]["score"] > results[1]["score"]
+    assert results[0]["user_input_snippet"] == "I love playing **guitar**"
+    assert [r["id"] for r in store.search_conversations("rain", since="2021-01-01")] == [1]
+
+    store.update_conversation(conv_id=1, user_input="piano lessons", response="scales every day")
+    assert store.search_conversations("guitar") == []
+    assert [r["id"] for r in store.search_conversations("piano")] == [1]
+
+
+def test_existing_database_is_searchable_after_backfill(tmp_path, monkeypatch):
+    import sqlite3
+    import persistent_memory_store
+
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE conversations (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, "
+                 "user_input TEXT, response TEXT, emotion TEXT, importance REAL)")
+    conn.executemany("INSERT INTO conversations (timestamp, user_input, response) VALUES (?, ?, ?)",
+                     [("2024-01-01", f"question {i} about coffee", f"answer {i}") for i in range(5)])
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(persistent_memory_store, "SEARCH_AUTO_BACKFILL_ROWS", 2)
+    store = PersistentMemoryStore(path)
+    assert not store.search_indexed
+    assert len(store.search_conversations("coffee")) == 5      # LIKE fallback
+    assert persistent_memory_store.main(["backfill-search", "--db", path]) == 0
+    reopened = PersistentMemoryStore(path)
+    assert reopened.search_indexed
+    assert len(reopened.search_conversations("coffee", limit=10)) == 5
+    reopened.store_conversation("fresh coffee", "brewing")
+    assert len(reopened.search_conversations("coffee", limit=10)) == 6
@@ -0,0 +1,122 @@
+"""
+Unit tests for the concurrent comprehensive context of the real-time data engine.
+"""
+import sys
+import os
+import asyncio
+import pickle
+import time
+
+# Add backend to path so we can import the real-time data module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from real_time_data_system import CacheManager, LatencyHistogram, RealTimeDataEngine
+
+
+def make_engine(monkeypatch, delays):
+    """Engine whose sources sleep for the given seconds instead of calling out"""
+    monkeypatch.delenv("OPENWEATHER_API_KEY", raising=False)
+    monkeypatch.delenv("NEWS_API_KEY", raising=False)
+    engine = RealTimeDataEngine()
+    for source in ("weather", "news"):
+        engine.configs[source].enabled = True
+    timeouts = {}
+
+    def fake(source, **fields):
+        def fetch(*args, timeout=None):
+            timeouts[source] = timeout
+            time.sleep(delays[source])
+            return {"success": True, "source": source, **fields}
+        return fetch
+
+    monkeypatch.setattr(engine, "get_current_time", fake("time", hour_24=9, is_weekend=False, day_of_week="Monday"))
+    monkeypatch.setattr(engine, "get_weather_data", fake("weather", temperature=21.0, main_weather="Clear"))
+    monkeypatch.setattr(engine, "get_system_info", fake("system_info"))
+    monkeypatch.setattr(engine, "get_news_data", fake("news"))
+    monkeypatch.setattr(engine, "get_crypto_data", fake("crypto", change_24h=1.5))
+    return engine, timeouts
+
+
+def test_sources_are_fetched_concurrently(monkeypatch):
+    delays = {"time": 0.0, "weather": 0.2, "system_info": 0.2, "news": 0.2, "crypto": 0.2}
+    engine, timeouts = make_engine(monkeypatch, delays)
+    started = time.monotonic()
+    context = engine.get_comprehensive_context(deadline_seconds=5)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.6   # Sequentially this took at least 0.8s
+    assert context["partial"] is False and context["timed_out_sources"] == []
+    for key in ("time_context", "weather_context", "system_context", "news_context", "crypto_context"):
+        assert context[key]["success"]
+    # The deadline caps each request timeout below the configured 10s
+    assert 0 < timeouts["weather"] <= 5
+    latency = context["performance_metrics"]["source_latency"]
+    assert latency["weather"]["count"] == 1 and latency["weather"]["p50_ms"] >= 100
+    engine.close()
+
+
+def test_slow_source_yields_partial_context_at_deadline(monkeypatch):
+    delays = {"time": 0.0, "weather": 0.0, "system_info": 0.0, "news": 0.0, "crypto": 1.0}
+    engine, _ = make_engine(monkeypatch, delays)
+    started = time.monotonic()
+    context = asyncio.run(engine.get_comprehensive_context_async(deadline_seconds=0.2))
+    assert time.monotonic() - started < 0.8
+
+    assert context["partial"] is True and context["timed_out_sources"] == ["crypto"]
+    assert context["crypto_context"]["timed_out"] and context["weather_context"]["success"]
+    assert "contextual_insights" in context
+    assert engine.get_metrics()["source_latency"]["crypto"]["timeouts"] == 1
+    engine.close()
+
+
+def test_latency_histogram_buckets_and_percentiles():
+    histogram = LatencyHistogram(buckets=(10, 100))
+    for seconds in (0.002, 0.004, 0.05, 0.3):
+        histogram.record(seconds)
+    histogram.record_timeout()
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"<=10ms": 2, "<=100ms": 1, ">100ms": 1}
+    assert snapshot["count"] == 4 and snapshot["timeouts"] == 1
+    assert snapshot["p50_ms"] == 10.0 and snapshot["p99_ms"] == 300.0
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_evicts_least_recently_used_and_expires_items():
+    clock = FakeClock()
+    cache = CacheManager(max_size=2, clock=clock)
+    cache.set("a", {"v": 1}, ttl=10)
+    cache.set("b", {"v": 2}, ttl=100)
+    assert cache.get("a") == {"v": 1}           # "b" is now least recently used
+    cache.set("c", {"v": 3}, ttl=100)
+    assert cache.get("b") is None and len(cache) == 2
+
+    clock.now += 11
+    assert cache.get("a") is None and cache.get("c") == {"v": 3}
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (2, 2, 1, 1)
+
+
+def test_cache_hands_out_copies_and_accounts_bytes():
+    result = {"success": True, "from_cache": False, "nested": {"temperature": 21.0}}
+    other = {"padding": "x" * 20}
+    sizes = [len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)) for value in (result, other)]
+    cache = CacheManager(max_size=10, max_bytes=sum(sizes) - 1)
+    cache.set("weather", result, ttl=60)
+    result["nested"]["temperature"] = 99.0      # The caller keeps mutating its own result
+    hit = cache.get("weather")
+    hit["from_cache"] = True
+    hit["nested"]["temperature"] = -1.0
+    assert cache.get("weather") == {"success": True, "from_cache": False, "nested": {"temperature": 21.0}}
+
+    assert cache.get_stats()["bytes"] == sizes[0]
+    cache.set("other", other, ttl=60)           # Both would exceed max_bytes: the older item goes
+    assert cache.get("weather") is None and cache.get_stats()["bytes"] == sizes[1]
+    cache.clear()
+    assert cache.get_stats()["bytes"] == 0 and len(cache) == 0
@@ -0,0 +1,122 @@
+"""
+Unit tests for the stale-while-revalidate refresher of real-time data.
+"""
+import sys
+import os
+import threading
+import time
+
+# Add backend to path so we can import the refresher module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from real_time_refresher import BackgroundRefresher
+from real_time_data_system import RealTimeDataEngine
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class SlowSource:
+    """Fake source that blocks until released, counting its fetches"""
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+        self.fail = False
+        self.release = threading.Event()
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        self.release.wait(5)
+        if self.fail:
+            return {"success": False, "error": "upstream down"}
+        return {"success": True, **self.value}
+
+
+def test_serves_last_good_value_while_a_single_refresh_is_in_flight():
+    source = SlowSource({"temperature": 21.0})
+    source.release.set()
+    refresher = BackgroundRefresher(base_backoff=0.05)
+    refresher.add_source("weather", source, interval=60)
+    refresher.start()
+    assert wait_until(lambda: refresher.get("weather")["value"] is not None)
+
+    source.release.clear()
+    source.value = {"temperature": 25.0}
+    first = refresher.refresh("weather")
+    assert refresher.refresh("weather") is first          # Single flight
+    entry = refresher.get("weather")
+    assert entry["refreshing"] and entry["value"]["temperature"] == 21.0
+    entry["value"]["temperature"] = -1                     # Copies: the stored value is untouched
+    assert refresher.get("weather")["value"]["temperature"] == 21.0
+
+    source.release.set()
+    first.result(5)
+    assert refresher.get("weather")["value"]["temperature"] == 25.0
+    stats = refresher.get_stats()
+    assert source.calls == 2 and stats["coalesced"] == 1 and stats["failures"] == 0
+    refresher.stop()
+
+
+def test_failures_keep_the_value_and_back_off_with_jitter():
+    source = SlowSource({"price_usd": 100})
+    source.release.set()
+    refresher = BackgroundRefresher(base_backoff=0.2, max_backoff=10)
+    refresher.add_source("crypto", source, interval=60)
+    refresher.start()
+    assert wait_until(lambda: refresher.get("crypto")["value"] is not None)
+
+    source.fail = True
+    refresher.refresh("crypto").result(5)
+    refresher.refresh("crypto").result(5)
+    stats = refresher.get_stats()["sources"]["crypto"]
+    assert stats["failures"] == 2 and stats["last_error"] == "upstream down"
+    assert 0.2 <= stats["next_refresh_seconds"] <= 0.4     # 0.4s doubled backoff, half of it jittered
+    assert refresher.get("crypto")["value"]["price_usd"] == 100
+
+    source.fail = False
+    assert wait_until(lambda: refresher.get_stats()["sources"]["crypto"]["failures"] == 0)
+    refresher.stop()
+
+
+def test_memory_writes_never_wait_on_a_slow_source(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("OPENWEATHER_API_KEY", raising=False)
+    monkeypatch.delenv("NEWS_API_KEY", raising=False)
+    import memory_system
+    monkeypatch.setattr(memory_system, "REAL_TIME_AVAILABLE", False)
+    system = memory_system.QuantumEnhancedMemorySystem(memory_file=str(tmp_path / "memory.json"))
+
+    engine = RealTimeDataEngine()
+    engine.configs["weather"].enabled = True
+    weather = SlowSource({"temperature": 30.0, "main_weather": "Clear"})
+    system_info = SlowSource({"cpu": {"cpu_percent": 5}})
+    monkeypatch.setattr(engine, "get_weather_data", weather)
+    monkeypatch.setattr(engine, "get_system_info", system_info)
+    crypto = SlowSource({"change_24h": 0.0})
+    monkeypatch.setattr(engine, "get_crypto_data", crypto)
+    system.real_time_engine = engine
+    system.real_time_background_refresh = True
+
+    started = time.monotonic()
+    first = system.add_episodic_memory("what is the weather like", "Let me check", "curious")
+    system.wait_for_enrichment()
+    assert time.monotonic() - started < 2                  # The sources stay blocked for 5s
+    assert wait_until(lambda: weather.calls == 1)          # Fetching in the background
+    context = system.get_memory(first)["contextual_data"]
+    assert context["time_context"] and context["weather_context"]["pending"]
+
+    for source in (weather, system_info, crypto):
+        source.release.set()
+    assert wait_until(lambda: engine.refresher.get("weather")["value"] is not None)
+    second = system.add_episodic_memory("and tomorrow?", "Probably sunny", "curious")
+    system.wait_for_enrichment()
+    context = system.get_memory(second)["contextual_data"]
+    assert context["weather_context"]["temperature"] == 30.0
+    engine.close()
@@ -0,0 +1,62 @@
+"""
+Unit tests for the LRU/TTL retrieval cache.
+"""
+import sys
+import os
+
+# Add backend to path so we can import the cache module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from retrieval_cache import RetrievalCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalized_keys_hit_and_results_are_copies():
+    cache = RetrievalCache(max_size=10)
+    cache.put(cache.make_key("Tell me about  music!", "roberto", 5, "hybrid"), [{"id": "a"}], generation=1)
+
+    hit = cache.get(cache.make_key("tell me about music", "roberto", 5, "hybrid"), generation=1)
+    assert hit == [{"id": "a"}]
+    hit[0]["id"] = "mutated"
+    assert cache.get(cache.make_key("tell me about music", "roberto", 5, "hybrid"), generation=1) == [{"id": "a"}]
+    assert cache.get(cache.make_key("tell me about music", "roberto", 5, "semantic"), generation=1) is None
+
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_generation_bump_invalidates_and_lru_evicts():
+    cache = RetrievalCache(max_size=2)
+    cache.put("a", [1], generation=1)
+    cache.put("b", [2], generation=1)
+    assert cache.get("a", generation=1) == [1]  # "b" is now least recently used
+
+    cache.put("c", [3], generation=1)
+    assert cache.get("b", generation=1) is None
+    assert cache.get("a", generation=2) is None
+
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["invalidations"] == 1
+    assert len(cache) == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = RetrievalCache(max_size=10, ttl_seconds=30, clock=clock)
+    cache.put("a", [1], generation=0)
+    cache.put("b", [2], generation=0)
+
+    clock.now = 29
+    assert cache.get("a", generation=0) == [1]
+    clock.now = 31
+    assert cache.get("a", generation=0) is None
+    assert cache.prune() == 1
+    assert cache.get_stats()["expirations"] == 2
@@ -0,0 +1,83 @@
+"""
+Unit tests for the pooled WAL connections behind PersistentMemoryStore.
+"""
+import sys
+import os
+import threading
+
+import pytest
+
+# Add backend to path so we can import the connection manager module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlite_connections import SQLiteConnectionManager
+from persistent_memory_store import PersistentMemoryStore
+
+
+def test_connections_are_per_thread_wal_and_transactions_roll_back(tmp_path):
+    manager = SQLiteConnectionManager(str(tmp_path / "store.db"), synchronous="normal")
+    conn = manager.connection()
+    assert manager.connection() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1   # NORMAL
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(manager.connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+    with manager.transaction() as tx:
+        tx.execute("CREATE TABLE items (name TEXT UNIQUE)")
+    with pytest.raises(RuntimeError):
+        with manager.transaction() as tx:
+            tx.execute("INSERT INTO items VALUES ('lost')")
+            raise RuntimeError("boom")
+    assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
+    stats = manager.get_stats()
+    assert stats["transactions"] == 1 and stats["rollbacks"] == 1
+    manager.close()
+    assert manager.get_stats()["open_connections"] == 0
+
+
+def test_concurrent_writers_and_readers_share_the_store(tmp_path):
+    store = PersistentMemoryStore(str(tmp_path / "memory.db"))
+    errors = []
+
+    def write(worker):
+        try:
+            for i in range(25):
+                store.store_conversation(f"hello {worker} {i}", f"reply {i}", "joy")
+                store.store_conversation(f"hello {worker} {i}", f"reply {i}", "joy", dedupe_policy="merge")
+                store.list_recent_conversations(limit=5)
+        except Exception as e:  # "database is locked" used to surface here
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert store.get_conversation_count() == 200
+    row = store.get_conversation_by_fingerprint(next(iter(store.fingerprint_ids())))
+    assert row["merged_count"] == 2
+    store.close()
+
+
+def test_nested_transactions_are_savepoints(tmp_path):
+    manager = SQLiteConnectionManager(str(tmp_path / "store.db"))
+    with manager.transaction() as tx:
+        tx.execute("CREATE TABLE items (name TEXT)")
+    with manager.transaction() as tx:
+        tx.execute("INSERT INTO items VALUES ('kept')")
+        with pytest.raises(ValueError):
+            with manager.transaction() as inner:
+                inner.execute("INSERT INTO items VALUES ('undone')")
+                raise ValueError
+        with manager.transaction() as inner:
+            inner.execute("INSERT INTO items VALUES ('nested')")
+    names = [row[0] for row in manager.connection().execute("SELECT name FROM items")]
+    assert names == ["kept", "nested"]
+    assert manager.get_stats()["transactions"] == 2
@@ -0,0 +1,85 @@
+"""
+Unit tests for the pluggable state file formats and their detection on load.
+"""
+import sys
+import os
+import json
+
+import pytest
+
+# Add backend to path so we can import the serializer module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import state_serializer
+from memory_journal import _json_default
+from memory_record import MemoryRecord
+from state_serializer import COMPRESSIONS, FORMATS, detect_format, dumps_state, loads_state, main, read_state, write_state
+
+
+def make_state():
+    memories = [{"id": f"m{i}", "user_input": f"question {i}", "importance": i / 10, "key_themes": ["music"],
+                 "quantum_state": {"coherence": 0.5}, "contextual_data": {}} for i in range(20)]
+    memories[3]["db_id"] = 7                          # Fields only some records have
+    memories[5]["protection_level"] = None
+    memories[8]["user_input"] = "¿qué tal? ☀"
+    return {
+        "episodic_memories": memories,
+        "user_profiles": {"Roberto Villarreal Martinez": {"interaction_count": 20}},
+        "emotional_patterns": {"Roberto Villarreal Martinez": [{"emotion": "joy"}, {"emotion": "awe", "x": 1}]},
+        "self_reflections": [],
+        "real_time_integration": False,
+    }
+
+
+def test_every_format_round_trips_and_is_detected():
+    state = make_state()
+    for format in FORMATS:
+        for compression in COMPRESSIONS:
+            data = dumps_state(state, format, compression)
+            assert loads_state(data) == state, (format, compression)
+            expected = (state_serializer._resolve(format, FORMATS, "format"),
+                        state_serializer._resolve(compression, COMPRESSIONS, "compression"))
+            assert detect_format(data) == expected
+
+    assert dumps_state(state, "json", "none") == json.dumps(state, indent=2, ensure_ascii=False).encode("utf-8")
+    assert loads_state("\ufeff[1, 2]".encode("utf-8")) == [1, 2]          # Legacy JSON, with a BOM
+    assert loads_state(dumps_state([{"a": 1}, {"a": 2, "b": None}, 3], "columnar")) == [{"a": 1}, {"a": 2, "b": None}, 3]
+    with pytest.raises(ValueError):
+        dumps_state(state, "yaml")
+
+
+def test_columnar_stores_compact_records_and_field_names_once():
+    records = [MemoryRecord({"id": f"m{i}", "emotion": "joy", "timestamp": "2025-03-01T00:00:00+00:00"})
+               for i in range(50)]
+    data = dumps_state({"episodic_memories": records}, "columnar", "none", default=_json_default)
+    assert loads_state(data) == {"episodic_memories": [dict(record) for record in records]}
+    assert data.count(b"emotion") == 1
+
+
+def test_missing_optional_packages_fall_back_and_env_sets_defaults(monkeypatch, tmp_path):
+    monkeypatch.setattr(state_serializer, "MSGPACK_AVAILABLE", False)
+    monkeypatch.setattr(state_serializer, "ZSTD_AVAILABLE", False)
+    data = dumps_state({"a": 1}, "msgpack", "zstd")
+    assert detect_format(data) == ("columnar", "zlib") and loads_state(data) == {"a": 1}
+    header = state_serializer.HEADER.pack(state_serializer.MAGIC, 1, FORMATS["msgpack"], 0)
+    with pytest.raises(RuntimeError):
+        loads_state(header + b"\x81")
+
+    monkeypatch.setenv("STATE_FILE_FORMAT", "json-compact")
+    monkeypatch.setenv("STATE_FILE_COMPRESSION", "zlib")
+    path = str(tmp_path / "emotion_state.json")
+    write_state(path, {"a": [1, 2]})
+    assert read_state(path) == {"a": [1, 2]} and not os.path.exists(f"{path}.tmp")
+    assert detect_format(open(path, "rb").read()) == ("json-compact", "zlib")
+
+
+def test_convert_command_rewrites_files(tmp_path, capsys):
+    source = tmp_path / "roboto_memory.json"
+    source.write_text(json.dumps(make_state(), indent=2), encoding="utf-8")
+    dest = str(tmp_path / "roboto_memory.bin")
+
+    assert main(["convert", str(source), dest, "--format", "columnar", "--compression", "zlib"]) == 0
+    assert read_state(dest) == make_state() and os.path.getsize(dest) < source.stat().st_size
+    assert main(["convert", dest, "--format", "json", "--compression", "none"]) == 0
+    assert json.loads(open(dest, encoding="utf-8").read()) == make_state()
+    assert main(["info", dest]) == 0 and "json, compression none" in capsys.readouterr().out